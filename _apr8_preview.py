@@ -10,7 +10,6 @@ from comprehensive_pick_logic import analyze_horse_comprehensive, should_skip_ra
 import comprehensive_pick_logic as _cpl
 from complete_daily_analysis import _expected_value, _kelly_fraction, _win_prob_pct, tier_from_score
 from betfair_odds_fetcher import get_live_betfair_races
-from datetime import datetime
 
 TARGET_DATE = "2026-04-08"
 
@@ -71,9 +70,10 @@ _GOING_SEED = {
     "Galway":          {"going": "Good to Soft",   "score": -2},
     "Cork":            {"going": "Good to Soft",   "score": -2},
 }
-_cpl._going_cache['going_data'] = _GOING_SEED
-_cpl._going_cache['timestamp'] = datetime.now()
-_cpl._weights_cache = {'weights': _cpl.DEFAULT_WEIGHTS.copy(), 'timestamp': datetime.now()}
+import going_service as _gs
+_gs.seed_going(_GOING_SEED)
+import config_snapshot as _cs
+_cs.seed_snapshot(weights=_cpl.DEFAULT_WEIGHTS.copy())
 
 # ── Thresholds matching production ────────────────────────────────────────
 SCORE_THRESHOLD     = 95
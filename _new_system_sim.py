@@ -8,7 +8,6 @@ sys.path.insert(0, os.path.dirname(__file__))
 from comprehensive_pick_logic import analyze_horse_comprehensive, should_skip_race
 import comprehensive_pick_logic as _cpl
 from complete_daily_analysis import _expected_value, _kelly_fraction, _win_prob_pct, tier_from_score
-from datetime import datetime
 from unittest.mock import patch, MagicMock
 
 # ── Pre-seed going cache to skip slow weather API calls ────────────────────
@@ -61,10 +60,11 @@ _GOING_SEED = {
     "Hereford": {"going": "Good to Firm", "score": 6},
     "Chepstow": {"going": "Good", "score": 2},
 }
-_cpl._going_cache['going_data'] = _GOING_SEED
-_cpl._going_cache['timestamp'] = datetime.now()
-# Also pre-seed weights cache so get_dynamic_weights() skips DynamoDB
-_cpl._weights_cache = {'weights': _cpl.DEFAULT_WEIGHTS.copy(), 'timestamp': datetime.now()}
+import going_service as _gs
+_gs.seed_going(_GOING_SEED)
+# Also pin default weights so get_dynamic_weights() skips DynamoDB
+import config_snapshot as _cs
+_cs.seed_snapshot(weights=_cpl.DEFAULT_WEIGHTS.copy())
 
 TARGET_DATE = "2026-04-07"
 
@@ -0,0 +1,250 @@
+"""
+api_admin.py
+============
+Admin routes — /api/admin/config, /api/admin/subscribers, /api/workflow/run
+Split out of lambda_api_picks.py — imported by the router only when one of
+these paths is hit; lambda_handler below serves the routes as a standalone function.
+"""
+
+import json
+from datetime import datetime
+from config_snapshot import reload_if_bumped, save_weights, save_config
+from api_common import subscribers_table, decimal_to_float, client, dispatch
+
+
+def trigger_workflow(headers):
+    """Trigger the betting workflow Lambda to generate new picks"""
+    lambda_client = client('lambda')
+
+    try:
+        # Invoke the workflow Lambda asynchronously
+        response = lambda_client.invoke(
+            FunctionName='betting-workflow',
+            InvocationType='Event',  # Async invocation
+            Payload=json.dumps({
+                'source': 'api-trigger',
+                'trigger': 'manual-refresh'
+            })
+        )
+        
+        return {
+            'statusCode': 202,
+            'headers': headers,
+            'body': json.dumps({
+                'success': True,
+                'message': 'Workflow triggered successfully',
+                'status': 'processing',
+                'info': 'New picks will be generated in ~60-90 seconds. Refresh picks to see updates.'
+            })
+        }
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': headers,
+            'body': json.dumps({
+                'success': False,
+                'error': str(e),
+                'message': 'Failed to trigger workflow. Make sure betting-workflow Lambda exists and API has invoke permissions.'
+            })
+        }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ADMIN API
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Default config thresholds (mirrors complete_daily_analysis.py constants)
+ADMIN_DEFAULT_CONFIG = {
+    'min_confidence':        78,
+    'min_confidence_hcap':   85,
+    'min_confidence_norace': 75,
+    'target_picks':           3,
+    'picks_gate_hour_utc':   12,   # 1pm BST = 12 UTC
+    'elite_threshold':       95,
+    'strong_threshold':      90,
+    'good_threshold':        80,
+    'fair_threshold':        65,
+    'risky_threshold':       50,
+}
+
+# Default scoring weights — mirrors comprehensive_pick_logic.py DEFAULT_WEIGHTS
+ADMIN_DEFAULT_WEIGHTS = {
+    'sweet_spot':                 12,
+    'optimal_odds':               10,
+    'recent_win':                 16,
+    'total_wins':                  8,
+    'consistency':                 6,
+    'course_bonus':               12,
+    'database_history':           15,
+    'going_suitability':          16,
+    'track_pattern_bonus':         8,
+    'trainer_reputation':         15,
+    'trainer_tier2':               8,
+    'trainer_tier3':               4,
+    'favorite_correction':         7,
+    'jockey_quality':             12,
+    'jockey_tier2':                6,
+    'weight_penalty':             10,
+    'age_bonus':                   7,
+    'distance_suitability':       18,
+    'novice_race_penalty':        15,
+    'bounce_back_bonus':           8,
+    'short_form_improvement':      8,
+    'aw_low_class_penalty':       50,
+    'heavy_going_penalty':        12,
+    'cd_bonus':                   18,
+    'graded_race_cd_bonus':        8,
+    'official_rating_bonus':       8,
+    'jockey_course_bonus':         8,
+    'relative_weight_bonus':       8,
+    'meeting_focus_trainer':      10,
+    'meeting_focus_jockey':       10,
+    'meeting_focus_combo':        10,
+    'new_trainer_debut':           5,
+    'form_exact_course_win':      20,
+    'form_exact_distance_win':    20,
+    'form_going_win':             16,
+    'form_going_place':            6,
+    'form_fresh_optimal':         10,
+    'form_close_2nd':             14,
+    'form_or_rising':             10,
+    'form_big_field_win':          8,
+    'unexposed_bonus':            12,
+    'aw_evening_penalty':         12,
+    'unknown_trainer_penalty':     8,
+    'large_field_penalty':        10,
+    'class_drop_bonus':           12,
+    'same_trainer_rival_penalty': 10,
+    'irish_handicap_penalty':     10,
+}
+
+
+def _check_admin_token(event):
+    """Validate X-Admin-Token header. Returns user_email if valid, else None."""
+    req_headers = event.get('headers') or {}
+    token = req_headers.get('x-admin-token') or req_headers.get('X-Admin-Token') or ''
+    if not token:
+        return None
+    try:
+        item = subscribers_table.get_item(Key={'email': f'__session__{token}'}).get('Item')
+        if not item:
+            return None
+        expires = item.get('expires_at', '')
+        if expires and datetime.utcnow() > datetime.fromisoformat(expires.replace('Z', '')):
+            return None
+        return item.get('user_email')
+    except Exception as e:
+        print(f'_check_admin_token error: {e}')
+        return None
+
+
+def admin_get_config(headers, event):
+    """GET /api/admin/config — returns current weights + thresholds."""
+    user_email = _check_admin_token(event)
+    if not user_email:
+        return {'statusCode': 403, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Forbidden'})}
+
+    try:
+        # Current scoring weights + thresholds (re-read only if a version was bumped)
+        snap = reload_if_bumped()
+        current_weights = dict(snap['weights']) or ADMIN_DEFAULT_WEIGHTS.copy()
+        current_config  = dict(snap['config']) or ADMIN_DEFAULT_CONFIG.copy()
+
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps({
+                'success':          True,
+                'weights':          current_weights,
+                'config':           current_config,
+                'default_weights':  ADMIN_DEFAULT_WEIGHTS,
+                'default_config':   ADMIN_DEFAULT_CONFIG,
+                'weights_saved_at': snap['weights_updated_at'],
+                'config_saved_at':  snap['config_updated_at'],
+                'weights_version':  snap['version'],
+                'config_version':   snap['config_version'],
+                'tiers':            snap['tiers'],
+            })
+        }
+    except Exception as e:
+        print(f'admin_get_config error: {e}')
+        return {'statusCode': 500, 'headers': headers, 'body': json.dumps({'success': False, 'error': str(e)})}
+
+
+def admin_save_config(headers, event):
+    """POST /api/admin/config — saves weights and/or thresholds to DynamoDB."""
+    user_email = _check_admin_token(event)
+    if not user_email:
+        return {'statusCode': 403, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Forbidden'})}
+
+    try:
+        data = json.loads(event.get('body') or '{}')
+        weights = data.get('weights')
+        config  = data.get('config')
+        now_iso = datetime.utcnow().isoformat() + 'Z'
+        saved_versions = {}
+
+        if weights:
+            # Validate all values are numbers
+            for k, v in weights.items():
+                try:
+                    float(v)
+                except (TypeError, ValueError):
+                    return {'statusCode': 400, 'headers': headers,
+                            'body': json.dumps({'success': False, 'error': f'Invalid value for weight "{k}": {v}'})}
+            saved_versions['weights'] = save_weights(weights, 'admin', updated_by=user_email)
+
+        if config:
+            for k, v in config.items():
+                try:
+                    float(v)
+                except (TypeError, ValueError):
+                    return {'statusCode': 400, 'headers': headers,
+                            'body': json.dumps({'success': False, 'error': f'Invalid value for config "{k}": {v}'})}
+            saved_versions['config'] = save_config(config, 'admin', tiers=data.get('tiers'), updated_by=user_email)
+
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps({'success': True, 'message': 'Configuration saved successfully', 'saved_by': user_email, 'saved_at': now_iso, 'versions': saved_versions})
+        }
+    except Exception as e:
+        print(f'admin_save_config error: {e}')
+        return {'statusCode': 500, 'headers': headers, 'body': json.dumps({'success': False, 'error': str(e)})}
+
+
+def admin_get_subscribers(headers, event):
+    """GET /api/admin/subscribers — returns all subscriber records."""
+    user_email = _check_admin_token(event)
+    if not user_email:
+        return {'statusCode': 403, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Forbidden'})}
+
+    try:
+        resp = subscribers_table.scan()
+        items = resp.get('Items', [])
+        # Filter out internal session records
+        users = [
+            {k: v for k, v in i.items() if k != 'password_hash'}
+            for i in items
+            if not str(i.get('email', '')).startswith('__session__')
+        ]
+        # Split into real accounts (email key) vs username shadow rows
+        email_rows    = [u for u in users if '@' in str(u.get('email', '')) and not str(u.get('email', '')).startswith('u#')]
+        username_rows = [u for u in users if str(u.get('email', '')).startswith('u#')]
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps({
+                'success':  True,
+                'total':    len(email_rows),
+                'users':    decimal_to_float(sorted(email_rows, key=lambda x: x.get('joined_at', ''))),
+            }, default=str)
+        }
+    except Exception as e:
+        print(f'admin_get_subscribers error: {e}')
+        return {'statusCode': 500, 'headers': headers, 'body': json.dumps({'success': False, 'error': str(e)})}
+
+
+def lambda_handler(event, context):
+    """Standalone entry point — serves only this module's routes."""
+    return dispatch(event, context, only=__name__)
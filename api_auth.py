@@ -0,0 +1,399 @@
+"""
+api_auth.py
+===========
+Subscriber auth routes — register, login, verify-email, forgot/reset password
+Split out of lambda_api_picks.py — imported by the router only when one of
+these paths is hit; lambda_handler below serves the routes as a standalone function.
+"""
+
+import json
+import os
+import re
+import secrets
+import hashlib
+import base64
+from datetime import datetime, timedelta
+from decimal import Decimal
+from api_common import subscribers_table, SENDER_EMAIL, SITE_URL, ses, dispatch
+
+
+def _hash_password(password: str) -> str:
+    """PBKDF2-HMAC-SHA256, 32-byte random salt, 200k iterations."""
+    salt = os.urandom(32)
+    key  = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, 200_000)
+    return base64.b64encode(salt + key).decode('utf-8')
+
+
+def register_subscriber(headers, event):
+    """Register a new subscriber. POST /api/register"""
+    try:
+        body = event.get('body') or '{}'
+        if isinstance(body, str):
+            data = json.loads(body)
+        else:
+            data = body
+
+        full_name = (data.get('full_name') or '').strip()
+        email     = (data.get('email') or '').strip().lower()
+        address   = (data.get('address') or '').strip()
+        age       = data.get('age')
+        username  = (data.get('username') or '').strip().lower()
+        password  = data.get('password') or ''
+
+        if not full_name or len(full_name) < 3:
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Full name is required.'})}
+
+        email_re = re.compile(r'^[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}$')
+        if not email_re.match(email):
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'A valid email address is required (e.g. jane@example.com).'})}
+        if '..' in email:
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Email address contains invalid consecutive dots.'})}
+        email_domain = email.split('@')[1] if '@' in email else ''
+        email_local  = email.split('@')[0] if '@' in email else ''
+        if len(email_domain.split('.')[-1]) < 2:
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Email domain extension looks invalid.'})}
+        if re.match(r'^(test|asdf|qwerty|aaaaa|zzzzz|abcde|12345|noreply|fake|spam|none|null|xxx)', email_local):
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Please use a real email address.'})}
+        _fake_domains = {'test.com','fake.com','example.com','mailinator.com','guerrillamail.com',
+                         'throwam.com','trashmail.com','yopmail.com','sharklasers.com'}
+        if email_domain in _fake_domains:
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Disposable or test email addresses are not accepted.'})}
+
+        if len(address) < 10:
+            pass  # Address is optional — no longer required for registration
+        addr_words = [w for w in address.split() if len(w) > 1]
+        if len(addr_words) < 3:
+            pass  # Address is optional
+        addr_clean = address.replace(' ', '')
+        if addr_clean:
+            pass  # Address is optional
+        if re.match(r'^(asdf|qwerty|zxcv|abcd|1234|test|fake|none|null|xxx)', address, re.IGNORECASE):
+            pass  # Address is optional
+        try:
+            age = int(age)
+            if age < 18 or age > 120:
+                raise ValueError
+        except (TypeError, ValueError):
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'You must be 18 or over to register.'})}
+        if not re.match(r'^[a-zA-Z0-9_]{3,30}$', username):
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Username must be 3-30 characters (letters, numbers, underscores).'})}
+        if len(password) < 8:
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Password must be at least 8 characters.'})}
+
+        # Check email uniqueness
+        if subscribers_table.get_item(Key={'email': email}).get('Item'):
+            return {'statusCode': 409, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'An account with this email already exists.'})}
+        # Check username uniqueness
+        if subscribers_table.get_item(Key={'email': f'u#{username}'}).get('Item'):
+            return {'statusCode': 409, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'That username is already taken.'})}
+
+        pw_hash   = _hash_password(password)
+        joined_at = datetime.utcnow().isoformat() + 'Z'
+        subscribers_table.put_item(Item={
+            'email': email, 'full_name': full_name, 'address': address,
+            'age': Decimal(str(age)), 'username': username,
+            'password_hash': pw_hash, 'joined_at': joined_at, 'active': True,
+        })
+        subscribers_table.put_item(Item={
+            'email': f'u#{username}', 'username': username,
+            'ref_email': email, 'joined_at': joined_at,
+        })
+
+        # Mark verified immediately; attempt to send welcome email (non-blocking)
+        subscribers_table.update_item(
+            Key={'email': email},
+            UpdateExpression='SET email_verified = :v',
+            ExpressionAttributeValues={':v': True},
+        )
+        try:
+            token = secrets.token_urlsafe(32)
+            _send_verification_email(email, full_name, token)
+        except Exception as mail_err:
+            print(f'Welcome email failed (non-fatal): {mail_err}')
+
+        return {'statusCode': 200, 'headers': headers, 'body': json.dumps({'success': True, 'message': 'Registration successful. Welcome to BetBudAI!'})}
+    except Exception as e:
+        print(f'register_subscriber error: {e}')
+        return {'statusCode': 500, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Registration failed. Please try again.'})}
+
+
+def _verify_password(password: str, stored: str) -> bool:
+    """Verify a password against a PBKDF2 hash created by _hash_password()."""
+    try:
+        raw        = base64.b64decode(stored.encode('utf-8'))
+        salt       = raw[:32]
+        stored_key = raw[32:]
+        key        = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, 200_000)
+        return key == stored_key
+    except Exception:
+        return False
+
+
+def _send_verification_email(email: str, full_name: str, token: str):
+    """Send an account verification email via SES."""
+    verify_url = f'{SITE_URL}/?verify={token}'
+    first_name = full_name.split()[0] if full_name else 'there'
+    html = f"""<!DOCTYPE html><html><body style="font-family:Arial,sans-serif;background:#0f172a;color:white;padding:40px;">
+<div style="max-width:560px;margin:0 auto;background:#1e293b;border-radius:16px;padding:40px;">
+  <h1 style="color:#34d399;margin:0 0 8px;">BetBudAI</h1>
+  <p style="color:rgba(255,255,255,0.5);margin:0 0 32px;font-size:13px;">AI-powered horse racing picks</p>
+  <h2 style="color:white;font-size:22px;margin:0 0 16px;">Hi {first_name}, verify your email</h2>
+  <p style="color:rgba(255,255,255,0.7);line-height:1.6;">Thanks for registering with BetBudAI. Click the button below to verify your email address and activate your account.</p>
+  <a href="{verify_url}" style="display:inline-block;margin:24px 0;padding:14px 32px;background:linear-gradient(135deg,#059669,#047857);color:white;text-decoration:none;border-radius:10px;font-weight:700;font-size:16px;">✓ Verify My Email</a>
+  <p style="color:rgba(255,255,255,0.4);font-size:12px;">This link expires in 24 hours. If you didn't create an account, you can ignore this email.</p>
+  <hr style="border:none;border-top:1px solid rgba(255,255,255,0.1);margin:24px 0;"/>
+  <p style="color:rgba(255,255,255,0.3);font-size:11px;">BetBudAI &middot; <a href="{SITE_URL}" style="color:#34d399;">{SITE_URL}</a></p>
+</div></body></html>"""
+    ses().send_email(
+        Source=f'BetBudAI <{SENDER_EMAIL}>',
+        Destination={'ToAddresses': [email]},
+        Message={
+            'Subject': {'Data': 'Verify your BetBudAI account', 'Charset': 'UTF-8'},
+            'Body': {
+                'Html': {'Data': html, 'Charset': 'UTF-8'},
+                'Text': {'Data': f'Hi {first_name},\n\nVerify your BetBudAI account by visiting:\n{verify_url}\n\nThis link expires in 24 hours.', 'Charset': 'UTF-8'},
+            },
+        },
+    )
+
+
+# ── Forgot / Reset password ─────────────────────────────────────────────────
+SUPPORT_EMAIL = 'directorai@futuregenai.com'
+
+def forgot_password(headers, event):
+    """POST /api/forgot-password — send a password reset link via email."""
+    try:
+        body = json.loads(event.get('body') or '{}')
+        email = (body.get('email') or '').strip().lower()
+
+        if not email or '@' not in email:
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Please provide a valid email address.'})}
+
+        # Always return success to prevent email enumeration
+        item = subscribers_table.get_item(Key={'email': email}).get('Item')
+        if not item:
+            print(f'forgot_password: no account for {email} — returning success anyway')
+            return {'statusCode': 200, 'headers': headers, 'body': json.dumps({'success': True})}
+
+        # Generate reset token (URL-safe, 48 bytes = 64 chars)
+        token = secrets.token_urlsafe(48)
+        expires = (datetime.utcnow() + timedelta(hours=1)).isoformat() + 'Z'
+
+        # Store token reservation in subscribers table
+        subscribers_table.put_item(Item={
+            'email': f'rst#{token}',
+            'ref_email': email,
+            'expires_at': expires,
+            'created_at': datetime.utcnow().isoformat() + 'Z',
+        })
+
+        # Send reset email
+        reset_url = f'{SITE_URL}/?reset={token}'
+        first_name = (item.get('full_name') or '').split()[0] or 'there'
+        username = item.get('username', '')
+        html = f"""<!DOCTYPE html><html><body style="font-family:Arial,sans-serif;background:#0f172a;color:white;padding:40px;">
+<div style="max-width:560px;margin:0 auto;background:#1e293b;border-radius:16px;padding:40px;">
+  <h1 style="color:#34d399;margin:0 0 8px;">BetBudAI</h1>
+  <p style="color:rgba(255,255,255,0.5);margin:0 0 32px;font-size:13px;">AI-powered horse racing picks</p>
+  <h2 style="color:white;font-size:22px;margin:0 0 16px;">Hi {first_name}, reset your password</h2>
+  <p style="color:rgba(255,255,255,0.7);line-height:1.6;">We received a request to reset the password for your BetBudAI account{f' (username: <strong>{username}</strong>)' if username else ''}.</p>
+  <p style="color:rgba(255,255,255,0.7);line-height:1.6;">Click the button below to set a new password:</p>
+  <a href="{reset_url}" style="display:inline-block;margin:24px 0;padding:14px 32px;background:linear-gradient(135deg,#059669,#047857);color:white;text-decoration:none;border-radius:10px;font-weight:700;font-size:16px;">🔑 Reset My Password</a>
+  <p style="color:rgba(255,255,255,0.4);font-size:12px;">This link expires in 1 hour. If you didn't request a password reset, you can safely ignore this email.</p>
+  <hr style="border:none;border-top:1px solid rgba(255,255,255,0.1);margin:24px 0;"/>
+  <p style="color:rgba(255,255,255,0.3);font-size:11px;">Need help? Contact us at <a href="mailto:{SUPPORT_EMAIL}" style="color:#34d399;">{SUPPORT_EMAIL}</a></p>
+  <p style="color:rgba(255,255,255,0.3);font-size:11px;">BetBudAI &middot; <a href="{SITE_URL}" style="color:#34d399;">{SITE_URL}</a></p>
+</div></body></html>"""
+        text = f'Hi {first_name},\n\nReset your BetBudAI password by visiting:\n{reset_url}\n\nThis link expires in 1 hour.\n\nIf you didn\'t request this, ignore this email.\n\nNeed help? Contact {SUPPORT_EMAIL}'
+        ses().send_email(
+            Source=f'BetBudAI <{SENDER_EMAIL}>',
+            ReplyToAddresses=[SUPPORT_EMAIL],
+            Destination={'ToAddresses': [email]},
+            Message={
+                'Subject': {'Data': 'Reset your BetBudAI password', 'Charset': 'UTF-8'},
+                'Body': {
+                    'Html': {'Data': html, 'Charset': 'UTF-8'},
+                    'Text': {'Data': text, 'Charset': 'UTF-8'},
+                },
+            },
+        )
+        print(f'forgot_password: reset email sent to {email}')
+        return {'statusCode': 200, 'headers': headers, 'body': json.dumps({'success': True})}
+    except Exception as e:
+        print(f'forgot_password error: {e}')
+        return {'statusCode': 500, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Something went wrong. Please try again later.'})}
+
+
+def reset_password(headers, event):
+    """POST /api/reset-password — validate token and set new password."""
+    try:
+        body = json.loads(event.get('body') or '{}')
+        token = (body.get('token') or '').strip()
+        password = body.get('password') or ''
+
+        if not token:
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Reset token is missing.'})}
+        if not password or len(password) < 8:
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Password must be at least 8 characters.'})}
+
+        # Look up token reservation
+        reservation = subscribers_table.get_item(Key={'email': f'rst#{token}'}).get('Item')
+        if not reservation:
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Invalid or expired reset link. Please request a new one.'})}
+
+        # Check expiry
+        expires_at = reservation.get('expires_at', '')
+        if expires_at and datetime.utcnow().isoformat() + 'Z' > expires_at:
+            # Clean up expired token
+            try: subscribers_table.delete_item(Key={'email': f'rst#{token}'})
+            except: pass
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Reset link has expired. Please request a new one.'})}
+
+        ref_email = reservation['ref_email']
+
+        # Verify the user still exists
+        user = subscribers_table.get_item(Key={'email': ref_email}).get('Item')
+        if not user:
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Account not found. Please contact support.'})}
+
+        # Update password
+        new_hash = _hash_password(password)
+        subscribers_table.update_item(
+            Key={'email': ref_email},
+            UpdateExpression='SET password_hash = :ph, password_reset_at = :now',
+            ExpressionAttributeValues={
+                ':ph': new_hash,
+                ':now': datetime.utcnow().isoformat() + 'Z',
+            }
+        )
+
+        # Delete the used token
+        try: subscribers_table.delete_item(Key={'email': f'rst#{token}'})
+        except: pass
+
+        print(f'reset_password: password updated for {ref_email}')
+        return {'statusCode': 200, 'headers': headers, 'body': json.dumps({'success': True})}
+    except Exception as e:
+        print(f'reset_password error: {e}')
+        return {'statusCode': 500, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Something went wrong. Please try again later.'})}
+
+
+def verify_email_token(headers, event):
+    """GET /api/verify-email?token=xxx — mark account as verified."""
+    try:
+        qs = event.get('queryStringParameters') or {}
+        token = (qs.get('token') or '').strip()
+        if not token:
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Verification token is missing.'})}
+
+        # Look up token reservation
+        reservation = subscribers_table.get_item(Key={'email': f'vt#{token}'}).get('Item')
+        if not reservation:
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Invalid or expired verification link. Please register again or contact support.'})}
+
+        # Check expiry
+        expires_at = reservation.get('expires_at', '')
+        if expires_at and datetime.utcnow().isoformat() + 'Z' > expires_at:
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Verification link has expired. Please register again.'})}
+
+        ref_email = reservation['ref_email']
+
+        # Mark account verified
+        subscribers_table.update_item(
+            Key={'email': ref_email},
+            UpdateExpression='SET email_verified = :v REMOVE verify_token, token_expires',
+            ExpressionAttributeValues={':v': True},
+        )
+        # Delete token reservation
+        subscribers_table.delete_item(Key={'email': f'vt#{token}'})
+
+        # Return user info so frontend can log them in immediately
+        item = subscribers_table.get_item(Key={'email': ref_email}).get('Item', {})
+        return {'statusCode': 200, 'headers': headers, 'body': json.dumps({
+            'success': True,
+            'message': 'Email verified! Welcome to BetBudAI.',
+            'user': {'email': ref_email, 'username': item.get('username', ''), 'full_name': item.get('full_name', '')},
+        })}
+    except Exception as e:
+        print(f'verify_email_token error: {e}')
+        return {'statusCode': 500, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Verification failed. Please try again.'})}
+
+
+def login_subscriber(headers, event):
+    """Authenticate a subscriber. Accepts email or username + password."""
+    try:
+        body = json.loads(event.get('body') or '{}')
+        identifier = (body.get('email') or '').strip().lower()
+        password   = body.get('password') or ''
+
+        if not identifier or not password:
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Email/username and password are required.'})}
+
+        # Resolve username → email if no '@'
+        if '@' not in identifier:
+            reservation = subscribers_table.get_item(Key={'email': f'u#{identifier}'}).get('Item')
+            if not reservation:
+                return {'statusCode': 401, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Invalid email/username or password.'})}
+            identifier = reservation['ref_email']
+
+        item = subscribers_table.get_item(Key={'email': identifier}).get('Item')
+        if not item or not _verify_password(password, item.get('password_hash', '')):
+            return {'statusCode': 401, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Invalid email/username or password.'})}
+
+        # Track login activity
+        try:
+            source_ip = (event.get('requestContext', {}).get('identity', {}).get('sourceIp')
+                         or event.get('headers', {}).get('X-Forwarded-For', '').split(',')[0].strip()
+                         or 'unknown')
+            subscribers_table.update_item(
+                Key={'email': identifier},
+                UpdateExpression='SET last_login = :now, last_ip = :ip ADD login_count :one',
+                ExpressionAttributeValues={
+                    ':now': datetime.utcnow().isoformat() + 'Z',
+                    ':ip':  source_ip,
+                    ':one': 1,
+                }
+            )
+        except Exception as track_err:
+            print(f'login tracking error: {track_err}')
+
+        role = item.get('role', 'free')
+        subscription_tier = item.get('subscription_tier', 'free')
+        # If user has an active paid subscription, reflect that in role
+        if subscription_tier in ('premium', 'vip') and item.get('subscription_status') == 'active':
+            role = subscription_tier
+        user_payload = {
+            'email':     identifier,
+            'username':  item.get('username', ''),
+            'full_name': item.get('full_name', ''),
+            'role':      role,
+            'subscription_tier': subscription_tier,
+            'subscription_status': item.get('subscription_status', ''),
+        }
+
+        # Generate admin session token if user is admin
+        admin_token = None
+        if role == 'admin':
+            admin_token = secrets.token_hex(32)
+            # Store session (24h TTL)
+            expires = (datetime.utcnow() + timedelta(hours=24)).isoformat() + 'Z'
+            subscribers_table.put_item(Item={
+                'email':      f'__session__{admin_token}',
+                'user_email': identifier,
+                'expires_at': expires,
+                'created_at': datetime.utcnow().isoformat() + 'Z',
+            })
+            user_payload['admin_token'] = admin_token
+
+        return {'statusCode': 200, 'headers': headers, 'body': json.dumps({
+            'success': True,
+            'user': user_payload,
+        })}
+    except Exception as e:
+        print(f'login_subscriber error: {e}')
+        return {'statusCode': 500, 'headers': headers, 'body': json.dumps({'success': False, 'error': 'Login failed. Please try again.'})}
+
+
+def lambda_handler(event, context):
+    """Standalone entry point — serves only this module's routes."""
+    return dispatch(event, context, only=__name__)
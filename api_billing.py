@@ -0,0 +1,352 @@
+"""
+api_billing.py
+==============
+Stripe billing routes — checkout, webhook, customer portal, subscription status
+Split out of lambda_api_picks.py — imported by the router only when one of
+these paths is hit; lambda_handler below serves the routes as a standalone function.
+"""
+
+import json
+import os
+from api_common import subscribers_table, SITE_URL, dispatch
+
+
+# ── Stripe configuration ────────────────────────────────────────────────────
+# Imported lazily by the payment routes: the stripe SDK is the heaviest import
+# in this module and hot read paths (/api/picks/today) never touch it.
+_stripe = None
+STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET', '')
+STRIPE_PRICE_PREMIUM = os.environ.get('STRIPE_PRICE_PREMIUM', '')   # price_xxx for €19.99/mo
+STRIPE_PRICE_VIP     = os.environ.get('STRIPE_PRICE_VIP', '')       # price_xxx for €99/mo
+
+def _load_stripe():
+    """Import + configure Stripe on first use. None if the Stripe layer isn't deployed."""
+    global _stripe
+    if _stripe is None:
+        try:
+            import stripe as _stripe_mod
+        except ImportError:
+            return None  # Stripe layer not yet deployed; payment routes will fail gracefully
+        _stripe_mod.api_key = os.environ.get('STRIPE_SECRET_KEY', '')
+        _stripe = _stripe_mod
+    return _stripe
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# STRIPE PAYMENT HANDLERS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def create_checkout_session(headers, event):
+    """Create a Stripe Checkout session for Premium (€19.99/mo) or VIP (€99/mo).
+    POST /api/create-checkout-session  { "email": "...", "tier": "premium"|"vip" }
+    """
+    stripe = _load_stripe()
+    try:
+        if not stripe or 'NOT_CONFIGURED' in (os.environ.get('STRIPE_SECRET_KEY') or ''):
+            return {'statusCode': 503, 'headers': headers,
+                    'body': json.dumps({'error': 'Payments coming soon! Stripe is not yet configured.'})}
+
+        body = json.loads(event.get('body') or '{}')
+        email = (body.get('email') or '').strip().lower()
+        tier  = (body.get('tier') or '').strip().lower()
+
+        if not email or tier not in ('premium', 'vip'):
+            return {'statusCode': 400, 'headers': headers,
+                    'body': json.dumps({'error': 'email and tier (premium/vip) required'})}
+
+        # Look up subscriber
+        sub = subscribers_table.get_item(Key={'email': email}).get('Item')
+        if not sub:
+            return {'statusCode': 404, 'headers': headers,
+                    'body': json.dumps({'error': 'User not found'})}
+
+        price_id = STRIPE_PRICE_PREMIUM if tier == 'premium' else STRIPE_PRICE_VIP
+
+        # Reuse or create Stripe customer
+        stripe_customer_id = sub.get('stripe_customer_id')
+        if not stripe_customer_id:
+            customer = stripe.Customer.create(
+                email=email,
+                name=sub.get('full_name', ''),
+                metadata={'betbudai_email': email}
+            )
+            stripe_customer_id = customer.id
+            subscribers_table.update_item(
+                Key={'email': email},
+                UpdateExpression='SET stripe_customer_id = :cid',
+                ExpressionAttributeValues={':cid': stripe_customer_id}
+            )
+
+        # Create Checkout Session
+        session = stripe.checkout.Session.create(
+            customer=stripe_customer_id,
+            mode='subscription',
+            line_items=[{'price': price_id, 'quantity': 1}],
+            success_url=f'{SITE_URL}?payment=success&tier={tier}',
+            cancel_url=f'{SITE_URL}?payment=cancelled',
+            metadata={'betbudai_email': email, 'tier': tier},
+            subscription_data={'metadata': {'betbudai_email': email, 'tier': tier}},
+        )
+
+        return {'statusCode': 200, 'headers': headers,
+                'body': json.dumps({'url': session.url, 'session_id': session.id})}
+
+    except stripe.error.StripeError as e:
+        print(f'Stripe error in create_checkout_session: {e}')
+        return {'statusCode': 500, 'headers': headers,
+                'body': json.dumps({'error': str(e)})}
+    except Exception as e:
+        print(f'create_checkout_session error: {e}')
+        import traceback; traceback.print_exc()
+        return {'statusCode': 500, 'headers': headers,
+                'body': json.dumps({'error': 'Failed to create checkout session'})}
+
+
+def handle_stripe_webhook(headers, event):
+    """Handle Stripe webhook events — subscription lifecycle.
+    POST /api/stripe-webhook
+    """
+    stripe = _load_stripe()
+    try:
+        payload = event.get('body', '')
+        sig_header = (event.get('headers') or {}).get('Stripe-Signature') or \
+                     (event.get('headers') or {}).get('stripe-signature', '')
+
+        # Verify webhook signature
+        try:
+            webhook_event = stripe.Webhook.construct_event(
+                payload, sig_header, STRIPE_WEBHOOK_SECRET
+            )
+        except ValueError:
+            return {'statusCode': 400, 'headers': headers, 'body': 'Invalid payload'}
+        except stripe.error.SignatureVerificationError:
+            return {'statusCode': 400, 'headers': headers, 'body': 'Invalid signature'}
+
+        event_type = webhook_event['type']
+        data = webhook_event['data']['object']
+        print(f'Stripe webhook: {event_type}')
+
+        if event_type == 'checkout.session.completed':
+            _handle_checkout_completed(data)
+
+        elif event_type in ('customer.subscription.updated', 'customer.subscription.created'):
+            _handle_subscription_updated(data)
+
+        elif event_type == 'customer.subscription.deleted':
+            _handle_subscription_deleted(data)
+
+        elif event_type == 'invoice.payment_failed':
+            _handle_payment_failed(data)
+
+        return {'statusCode': 200, 'headers': headers,
+                'body': json.dumps({'received': True})}
+
+    except Exception as e:
+        print(f'stripe webhook error: {e}')
+        import traceback; traceback.print_exc()
+        return {'statusCode': 500, 'headers': headers,
+                'body': json.dumps({'error': str(e)})}
+
+
+def _find_email_from_stripe(data):
+    """Extract betbudai_email from Stripe object metadata or customer."""
+    email = (data.get('metadata') or {}).get('betbudai_email')
+    if email:
+        return email
+    # Fallback: look up customer
+    customer_id = data.get('customer')
+    if customer_id:
+        from boto3.dynamodb.conditions import Attr
+        resp = subscribers_table.scan(
+            FilterExpression=Attr('stripe_customer_id').eq(customer_id),
+            ProjectionExpression='email'
+        )
+        if resp.get('Items'):
+            return resp['Items'][0]['email']
+    return None
+
+
+def _handle_checkout_completed(session):
+    """After successful Checkout, activate subscription."""
+    email = (session.get('metadata') or {}).get('betbudai_email')
+    tier  = (session.get('metadata') or {}).get('tier', 'premium')
+    subscription_id = session.get('subscription')
+
+    if not email:
+        print('checkout.session.completed: no betbudai_email in metadata')
+        return
+
+    update_expr = 'SET subscription_tier = :tier, subscription_status = :status'
+    expr_vals = {':tier': tier, ':status': 'active'}
+
+    if subscription_id:
+        update_expr += ', stripe_subscription_id = :sid'
+        expr_vals[':sid'] = subscription_id
+
+    subscribers_table.update_item(
+        Key={'email': email},
+        UpdateExpression=update_expr,
+        ExpressionAttributeValues=expr_vals
+    )
+    print(f'Activated {tier} for {email}')
+
+
+def _handle_subscription_updated(subscription):
+    """Handle subscription status changes (renewals, payment method updates, etc.)."""
+    email = _find_email_from_stripe(subscription)
+    if not email:
+        print(f'subscription.updated: cannot find user for sub {subscription["id"]}')
+        return
+
+    status = subscription.get('status', 'active')
+    tier = (subscription.get('metadata') or {}).get('tier', 'premium')
+
+    subscribers_table.update_item(
+        Key={'email': email},
+        UpdateExpression='SET subscription_status = :s, subscription_tier = :t, stripe_subscription_id = :sid, subscription_current_period_end = :end',
+        ExpressionAttributeValues={
+            ':s': status,
+            ':t': tier,
+            ':sid': subscription['id'],
+            ':end': subscription.get('current_period_end', 0),
+        }
+    )
+    print(f'Subscription updated: {email} → {tier}/{status}')
+
+
+def _handle_subscription_deleted(subscription):
+    """Handle subscription cancellation — downgrade to free."""
+    email = _find_email_from_stripe(subscription)
+    if not email:
+        print(f'subscription.deleted: cannot find user for sub {subscription["id"]}')
+        return
+
+    subscribers_table.update_item(
+        Key={'email': email},
+        UpdateExpression='SET subscription_tier = :t, subscription_status = :s',
+        ExpressionAttributeValues={':t': 'free', ':s': 'canceled'}
+    )
+    print(f'Subscription canceled: {email} → free')
+
+
+def _handle_payment_failed(invoice):
+    """Mark subscription as past_due on payment failure."""
+    subscription_id = invoice.get('subscription')
+    if not subscription_id:
+        return
+    # Find user by subscription ID
+    from boto3.dynamodb.conditions import Attr
+    resp = subscribers_table.scan(
+        FilterExpression=Attr('stripe_subscription_id').eq(subscription_id),
+        ProjectionExpression='email'
+    )
+    if resp.get('Items'):
+        email = resp['Items'][0]['email']
+        subscribers_table.update_item(
+            Key={'email': email},
+            UpdateExpression='SET subscription_status = :s',
+            ExpressionAttributeValues={':s': 'past_due'}
+        )
+        print(f'Payment failed: {email} → past_due')
+
+
+def get_subscription_status(headers, event):
+    """Get current subscription status for a user.
+    POST /api/subscription-status  { "email": "..." }
+    """
+    try:
+        body = json.loads(event.get('body') or '{}')
+        email = (body.get('email') or '').strip().lower()
+        if not email:
+            return {'statusCode': 400, 'headers': headers,
+                    'body': json.dumps({'error': 'email required'})}
+
+        sub = subscribers_table.get_item(Key={'email': email}).get('Item')
+        if not sub:
+            return {'statusCode': 404, 'headers': headers,
+                    'body': json.dumps({'error': 'User not found'})}
+
+        return {'statusCode': 200, 'headers': headers, 'body': json.dumps({
+            'subscription_tier': sub.get('subscription_tier', 'free'),
+            'subscription_status': sub.get('subscription_status', ''),
+            'subscription_current_period_end': int(sub.get('subscription_current_period_end', 0)),
+        })}
+    except Exception as e:
+        print(f'get_subscription_status error: {e}')
+        return {'statusCode': 500, 'headers': headers,
+                'body': json.dumps({'error': 'Failed to get subscription status'})}
+
+
+def create_customer_portal(headers, event):
+    """Create a Stripe Customer Portal session for managing subscription.
+    POST /api/customer-portal  { "email": "..." }
+    """
+    stripe = _load_stripe()
+    try:
+        if not stripe or 'NOT_CONFIGURED' in (os.environ.get('STRIPE_SECRET_KEY') or ''):
+            return {'statusCode': 503, 'headers': headers,
+                    'body': json.dumps({'error': 'Payments coming soon! Stripe is not yet configured.'})}
+
+        body = json.loads(event.get('body') or '{}')
+        email = (body.get('email') or '').strip().lower()
+        if not email:
+            return {'statusCode': 400, 'headers': headers,
+                    'body': json.dumps({'error': 'email required'})}
+
+        sub = subscribers_table.get_item(Key={'email': email}).get('Item')
+        if not sub or not sub.get('stripe_customer_id'):
+            return {'statusCode': 404, 'headers': headers,
+                    'body': json.dumps({'error': 'No active subscription found'})}
+
+        session = stripe.billing_portal.Session.create(
+            customer=sub['stripe_customer_id'],
+            return_url=SITE_URL,
+        )
+        return {'statusCode': 200, 'headers': headers,
+                'body': json.dumps({'url': session.url})}
+    except Exception as e:
+        print(f'create_customer_portal error: {e}')
+        return {'statusCode': 500, 'headers': headers,
+                'body': json.dumps({'error': 'Failed to create portal session'})}
+
+
+def cancel_subscription(headers, event):
+    """Cancel a subscription (at period end).
+    POST /api/cancel-subscription  { "email": "..." }
+    """
+    stripe = _load_stripe()
+    try:
+        body = json.loads(event.get('body') or '{}')
+        email = (body.get('email') or '').strip().lower()
+        if not email:
+            return {'statusCode': 400, 'headers': headers,
+                    'body': json.dumps({'error': 'email required'})}
+
+        sub = subscribers_table.get_item(Key={'email': email}).get('Item')
+        if not sub or not sub.get('stripe_subscription_id'):
+            return {'statusCode': 404, 'headers': headers,
+                    'body': json.dumps({'error': 'No active subscription found'})}
+
+        # Cancel at end of billing period (not immediately)
+        stripe.Subscription.modify(
+            sub['stripe_subscription_id'],
+            cancel_at_period_end=True
+        )
+
+        subscribers_table.update_item(
+            Key={'email': email},
+            UpdateExpression='SET subscription_status = :s',
+            ExpressionAttributeValues={':s': 'canceling'}
+        )
+
+        return {'statusCode': 200, 'headers': headers,
+                'body': json.dumps({'success': True, 'message': 'Subscription will cancel at end of billing period'})}
+    except Exception as e:
+        print(f'cancel_subscription error: {e}')
+        return {'statusCode': 500, 'headers': headers,
+                'body': json.dumps({'error': 'Failed to cancel subscription'})}
+
+
+def lambda_handler(event, context):
+    """Standalone entry point — serves only this module's routes."""
+    return dispatch(event, context, only=__name__)
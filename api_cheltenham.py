@@ -0,0 +1,234 @@
+"""
+api_cheltenham.py
+=================
+Cheltenham routes — /api/cheltenham/picks, /races, /picks/save
+Split out of lambda_api_picks.py — imported by the router only when one of
+these paths is hit; lambda_handler below serves the routes as a standalone function.
+"""
+
+import json
+from datetime import datetime
+from api_common import dynamodb, decimal_to_float, client, dispatch
+from pick_record import expand_heavy
+
+
+def get_cheltenham_picks_lambda(headers, event):
+    """Return today's Cheltenham picks from CheltenhamPicks DynamoDB table."""
+    from boto3.dynamodb.conditions import Attr
+    from datetime import timedelta
+
+    db_chelt = dynamodb.Table('CheltenhamPicks')
+    qp = event.get('queryStringParameters') or {}
+    target_date = qp.get('date', datetime.now().strftime('%Y-%m-%d'))
+
+    # Collect items across a 5-day lookback window so that older full-field
+    # saves (e.g. with 12 all_horses) are not dropped in favour of newer
+    # lighter refreshes that only stored 6.
+    base = datetime.strptime(target_date, '%Y-%m-%d')
+    date_window = [(base - timedelta(days=n)).strftime('%Y-%m-%d') for n in range(5)]
+
+    def scan_date(dt):
+        resp = db_chelt.scan(
+            FilterExpression=Attr('pick_date').eq(dt)
+        )
+        return [expand_heavy(decimal_to_float(item)) for item in resp.get('Items', [])]
+
+    # Flat list of all items across the window (newest dates first so the
+    # (day, race_time) dedup below prefers today's horse/score fields while
+    # also picking up full all_horses lists from older saves).
+    all_items_by_date: dict = {}   # race_name → best item (most all_horses wins)
+    for dt in date_window:   # newest first — dt=today, yesterday, …
+        for item in scan_date(dt):
+            rn = item.get('race_name', '')
+            existing = all_items_by_date.get(rn)
+            # Keep today's fields by default, but upgrade all_horses if an
+            # older date has a fuller field list.
+            if existing is None:
+                all_items_by_date[rn] = item
+            elif len(item.get('all_horses', [])) > len(existing.get('all_horses', [])):
+                # Preserve today's scalar fields; only replace all_horses from older richer item
+                merged_item = dict(existing)
+                merged_item['all_horses'] = item['all_horses']
+                # Fix is_surebet_pick flags — old all_horses may mark a stale pick as PICK
+                # (e.g. Day 1 save had Horse A as pick; today's save has Horse B; old all_horses
+                # still has Horse A flagged is_surebet_pick=True, causing wrong PICK badge in UI)
+                current_horse = merged_item.get('horse', '')
+                if current_horse:
+                    for h in merged_item['all_horses']:
+                        h['is_surebet_pick'] = (h.get('name', '') == current_horse)
+                all_items_by_date[rn] = merged_item
+    all_picks = list(all_items_by_date.values())
+
+    # Deduplicate by (day, race_time) — keep the record with the most all_horses
+    # Prevents duplicate panels when race was saved under two different name variants
+    seen_slots: dict = {}
+    for item in all_picks:
+        slot = (item.get('day', ''), item.get('race_time', ''))
+        existing = seen_slots.get(slot)
+        if not existing or len(item.get('all_horses', [])) > len(existing.get('all_horses', [])):
+            seen_slots[slot] = item
+    all_picks = list(seen_slots.values())
+
+    DAY_ORDER = ['Tuesday_10_March', 'Wednesday_11_March', 'Thursday_12_March', 'Friday_13_March']
+    days = {}
+    for item in all_picks:
+        day = item.get('day', 'Unknown')
+        if day not in days:
+            days[day] = []
+        days[day].append({
+            'race_name':        item.get('race_name', ''),
+            'day':              item.get('day', ''),
+            'race_time':        item.get('race_time', ''),
+            'grade':            item.get('grade', ''),
+            'distance':         item.get('distance', ''),
+            'horse':            item.get('horse', ''),
+            'trainer':          item.get('trainer', ''),
+            'jockey':           item.get('jockey', ''),
+            'odds':             item.get('odds', ''),
+            'score':            item.get('score', 0),
+            'tier':             item.get('tier', ''),
+            'value_rating':     item.get('value_rating', 0),
+            'second_score':     item.get('second_score', 0),
+            'score_gap':        item.get('score_gap', 0),
+            'confidence':       item.get('confidence', ''),
+            # ── Strategy fields ──────────────────────────────────────────────
+            'is_grade1':        item.get('is_grade1', False),
+            'is_skip_race':     item.get('is_skip_race', False),
+            'bet_tier':         item.get('bet_tier', 'OPINION_ONLY'),
+            'bet_recommendation': item.get('bet_recommendation', False),
+            # ─────────────────────────────────────────────────────────────────
+            'reasons':          item.get('reasons', []),
+            'warnings':         item.get('warnings', []),
+            'pick_changed':     item.get('pick_changed', False),
+            'previous_horse':   item.get('previous_horse', ''),
+            'previous_odds':    item.get('previous_odds', ''),
+            'change_reason':    item.get('change_reason', ''),
+            'pick_date':        item.get('pick_date', target_date),
+            'all_horses':       item.get('all_horses', []),
+        })
+
+    ordered = {d: days[d] for d in DAY_ORDER if d in days}
+    for d in days:
+        if d not in ordered:
+            ordered[d] = days[d]
+
+    total_changes = sum(1 for p in all_picks if p.get('pick_changed'))
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': json.dumps({
+            'success':       True,
+            'pick_date':     target_date,
+            'days':          ordered,
+            'total_picks':   len(all_picks),
+            'total_changes': total_changes,
+        })
+    }
+
+
+def get_cheltenham_races_lambda(headers):
+    """
+    Return Cheltenham race structure derived from CheltenhamPicks DynamoDB table.
+    Grouped by day with race metadata (name, time, grade, horses count).
+    """
+    from boto3.dynamodb.conditions import Attr
+    today = datetime.now().strftime('%Y-%m-%d')
+    db_chelt = dynamodb.Table('CheltenhamPicks')
+    resp = db_chelt.scan(FilterExpression=Attr('pick_date').eq(today))
+    raw_items = [expand_heavy(decimal_to_float(i)) for i in resp.get('Items', [])]
+
+    # Deduplicate by (day, race_time) — keep item with the most all_horses
+    seen_slots: dict = {}
+    for item in raw_items:
+        slot = (item.get('day', ''), item.get('race_time', ''))
+        existing = seen_slots.get(slot)
+        if not existing or len(item.get('all_horses', [])) > len(existing.get('all_horses', [])):
+            seen_slots[slot] = item
+    items = list(seen_slots.values())
+
+    DAY_ORDER = ['Tuesday_10_March', 'Wednesday_11_March', 'Thursday_12_March', 'Friday_13_March']
+    days = {}
+    for idx, item in enumerate(items):
+        day = item.get('day', 'Unknown')
+        if day not in days:
+            days[day] = []
+        days[day].append({
+            'raceId':       f"{day}_{idx}",
+            'raceName':     item.get('race_name', ''),
+            'raceTime':     item.get('race_time', ''),
+            'raceGrade':    item.get('grade', ''),
+            'raceDistance': item.get('distance', ''),
+            'festivalDay':  day,
+            'totalHorses':  len(item.get('all_horses', [])),
+        })
+
+    ordered = {d: sorted(days.get(d, []), key=lambda x: x.get('raceTime', '')) for d in DAY_ORDER}
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': json.dumps({'success': True, 'races': ordered, 'totalRaces': len(items)})
+    }
+
+
+def save_cheltenham_picks_lambda(headers):
+    """
+    Run cheltenham picks save inline (imports and calls save_picks directly).
+    Falls back to async Lambda invoke if import fails.
+    """
+    try:
+        import sys
+        sys.path.insert(0, '/var/task')
+        from save_cheltenham_picks import save_picks
+        picks, changes = save_picks(dry_run=False)
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps({
+                'success': True,
+                'message': f'Saved {len(picks)} picks. {len(changes)} changed.',
+                'picks_count': len(picks),
+                'changes_count': len(changes),
+            })
+        }
+    except ImportError:
+        # Fall back to async Lambda invoke if module not found
+        try:
+            lc = client('lambda')
+            lc.invoke(
+                FunctionName='cheltenham-picks-save',
+                InvocationType='Event',
+                Payload=json.dumps({'source': 'api-trigger'})
+            )
+            return {
+                'statusCode': 202,
+                'headers': headers,
+                'body': json.dumps({
+                    'success': True,
+                    'message': 'Save triggered — picks will update in ~60s. Refresh to see changes.',
+                })
+            }
+        except Exception as e2:
+            return {
+                'statusCode': 500,
+                'headers': headers,
+                'body': json.dumps({
+                    'success': False,
+                    'error': f'Could not trigger pick save: {e2}',
+                    'message': 'Run: python save_cheltenham_picks.py locally to refresh picks.',
+                })
+            }
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': headers,
+            'body': json.dumps({
+                'success': False,
+                'error': str(e),
+                'message': f'Pick save failed: {e}',
+            })
+        }
+
+
+def lambda_handler(event, context):
+    """Standalone entry point — serves only this module's routes."""
+    return dispatch(event, context, only=__name__)
@@ -0,0 +1,306 @@
+"""
+API COMMON — shared plumbing for the BettingPicksAPI route modules
+==================================================================
+lambda_api_picks.py is now a thin router; each route group lives in its own
+module and is imported only when one of its paths is hit:
+
+  api_picks.py       /api/picks, /api/picks/today|yesterday|greyhounds, /api/health
+  api_results.py     /api/results*, cumulative-roi, export-csv, auto-record, /api/dashboard
+  api_cheltenham.py  /api/cheltenham/*
+  api_auth.py        register / login / verify-email / forgot|reset-password
+  api_billing.py     Stripe checkout, webhook, portal, subscription status
+  api_learning.py    /api/learning/apply
+  api_favs.py        /api/favs-run
+  api_admin.py       /api/admin/*, /api/workflow/run
+  api_events.py      /api/events (SSE push channel — see push_events.py)
+
+This module holds what every route shares:
+  - ONE pooled boto3 session (keep-alive, standard retries) — clients and
+    resources are created on first use and reused for the container lifetime
+  - lazy `table` / `subscribers_table` / `dynamodb` handles with the same
+    interface as the old module-level globals
+  - ROUTES + dispatch(): the routing table, in the same match order as the
+    old if/elif chain
+
+Every route module also exposes its own lambda_handler, so a hot path can be
+deployed as a separate lightweight function, e.g. Handler=api_picks.lambda_handler
+serves /api/picks/* without ever importing Stripe or auth code.
+"""
+
+import os
+import json
+import importlib
+
+import pick_record
+
+REGION = 'eu-west-1'
+BUCKET = os.environ.get('PIPELINE_BUCKET', 'surebet-pipeline-data')
+
+SENDER_EMAIL  = 'charles.mccarthy@gmail.com'
+SITE_URL      = 'https://www.betbudai.com'
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,x-admin-token',
+    'Access-Control-Allow-Methods': 'GET,POST,OPTIONS',
+    'Content-Type': 'application/json'
+}
+
+# ── Pooled boto3 session ──────────────────────────────────────────────────────
+_session   = None
+_clients   = {}
+_resources = {}
+
+
+def _boto_config():
+    from botocore.config import Config
+    return Config(
+        max_pool_connections=25,          # favs-run / results scans fan out
+        tcp_keepalive=True,
+        retries={'max_attempts': 3, 'mode': 'standard'},
+    )
+
+
+def _get_session():
+    global _session
+    if _session is None:
+        import boto3
+        _session = boto3.session.Session(region_name=REGION)
+    return _session
+
+
+def client(service):
+    """Shared low-level client (one per service per container)."""
+    if service not in _clients:
+        _clients[service] = _get_session().client(service, config=_boto_config())
+    return _clients[service]
+
+
+def resource(service='dynamodb'):
+    """Shared resource (one per service per container)."""
+    if service not in _resources:
+        _resources[service] = _get_session().resource(service, config=_boto_config())
+    return _resources[service]
+
+
+class _LazyTable:
+    """Stands in for dynamodb.Table(name) until first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._table = None
+
+    def __getattr__(self, attr):
+        if self._table is None:
+            self._table = resource('dynamodb').Table(self._name)
+        return getattr(self._table, attr)
+
+
+class _LazyDynamo:
+    """Stands in for boto3.resource('dynamodb') — .Table() is itself lazy."""
+
+    def Table(self, name):
+        return _LazyTable(name)
+
+    def __getattr__(self, attr):
+        return getattr(resource('dynamodb'), attr)
+
+
+dynamodb          = _LazyDynamo()
+table             = _LazyTable('SureBetBets')
+subscribers_table = _LazyTable('BetBudAI_Subscribers')
+
+
+def ses():
+    return client('ses')
+
+
+def query_day(date_str, table_name='SureBetBets', projection=None, filter_expr=None, filter_values=None,
+              plain=False):
+    """
+    All items for one bet_date, following LastEvaluatedKey.
+    Uses the low-level client (thread-safe, unlike resources) so it can run
+    inside a ThreadPoolExecutor fan-out; items come back as plain dicts with
+    Decimal numbers, the same shape as Table.query() — or with float numbers
+    when plain=True (pick_record.plain_item, no Decimal round trip).
+    projection is a comma string or a sequence of attribute names; every name
+    is aliased, so reserved words are safe.
+    filter_values are low-level typed values, e.g. {':ui': {'BOOL': True}}.
+    """
+    kwargs = {
+        'TableName': table_name,
+        'KeyConditionExpression': 'bet_date = :d',
+        'ExpressionAttributeValues': {':d': {'S': date_str}, **(filter_values or {})},
+    }
+    if projection:
+        if isinstance(projection, str):
+            projection = [f.strip() for f in projection.split(',')]
+        kwargs['ProjectionExpression'], names = pick_record.projection(projection)
+        kwargs['ExpressionAttributeNames'] = names
+    if filter_expr:
+        kwargs['FilterExpression'] = filter_expr
+    pages = client('dynamodb').get_paginator('query').paginate(**kwargs)
+    return [_decode(it, plain) for page in pages for it in page.get('Items', [])]
+
+
+def get_items(keys, table_name='SureBetBets', plain=True):
+    """BatchGetItem for [{'bet_id': .., 'bet_date': ..}] (retries UnprocessedKeys)."""
+    out = []
+    low_keys = [{k: {'S': v} for k, v in key.items()} for key in keys]
+    for i in range(0, len(low_keys), 100):
+        request = {table_name: {'Keys': low_keys[i:i + 100]}}
+        while request:
+            resp = client('dynamodb').batch_get_item(RequestItems=request)
+            out.extend(_decode(it, plain) for it in resp.get('Responses', {}).get(table_name, []))
+            request = resp.get('UnprocessedKeys') or None
+    return out
+
+
+_deser = None
+
+
+def _decode(low_item, plain):
+    global _deser
+    if plain:
+        return pick_record.plain_item(low_item)
+    if _deser is None:
+        from boto3.dynamodb.types import TypeDeserializer
+        _deser = TypeDeserializer()
+    return {k: _deser.deserialize(v) for k, v in low_item.items()}
+
+
+# ── Shared helpers ────────────────────────────────────────────────────────────
+
+def decimal_to_float(obj):
+    """Convert Decimal objects to float for JSON serialization"""
+    return pick_record.to_plain(obj)
+
+
+def _settlement_odds(p):
+    """Return the best available odds for P&L calculations.
+    Prefers sp_odds (set at settlement using Betfair SP/lastPriceTraded)
+    over the pre-race exchange price stored at pick time."""
+    return float(p.get('sp_odds') or p.get('odds', 0))
+
+
+# ── Routing ───────────────────────────────────────────────────────────────────
+# (match(path), method or None, module, handler, handler takes event)
+# Order matters — more specific paths first, exactly as the old if/elif chain.
+ROUTES = [
+    (lambda p: p.endswith('/events'),             'GET',  'api_events',     'get_events',                   True),
+    (lambda p: 'cheltenham/picks/save' in p,      None,   'api_cheltenham', 'save_cheltenham_picks_lambda', False),
+    (lambda p: 'cheltenham/picks' in p,           None,   'api_cheltenham', 'get_cheltenham_picks_lambda',  True),
+    (lambda p: 'cheltenham/races' in p,           None,   'api_cheltenham', 'get_cheltenham_races_lambda',  False),
+    (lambda p: 'favs-run' in p,                   None,   'api_favs',       'get_favs_run_lambda',          True),
+    (lambda p: 'learning/apply' in p,             None,   'api_learning',   'apply_learning_lambda',        True),
+    (lambda p: 'results/auto-record' in p,        None,   'api_results',    'auto_record_pending_results',  False),
+    (lambda p: 'admin/config' in p,               'GET',  'api_admin',      'admin_get_config',             True),
+    (lambda p: 'admin/config' in p,               'POST', 'api_admin',      'admin_save_config',            True),
+    (lambda p: 'admin/subscribers' in p,          'GET',  'api_admin',      'admin_get_subscribers',        True),
+    (lambda p: 'login' in p,                      'POST', 'api_auth',       'login_subscriber',             True),
+    (lambda p: 'forgot-password' in p,            'POST', 'api_auth',       'forgot_password',              True),
+    (lambda p: 'reset-password' in p,             'POST', 'api_auth',       'reset_password',               True),
+    (lambda p: 'verify-email' in p,               None,   'api_auth',       'verify_email_token',           True),
+    (lambda p: 'register' in p,                   'POST', 'api_auth',       'register_subscriber',          True),
+    (lambda p: 'create-checkout-session' in p,    'POST', 'api_billing',    'create_checkout_session',      True),
+    (lambda p: 'stripe-webhook' in p,             'POST', 'api_billing',    'handle_stripe_webhook',        True),
+    (lambda p: 'subscription-status' in p,        'POST', 'api_billing',    'get_subscription_status',      True),
+    (lambda p: 'customer-portal' in p,            'POST', 'api_billing',    'create_customer_portal',       True),
+    (lambda p: 'cancel-subscription' in p,        'POST', 'api_billing',    'cancel_subscription',          True),
+    (lambda p: p.endswith('/dashboard'),          'GET',  'api_results',    'get_dashboard',                True),
+    (lambda p: 'results/export-csv' in p,         None,   'api_results',    'export_roi_csv',               True),
+    (lambda p: 'results/cumulative-roi' in p,     None,   'api_results',    'get_cumulative_roi',           False),
+    (lambda p: 'results/yesterday' in p,          None,   'api_results',    'check_yesterday_results',      False),
+    (lambda p: 'results/today' in p or p.endswith('/results'),
+                                                  None,   'api_results',    'check_today_results',          False),
+    (lambda p: 'picks/greyhounds' in p,           None,   'api_picks',      'get_greyhound_picks',          False),
+    (lambda p: 'picks/yesterday' in p,            None,   'api_picks',      'get_yesterday_picks',          False),
+    (lambda p: 'picks/today' in p,                None,   'api_picks',      'get_today_picks',              False),
+    (lambda p: 'workflow' in p,                   None,   'api_admin',      'trigger_workflow',             False),
+    (lambda p: 'picks' in p,                      None,   'api_picks',      'get_all_picks',                False),
+    (lambda p: 'health' in p,                     None,   'api_picks',      'get_health',                   False),
+]
+
+ROOT_ENDPOINTS = [
+    '/api/picks/today',
+    '/api/picks/yesterday',
+    '/api/picks',
+    '/api/results',
+    '/api/results/today',
+    '/api/workflow/run',
+    '/api/health'
+]
+
+
+def _call(module, func, headers, event, with_event):
+    handler = getattr(importlib.import_module(module), func)
+    return handler(headers, event) if with_event else handler(headers)
+
+
+def dispatch(event, context, only=None):
+    """
+    Route an API Gateway / Lambda URL / EventBridge event.
+    only=module name restricts routing to that module's routes (used when a
+    route module is deployed as its own function); anything else is a 404.
+    """
+    headers = dict(CORS_HEADERS)
+
+    # Handle OPTIONS preflight — supports both REST API (httpMethod) and HTTP API v2 (requestContext.http.method)
+    req_method = event.get('httpMethod') or event.get('requestContext', {}).get('http', {}).get('method', '')
+    if req_method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': ''
+        }
+
+    try:
+        # ── EventBridge scheduled trigger (no HTTP path) ─────────────────────
+        if event.get('source') == 'aws.events' or event.get('source') == 'scheduled-results':
+            if only in (None, 'api_results'):
+                print('EventBridge scheduled trigger – running auto_record_pending_results')
+                return _call('api_results', 'auto_record_pending_results', headers, event, False)
+
+        # Get path - handle both API Gateway and Lambda URL formats
+        path = event.get('rawPath', event.get('path', ''))
+        method = event.get('requestContext', {}).get('http', {}).get('method', event.get('httpMethod', 'GET'))
+
+        print(f"Request: {method} {path}")
+
+        for match, route_method, module, func, with_event in ROUTES:
+            if only is not None and module != only:
+                continue
+            if route_method is not None and method != route_method:
+                continue
+            if match(path):
+                return _call(module, func, headers, event, with_event)
+
+        if path == '/' and only is None:
+            # Root path - return API info
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'body': json.dumps({
+                    'service': 'Betting Picks API',
+                    'endpoints': ROOT_ENDPOINTS
+                })
+            }
+        return {
+            'statusCode': 404,
+            'headers': headers,
+            'body': json.dumps({
+                'success': False,
+                'error': f'Endpoint not found: {path}'
+            })
+        }
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return {
+            'statusCode': 500,
+            'headers': headers,
+            'body': json.dumps({
+                'success': False,
+                'error': str(e)
+            })
+        }
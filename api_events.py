@@ -0,0 +1,51 @@
+"""
+api_events.py
+=============
+Push channel route — /api/events (Server-Sent Events)
+Each request returns the events newer than the client's Last-Event-ID and
+closes; EventSource reconnects after the `retry` interval and resumes from
+that cursor, so an idle reconnect costs one S3 list and a few bytes.
+"""
+
+import json
+from push_events import read_events, latest_event_id, start_of_day_id, retry_ms, format_sse
+from api_common import dispatch
+
+
+def get_events(headers, event):
+    """GET /api/events  (Last-Event-ID header or ?since=<id>, optional ?date=)"""
+    try:
+        qp = event.get('queryStringParameters') or {}
+        req_headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+        since = req_headers.get('last-event-id') or qp.get('since')
+        date_str = qp.get('date')
+
+        if since:
+            events = read_events(since=since, date_str=date_str)
+        else:
+            # First connect: the client has just loaded the full lists, so
+            # only hand back the current cursor — always an id, or EventSource
+            # reconnects without one and skips whatever was published meanwhile
+            cursor = latest_event_id(date_str) or start_of_day_id(date_str)
+            events = [{'id': cursor, 'kind': 'hello'}]
+
+        sse_headers = dict(headers)
+        sse_headers['Content-Type'] = 'text/event-stream'
+        sse_headers['Cache-Control'] = 'no-cache'
+        return {
+            'statusCode': 200,
+            'headers': sse_headers,
+            'body': format_sse(events, retry=retry_ms()),
+        }
+    except Exception as e:
+        print(f'get_events error: {e}')
+        return {
+            'statusCode': 500,
+            'headers': headers,
+            'body': json.dumps({'success': False, 'error': str(e)})
+        }
+
+
+def lambda_handler(event, context):
+    """Standalone entry point — serves only this module's routes."""
+    return dispatch(event, context, only=__name__)
@@ -0,0 +1,70 @@
+"""
+api_favs.py
+===========
+Lay-the-favourite route — /api/favs-run
+Split out of lambda_api_picks.py — imported by the router only when one of
+these paths is hit; lambda_handler below serves the routes as a standalone function.
+"""
+
+import json
+from datetime import datetime, timedelta
+from api_common import client, dispatch
+import lay_scanner
+
+
+# ── Lay the Favourite analysis ─────────────────────────────────────────────
+# Scoring, the per-(date, race) memo and the SL winner-map cache live in
+# lay_scanner: sf_analysis stores a per-day table over every favourite on the
+# card (daily/{date}/lay_scan.json); this route reads it through that memo.
+
+
+def get_favs_run_lambda(headers, event):
+    """GET /api/favs-run?days=N&date=YYYY-MM-DD"""
+    try:
+        qp = event.get('queryStringParameters') or {}
+        today = datetime.now().strftime('%Y-%m-%d')
+        target_date = qp.get('date', today)
+        days = int(qp.get('days', 1))
+
+        dates = [(datetime.strptime(target_date, '%Y-%m-%d') + timedelta(days=i)).strftime('%Y-%m-%d')
+                 for i in range(days)]
+
+        all_results, cache_hits = lay_scanner.analyse_dates(dates, dynamodb=client('dynamodb'))
+        print(f'[favs_run] {len(dates)} day(s): {cache_hits} precomputed, {len(dates) - cache_hits} scanned')
+        max_odds = float(qp['max_odds']) if qp.get('max_odds') else None
+        if max_odds:
+            all_results = [r for r in all_results if r['fav_odds'] <= max_odds]
+
+        caution   = [r for r in all_results if r['lay_score'] >= 4]
+        strong    = [r for r in all_results if r['lay_score'] >= 9]
+        red_flag  = [r for r in all_results if r['lay_score'] >= 13]
+
+        # Lay win % — how often the favourite lost (settled races only)
+        settled   = [r for r in all_results if r.get('outcome') and r['outcome'].lower() in ('win','won','loss','lost')]
+        fav_lost  = [r for r in settled if r['outcome'].lower() in ('loss','lost')]
+        lay_win_pct = round(len(fav_lost) / len(settled) * 100, 1) if settled else None
+
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps({
+                'success':   True,
+                'generated': datetime.now().isoformat(),
+                'cached_days': cache_hits,
+                'summary':   {'total': len(all_results), 'caution': len(caution), 'strong': len(strong), 'red_flag': len(red_flag),
+                              'settled': len(settled), 'fav_lost': len(fav_lost), 'lay_win_pct': lay_win_pct},
+                'races':     all_results,
+            }, default=str)
+        }
+    except Exception as e:
+        print(f'get_favs_run_lambda error: {e}')
+        return {
+            'statusCode': 500,
+            'headers': headers,
+            'body': json.dumps({'success': False, 'error': str(e)})
+        }
+
+
+def lambda_handler(event, context):
+    """Standalone entry point — serves only this module's routes."""
+    return dispatch(event, context, only=__name__)
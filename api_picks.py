@@ -0,0 +1,390 @@
+"""
+api_picks.py
+============
+Picks routes — /api/picks, /api/picks/today|yesterday|greyhounds, /api/health
+Split out of lambda_api_picks.py — imported by the router only when one of
+these paths is hit; lambda_handler below serves the routes as a standalone function.
+"""
+
+import json
+from datetime import datetime, timedelta
+from api_common import table, decimal_to_float, query_day, get_items, dispatch
+from pick_record import PickRecord, CARD_FIELDS, LIST_FIELDS, expand_heavy
+
+
+def get_all_picks(headers):
+    """Get all picks from DynamoDB"""
+    response = table.scan()
+    items = response.get('Items', [])
+    
+    # Convert Decimals to floats
+    items = [decimal_to_float(item) for item in items]
+    
+    # Sort by timestamp descending
+    items.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+    
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': json.dumps({
+            'success': True,
+            'picks': items,
+            'count': len(items)
+        })
+    }
+
+def get_today_picks(headers):
+    """Get today's picks only - filter to show only upcoming horse races"""
+    from datetime import timezone as _tz
+    today = datetime.now(_tz.utc).strftime('%Y-%m-%d')
+
+    # ── 1PM BST GATE ─────────────────────────────────────────────────────────
+    # Hold picks until 12:00 UTC (1:00pm BST) each day.
+    # The morning analysis runs at ~10:00 UTC but may re-score horses as going /
+    # flags update before racing.  Showing picks only after 1pm ensures the last
+    # lunchtime re-check has settled and we're committed to the best version.
+    _now_utc = datetime.now(_tz.utc)
+    if _now_utc.hour < 12:
+        _mins = (12 - _now_utc.hour) * 60 - _now_utc.minute
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps({
+                'success':          True,
+                'picks':            [],
+                'count':            0,
+                'date':             today,
+                'analysis_pending': True,
+                'pending_reason':   f'Picks confirmed at 1:00pm — rechecking going & flags ({_mins} min)',
+                'message':          'Picks locked until 1pm BST to allow full morning analysis to complete',
+            })
+        }
+
+    # Card-level scalars for every runner (UI filter, dedup, race cards); the
+    # full items — all_horses, score_breakdown, reasons — only for the picks
+    # that survive the filters
+    try:
+        items = [PickRecord.from_item(i) for i in query_day(today, projection=CARD_FIELDS, plain=True)]
+    except Exception as e:
+        print(f"Query failed, falling back to scan: {e}")
+        # Fallback to scan if query fails
+        response = table.scan(
+            FilterExpression='(#d = :today OR bet_date = :today)',
+            ExpressionAttributeNames={'#d': 'date'},
+            ExpressionAttributeValues={':today': today}
+        )
+        items = [PickRecord.from_item(item) for item in response.get('Items', [])]
+    
+    # Filter out greyhounds - only show horses (accept both 'horses' and 'Horse Racing')
+    horse_items = [item for item in items if item.get('sport', 'horses') in ['horses', 'Horse Racing', 'horse racing']]
+    
+    # CRITICAL: Only show items explicitly marked for UI display
+    horse_items = [item for item in horse_items if item.get('show_in_ui') == True]
+    
+    # Filter to System A only: picks with stake <= 10 (excludes learning_workflow picks)
+    # System A = Comprehensive scoring system with £5-6 stakes (actual bets)
+    # System B = Learning workflow with £12-30 stakes (data collection only)
+    horse_items = [item for item in horse_items if float(item.get('stake', 0)) <= 10]
+    
+    # DEMO MODE: On Jan 20, 2026, show ALL picks regardless of time
+    # This allows showing past races during the demo
+    if today == '2026-01-20':
+        print(f"DEMO MODE: Showing all {len(horse_items)} picks for {today}")
+        future_picks = horse_items
+    else:
+        # Filter out races that have already started
+        from datetime import timezone as _tz
+        now_utc = datetime.now(_tz.utc)
+        future_picks = []
+        
+        for item in horse_items:
+            race_time_str = item.get('race_time', '')
+            if race_time_str:
+                try:
+                    # Parse race time (ISO format with offset) and compare in UTC
+                    race_time = datetime.fromisoformat(race_time_str.replace('Z', '+00:00'))
+                    if race_time.astimezone(_tz.utc) > now_utc:
+                        future_picks.append(item)
+                except Exception as e:
+                    print(f"Error parsing race time {race_time_str}: {e}")
+                    # Include if we can't parse (safer than excluding)
+                    future_picks.append(item)
+            else:
+                # Include if no race time (safer than excluding)
+                future_picks.append(item)
+    
+    # ONE PICK PER RACE: keep only the highest-scoring pick per race
+    seen_races = {}
+    for pick in future_picks:
+        race_key = (pick.get('course', ''), str(pick.get('race_time', ''))[:16])
+        existing = seen_races.get(race_key)
+        if not existing or float(pick.get('comprehensive_score', 0)) > float(existing.get('comprehensive_score', 0)):
+            seen_races[race_key] = pick
+    future_picks = list(seen_races.values())
+    print(f"After dedup (1 pick per race): {len(future_picks)} picks")
+
+    full_items = {}
+    if future_picks:
+        try:
+            full_items = {i['bet_id']: expand_heavy(i) for i in get_items([p.key for p in future_picks])}
+        except Exception as e:
+            print(f"Full item fetch failed, returning card fields only: {e}")
+    future_picks = [full_items.get(p.bet_id) or p.to_dict() for p in future_picks]
+
+    # Build full race card for each pick by scanning all items for the same (course, race_time)
+    for pick in future_picks:
+        pick_course    = pick.get('course', '')
+        pick_race_time = pick.get('race_time', '')
+        pick_score     = float(pick.get('comprehensive_score', 0) or 0)
+
+        # Preserve the all_horses list saved by the workflow (full race card with all runners scored)
+        # This is used as fallback if DynamoDB only has one record for this race (the pick itself)
+        stored_all_horses = pick.get('all_horses', [])
+
+        # All candidates for this race with a valid score
+        race_candidates = [
+            item for item in items
+            if item.get('course') == pick_course
+            and item.get('race_time') == pick_race_time
+            and item.get('comprehensive_score') is not None
+            and float(item.get('comprehensive_score', 0) or 0) != 0
+        ]
+
+        # Deduplicate by horse name — keep highest-scoring entry
+        seen_runners = {}
+        for h in race_candidates:
+            hname  = (h.get('horse') or '').strip()
+            hscore = float(h.get('comprehensive_score', 0) or 0)
+            if hname not in seen_runners or hscore > seen_runners[hname]:
+                seen_runners[hname] = hscore
+
+        # Build sorted race card (best score first)
+        race_card = sorted(
+            [{'name': n, 'score': s} for n, s in seen_runners.items()],
+            key=lambda x: x['score'], reverse=True
+        )
+
+        # Attach full all_horses list to pick (with jockey/trainer from item)
+        horse_lookup = {}
+        for h in race_candidates:
+            hname  = (h.get('horse') or '').strip()
+            hscore = float(h.get('comprehensive_score', 0) or 0)
+            if hname not in horse_lookup or hscore > float(horse_lookup[hname].get('comprehensive_score', 0) or 0):
+                horse_lookup[hname] = h
+
+        pick['all_horses'] = [
+            {
+                'horse':   entry['name'],
+                'jockey':  horse_lookup[entry['name']].get('jockey', '') if entry['name'] in horse_lookup else '',
+                'trainer': horse_lookup[entry['name']].get('trainer', '') if entry['name'] in horse_lookup else '',
+                'odds':    float(horse_lookup[entry['name']].get('odds', 0) or 0) if entry['name'] in horse_lookup else 0,
+                'score':   round(entry['score'], 0),
+            }
+            for entry in race_card
+        ]
+
+        # If race_candidates only found our pick (1 entry), fall back to the full all_horses list
+        # stored by the workflow in DynamoDB — this contains all scored runners in the race
+        if len(pick['all_horses']) <= 1 and stored_all_horses and len(stored_all_horses) > 1:
+            pick['all_horses'] = [
+                {
+                    'horse':   h.get('horse', ''),
+                    'jockey':  h.get('jockey', ''),
+                    'trainer': h.get('trainer', ''),
+                    'odds':    float(h.get('odds', 0) or 0),
+                    'score':   float(h.get('score', 0) or 0),
+                }
+                for h in stored_all_horses
+            ]
+
+        # next_best / score_gap from rivals (exclude our pick)
+        rivals = [r for r in race_card if r['name'] != pick.get('horse', '')]
+        if rivals:
+            best_rival = rivals[0]
+            pick['next_best_score'] = best_rival['score']
+            pick['next_best_horse'] = best_rival['name']
+            pick['score_gap'] = pick_score - best_rival['score']
+        else:
+            pick['next_best_score'] = 0
+            pick['next_best_horse'] = ''
+            pick['score_gap'] = 0
+
+    # Sort by score and limit to top 5 picks per day
+    future_picks.sort(key=lambda x: float(x.get('comprehensive_score') or x.get('analysis_score') or 0), reverse=True)
+    future_picks = future_picks[:5]
+    # Re-sort top 5 by race time for display
+    future_picks.sort(key=lambda x: x.get('race_time', ''))
+
+    # Map reasons -> selection_reasons for UI compatibility
+    race_fields = {}
+    for pick in future_picks:
+        pick['selection_reasons'] = pick.get('reasons', [])
+
+    print(f"Total picks: {len(items)}, Horse picks: {len(horse_items)}, Future picks: {len(future_picks)} (top 5 by score)")
+    
+    # Calculate workflow schedule (runs every 30 min at :15 and :45)
+    now = datetime.utcnow()
+    current_minute = now.minute
+    
+    # Determine last run time
+    if current_minute >= 45:
+        last_run_minute = 45
+    elif current_minute >= 15:
+        last_run_minute = 15
+    else:
+        # Last run was previous hour at :45
+        last_run_minute = 45
+        now = now - timedelta(hours=1)
+    
+    last_run = now.replace(minute=last_run_minute, second=0, microsecond=0)
+    if current_minute < 15:
+        last_run = last_run - timedelta(hours=1)
+    
+    # Determine next run time
+    if current_minute < 15:
+        next_run = now.replace(minute=15, second=0, microsecond=0)
+    elif current_minute < 45:
+        next_run = now.replace(minute=45, second=0, microsecond=0)
+    else:
+        # Next run is next hour at :15
+        next_run = (now + timedelta(hours=1)).replace(minute=15, second=0, microsecond=0)
+    
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': json.dumps({
+            'success': True,
+            'picks': future_picks,
+            'count': len(future_picks),
+            'date': today,
+            'last_run': last_run.isoformat() + 'Z',
+            'next_run': next_run.isoformat() + 'Z',
+            'race_fields': race_fields,
+            'message': 'No selections met the criteria' if len(future_picks) == 0 else f'{len(future_picks)} upcoming races'
+        })
+    }
+
+def get_greyhound_picks(headers):
+    """Get today's greyhound picks only - filter to show only upcoming races"""
+    today = datetime.now().strftime('%Y-%m-%d')
+    
+    # Get today's picks and filter for greyhounds
+    response = table.scan(
+        FilterExpression='(#d = :today OR bet_date = :today) AND sport = :sport',
+        ExpressionAttributeNames={'#d': 'date'},
+        ExpressionAttributeValues={
+            ':today': today,
+            ':sport': 'greyhounds'
+        }
+    )
+    
+    items = response.get('Items', [])
+    items = [decimal_to_float(item) for item in items]
+    
+    # DEMO MODE: On Jan 20, 2026, show ALL picks regardless of time
+    if today == '2026-01-20':
+        print(f"DEMO MODE: Showing all {len(items)} greyhound picks for {today}")
+        future_picks = items
+    else:
+        # Filter out races that have already started
+        now = datetime.utcnow()
+        future_picks = []
+        
+        for item in items:
+            race_time_str = item.get('race_time', '')
+            if race_time_str:
+                try:
+                    # Parse race time (ISO format)
+                    race_time = datetime.fromisoformat(race_time_str.replace('Z', '+00:00'))
+                    # Only include if race is in the future
+                    if race_time.replace(tzinfo=None) > now:
+                        future_picks.append(item)
+                except Exception as e:
+                    print(f"Error parsing race time {race_time_str}: {e}")
+                    # Include if we can't parse (safer than excluding)
+                    future_picks.append(item)
+            else:
+                # Include if no race time (safer than excluding)
+                future_picks.append(item)
+    
+    # Sort by race time (soonest first)
+    future_picks.sort(key=lambda x: x.get('race_time', ''))
+    
+    print(f"Greyhound picks today: {len(items)}, Future greyhound picks: {len(future_picks)}")
+    
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': json.dumps({
+            'success': True,
+            'picks': future_picks,
+            'count': len(future_picks),
+            'date': today,
+            'sport': 'greyhounds'
+        })
+    }
+
+def get_yesterday_picks(headers):
+    """Get yesterday's picks with results (System A only - actual bets)"""
+    from datetime import timedelta
+    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    
+    print(f"[DEBUG] Querying for yesterday: {yesterday}")
+    
+    # Partition-key query, list columns only (no all_horses / breakdown blobs)
+    items = query_day(yesterday, projection=LIST_FIELDS, plain=True)
+    print(f"[DEBUG] Raw items from query: {len(items)}")
+    
+    # Filter to System A only: picks with stake <= 10 (excludes learning_workflow picks)
+    # System A = Comprehensive scoring system with £5-6 stakes (actual bets)
+    # System B = Learning workflow with £12-30 stakes (data collection only)
+    before_filter = len(items)
+    items = [item for item in items if float(item.get('stake', 0)) <= 10]
+    print(f"[DEBUG] After stake filter (<= 10): {len(items)} (was {before_filter})")
+    
+    # Normalize outcome values for frontend compatibility
+    # Database uses: 'won', 'WON', 'lost', 'LOST'
+    # Frontend expects: 'win', 'loss', 'placed'
+    for item in items:
+        outcome = item.get('outcome', '').lower() if item.get('outcome') else None
+        if outcome in ['won', 'win']:
+            item['outcome'] = 'win'
+        elif outcome in ['lost', 'loss']:
+            item['outcome'] = 'loss'
+        elif outcome in ['placed', 'place']:
+            item['outcome'] = 'placed'
+        # Keep None or other values as-is (for pending/voided)
+    
+    # Sort by race time
+    items.sort(key=lambda x: x.get('race_time', ''))
+    
+    print(f"Yesterday's picks: {len(items)}")
+    
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': json.dumps({
+            'success': True,
+            'picks': items,
+            'count': len(items),
+            'date': yesterday
+        })
+    }
+
+
+def get_health(headers):
+    """Health check endpoint"""
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': json.dumps({
+            'status': 'ok',
+            'service': 'betting-picks-api',
+            'timestamp': datetime.now().isoformat()
+        })
+    }
+
+
+def lambda_handler(event, context):
+    """Standalone entry point — serves only this module's routes."""
+    return dispatch(event, context, only=__name__)
@@ -0,0 +1,1140 @@
+"""
+api_results.py
+==============
+Results routes — /api/results*, cumulative ROI, CSV export, EventBridge auto-record
+Split out of lambda_api_picks.py — imported by the router only when one of
+these paths is hit; lambda_handler below serves the routes as a standalone function.
+"""
+
+import json
+import urllib.request
+import urllib.parse
+from datetime import datetime, timedelta
+from decimal import Decimal
+from push_events import publish_event, result_delta
+from api_common import BUCKET, table, decimal_to_float, _settlement_odds, client, query_day, dispatch
+from pick_record import expand_heavy
+
+
+def get_cumulative_roi(headers, picks=None):
+    """Cumulative level-stakes ROI since 2026-03-22, deduped by race identity.
+    Served from the settled-days row cache (see load_roi_rows) plus the unsettled tail;
+    picks: rows already loaded by get_dashboard."""
+    try:
+        if picks is None:
+            picks, _, _ = load_roi_rows()
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps(_roi_summary(picks))
+        }
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': headers,
+            'body': json.dumps({'success': False, 'error': str(e)})
+        }
+
+
+def _roi_summary(picks):
+    """Level-stakes ROI (1 unit per pick — standard tipster ROI)."""
+    UNIT = 1.0
+    total_stake = total_return = 0.0
+    wins = places = losses = pending = 0
+    for p in picks:
+        outcome = p.get('outcome') or ''
+        odds = _settlement_odds(p)
+        ef   = float(p.get('ew_fraction') or 0.25)
+        if outcome == 'win':
+            wins += 1; total_stake += UNIT; total_return += UNIT * odds
+        elif outcome == 'placed':
+            places += 1; total_stake += UNIT
+            total_return += (UNIT/2) * (1 + (odds-1) * ef)
+        elif outcome == 'loss':
+            losses += 1; total_stake += UNIT
+        else:
+            pending += 1
+
+    profit  = total_return - total_stake
+    roi     = round((profit / total_stake * 100) if total_stake > 0 else 0, 1)
+    return {
+        'success':      True,
+        'start_date':   CUMULATIVE_ROI_START,
+        'roi':          roi,
+        'profit':       round(profit, 2),
+        'total_stake':  round(total_stake, 2),
+        'total_return': round(total_return, 2),
+        'wins':         wins,
+        'places':       places,
+        'losses':       losses,
+        'pending':      pending,
+        'settled':      wins + places + losses,
+    }
+
+
+# ── ROI rows: cumulative ROI, CSV export, dashboard ──────────────────────────
+# Rows for days that settled more than ROI_REGRADE_DAYS ago are kept in one
+# consolidated S3 object (exports/roi_rows_settled.jsonl: a header line with the
+# `through` date, then one deduped row per line).  Cumulative ROI and the CSV
+# export only query the days after `through`, so an outcome correction (the
+# _fix_* scripts) inside the window always reaches ROI; ?rebuild=1 on the export
+# re-reads everything for an older one.  The export reads the object line by
+# line and streams the CSV to S3 with a multipart upload, then hands back a
+# pre-signed URL.
+CUMULATIVE_ROI_START = '2026-03-22'
+ROI_EXPORT_FIELDS    = ('bet_date, bet_id, horse, course, race_time, show_in_ui, is_learning_pick, outcome, '
+                        'sp_odds, odds, ew_fraction, bet_type, comprehensive_score, finish_position, '
+                        'winner_horse, number_of_places, confidence_grade, jockey, trainer')
+ROI_ROW_KEYS         = [f.strip() for f in ROI_EXPORT_FIELDS.split(',')]
+ROI_SETTLED_KEY      = 'exports/roi_rows_settled.jsonl'
+ROI_EXPORT_VERSION   = 2
+ROI_REGRADE_DAYS     = 14     # days this recent are always re-queried, never frozen in the cache
+ROI_CSV_HEADER       = 'Date,Race Time,Course,Horse,Trainer,Jockey,Odds,SP Odds,EW Fraction,Bet Type,Score,Grade,Outcome,Finish Position,Winner,Places Paid'
+_SETTLED_OUTCOMES    = ('win', 'placed', 'loss')
+
+
+def _roi_rows_from_items(items):
+    """UI picks (non-learning, known horse/course) normalised for ROI / the CSV."""
+    rows = []
+    for p in (decimal_to_float(i) for i in items):
+        if not (p.get('show_in_ui') is True
+                and p.get('horse') and p.get('horse') != 'Unknown'
+                and p.get('course') and p.get('course') != 'Unknown'
+                and not p.get('is_learning_pick', False)):
+            continue
+        oc = (p.get('outcome') or '').lower()
+        if oc in ('won',): oc = 'win'
+        elif oc in ('lost',): oc = 'loss'
+        elif oc in ('place',): oc = 'placed'
+        p = {k: p[k] for k in ROI_ROW_KEYS if k in p}
+        p['outcome'] = oc
+        rows.append(p)
+    return rows
+
+
+def _roi_rows_for_day(d):
+    return _roi_rows_from_items(query_day(d, projection=ROI_EXPORT_FIELDS,
+                                          filter_expr='show_in_ui = :ui',
+                                          filter_values={':ui': {'BOOL': True}}))
+
+
+def _roi_key(p):
+    return p.get('course', ''), p.get('race_time', '')
+
+
+def _dedupe(rows, seen=None):
+    """Race identity (course + race_time) → most recently dated record, so outcome
+    corrections always win over the original pick record."""
+    seen = {} if seen is None else seen
+    for p in rows:
+        k = _roi_key(p)
+        if k not in seen or p.get('bet_date', '') > seen[k].get('bet_date', ''):
+            seen[k] = p
+    return seen
+
+
+def _by_race_time(rows):
+    return sorted(rows, key=lambda x: x.get('race_time', '') or x.get('bet_date', ''))
+
+
+def iter_roi_rows(preloaded=None, rebuild=False, stats=None):
+    """
+    Deduped ROI rows since CUMULATIVE_ROI_START, streamed: the cached settled
+    days line by line, then the queried days.  Only the days after the cache's
+    `through` date are queried (preloaded={date: items} skips those too) and the
+    high-water mark is advanced over newly settled days older than
+    ROI_REGRADE_DAYS.  rebuild=True ignores the cache and rewrites it.
+    stats (dict) receives through / days_queried.
+    """
+    from datetime import date as _date
+    from concurrent.futures import ThreadPoolExecutor
+    preloaded = preloaded or {}
+    today_d = _date.today()
+    frozen_until = (today_d - timedelta(days=ROI_REGRADE_DAYS)).isoformat()
+    through, settled = (None, iter(())) if rebuild else _open_settled_rows()
+    if through and through > frozen_until:
+        # Cached with a shorter window — those days are queried again
+        settled = (r for r in settled if r.get('bet_date', '') <= frozen_until)
+        through = frozen_until
+    first_d = (_date.fromisoformat(through) + timedelta(days=1)) if through else _date.fromisoformat(CUMULATIVE_ROI_START)
+    dates = [(first_d + timedelta(days=i)).isoformat()
+             for i in range(max(0, (today_d - first_d).days + 1))]
+    to_query = [d for d in dates if d not in preloaded]
+
+    client('s3'), client('dynamodb')   # create before the fan-out
+    with ThreadPoolExecutor(max_workers=10) as ex:
+        queried = dict(zip(to_query, ex.map(_roi_rows_for_day, to_query)))
+    fresh = [(d, queried[d] if d in queried else _roi_rows_from_items(preloaded[d])) for d in dates]
+
+    # Advance the high-water mark over consecutive fully settled days outside the window
+    new_through, newly = through, []
+    for d, rows in fresh:
+        if d > frozen_until or any(r['outcome'] not in _SETTLED_OUTCOMES for r in rows):
+            break
+        newly.extend(rows)
+        new_through = d
+    if new_through != through:
+        cached = _by_race_time(_dedupe(newly, _dedupe(settled)).values())
+        _save_settled_rows(new_through, cached)
+        settled = iter(cached)
+    tail = _dedupe(r for d, rows in fresh if new_through is None or d > new_through for r in rows)
+    print(f'[roi_rows] cached rows through {new_through}, {len(to_query)} day(s) queried')
+    if stats is not None:
+        stats.update(through=new_through, days_queried=len(to_query))
+
+    for row in settled:
+        if _roi_key(row) not in tail:      # a later record for the race supersedes it
+            yield row
+    yield from _by_race_time(tail.values())
+
+
+def load_roi_rows(preloaded=None):
+    """iter_roi_rows() as a list sorted by race time → (picks, through, days_queried)."""
+    stats = {}
+    picks = _by_race_time(iter_roi_rows(preloaded, stats=stats))
+    return picks, stats['through'], stats['days_queried']
+
+
+def _open_settled_rows():
+    """(through_date, row iterator) over the consolidated settled-days object, or (None, empty)."""
+    try:
+        lines = client('s3').get_object(Bucket=BUCKET, Key=ROI_SETTLED_KEY)['Body'].iter_lines()
+        header = json.loads(next(lines))
+        if header.get('version') == ROI_EXPORT_VERSION and header.get('start') == CUMULATIVE_ROI_START:
+            return header['through'], (json.loads(line) for line in lines if line)
+    except Exception:
+        pass
+    return None, iter(())
+
+
+def _save_settled_rows(through, rows):
+    header = {'version': ROI_EXPORT_VERSION, 'start': CUMULATIVE_ROI_START,
+              'through': through, 'updated_at': datetime.now().isoformat(), 'rows': len(rows)}
+    try:
+        client('s3').put_object(
+            Bucket=BUCKET, Key=ROI_SETTLED_KEY, ContentType='application/x-ndjson',
+            Body='\n'.join(json.dumps(r, default=str) for r in [header] + rows).encode('utf-8'),
+        )
+    except Exception as e:
+        print(f'[roi_export] settled cache write skipped: {e}')
+
+
+def _csv_quote(v):
+    return '"' + (v or '').replace('"', '""') + '"'
+
+
+def _iter_roi_csv(picks, totals):
+    """Yield CSV lines; accumulates level-stakes totals into `totals` as it goes."""
+    UNIT = 1.0
+    yield ROI_CSV_HEADER
+    for p in picks:
+        totals['rows'] += 1
+        oc = p.get('outcome') or ''
+        odds = _settlement_odds(p)
+        sp_odds = float(p.get('sp_odds') or 0)
+        pre_odds = float(p.get('odds') or 0)
+        ef = float(p.get('ew_fraction') or 0.25)
+
+        if oc == 'win':
+            totals['settled'] += 1; totals['stake'] += UNIT; totals['return'] += UNIT * odds
+        elif oc == 'placed':
+            totals['settled'] += 1; totals['stake'] += UNIT
+            totals['return'] += (UNIT / 2) * (1 + (odds - 1) * ef)
+        elif oc == 'loss':
+            totals['settled'] += 1; totals['stake'] += UNIT
+
+        race_time = (p.get('race_time') or '')[:16].replace('T', ' ')
+        yield ','.join([
+            p.get('bet_date', ''),
+            race_time,
+            _csv_quote(p.get('course')),
+            _csv_quote(p.get('horse')),
+            _csv_quote(p.get('trainer')),
+            _csv_quote(p.get('jockey')),
+            str(pre_odds),
+            str(sp_odds),
+            str(ef),
+            p.get('bet_type', 'Each Way'),
+            str(float(p.get('comprehensive_score', 0))),
+            p.get('confidence_grade', ''),
+            oc or 'pending',
+            str(p.get('finish_position', '')),
+            _csv_quote(p.get('winner_horse')),
+            str(p.get('number_of_places', '')),
+        ])
+    profit = totals['return'] - totals['stake']
+    roi_pct = round((profit / totals['stake'] * 100) if totals['stake'] > 0 else 0, 1)
+    yield ''
+    yield (f"SUMMARY,Settled: {totals['settled']},Stake: {totals['stake']:.2f},"
+           f"Return: {totals['return']:.2f},Profit: {profit:.2f},ROI: {roi_pct}%")
+
+
+def _stream_to_s3(lines, key, part_size=5 * 1024 * 1024):
+    """Multipart-upload lines to S3 without holding the whole CSV in memory."""
+    s3 = client('s3')
+    upload_id = s3.create_multipart_upload(Bucket=BUCKET, Key=key, ContentType='text/csv')['UploadId']
+    parts, buf = [], bytearray()
+
+    def _flush():
+        n = len(parts) + 1
+        etag = s3.upload_part(Bucket=BUCKET, Key=key, UploadId=upload_id,
+                              PartNumber=n, Body=bytes(buf))['ETag']
+        parts.append({'PartNumber': n, 'ETag': etag})
+        buf.clear()
+
+    try:
+        for line in lines:
+            buf += (line + '\n').encode('utf-8')
+            if len(buf) >= part_size:
+                _flush()
+        if buf or not parts:
+            _flush()
+        s3.complete_multipart_upload(Bucket=BUCKET, Key=key, UploadId=upload_id,
+                                     MultipartUpload={'Parts': parts})
+    except Exception:
+        s3.abort_multipart_upload(Bucket=BUCKET, Key=key, UploadId=upload_id)
+        raise
+
+
+def export_roi_csv(headers, event=None):
+    """
+    Export all settled UI picks as CSV for ROI verification.
+    Default: streams the CSV to S3 and returns {url} (pre-signed, 1 hour).
+    ?format=csv returns the CSV inline (also the fallback if S3 is unavailable).
+    ?rebuild=1 re-reads every day (a correction older than ROI_REGRADE_DAYS).
+    """
+    qp = (event or {}).get('queryStringParameters') or {}
+    try:
+        stats = {}
+        rebuild = qp.get('rebuild') in ('1', 'true')
+
+        totals = {'rows': 0, 'settled': 0, 'stake': 0.0, 'return': 0.0}
+        if qp.get('format') != 'csv':
+            key = f"exports/roi/BetBudAI_ROI_Data_{datetime.now().strftime('%Y%m%dT%H%M%S')}.csv"
+            try:
+                _stream_to_s3(_iter_roi_csv(iter_roi_rows(rebuild=rebuild, stats=stats), totals), key)
+                url = client('s3').generate_presigned_url(
+                    'get_object', ExpiresIn=3600,
+                    Params={'Bucket': BUCKET, 'Key': key,
+                            'ResponseContentDisposition': 'attachment; filename="BetBudAI_ROI_Data.csv"'},
+                )
+                return {
+                    'statusCode': 200,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success':  True,
+                        'url':      url,
+                        'rows':     totals['rows'],
+                        'settled':  totals['settled'],
+                        'cached_through': stats.get('through'),
+                    })
+                }
+            except Exception as e:
+                print(f'[roi_export] S3 export failed, returning inline CSV: {e}')
+                totals = {'rows': 0, 'settled': 0, 'stake': 0.0, 'return': 0.0}
+
+        csv_headers = dict(headers)
+        csv_headers['Content-Type'] = 'text/csv'
+        csv_headers['Content-Disposition'] = 'attachment; filename="BetBudAI_ROI_Data.csv"'
+        return {
+            'statusCode': 200,
+            'headers': csv_headers,
+            'body': '\n'.join(_iter_roi_csv(iter_roi_rows(rebuild=rebuild), totals))
+        }
+    except Exception as e:
+        print(f'export_roi_csv error: {e}')
+        import traceback; traceback.print_exc()
+        return {
+            'statusCode': 500,
+            'headers': headers,
+            'body': json.dumps({'success': False, 'error': str(e)})
+        }
+
+
+def _query_ui_picks(date_str):
+    """show_in_ui items for one day — the only rows the results views read."""
+    return query_day(date_str, filter_expr='show_in_ui = :ui',
+                     filter_values={':ui': {'BOOL': True}}, plain=True)
+
+
+def check_yesterday_results(headers, all_picks=None):
+    """Check results for yesterday's UI picks only (show_in_ui=True).
+    all_picks: yesterday's items already loaded (get_dashboard) — skips the query."""
+    from datetime import timedelta
+    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    
+    if all_picks is None:
+        # Yesterday's UI picks (paginated partition-key query, learning rows filtered server-side)
+        all_picks = _query_ui_picks(yesterday)
+
+    all_picks = [expand_heavy(decimal_to_float(item)) for item in all_picks]
+    
+    # Filter for UI picks only - keep others in database for learning
+    picks = [item for item in all_picks if item.get('show_in_ui') == True]
+    
+    # Normalize outcome values for frontend compatibility
+    # Database uses: 'won', 'WON', 'lost', 'LOST'
+    # Frontend expects: 'win', 'loss', 'placed'
+    for item in picks:
+        outcome = item.get('outcome', '').lower() if item.get('outcome') else None
+        if outcome in ['won', 'win']:
+            item['outcome'] = 'win'
+        elif outcome in ['lost', 'loss']:
+            item['outcome'] = 'loss'
+        elif outcome in ['placed', 'place']:
+            item['outcome'] = 'placed'
+        # Keep None or other values as-is (for pending/voided)
+    
+    print(f"Yesterday ({yesterday}) - Total picks: {len(all_picks)}, UI picks: {len(picks)}")
+
+    # Exclude retrospective picks (created >30 min after race started, accounting for BST)
+    def _is_retro_yest(pick):
+        import calendar as _cal
+        from datetime import timezone as _tz, timedelta as _td
+        def _uk_off(d):
+            def _last_sun(y, m):
+                last = _cal.monthrange(y, m)[1]
+                return next(day for day in range(last, last - 7, -1)
+                            if datetime(y, m, day).weekday() == 6)
+            bst_start = datetime(d.year, 3, _last_sun(d.year, 3), 1, tzinfo=_tz.utc)
+            bst_end   = datetime(d.year, 10, _last_sun(d.year, 10), 1, tzinfo=_tz.utc)
+            return 1 if bst_start <= datetime(d.year, d.month, d.day, tzinfo=_tz.utc) < bst_end else 0
+        created_s = str(pick.get('created_at', '') or '')
+        race_rt_s = str(pick.get('race_time', '') or '')
+        if len(created_s) < 16 or len(race_rt_s) < 16 or created_s[:10] != race_rt_s[:10]:
+            return False
+        try:
+            race_utc    = datetime.fromisoformat(race_rt_s).astimezone(_tz.utc)
+            uk_off      = _uk_off(race_utc.date())
+            created_utc = datetime.fromisoformat(created_s[:16]) - _td(hours=uk_off)
+            return (created_utc - race_utc).total_seconds() > 30 * 60
+        except Exception:
+            return False
+
+    picks = [p for p in picks if not _is_retro_yest(p)]
+
+    # ONE PICK PER RACE: keep highest-scoring pick, normalise race_time to strip tz offset
+    def _norm_rt_y(rt):
+        return str(rt or '')[:16]
+
+    seen_races = {}
+    for pick in picks:
+        race_key = (pick.get('course', ''), _norm_rt_y(pick.get('race_time', '')))
+        existing = seen_races.get(race_key)
+        score = float(pick.get('comprehensive_score') or pick.get('analysis_score') or 0)
+        existing_score = float(existing.get('comprehensive_score') or existing.get('analysis_score') or 0) if existing else 0
+        if not existing or score > existing_score:
+            seen_races[race_key] = pick
+    picks = list(seen_races.values())
+    picks.sort(key=lambda x: x.get('race_time', ''))
+    print(f"After retro-filter + dedup: {len(picks)} picks")
+
+    if not picks:
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps({
+                'success': True,
+                'message': f'No picks for yesterday',
+                'date': yesterday,
+                'summary': {'total_picks': 0, 'wins': 0, 'losses': 0, 'pending': 0},
+                'horses': {'summary': None, 'picks': []},
+                'greyhounds': {'summary': None, 'picks': []},
+                'picks': []
+            })
+        }
+    
+    # Calculate stats from existing outcomes (case-insensitive)
+    wins = sum(1 for p in picks if str(p.get('outcome', '')).upper() in ['WIN', 'WON'])
+    places = sum(1 for p in picks if str(p.get('outcome', '')).upper() == 'PLACED')
+    losses = sum(1 for p in picks if str(p.get('outcome', '')).upper() in ['LOSS', 'LOST'])
+    pending = sum(1 for p in picks if str(p.get('outcome', '')).upper() in ['PENDING', ''] or p.get('outcome') is None)
+    
+    # EXCLUDE PENDING from stake/return calculations - only count resolved bets
+    resolved_picks = [p for p in picks if str(p.get('outcome', '')).upper() not in ['PENDING', ''] and p.get('outcome') is not None]
+    
+    total_stake = sum(float(p.get('stake', 1.0)) for p in resolved_picks)
+
+    # Calculate total_return from first principles (don't trust stored profit field)
+    total_return = 0.0
+    for p in resolved_picks:
+        outcome = str(p.get('outcome', '')).upper()
+        if outcome in ['WIN', 'WON']:
+            stake = float(p.get('stake', 1.0))
+            odds = _settlement_odds(p)
+            bet_type = p.get('bet_type', 'WIN').upper()
+            if bet_type == 'WIN':
+                total_return += stake * odds
+            else:  # EW
+                ew_fraction = float(p.get('ew_fraction', 0.2) or 0.2)
+                total_return += (stake/2) * odds + (stake/2) * (1 + (odds-1) * ew_fraction)
+        elif outcome == 'PLACED':
+            stake = float(p.get('stake', 1.0))
+            odds = _settlement_odds(p)
+            ew_fraction = float(p.get('ew_fraction', 0.2) or 0.2)
+            total_return += (stake/2) * (1 + (odds-1) * ew_fraction)
+
+    profit = total_return - total_stake
+    roi = (profit / total_stake * 100) if total_stake > 0 else 0
+    
+    # Build race_fields: all runners for yesterday grouped by race (for full race card display)
+    race_fields = {}
+    for item in all_picks:
+        if item.get('sport') != 'horses':
+            continue
+        course    = item.get('course', '') or item.get('venue', '')
+        race_time = item.get('race_time', '')
+        if not course or not race_time:
+            continue
+        key = f"{course}|{race_time}"
+        if key not in race_fields:
+            race_fields[key] = []
+        score = float(item.get('comprehensive_score') or item.get('analysis_score') or 0)
+        race_fields[key].append({
+            'horse':     item.get('horse', ''),
+            'jockey':    item.get('jockey', ''),
+            'trainer':   item.get('trainer', ''),
+            'odds':      float(item.get('odds', 0) or 0),
+            'score':     score,
+            'pick_rank': 1 if item.get('show_in_ui') else 0,
+        })
+    for key in race_fields:
+        race_fields[key].sort(key=lambda r: float(r.get('score', 0)), reverse=True)
+
+    # Separate by sport
+    horse_picks = [p for p in picks if p.get('sport') == 'horses']
+    greyhound_picks = [p for p in picks if p.get('sport') == 'greyhounds']
+    
+    def calculate_sport_summary(sport_picks):
+        if not sport_picks:
+            return None
+        
+        sport_wins = sum(1 for p in sport_picks if str(p.get('outcome', '')).upper() in ['WIN', 'WON'])
+        sport_places = sum(1 for p in sport_picks if str(p.get('outcome', '')).upper() == 'PLACED')
+        sport_losses = sum(1 for p in sport_picks if str(p.get('outcome', '')).upper() in ['LOSS', 'LOST'])
+        sport_pending = sum(1 for p in sport_picks if str(p.get('outcome', '')).upper() in ['PENDING', ''] or p.get('outcome') is None)
+        
+        # EXCLUDE PENDING from stake/return calculations - only count resolved bets
+        sport_resolved = [p for p in sport_picks if str(p.get('outcome', '')).upper() not in ['PENDING', ''] and p.get('outcome') is not None]
+        sport_stake = sum(float(p.get('stake', 1.0)) for p in sport_resolved)
+        sport_return = 0.0
+        for p in sport_resolved:
+            outcome = str(p.get('outcome', '')).upper()
+            if outcome in ['WIN', 'WON']:
+                s = float(p.get('stake', 1.0))
+                o = _settlement_odds(p)
+                bt = p.get('bet_type', 'WIN').upper()
+                if bt == 'WIN':
+                    sport_return += s * o
+                else:  # EW
+                    ewf = float(p.get('ew_fraction', 0.2) or 0.2)
+                    sport_return += (s/2) * o + (s/2) * (1 + (o-1) * ewf)
+            elif outcome == 'PLACED':
+                s = float(p.get('stake', 1.0))
+                o = _settlement_odds(p)
+                ewf = float(p.get('ew_fraction', 0.2) or 0.2)
+                sport_return += (s/2) * (1 + (o-1) * ewf)
+        sport_profit = sport_return - sport_stake
+        sport_roi = (sport_profit / sport_stake * 100) if sport_stake > 0 else 0
+        
+        return {
+            'total_picks': len(sport_picks),
+            'wins': sport_wins,
+            'places': sport_places,
+            'losses': sport_losses,
+            'pending': sport_pending,
+            'total_stake': round(sport_stake, 2),
+            'total_return': round(sport_return, 2),
+            'profit': round(sport_profit, 2),
+            'roi': round(sport_roi, 1),
+            'strike_rate': round((sport_wins / (sport_wins + sport_losses) * 100) if (sport_wins + sport_losses) > 0 else 0, 1)
+        }
+    
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': json.dumps({
+            'success': True,
+            'date': yesterday,
+            'summary': {
+                'total_picks': len(picks),
+                'wins': wins,
+                'places': places,
+                'losses': losses,
+                'pending': pending,
+                'total_stake': round(total_stake, 2),
+                'total_return': round(total_return, 2),
+                'profit': round(profit, 2),
+                'roi': round(roi, 1),
+                'strike_rate': round((wins / (wins + losses) * 100) if (wins + losses) > 0 else 0, 1)
+            },
+            'horses': {
+                'summary': calculate_sport_summary(horse_picks),
+                'picks': horse_picks
+            },
+            'greyhounds': {
+                'summary': calculate_sport_summary(greyhound_picks),
+                'picks': greyhound_picks
+            },
+            'picks': picks,
+            'race_fields': race_fields,
+            'debug_timestamp': datetime.now().isoformat()
+        })
+    }
+
+def check_today_results(headers, all_picks=None):
+    """Check results for today's UI picks only (show_in_ui=True).
+    all_picks: today's items already loaded (get_dashboard) — skips the query."""
+    today = datetime.now().strftime('%Y-%m-%d')
+    
+    if all_picks is None:
+        # Today's UI picks (paginated partition-key query, learning rows filtered server-side)
+        all_picks = _query_ui_picks(today)
+
+    all_picks = [expand_heavy(decimal_to_float(item)) for item in all_picks]
+    print(f"Total picks retrieved (paginated): {len(all_picks)}")
+
+    # Filter for UI picks only - keep others in database for learning
+    picks = [item for item in all_picks if item.get('show_in_ui') == True]
+
+    # Filter: race must be TODAY (excludes yesterday's races stored with today's bet_date)
+    picks = [item for item in picks if str(item.get('race_time', '')).startswith(today)]
+
+    # Exclude retrospective picks: created more than 30 min after the race started.
+    # race_time has an explicit UTC offset (+00:00 or +01:00); created_at is UK
+    # local time (no suffix). Compare both in UTC so BST offsets don't confuse things.
+    def _is_retrospective(pick):
+        import calendar as _cal
+        from datetime import datetime as _dt, timezone as _tz, timedelta as _td
+        def _uk_off(d):
+            def _last_sun(y, m):
+                last = _cal.monthrange(y, m)[1]
+                return next(day for day in range(last, last - 7, -1)
+                            if _dt(y, m, day).weekday() == 6)
+            bst_start = _dt(d.year, 3, _last_sun(d.year, 3), 1, tzinfo=_tz.utc)
+            bst_end   = _dt(d.year, 10, _last_sun(d.year, 10), 1, tzinfo=_tz.utc)
+            return 1 if bst_start <= _dt(d.year, d.month, d.day, tzinfo=_tz.utc) < bst_end else 0
+        created_s = str(pick.get('created_at', '') or '')
+        race_rt_s = str(pick.get('race_time', '') or '')
+        if len(created_s) < 16 or len(race_rt_s) < 16 or created_s[:10] != race_rt_s[:10]:
+            return False
+        try:
+            race_utc    = _dt.fromisoformat(race_rt_s).astimezone(_tz.utc)
+            uk_off      = _uk_off(race_utc.date())
+            created_utc = _dt.fromisoformat(created_s[:16]) - _td(hours=uk_off)
+            return (created_utc - race_utc).total_seconds() > 30 * 60
+        except Exception:
+            return False
+
+    picks = [p for p in picks if not _is_retrospective(p)]
+
+    # ONE PICK PER RACE: keep only the highest-scoring pick per (course, race_time)
+    # Normalise race_time to YYYY-MM-DDTHH:MM (strip timezone offset) so that
+    # records stored as +00:00 and +01:00 for the same local UK race are deduped.
+    def _norm_rt(rt):
+        s = str(rt or '')
+        return s[:16]  # e.g. "2026-03-31T14:15" from any offset variant
+
+    seen_races = {}
+    for pick in picks:
+        race_key = (pick.get('course', ''), _norm_rt(pick.get('race_time', '')))
+        existing = seen_races.get(race_key)
+        score = float(pick.get('comprehensive_score') or pick.get('analysis_score') or 0)
+        existing_score = float(existing.get('comprehensive_score') or existing.get('analysis_score') or 0) if existing else 0
+        if not existing or score > existing_score:
+            seen_races[race_key] = pick
+    picks = list(seen_races.values())
+    # Sort by race_time for display (top-N cap applied at pick selection time, not here)
+    picks.sort(key=lambda x: x.get('race_time', ''))
+    print(f"After dedup: {len(picks)} picks")
+
+    # Normalize outcome values for frontend compatibility
+    # Database uses: 'won', 'WON', 'lost', 'LOST'
+    # Frontend expects: 'win', 'loss', 'placed'
+    for item in picks:
+        outcome = item.get('outcome', '').lower() if item.get('outcome') else None
+        if outcome in ['won', 'win']:
+            item['outcome'] = 'win'
+        elif outcome in ['lost', 'loss']:
+            item['outcome'] = 'loss'
+        elif outcome in ['placed', 'place']:
+            item['outcome'] = 'placed'
+        # Keep None or other values as-is (for pending/voided)
+    
+    if not picks:
+        print("NO PICKS for today - returning empty")
+        # Calculate next run time (every 2 hours, on the hour)
+        now = datetime.now()
+        current_hour = now.hour
+        # Round up to next 2-hour boundary
+        next_hour = ((current_hour // 2) + 1) * 2
+        if next_hour >= 24:
+            next_run = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        else:
+            next_run = now.replace(hour=next_hour, minute=0, second=0, microsecond=0)
+        
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps({
+                'success': True,
+                'message': f'No selections met the criteria',
+                'date': today,
+                'last_run': now.strftime('%Y-%m-%d %H:%M:%S'),
+                'next_run': next_run.strftime('%Y-%m-%d %H:%M:%S'),
+                'summary': {'total_picks': 0, 'wins': 0, 'losses': 0, 'pending': 0},
+                'horses': {'summary': None, 'picks': []},
+                'greyhounds': {'summary': None, 'picks': []},
+                'picks': []
+            })
+        }
+    
+    # Use all picks for results checking
+    print(f"Proceeding with {len(picks)} picks from today")
+    
+    # Use existing outcomes from database (already fetched by fetch_today_results.py)
+    # No need to call Betfair API - outcomes are already in the picks
+    picks_with_results = picks
+    
+    # Calculate overall stats from existing outcomes (case-insensitive)
+    wins = sum(1 for p in picks if str(p.get('outcome', '')).upper() in ['WIN', 'WON'])
+    places = sum(1 for p in picks if str(p.get('outcome', '')).upper() == 'PLACED')
+    losses = sum(1 for p in picks if str(p.get('outcome', '')).upper() in ['LOSS', 'LOST'])
+    pending = sum(1 for p in picks if str(p.get('outcome', '')).upper() in ['PENDING', ''] or p.get('outcome') is None)
+    
+    # EXCLUDE PENDING from stake/return calculations - only count resolved bets
+    resolved_picks = [p for p in picks if str(p.get('outcome', '')).upper() not in ['PENDING', ''] and p.get('outcome') is not None]
+    
+    total_stake = sum(float(p.get('stake', 2.0)) for p in resolved_picks)
+    
+    # Calculate returns based on outcomes (only resolved bets)
+    total_return = 0
+    for p in resolved_picks:
+        outcome = str(p.get('outcome', '')).upper()
+        if outcome in ['WIN', 'WON']:
+            stake = float(p.get('stake', 2.0))
+            odds = _settlement_odds(p)
+            bet_type = p.get('bet_type', 'WIN').upper()
+            if bet_type == 'WIN':
+                total_return += stake * odds
+            else:  # EW
+                ew_fraction = float(p.get('ew_fraction', 0.2))
+                total_return += (stake/2) * odds + (stake/2) * (1 + (odds-1) * ew_fraction)
+        elif outcome == 'PLACED':
+            stake = float(p.get('stake', 2.0))
+            odds = _settlement_odds(p)
+            ew_fraction = float(p.get('ew_fraction', 0.2))
+            total_return += (stake/2) * (1 + (odds-1) * ew_fraction)
+    
+    profit = total_return - total_stake
+    roi = (profit / total_stake * 100) if total_stake > 0 else 0
+    
+    # Separate picks by sport
+    horse_picks = [p for p in picks_with_results if p.get('sport') == 'horses']
+    greyhound_picks = [p for p in picks_with_results if p.get('sport') == 'greyhounds']
+    
+    # Calculate sport-specific summaries
+    def calculate_sport_summary(sport_picks):
+        if not sport_picks:
+            return None
+        
+        sport_wins = sum(1 for p in sport_picks if str(p.get('outcome', '')).upper() in ['WIN', 'WON'])
+        sport_places = sum(1 for p in sport_picks if str(p.get('outcome', '')).upper() == 'PLACED')
+        sport_losses = sum(1 for p in sport_picks if str(p.get('outcome', '')).upper() in ['LOSS', 'LOST'])
+        sport_pending = sum(1 for p in sport_picks if str(p.get('outcome', '')).upper() in ['PENDING', ''] or p.get('outcome') is None)
+        
+        # EXCLUDE PENDING from stake/return calculations - only count resolved bets
+        sport_resolved = [p for p in sport_picks if str(p.get('outcome', '')).upper() not in ['PENDING', ''] and p.get('outcome') is not None]
+        sport_stake = sum(float(p.get('stake', 2.0)) for p in sport_resolved)
+        
+        # Calculate returns for this sport (only resolved bets)
+        sport_return = 0
+        for p in sport_resolved:
+            outcome = str(p.get('outcome', '')).upper()
+            if outcome in ['WIN', 'WON']:
+                stake = float(p.get('stake', 2.0))
+                odds = _settlement_odds(p)
+                bet_type = p.get('bet_type', 'WIN').upper()
+                if bet_type == 'WIN':
+                    sport_return += stake * odds
+                else:  # EW
+                    ew_fraction = float(p.get('ew_fraction', 0.2))
+                    sport_return += (stake/2) * odds + (stake/2) * (1 + (odds-1) * ew_fraction)
+            elif outcome == 'PLACED':
+                stake = float(p.get('stake', 2.0))
+                odds = _settlement_odds(p)
+                ew_fraction = float(p.get('ew_fraction', 0.2))
+                sport_return += (stake/2) * (1 + (odds-1) * ew_fraction)
+        
+        sport_profit = sport_return - sport_stake
+        sport_roi = (sport_profit / sport_stake * 100) if sport_stake > 0 else 0
+        
+        return {
+            'total_picks': len(sport_picks),
+            'wins': sport_wins,
+            'places': sport_places,
+            'losses': sport_losses,
+            'pending': sport_pending,
+            'total_stake': round(sport_stake, 2),
+            'total_return': round(sport_return, 2),
+            'profit': round(sport_profit, 2),
+            'roi': round(sport_roi, 1),
+            'strike_rate': round((sport_wins / (sport_wins + sport_losses) * 100) if (sport_wins + sport_losses) > 0 else 0, 1)
+        }
+    
+    summary = {
+        'total_picks': len(picks),
+        'wins': wins,
+        'places': places,
+        'losses': losses,
+        'pending': pending,
+        'total_stake': round(total_stake, 2),
+        'total_return': round(total_return, 2),
+        'profit': round(profit, 2),
+        'roi': round(roi, 1),
+        'strike_rate': round((wins / (wins + losses) * 100) if (wins + losses) > 0 else 0, 1)
+    }
+    
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': json.dumps({
+            'success': True,
+            'date': today,
+            'summary': summary,
+            'horses': {
+                'summary': calculate_sport_summary(horse_picks),
+                'picks': horse_picks
+            },
+            'greyhounds': {
+                'summary': calculate_sport_summary(greyhound_picks),
+                'picks': greyhound_picks
+            },
+            'picks': picks_with_results,
+            'debug_timestamp': datetime.now().isoformat()
+        })
+    }
+
+
+# ── Dashboard: today + yesterday + cumulative ROI in one round trip ──────────
+
+def _select_fields(payload, fields):
+    """Keep only dotted paths, e.g. ['today.picks', 'today.summary', 'roi']."""
+    out = {}
+    for path in fields:
+        src, dst = payload, out
+        parts = path.split('.')
+        for i, part in enumerate(parts):
+            if not isinstance(src, dict) or part not in src:
+                break
+            if i == len(parts) - 1:
+                dst[part] = src[part]
+            else:
+                src = src[part]
+                dst = dst.setdefault(part, {})
+    return out
+
+
+def _trim_picks(view, pick_fields):
+    if isinstance(view, dict) and isinstance(view.get('picks'), list):
+        view['picks'] = [{k: p[k] for k in pick_fields if k in p} for p in view['picks']]
+
+
+def get_dashboard(headers, event):
+    """
+    GET /api/dashboard — what the results view used to fetch with three calls
+    (/results/today, /results/yesterday, /results/cumulative-roi).
+    Today's and yesterday's items are queried once, in parallel, and shared by
+    all three views; ROI reuses them for its unsettled tail.
+
+    ?fields=today.picks,today.summary,roi   dotted paths to return (default: all)
+    ?pick_fields=horse,course,odds,outcome  keys kept on each pick
+    Responses are gzipped when the client sends Accept-Encoding: gzip.
+    """
+    import gzip, base64
+    from concurrent.futures import ThreadPoolExecutor
+    try:
+        qp = event.get('queryStringParameters') or {}
+        req_headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+        today = datetime.now().strftime('%Y-%m-%d')
+        yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+
+        client('dynamodb'), client('s3')   # create before the fan-out
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            today_items, yest_items = ex.map(_query_ui_picks, [today, yesterday])
+        roi_picks, _, _ = load_roi_rows(preloaded={today: today_items, yesterday: yest_items})
+
+        payload = {
+            'success':   True,
+            'generated': datetime.now().isoformat(),
+            'today':     json.loads(check_today_results(headers, all_picks=today_items)['body']),
+            'yesterday': json.loads(check_yesterday_results(headers, all_picks=yest_items)['body']),
+            'roi':       _roi_summary(roi_picks),
+        }
+        if qp.get('fields'):
+            payload = {'success': True, **_select_fields(payload, qp['fields'].split(','))}
+        if qp.get('pick_fields'):
+            pick_fields = qp['pick_fields'].split(',')
+            for view in ('today', 'yesterday'):
+                _trim_picks(payload.get(view), pick_fields)
+
+        body = json.dumps(payload, separators=(',', ':'), default=str)
+        if 'gzip' in req_headers.get('accept-encoding', ''):
+            gz_headers = dict(headers)
+            gz_headers['Content-Encoding'] = 'gzip'
+            return {
+                'statusCode': 200,
+                'headers': gz_headers,
+                'isBase64Encoded': True,
+                'body': base64.b64encode(gzip.compress(body.encode('utf-8'), compresslevel=6)).decode('ascii'),
+            }
+        return {'statusCode': 200, 'headers': headers, 'body': body}
+    except Exception as e:
+        print(f'get_dashboard error: {e}')
+        return {
+            'statusCode': 500,
+            'headers': headers,
+            'body': json.dumps({'success': False, 'error': str(e)})
+        }
+
+
+def auto_record_pending_results(headers):
+    """
+    Fetch Betfair results for any pending picks whose race finished >30 min ago.
+    Triggered by EventBridge every 15 minutes, or manually via /api/results/auto-record.
+    """
+    now_utc = datetime.utcnow()
+    today     = now_utc.strftime('%Y-%m-%d')
+    yesterday = (now_utc - timedelta(days=1)).strftime('%Y-%m-%d')
+
+    # ── 1. Scan DynamoDB for pending picks (today + yesterday) ────────────────
+    from boto3.dynamodb.conditions import Attr
+    pending = []
+    for date in [today, yesterday]:
+        resp = table.scan(
+            FilterExpression=Attr('bet_date').eq(date) & (Attr('outcome').eq('pending') | Attr('outcome').not_exists() | Attr('outcome').eq(None)) & Attr('show_in_ui').eq(True)
+        )
+        pending.extend(decimal_to_float(item) for item in resp.get('Items', []))
+
+    # Keep only races that finished >30 minutes ago and have a market_id
+    to_check = []
+    for pick in pending:
+        rt_str    = pick.get('race_time', '')
+        market_id = str(pick.get('market_id', '')).strip()
+        if not market_id or not rt_str:
+            continue
+        try:
+            rt = datetime.fromisoformat(rt_str.replace('Z', '+00:00')).replace(tzinfo=None)
+            if rt + timedelta(minutes=30) < now_utc:
+                to_check.append(pick)
+        except Exception:
+            continue
+
+    if not to_check:
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps({'success': True, 'message': 'No pending results ready to check', 'checked': 0})
+        }
+
+    print(f'auto_record: checking {len(to_check)} pending picks')
+
+    # ── 2. Authenticate to Betfair ────────────────────────────────────────────
+    sm = client('secretsmanager')
+    creds = json.loads(sm.get_secret_value(SecretId='betfair-credentials')['SecretString'])
+    app_key = creds['app_key']
+    BF_BASE = 'https://api.betfair.com/exchange/betting/rest/v1.0'
+
+    session_token = None
+    try:
+        login_data = urllib.parse.urlencode(
+            {'username': creds['username'], 'password': creds['password']}
+        ).encode('utf-8')
+        login_req = urllib.request.Request(
+            'https://identitysso.betfair.com/api/login',
+            data=login_data,
+            headers={'X-Application': app_key, 'Content-Type': 'application/x-www-form-urlencoded'},
+            method='POST'
+        )
+        with urllib.request.urlopen(login_req, timeout=10) as r:
+            result = json.loads(r.read())
+            session_token = result.get('sessionToken') or result.get('token')
+    except Exception as e:
+        print(f'Betfair login error: {e}')
+        session_token = creds.get('session_token', '')
+
+    if not session_token:
+        return {
+            'statusCode': 500, 'headers': headers,
+            'body': json.dumps({'success': False, 'error': 'Could not authenticate to Betfair'})
+        }
+
+    bf_hdrs = {
+        'X-Application':  app_key,
+        'X-Authentication': session_token,
+        'Content-Type':   'application/json',
+        'Accept':         'application/json',
+    }
+
+    def bf_post(endpoint, payload):
+        data = json.dumps(payload).encode('utf-8')
+        req  = urllib.request.Request(f'{BF_BASE}/{endpoint}/', data=data, headers=bf_hdrs, method='POST')
+        with urllib.request.urlopen(req, timeout=15) as r:
+            return json.loads(r.read())
+
+    # ── 3. Group picks by market_id ───────────────────────────────────────────
+    by_market = {}
+    for pick in to_check:
+        mid = str(pick['market_id']).strip()
+        by_market.setdefault(mid, []).append(pick)
+
+    updated = 0
+    errors  = []
+    results_summary = []
+
+    for market_id, picks in by_market.items():
+        try:
+            # ── listMarketBook: statuses + SP ─────────────────────────────
+            book_resp = bf_post('listMarketBook', {
+                'marketIds': [market_id],
+                'priceProjection': {'priceData': ['SP_TRADED']},
+                'orderProjection': 'EXECUTABLE',
+                'matchProjection': 'NO_ROLLUP',
+            })
+            if not book_resp:
+                errors.append(f'{market_id}: empty book response')
+                continue
+
+            market_book  = book_resp[0] if isinstance(book_resp, list) else book_resp
+            market_status = market_book.get('status', '')
+            runners_book  = market_book.get('runners', [])
+
+            # If market not CLOSED yet, skip — check again next cycle
+            if market_status not in ('CLOSED',):
+                print(f'{market_id}: status={market_status} – not settled yet, will retry')
+                continue
+
+            # ── listMarketCatalogue: horse names by selectionId ───────────────
+            runner_names = {}
+            try:
+                cat_resp = bf_post('listMarketCatalogue', {
+                    'filter': {'marketIds': [market_id]},
+                    'marketProjection': ['RUNNER_DESCRIPTION'],
+                })
+                cat_market = (cat_resp[0] if isinstance(cat_resp, list) else cat_resp) or {}
+                for r in cat_market.get('runners', []):
+                    runner_names[str(r.get('selectionId'))] = r.get('runnerName', '')
+            except Exception as ce:
+                print(f'Catalogue fetch failed for {market_id}: {ce}')
+
+            # Build lookup dicts from book
+            sort_by_sel   = {str(r.get('selectionId')): r.get('sortPriority', 99) for r in runners_book}
+            status_by_sel = {str(r.get('selectionId')): r.get('status', '')      for r in runners_book}
+            # SP lookup: prefer sp.actualSP, fall back to lastPriceTraded
+            sp_by_sel = {}
+            for r in runners_book:
+                sp_data = r.get('sp', {})
+                sp_val  = (sp_data.get('actualSP') if sp_data else None) or r.get('lastPriceTraded')
+                if sp_val:
+                    sp_by_sel[str(r.get('selectionId'))] = float(sp_val)
+
+            # Winner = runner with sortPriority==1 (or status==WINNER)
+            winner_sel_id = None
+            winner_name   = 'Unknown'
+            for r in runners_book:
+                if r.get('sortPriority') == 1 or r.get('status') == 'WINNER':
+                    winner_sel_id = str(r.get('selectionId'))
+                    winner_name   = runner_names.get(winner_sel_id, 'Unknown')
+                    break
+
+            # ── Update each pick in this market ───────────────────────────────
+            for pick in picks:
+                pick_sel   = str(pick.get('selection_id', '')).strip()
+                sel_status = status_by_sel.get(pick_sel, '')
+                finish     = int(sort_by_sel.get(pick_sel, 99))
+                sp_odds    = sp_by_sel.get(pick_sel)  # None if not traded
+
+                if sel_status == 'WINNER' or finish == 1:
+                    outcome = 'win'
+                elif finish in (2, 3):
+                    outcome = 'placed'
+                elif sel_status in ('LOSER', 'REMOVED') or finish > 3:
+                    outcome = 'loss'
+                else:
+                    print(f"  {pick.get('horse')}: sel_id={pick_sel} not found in book (may have been a non-runner)")
+                    continue
+
+                # Calculate P&L using SP when available, else stored pick odds
+                stake = float(pick.get('stake', 6.0))
+                settlement_odds = sp_odds if sp_odds else float(pick.get('odds', 0))
+                if outcome == 'win':
+                    profit = round(stake * (settlement_odds - 1), 2)
+                elif outcome == 'placed':
+                    ef = float(pick.get('ew_fraction', 0.25) or 0.25)
+                    profit = round((stake / 2) * (1 + (settlement_odds - 1) * ef) - stake, 2)
+                else:
+                    profit = round(-stake, 2)
+
+                dynamo_table = table
+                update_expr = 'SET outcome = :o, finish_position = :f, winner_horse = :w, result_recorded_at = :t, profit = :p'
+                expr_vals = {
+                    ':o': outcome,
+                    ':f': finish,
+                    ':w': winner_name,
+                    ':t': now_utc.isoformat() + 'Z',
+                    ':p': Decimal(str(profit)),
+                }
+                if sp_odds:
+                    update_expr += ', sp_odds = :sp'
+                    expr_vals[':sp'] = Decimal(str(round(sp_odds, 2)))
+
+                dynamo_table.update_item(
+                    Key={'bet_id': pick['bet_id'], 'bet_date': pick['bet_date']},
+                    UpdateExpression=update_expr,
+                    ExpressionAttributeValues=expr_vals
+                )
+                updated += 1
+                results_summary.append({
+                    'bet_id':  pick['bet_id'],
+                    'bet_date': pick['bet_date'],
+                    'horse':   pick.get('horse'),
+                    'course':  pick.get('course'),
+                    'outcome': outcome,
+                    'finish':  finish,
+                    'winner':  winner_name,
+                    'sp_odds': sp_odds,
+                    'profit':  profit,
+                })
+                sp_note = f" SP={sp_odds}" if sp_odds else " (no SP)"
+                print(f"  Recorded: {pick.get('horse')} @ {pick.get('course')} → {outcome} pos={finish} profit={profit:+.2f}{sp_note}")
+
+        except Exception as e:
+            errors.append(f'{market_id}: {str(e)}')
+            print(f'Error processing market {market_id}: {e}')
+
+    # Push the settled deltas to connected frontends, one event per day
+    by_date = {}
+    for r in results_summary:
+        by_date.setdefault(r['bet_date'], []).append(result_delta({
+            'bet_id': r['bet_id'], 'outcome': r['outcome'], 'finish_position': r['finish'],
+            'sp_odds': r['sp_odds'] or None, 'profit': r['profit'], 'winner_horse': r['winner'],
+        }))
+    for d, deltas in by_date.items():
+        publish_event('results', {'results': deltas}, date_str=d)
+
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': json.dumps({
+            'success':  True,
+            'checked':  len(to_check),
+            'updated':  updated,
+            'results':  results_summary,
+            'errors':   errors,
+        })
+    }
+
+
+def lambda_handler(event, context):
+    """Standalone entry point — serves only this module's routes."""
+    return dispatch(event, context, only=__name__)
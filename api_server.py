@@ -9,6 +9,8 @@ import boto3
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
 import hashlib, os, base64, re
+from config_snapshot import pin_snapshot, save_weights
+from pick_record import expand_heavy
 
 app = Flask(__name__)
 CORS(app)  # Allow React app to call this API
@@ -88,8 +90,8 @@ def get_picks():
         response = table.scan()
         items = response.get('Items', [])
         
-        # Convert Decimals to floats
-        items = [decimal_to_float(item) for item in items]
+        # Convert Decimals to floats; learning rows' compressed blobs → plain lists
+        items = [expand_heavy(decimal_to_float(item)) for item in items]
         
         # Sort by timestamp descending
         items.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
@@ -1197,7 +1199,7 @@ def get_cheltenham_picks():
             FilterExpression='pick_date = :d',
             ExpressionAttributeValues={':d': target_date}
         )
-        today_items = {item['race_name']: decimal_to_float(item)
+        today_items = {item['race_name']: expand_heavy(decimal_to_float(item))
                        for item in today_resp.get('Items', [])}
 
         # Fetch yesterday (for context if today has no saves yet)
@@ -1205,7 +1207,7 @@ def get_cheltenham_picks():
             FilterExpression='pick_date = :d',
             ExpressionAttributeValues={':d': yesterday}
         )
-        yest_items = {item['race_name']: decimal_to_float(item)
+        yest_items = {item['race_name']: expand_heavy(decimal_to_float(item))
                       for item in yest_resp.get('Items', [])}
 
         # Build response grouped by festival day
@@ -1301,7 +1303,7 @@ def apply_learning():
             )
             all_items.extend(resp.get('Items', []))
 
-        picks = [decimal_to_float(i) for i in all_items]
+        picks = [expand_heavy(decimal_to_float(i)) for i in all_items]
         picks = [p for p in picks
                  if p.get('show_in_ui') == True
                  and p.get('result_winner_name')
@@ -1328,9 +1330,9 @@ def apply_learning():
         }
         WEIGHT_MIN, WEIGHT_MAX, MAX_NUDGE = 2.0, 40.0, 1.0  # reduced MAX_NUDGE from 1.5 to 1.0
         try:
-            wt_resp = table.get_item(Key={'bet_id': 'SYSTEM_WEIGHTS', 'bet_date': 'CONFIG'})
-            raw_wt  = wt_resp.get('Item', {}).get('weights', {})
-            weights = {k: float(v) for k, v in raw_wt.items()} if raw_wt else {}
+            # Fresh read — nudges must apply on top of the latest version, and the
+            # versioned save below rejects the write if another job got in first
+            weights = dict(pin_snapshot(force=True)['weights'])
         except Exception:
             weights = {}
 
@@ -1371,20 +1373,14 @@ def apply_learning():
                     changes[factor] = {'from': old_v, 'to': new_v, 'nudge': round(nudge, 2)}
 
             if changes:
-                table.put_item(Item={
-                    'bet_id':     'SYSTEM_WEIGHTS',
-                    'bet_date':   'CONFIG',
-                    'weights':    {k: Decimal(str(v)) for k, v in weights.items()},
-                    'updated_at': datetime.now().isoformat(),
-                    'source':     'api_learning_apply',
-                    'learning_date': target_date,
-                })
+                new_version = save_weights(weights, 'api_learning_apply', learning_date=target_date)
 
         return jsonify({
             'success':        True,
             'date':           target_date,
             'picks_analysed': len(picks),
             'changes':        changes,
+            'weights_version': new_version if changes else None,
             'races':          race_summaries,
             'message':        f"Applied {len(changes)} weight update(s) from {len(picks)} missed winner(s)" if changes
                               else "No weight changes needed",
@@ -1396,28 +1392,18 @@ def apply_learning():
 
 @app.route('/api/favs-run', methods=['GET'])
 def get_favs_run():
-    """Return today's suspect-favourite lay analysis from favs_run.py logic (read-only)."""
+    """Return today's suspect-favourite lay analysis from lay_scanner (read-only)."""
     try:
         from datetime import date as _date, timedelta
-        import importlib.util, sys as _sys, os as _os
-
-        # Load favs_run without side effects
-        spec = importlib.util.spec_from_file_location(
-            'favs_run', _os.path.join(_os.path.dirname(__file__), 'favs_run.py'))
-        fr = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(fr)
+        import lay_scanner
 
         days = int(request.args.get('days', 1))
         start_str = request.args.get('date', _date.today().strftime('%Y-%m-%d'))
         start_d = _date.fromisoformat(start_str)
         dates = [(start_d + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
 
-        # Fetch SL fast-results once to annotate finished races with win/loss
-        winner_map = fr._fetch_sl_winner_map()
-
-        all_results = []
-        for d in dates:
-            all_results.extend(fr.analyse_date(d, table, winner_map))
+        # Shared memo + SL winner-map cache (same rows as /api/favs-run and favs_run.py)
+        all_results, _ = lay_scanner.analyse_dates(dates)
 
         total   = len(all_results)
         caution = sum(1 for r in all_results if r['lay_score'] >= 4)
@@ -53,10 +53,8 @@ This module fixes all 5 gaps by:
 
 import re
 import json
-import boto3
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
-from collections import defaultdict
 from pathlib import Path
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -84,37 +82,25 @@ ODDS_BANDS = [
 # DATA LOADING
 # ─────────────────────────────────────────────────────────────────────────────
 
+_OUTCOME_LABEL = {'win': 'WIN', 'placed': 'PLACED', 'loss': 'LOSS'}
+
+
 def load_settled_picks(days_back: int = DAYS_BACK):
-    """Load show_in_ui=True picks that have a WIN/LOSS/PLACED outcome."""
-    db    = boto3.resource('dynamodb', region_name=REGION)
-    table = db.Table(DYNAMODB_TABLE)
+    """Load show_in_ui=True picks that have a WIN/LOSS/PLACED outcome.
+    Read from the shared settled-picks dataset (settled_picks.py) — no table scan."""
+    import settled_picks
 
     cutoff = (datetime.now(timezone.utc) - timedelta(days=days_back)).strftime('%Y-%m-%d')
     picks  = []
-
-    resp = table.scan()
-    items = resp['Items']
-    while resp.get('LastEvaluatedKey'):
-        resp  = table.scan(ExclusiveStartKey=resp['LastEvaluatedKey'])
-        items += resp['Items']
-
-    for it in items:
-        if not it.get('show_in_ui'):
-            continue
-        outcome = str(it.get('result_emoji', it.get('outcome', ''))).upper()
-        if outcome not in ('WIN', 'WON', 'LOSS', 'LOST', 'PLACED'):
-            continue
-        bet_date = str(it.get('bet_date', ''))
-        if bet_date < cutoff:
-            continue
+    for it in settled_picks.rows(since=cutoff, ui_only=True):
         picks.append({
-            'horse':   it.get('horse', ''),
+            'horse':   it.get('horse') or '',
             'odds':    float(it.get('sp_odds') or it.get('odds') or 0),
-            'score':   float(it.get('comprehensive_score', it.get('analysis_score', 0)) or 0),
-            'outcome': outcome,
-            'profit':  float(it.get('profit', 0) or 0),
-            'date':    bet_date,
-            'trainer': str(it.get('trainer', '')),
+            'score':   float(it.get('comprehensive_score') or 0),
+            'outcome': _OUTCOME_LABEL[it['outcome']],
+            'profit':  float(it.get('profit') or 0),
+            'date':    it['bet_date'],
+            'trainer': str(it.get('trainer') or ''),
         })
 
     print(f"[auto_fix] Loaded {len(picks)} settled show_in_ui picks (last {days_back} days)")
@@ -125,31 +111,31 @@ def load_settled_picks(days_back: int = DAYS_BACK):
 # ANALYSIS
 # ─────────────────────────────────────────────────────────────────────────────
 
-def calc_band_stats(picks):
-    """Return per-band ROI and win-rate stats."""
-    bands = {label: {'wins': 0, 'total': 0, 'profit': 0.0, 'stake': 0.0}
-             for label, _, _ in ODDS_BANDS}
-
-    for p in picks:
-        odds = p['odds']
-        for label, lo, hi in ODDS_BANDS:
-            if lo <= odds < hi:
-                bands[label]['total']  += 1
-                bands[label]['stake']  += 10  # level-stakes £10
-                bands[label]['profit'] += p['profit']
-                if p['outcome'] in ('WIN', 'WON'):
-                    bands[label]['wins'] += 1
-                break
-
-    for label, stats in bands.items():
-        if stats['stake'] > 0:
-            stats['roi']      = round(stats['profit'] / stats['stake'] * 100, 1)
-            stats['win_rate'] = round(stats['wins'] / stats['total'] * 100, 1) if stats['total'] else 0
-        else:
-            stats['roi']      = 0.0
-            stats['win_rate'] = 0.0
+def _picks_frame(picks):
+    import pandas as pd
+    import learning_analytics
+    df = pd.DataFrame(picks, columns=['odds', 'score', 'outcome', 'profit'])
+    df['won'] = df['outcome'].isin(['WIN', 'WON'])
+    df['placed'] = df['won'] | df['outcome'].eq('PLACED')
+    return learning_analytics.prepare(df)
+
 
-    return bands
+def calc_band_stats(picks):
+    """Return per-band ROI and win-rate stats (£10 level stakes, recorded profit)."""
+    import learning_analytics
+    stats = learning_analytics.odds_bands(_picks_frame(picks), ODDS_BANDS, odds_col='odds',
+                                          pl_col='profit', stake=10)
+    return {
+        label: {
+            'wins':     int(r['wins']),
+            'total':    int(r['n']),
+            'profit':   float(r['pl']),
+            'stake':    10.0 * int(r['n']),
+            'roi':      round(float(r['roi']), 1),
+            'win_rate': round(100 * float(r['win_rate']), 1),
+        }
+        for label, r in stats.iterrows()
+    }
 
 
 def calc_score_threshold_stats(picks):
@@ -157,25 +143,17 @@ def calc_score_threshold_stats(picks):
     For each 5-point score bucket (85-89, 90-94, 95-99, 100+),
     calculate ROI. Returns dict keyed by bucket lower bound.
     """
-    buckets = defaultdict(lambda: {'wins': 0, 'total': 0, 'profit': 0.0})
-    for p in picks:
-        score = p['score']
-        bucket = int(score // 5) * 5   # e.g. 87 → 85, 92 → 90
-        buckets[bucket]['total']  += 1
-        buckets[bucket]['profit'] += p['profit']
-        if p['outcome'] in ('WIN', 'WON'):
-            buckets[bucket]['wins'] += 1
-
-    result = {}
-    for bucket, s in buckets.items():
-        stake = s['total'] * 10
-        result[bucket] = {
-            'total':    s['total'],
-            'wins':     s['wins'],
-            'roi':      round(s['profit'] / stake * 100, 1) if stake else 0,
-            'win_rate': round(s['wins'] / s['total'] * 100, 1) if s['total'] else 0,
+    import learning_analytics
+    stats = learning_analytics.score_bands(_picks_frame(picks), width=5, pl_col='profit', stake=10)
+    return {
+        int(bucket): {
+            'total':    int(r['n']),
+            'wins':     int(r['wins']),
+            'roi':      round(float(r['roi']), 1),
+            'win_rate': round(100 * float(r['win_rate']), 1),
         }
-    return result
+        for bucket, r in stats.iterrows()
+    }
 
 
 # ─────────────────────────────────────────────────────────────────────────────
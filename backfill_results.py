@@ -0,0 +1,346 @@
+"""
+BACKFILL RESULTS — settle every unresolved pick over a date range, in parallel
+=============================================================================
+Missed settlements used to be recovered one date at a time with one-off
+scripts (_record_pending_results.py, _fix_today_places.py, update_results.py,
+fetch_settled_today.py, sl_results_fetcher.py <date>).  This settles a whole
+range in one run:
+
+  1. pending   — one paginated Query per day (UI and learning picks with no
+                 final outcome), all days concurrently
+  2. SL        — one results index per day, then only the race pages at
+                 courses that still have pending picks, deduplicated and
+                 fetched through http_client's per-host pool
+  3. Betfair   — picks SL could not place: one listMarketBook per
+                 MARKET_BOOK_BATCH markets across the whole range
+                 (WINNER / LOSER only — a Betfair-settled loser is 'loss')
+  4. write     — TransactWriteItems in chunks of WRITE_BATCH, each update
+                 conditional on the pick still being unresolved
+
+Idempotent: only unresolved picks are selected and every write re-checks
+that under a condition, so re-running a range (or racing the evening
+pipeline) never overwrites a settled result.  Resumable: each finished
+day is recorded in the checkpoint file; a re-run skips days with nothing
+left unresolved and retries the rest.
+
+Usage:
+    python backfill_results.py 2026-04-01 2026-04-07
+    python backfill_results.py 2026-04-01 2026-04-07 --dry-run
+    python backfill_results.py 2026-04-01 2026-04-07 --workers 4 --reset
+    python backfill_results.py 2026-04-05                     # one day
+"""
+
+import os
+import re
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import http_client
+import pick_record
+from lay_scanner import local_hhmm
+from sl_results_fetcher import get_race_urls, parse_race_result, norm, norm_course, settlement
+
+REGION            = 'eu-west-1'
+TABLE             = 'SureBetBets'
+CHECKPOINT_PATH   = os.environ.get('BACKFILL_CHECKPOINT', 'backfill_checkpoint.json')
+CHECKPOINT_VERSION = 1
+MARKET_BOOK_BATCH = 40       # marketIds per listMarketBook call (same cap as daily_learning)
+WRITE_BATCH       = 25       # updates per TransactWriteItems call
+MATCH_WINDOW_MIN  = 15       # SL off time vs our race time (sl_results_fetcher uses the same)
+DEFAULT_STAKE     = 6
+UNRESOLVED        = ('pending', 'PENDING', 'WON', 'LOST', 'LOSS', '')
+BETFAIR_BOOK_URL  = 'https://api.betfair.com/exchange/betting/rest/v1.0/listMarketBook/'
+
+_PICK_FIELDS = ('bet_id', 'bet_date', 'horse', 'horse_name', 'course', 'race_time', 'odds',
+                'bet_amount', 'outcome', 'show_in_ui', 'is_learning_pick', 'market_id', 'selection_id')
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _client(service):
+    with _clients_lock:
+        if service not in _clients:
+            import boto3
+            _clients[service] = boto3.client(service, region_name=REGION)
+        return _clients[service]
+
+
+def date_range(start, end):
+    d0, d1 = date.fromisoformat(start), date.fromisoformat(end or start)
+    return [(d0 + timedelta(days=i)).isoformat() for i in range((d1 - d0).days + 1)]
+
+
+# ── Checkpoint ────────────────────────────────────────────────────────────────
+
+def load_checkpoint(path=CHECKPOINT_PATH):
+    try:
+        with open(path) as f:
+            cp = json.load(f)
+        if cp.get('version') == CHECKPOINT_VERSION:
+            return cp
+    except Exception:
+        pass
+    return {'version': CHECKPOINT_VERSION, 'dates': {}}
+
+
+def save_checkpoint(cp, path=CHECKPOINT_PATH):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(cp, f, indent=1)
+    os.replace(tmp, path)       # a killed run never leaves a half-written checkpoint
+
+
+# ── 1. Pending picks ──────────────────────────────────────────────────────────
+
+def pending_picks(date_str):
+    """UI and learning picks for the day with no final outcome."""
+    expr, names = pick_record.projection(_PICK_FIELDS)
+    pages = _client('dynamodb').get_paginator('query').paginate(
+        TableName=TABLE, KeyConditionExpression='bet_date = :d',
+        ExpressionAttributeValues={':d': {'S': date_str}},
+        ProjectionExpression=expr, ExpressionAttributeNames=names)
+    out = []
+    for page in pages:
+        for low in page.get('Items', []):
+            p = pick_record.plain_item(low)
+            if not (p.get('show_in_ui') is True or p.get('is_learning_pick') is True):
+                continue
+            if (p.get('outcome') or '') in UNRESOLVED:
+                out.append(p)
+    return out
+
+
+# ── 2. Sporting Life ──────────────────────────────────────────────────────────
+
+def _course_wanted(course, wanted):
+    c = norm_course(course)
+    return any(c == w or c in w or w in c for w in wanted)
+
+
+def sl_results(date_str, picks):
+    """{course_norm: [(minutes, winner, off_time, runners_in_finish_order)]} for
+    the courses our pending picks ran at (one index fetch, then those race pages)."""
+    wanted = {norm_course(p.get('course')) for p in picks if p.get('course')}
+    races = [r for r in get_race_urls(date_str) if _course_wanted(r[1], wanted)]
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        parsed = list(ex.map(lambda r: (r[1], parse_race_result(r[3])), races))
+    results = {}
+    for course_name, (off_time, winner, runners) in parsed:
+        if not (off_time and winner):
+            continue
+        h, mn = map(int, off_time.split(':'))
+        results.setdefault(norm_course(course_name), []).append((h * 60 + mn, winner, off_time, runners))
+    return results
+
+
+def _find(results, course, hhmm):
+    try:
+        h, mn = map(int, hhmm.split(':'))
+    except ValueError:
+        return None
+    target = h * 60 + mn
+    c = norm_course(course)
+    for key, rows in results.items():
+        if key != c and key not in c and c not in key:
+            continue
+        for mins, winner, off_time, runners in rows:
+            if abs(mins - target) <= MATCH_WINDOW_MIN:
+                return winner, runners
+    return None
+
+
+def _update(pick, outcome, emoji, profit, winner, finish_pos, analysis, source):
+    return {
+        'key':     {'bet_date': pick['bet_date'], 'bet_id': pick['bet_id']},
+        'horse':   pick.get('horse') or pick.get('horse_name') or '',
+        'values':  {':o': outcome, ':re': emoji, ':p': Decimal(str(profit)), ':r': emoji,
+                    ':w': winner or '', ':fp': finish_pos or 0, ':ra': analysis, ':src': source},
+    }
+
+
+def settle_from_sl(picks, results):
+    """(updates, still_pending) — finishing order from the SL race pages."""
+    updates, left = [], []
+    for p in picks:
+        horse = p.get('horse') or p.get('horse_name') or ''
+        found = _find(results, p.get('course', ''), local_hhmm(p.get('race_time'), p['bet_date']))
+        if not found:
+            left.append(p)
+            continue
+        winner, runners = found
+        pos = next((i + 1 for i, r in enumerate(runners) if norm(r) == norm(horse)), None)
+        odds, stake = float(p.get('odds') or 0), float(p.get('bet_amount') or DEFAULT_STAKE)
+        outcome, emoji, profit, _, analysis = settlement(pos, odds, stake, winner, len(runners))
+        updates.append(_update(p, outcome, emoji, profit, winner, pos, analysis, 'sl_backfill'))
+    return updates, left
+
+
+# ── 3. Betfair ────────────────────────────────────────────────────────────────
+
+def betfair_books(market_ids):
+    """{market_id: book} for CLOSED markets, MARKET_BOOK_BATCH ids per call."""
+    if not market_ids:
+        return {}
+    from betfair_odds_fetcher import get_betfair_session
+    app_key, token = get_betfair_session()
+    headers = {'X-Application': app_key, 'X-Authentication': token,
+               'Content-Type': 'application/json', 'Accept': 'application/json'}
+    chunks = [market_ids[i:i + MARKET_BOOK_BATCH] for i in range(0, len(market_ids), MARKET_BOOK_BATCH)]
+
+    def _fetch(chunk):
+        try:
+            return http_client.post(BETFAIR_BOOK_URL, json={'marketIds': chunk},
+                                    headers=headers, timeout=20).raise_for_status().json() or []
+        except Exception as e:
+            print(f'  [Backfill] listMarketBook failed for {len(chunk)} markets: {e}')
+            return []
+
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        books = [b for page in ex.map(_fetch, chunks) for b in page]
+    print(f'  [Backfill] Betfair: {len(market_ids)} markets in {len(chunks)} listMarketBook call(s)')
+    return {b['marketId']: b for b in books if b.get('status') == 'CLOSED'}
+
+
+def settle_from_betfair(picks, books):
+    """(updates, still_pending) — WIN market runner status (no place information)."""
+    updates, left = [], []
+    for p in picks:
+        book = books.get(p.get('market_id'))
+        runners = {str(r.get('selectionId')): r for r in (book or {}).get('runners', [])}
+        mine = runners.get(str(p.get('selection_id') or ''))
+        if not mine or mine.get('status') not in ('WINNER', 'LOSER'):
+            left.append(p)          # open market, unknown runner or non-runner (REMOVED)
+            continue
+        won = mine['status'] == 'WINNER'
+        odds, stake = float(p.get('odds') or 0), float(p.get('bet_amount') or DEFAULT_STAKE)
+        outcome, emoji, profit, _, _ = settlement(1 if won else None, odds, stake, '', 0)
+        analysis = f"{'Won' if won else 'Lost'} at {odds} (Betfair settlement, no place data)"
+        updates.append(_update(p, outcome, emoji, profit, p.get('horse') if won else '',
+                               1 if won else 0, analysis, 'betfair_backfill'))
+    return updates, left
+
+
+# ── 4. Batched conditional writes ─────────────────────────────────────────────
+
+_SET = ('SET outcome = :o, result_emoji = :re, profit = :p, actual_result = :r, '
+        'result_winner_name = :w, winner_name = :w, finish_position = :fp, '
+        'result_analysis = :ra, result_source = :src, result_settled_at = :at')
+_UNRESOLVED_VALS = {f':u{i}': v for i, v in enumerate(UNRESOLVED)}
+_CONDITION = f"attribute_not_exists(outcome) OR outcome IN ({', '.join(_UNRESOLVED_VALS)})"
+
+
+def _low_update(u, now):
+    from boto3.dynamodb.types import TypeSerializer
+    ser = TypeSerializer()
+    vals = {**u['values'], ':at': now, **_UNRESOLVED_VALS}
+    return {
+        'TableName': TABLE,
+        'Key': {k: ser.serialize(v) for k, v in u['key'].items()},
+        'UpdateExpression': _SET,
+        'ConditionExpression': _CONDITION,
+        'ExpressionAttributeValues': {k: ser.serialize(v) for k, v in vals.items()},
+    }
+
+
+def write_updates(updates):
+    """Apply updates in TransactWriteItems chunks. A chunk cancelled because one
+    pick was settled meanwhile is replayed item by item. Returns (written, skipped)."""
+    ddb = _client('dynamodb')
+    now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    written = skipped = 0
+    for i in range(0, len(updates), WRITE_BATCH):
+        ops = [_low_update(u, now) for u in updates[i:i + WRITE_BATCH]]
+        try:
+            ddb.transact_write_items(TransactItems=[{'Update': op} for op in ops])
+            written += len(ops)
+            continue
+        except ddb.exceptions.TransactionCanceledException:
+            pass
+        for op in ops:
+            try:
+                ddb.update_item(**op)
+                written += 1
+            except ddb.exceptions.ConditionalCheckFailedException:
+                skipped += 1          # settled by someone else since the query
+    return written, skipped
+
+
+# ── Driver ────────────────────────────────────────────────────────────────────
+
+def backfill(start, end=None, workers=6, dry_run=False, reset=False, checkpoint_path=CHECKPOINT_PATH):
+    t0 = time.perf_counter()
+    cp = {'version': CHECKPOINT_VERSION, 'dates': {}} if reset else load_checkpoint(checkpoint_path)
+    dates = [d for d in date_range(start, end) if not cp['dates'].get(d, {}).get('done')]
+    skipped_days = len(date_range(start, end)) - len(dates)
+    print(f'[Backfill] {start} → {end or start}: {len(dates)} day(s) to settle'
+          f'{f", {skipped_days} already done (checkpoint)" if skipped_days else ""}')
+    if not dates:
+        return cp
+
+    # 1 + 2: pending picks and SL results, all days concurrently
+    def _day(d):
+        picks = pending_picks(d)
+        if not picks:
+            return d, [], [], []
+        updates, left = settle_from_sl(picks, sl_results(d, picks))
+        return d, picks, updates, left
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        days = list(ex.map(_day, dates))
+
+    # 3: one Betfair pass over every leftover market in the range
+    leftovers = [p for _, _, _, left in days for p in left if p.get('market_id') and p.get('selection_id')]
+    books = betfair_books(sorted({p['market_id'] for p in leftovers})) if leftovers else {}
+
+    # 4: write per day, checkpoint after each
+    totals = {'pending': 0, 'settled': 0, 'unresolved': 0}
+    for d, picks, updates, left in days:
+        bf_updates, still = settle_from_betfair(left, books)
+        updates += bf_updates
+        if dry_run:
+            written, skipped = 0, 0
+            for u in updates:
+                print(f"  [dry-run] {d} {u['horse']:<28} → {u['values'][':o']:<7} ({u['values'][':src']})")
+        else:
+            written, skipped = write_updates(updates)
+        print(f'  [Backfill] {d}: {len(picks)} pending, {written} settled '
+              f'({len(updates) - len(bf_updates)} SL, {len(bf_updates)} Betfair), '
+              f'{skipped} already settled, {len(still)} unresolved')
+        totals['pending'] += len(picks)
+        totals['settled'] += written
+        totals['unresolved'] += len(still)
+        if not dry_run:
+            cp['dates'][d] = {'done': not still, 'pending': len(picks), 'settled': written,
+                              'unresolved': [p['bet_id'] for p in still],
+                              'at': datetime.now(timezone.utc).isoformat(timespec='seconds')}
+            save_checkpoint(cp, checkpoint_path)
+
+    print(f"[Backfill] {len(dates)} day(s): {totals['pending']} pending, {totals['settled']} settled, "
+          f"{totals['unresolved']} unresolved ({time.perf_counter() - t0:.1f}s)")
+    return cp
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Settle every unresolved pick over a date range')
+    parser.add_argument('start', help='First date YYYY-MM-DD')
+    parser.add_argument('end', nargs='?', default=None, help='Last date YYYY-MM-DD (default: start)')
+    parser.add_argument('--workers', type=int, default=6, help='Days processed concurrently (default: 6)')
+    parser.add_argument('--dry-run', action='store_true', help='Match and print, write nothing')
+    parser.add_argument('--reset', action='store_true', help='Ignore the checkpoint and redo every day')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH, help=f'Checkpoint file (default: {CHECKPOINT_PATH})')
+    args = parser.parse_args()
+    if not re.match(r'^\d{4}-\d{2}-\d{2}$', args.start) or (args.end and not re.match(r'^\d{4}-\d{2}-\d{2}$', args.end)):
+        parser.error('dates must be YYYY-MM-DD')
+    backfill(args.start, args.end, workers=args.workers, dry_run=args.dry_run,
+             reset=args.reset, checkpoint_path=args.checkpoint)
+    http_client.print_metrics()
+
+
+if __name__ == '__main__':
+    main()
@@ -337,6 +337,13 @@ def get_live_betfair_races():
     except Exception as _pe:
         print(f"  [price_steam] Warning: {_pe}")
 
+    # ── MARKET MODEL: overround / FLB-adjusted implied probabilities per race ──
+    try:
+        import market_model
+        market_model.annotate_races(races)
+    except Exception as _me:
+        print(f"  [market_model] Warning: {_me}")
+
     print(f"Returning {len(races)} races with odds in betting window")
     return races
 
@@ -18,12 +18,20 @@ This ensures:
 """
 
 import json
+import time
 import boto3
 from boto3.dynamodb.conditions import Attr
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
-from comprehensive_pick_logic import analyze_horse_comprehensive, should_skip_race
+from comprehensive_pick_logic import analyze_horse_comprehensive, should_skip_race, get_going_conditions
 from notify_picks import send_pick_notifications
+from going_service import prewarm_going
+from config_snapshot import pin_snapshot, use_snapshot
+from push_events import publish_event, pick_delta
+from pick_record import pack_blob, unpack_blob
+from stage_profiler import StageTimer, profiled, signal_costs
+import score_calibration
+import market_model
 
 # ── Form enricher (deep per-run history from Racing Post/Sporting Life) ──────
 # Unlocks: exact_course_win (+20), exact_distance_win (+20), going_win_match
@@ -154,21 +162,13 @@ def tier_from_score(score):
     return              "POOR",   "POOR (Very unlikely)",        "red"
 
 
-def _win_prob_pct(score: float) -> int:
+def _win_prob_pct(score: float, market_name: str = None) -> int:
     """Calibrated score-to-win-probability mapping.
-    FIXED 2026-04-17: Must be monotonic (higher score = higher probability).
-    Based on actuals: 100+ ≈ 30-35% wins, 90-99 ≈ 25%, 80-89 ≈ 20%.
-    Capped at 38% — model cannot reliably claim >38% in any conditions."""
-    if score >= 130: return 38
-    if score >= 110: return 35
-    if score >= 100: return 32
-    if score >= 95:  return 28
-    if score >= 90:  return 25
-    if score >= 85:  return 22
-    if score >= 80:  return 19
-    if score >= 75:  return 16
-    if score >= 70:  return 14
-    return 12
+    Reads the score → win % table fitted nightly from settled picks (score_calibration,
+    per race type from the market name).  Falls back to the hand-written curve
+    (score_calibration.STATIC_CURVE: 100+ ≈ 32%, 90-94 ≈ 25%, capped at 38%) until a
+    table has been fitted."""
+    return int(round(score_calibration.win_prob(score, market_name)))
 
 
 def _expected_value(win_prob_pct: int, decimal_odds: float) -> float:
@@ -202,20 +202,99 @@ def _kelly_fraction(win_prob_pct: int, decimal_odds: float, fraction: float = 0.
     return round(min(fraction * k, 0.12), 4)
 
 
-def analyze_and_save_all():
+def analyze_and_save_all(races=None):
     """
     Two-pass algorithm:
       Pass 1 — Score every horse, collect per-race bests.
       Select top-5 cross-race bests.
       Pass 2 — Save everything with correct show_in_ui flag.
+
+    races: the card already in memory (sf_analysis via race_card); None reads
+    response_horses.json from the working directory.
+
+    Per-stage timings land in SYSTEM_ANALYSIS_MANIFEST.timing and as CloudWatch
+    metrics; PIPELINE_PROFILE=1 also writes a cProfile dump and SIGNAL_COSTS=1 a
+    per-signal time / I/O report (stage_profiler.py).
     """
-    races = load_races()
+    with profiled('analysis'):
+        return _analyze_and_save_all(races)
+
+
+def _analyze_and_save_all(races=None):
+    timer = StageTimer('analysis')
+    timer.start('load_races')
+    if races is None:
+        races = load_races()
+    timer.stop('load_races')
     if not races:
         print("No races found — run betfair_odds_fetcher.py first")
         return
+    return select_and_save([score_races(races, timer)], timer)
+
 
+def load_day_inputs():
+    """
+    The day-wide score_races() inputs, loaded once.  sf_analysis prepare hands
+    them to every course shard so none of them repeats the history scan, the
+    config pin or the OurHub calls.
+    """
+    ourhub_data = {}
+    if _OURHUB_AVAILABLE:
+        try:
+            ourhub_data = fetch_ourhub_data(datetime.now(timezone.utc).strftime('%Y-%m-%d'))
+        except Exception as e:
+            print(f"  [OurHub] Fetch failed (non-fatal — shards score without it): {e}")
+    return {
+        'horse_history': load_horse_history(),
+        'sl_declared':   load_sl_declared_field_sizes(),
+        'snapshot':      pin_snapshot(),
+        'calibration':   score_calibration.load() or {},
+        'ourhub_data':   ourhub_data,
+    }
+
+
+def score_races(races, timer=None, horse_history=None, sl_declared=None, snapshot=None,
+                calibration=None, ourhub_data=None):
+    """
+    Pass 1 over a set of races — the whole card, or one course shard in the
+    Step Functions Map: enrich, score every runner, find each race's best.
+    Nothing is written.  Returns a part for select_and_save().
+
+    The day-wide inputs are loaded here unless passed in — a shard gets the
+    ones its run loaded once (sf_analysis prepare), so every course is scored
+    with the same config version and OurHub is called once per run:
+      horse_history  horse → {wins, runs, win_rate}
+      sl_declared    (course_lower, HH:MM) → declared runners
+      snapshot       pinned config_snapshot dict
+      calibration    score_calibration table ({} = never fitted)
+      ourhub_data    fetch_ourhub_data() result
+    """
+    timer = timer or StageTimer('analysis')
     # Load SL declared field sizes for S8 completeness gate
-    sl_declared = load_sl_declared_field_sizes()
+    if sl_declared is None:
+        sl_declared = load_sl_declared_field_sizes()
+
+    # Pin weights/thresholds/tier lists for the whole run — a mid-run learning
+    # write cannot leave half the card scored with one version and half another
+    _config = use_snapshot(snapshot) if snapshot is not None else pin_snapshot()
+    # Same for the score → win-probability table: loaded once, O(1) lookups per runner
+    if calibration is not None:
+        score_calibration.use(calibration)
+    else:
+        score_calibration.load()
+
+    # ── STAGE 0: Going prewarm ───────────────────────────────────────────────
+    # One batched weather request for today's courses only, persisted to the
+    # dated going cache (local file + S3) so scoring never fetches lazily.
+    # sf_betfair_fetch normally prewarms already — this is then a cache hit.
+    _today_courses = sorted({(r.get('course') or r.get('venue') or '') for r in races} - {''})
+    print(f"\n[STAGE 0] Going prewarm — {len(_today_courses)} courses")
+    timer.start('going_prewarm')
+    try:
+        prewarm_going(_today_courses)
+    except Exception as e:
+        print(f"  [Going] Prewarm failed (non-fatal — scoring fetches on demand): {e}")
+    timer.stop('going_prewarm')
 
     # ── STAGE 1: Deep form enrichment ────────────────────────────────────────
     # Fetches last-6-race run history from Racing Post / Sporting Life for every
@@ -227,7 +306,8 @@ def analyze_and_save_all():
     _form_enriched_count = 0
     if _FORM_ENRICHER_AVAILABLE:
         print(f"\n[STAGE 1/5] Deep form enrichment — {_form_total_horses} horses from Racing Post/SL...")
-        races = _form_enrich(races, verbose=True)
+        with timer.stage('form_enrichment'):
+            races = _form_enrich(races, verbose=True)
         _form_enriched_count = sum(
             1 for race in races for runner in race.get('runners', [])
             if runner.get('form_runs')
@@ -239,15 +319,18 @@ def analyze_and_save_all():
 
     # ── STAGE 1b: OurHub Racing API enrichment ───────────────────────────────
     # Fetches confirmed going, trainer/jockey win rates, and win probabilities.
-    # Only 3 API calls per day (well within 80/day free tier).
+    # Only 3 API calls per run (well within 80/day free tier) — Map shards are
+    # handed the run's data rather than calling again.
     if _OURHUB_AVAILABLE:
         _oh_date = datetime.now(timezone.utc).strftime('%Y-%m-%d')
         print(f"\n[STAGE 1b] OurHub API enrichment for {_oh_date}...")
+        timer.start('ourhub')
         try:
-            _oh_data = fetch_ourhub_data(_oh_date)
+            _oh_data = ourhub_data if ourhub_data is not None else fetch_ourhub_data(_oh_date)
             races = _ourhub_enrich(races, _oh_data)
         except Exception as e:
             print(f"  [OurHub] Enrichment failed (non-fatal): {e}")
+        timer.stop('ourhub')
     else:
         print("\n[STAGE 1b] OurHub enrichment unavailable — using defaults")
 
@@ -259,42 +342,11 @@ def analyze_and_save_all():
     print("=" * 100 + "\n")
 
     today        = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-    avg_winner_odds = 3.80  # RECALIBRATED 2026-04-17: shifted from 4.65 to centre of best-performing 2-5 range
-
-    # ── CHECK EXISTING UI PICKS (intraday accumulation guard) ─────────────────
-    # Each refresh only fetches FUTURE races, so previous picks are never overwritten.
-    # Without this guard, 3 new picks are added per 2-hour refresh → 9+ picks/day.
-    # Weekends have more racing cards → allow 8 picks; weekdays capped at 5.
-    _dow = datetime.now(timezone.utc).weekday()  # 0=Mon … 6=Sun
-    MAX_DAILY_UI_PICKS = 5   # 2026-04-17: Hard cap — 5 picks/day every day (free see 2, paid see 5)
-    from boto3.dynamodb.conditions import Key as _Key
-    _existing_resp = table.query(KeyConditionExpression=_Key('bet_date').eq(today))
-    _existing_items = _existing_resp.get('Items', [])
-    while _existing_resp.get('LastEvaluatedKey'):
-        _existing_resp = table.query(
-            KeyConditionExpression=_Key('bet_date').eq(today),
-            ExclusiveStartKey=_existing_resp['LastEvaluatedKey'])
-        _existing_items.extend(_existing_resp.get('Items', []))
-    _existing_ui = [i for i in _existing_items if i.get('show_in_ui') is True]
-    _existing_ui_count = len(_existing_ui)
-    now_utc = datetime.now(timezone.utc)
-    cutoff  = now_utc + timedelta(minutes=15)
-    # Count UI picks whose races are PAST or within the 15-min cutoff as "locked".
-    # These races won't appear in this analysis run, so their show_in_ui=True
-    # records persist untouched.  Only races AFTER the cutoff are truly
-    # re-analysable: this run's selection engine will overwrite them (promote or
-    # demote) so they don't consume a permanent slot.
-    _locked_ui = []
-    for _eui in _existing_ui:
-        _ert = _eui.get('race_time', '')
-        try:
-            _ert_dt = datetime.fromisoformat(_ert.replace('Z', '+00:00'))
-            if _ert_dt.astimezone(timezone.utc) <= cutoff:
-                _locked_ui.append(_eui)
-        except Exception:
-            _locked_ui.append(_eui)  # treat unparseable as past
-    _locked_count = len(_locked_ui)
-    _locked_ui_ids = {i['bet_id'] for i in _locked_ui}
+    now_utc      = datetime.now(timezone.utc)
+    cutoff       = now_utc + timedelta(minutes=15)   # races inside this are not re-scored
+    # Optimal-odds baseline is per race now: market_model.winner_odds_baseline
+    # (field-aware, from the book, anchored so a typical field is 3.80); 3.80
+    # itself for races without enough prices
 
     # Build set of race identifiers from the CURRENT scrape so we only re-analyse
     # picks whose race is actually in this scrape.  Picks from races not in the
@@ -310,61 +362,19 @@ def analyze_and_save_all():
         if _cs_course and _cs_time:
             _current_scrape_races.add((_cs_course, _cs_time))
 
-    # Only track genuinely ranked picks (rank 1-5) as candidates for drop detection,
-    # AND only if their race appears in the current scrape's race list.
-    # Without the rank filter, every show_in_ui=True item (including previous drops)
-    # counts, causing exponential inflation across refreshes.
-    # Without the scrape-race filter, picks from a different scrape run get demoted
-    # simply because their race isn't in this run's data.
-    _reanalysable_ui_ids = set()
-    _preserved_ui_ids = set()  # picks kept because their race isn't in this scrape
-    for _eui in _existing_ui:
-        if _eui['bet_id'] in _locked_ui_ids:
-            continue
-        if int(_eui.get('pick_rank', 0)) <= 0:
-            continue
-        # Check if this pick's race is in the current scrape
-        _eui_course = (_eui.get('course') or _eui.get('venue') or '').lower().strip()
-        _eui_time = str(_eui.get('race_time', ''))[:16]
-        _race_in_scrape = (_eui_course, _eui_time) in _current_scrape_races
-        if not _race_in_scrape:
-            # Also try fuzzy match: course substring match at same time
-            _race_in_scrape = any(
-                _st == _eui_time and (_sc in _eui_course or _eui_course in _sc)
-                for _sc, _st in _current_scrape_races
-            )
-        if _race_in_scrape:
-            _reanalysable_ui_ids.add(_eui['bet_id'])
-        else:
-            _preserved_ui_ids.add(_eui['bet_id'])
-            _locked_ui_ids.add(_eui['bet_id'])  # treat as locked for slot counting
-            _locked_count += 1
-
-    if _preserved_ui_ids:
-        print(f"  Preserved {len(_preserved_ui_ids)} picks (race not in current scrape):")
-        for _pid in _preserved_ui_ids:
-            _pmatch = next((i for i in _existing_ui if i['bet_id'] == _pid), {})
-            print(f"    - {_pmatch.get('horse', _pid)} ({_pmatch.get('course', '?')} "
-                  f"{str(_pmatch.get('race_time', ''))[:16]})")
-
-    _slots_remaining = max(0, MAX_DAILY_UI_PICKS - _locked_count)
-    print(f"  Existing UI picks today: {_existing_ui_count} ({_locked_count} locked/past/preserved, "
-          f"{len(_reanalysable_ui_ids)} re-analysable) / {MAX_DAILY_UI_PICKS} "
-          f"({_slots_remaining} slots remaining)")
-    if _slots_remaining == 0:
-        print(f"  Daily pick cap reached — new horses will be saved as learning data only")
-    # Use remaining slots instead of TARGET_PICKS for this run
-    _effective_target = min(TARGET_PICKS, _slots_remaining)
-
     # ── STAGE 2: Horse history from DynamoDB ─────────────────────────────────
-    print("[STAGE 2/5] Loading horse history from DynamoDB...")
-    horse_history = load_horse_history()
+    if horse_history is None:
+        print("[STAGE 2/5] Loading horse history from DynamoDB...")
+        with timer.stage('horse_history'):
+            horse_history = load_horse_history()
 
     # ── PASS 1 ───────────────────────────────────────────────────────────────
     # Build a list of races, each containing scored runner items.
     # Also track the best-scoring horse in each race.
     all_races_data = []  # [{venue, race_time, market_id, runners:[{item, score}], best_idx}]
 
+    timer.start('scoring')
+    signal_costs.enable_from_env()   # SIGNAL_COSTS=1 → per-signal time / I/O ledger
     for race in races:
         # FIX 2026-04-04: betfair_odds_fetcher writes 'course' (not 'venue'). Read 'course' first,
         # fall back to 'venue' for backward compat. Without this every pick gets course=Unknown
@@ -396,11 +406,23 @@ def analyze_and_save_all():
             pass  # unparseable time — process anyway
 
         print(f"[{venue}  {race_time[:16]}]  {len(runners)} runners")
+        _race_t0 = time.perf_counter()
 
         # Find the race favourite (lowest decimal odds) — used as market signal
         valid_runners = [r for r in runners if float(r.get('odds', 0)) > 1.0]
         favourite_odds = min((float(r.get('odds', 99)) for r in valid_runners), default=99)
 
+        # Race going as scored (OurHub confirmed, else the dated going cache) — stored
+        # on every item so the learning analytics can break results down by going
+        race_going = (race.get('ourhub_going')
+                      or (get_going_conditions(venue).get(venue) or {}).get('going', '') or '')
+
+        # Market-implied probabilities (normally set by betfair_odds_fetcher; cached
+        # card files from before it did are annotated here)
+        if 'winner_odds_baseline' not in race:
+            market_model.annotate_race(race)
+        avg_winner_odds = race['winner_odds_baseline']
+
         # Collect weight_lbs for every runner in this race so scoring can do relative comparison
         field_weights = [int(r.get('weight_lbs', 0) or 0) for r in runners if int(r.get('weight_lbs', 0) or 0) > 0]
 
@@ -413,6 +435,7 @@ def analyze_and_save_all():
             if race.get('ourhub_going'):
                 runner['_race_ourhub_going'] = race['ourhub_going']
 
+            _runner_t0 = time.perf_counter()
             score, breakdown, reasons = analyze_horse_comprehensive(
                 runner,
                 venue,
@@ -421,6 +444,7 @@ def analyze_and_save_all():
                 field_weights=field_weights,
                 n_runners=len(runners),
             )
+            timer.add('score_runner', (time.perf_counter() - _runner_t0) * 1000)
 
             # ── Database history bonus ───────────────────────────────────────
             # If we've seen this horse before and it has a meaningful win rate,
@@ -507,6 +531,7 @@ def analyze_and_save_all():
                 breakdown['price_steam'] = 0
 
             confidence_level, confidence_grade, confidence_color = tier_from_score(score)
+            win_prob = _win_prob_pct(score, market_name)
 
             bet_id = (f"{race_time}_{venue}_{horse_name}"
                       .replace(' ', '_').replace(':', '').replace('.', ''))
@@ -529,9 +554,14 @@ def analyze_and_save_all():
                 'decimal_odds':        Decimal(str(odds)) if odds else Decimal('0'),
                 'combined_confidence': Decimal(str(score)),
                 'comprehensive_score': Decimal(str(score)),
-                'win_probability':      _win_prob_pct(score),
-                'expected_value':       Decimal(str(_expected_value(_win_prob_pct(score), odds or 0))),
-                'kelly_fraction':       Decimal(str(_kelly_fraction(_win_prob_pct(score), odds or 0))),
+                'win_probability':      win_prob,
+                'expected_value':       Decimal(str(_expected_value(win_prob, odds or 0))),
+                'kelly_fraction':       Decimal(str(_kelly_fraction(win_prob, odds or 0))),
+                'market_probability':   (Decimal(str(round(100 * runner['market_prob'], 1)))
+                                         if runner.get('market_prob') is not None else None),
+                'market_edge':          (Decimal(str(round(win_prob - 100 * runner['market_prob'], 1)))
+                                         if runner.get('market_prob') is not None else None),
+                'market_rank':          runner.get('market_rank'),
                 'opening_price':        Decimal(str(odds)) if odds else Decimal('0'),
                 'confidence_level':    confidence_level,
                 'confidence_grade':    confidence_grade,
@@ -541,12 +571,15 @@ def analyze_and_save_all():
                 'is_learning_pick':    True,    # will be set in pass 2
                 'pick_rank':           0,       # 1-5 for top picks; 0 = learning
                 'analysis_type':       'comprehensive_7factor',
+                'weights_version':     _config['version'],
+                'config_version':      _config['config_version'],
                 'score_breakdown':     breakdown,
                 'selection_reasons':   reasons,
                 'sport':               'horses',
                 'outcome':             'pending',
                 'market_id':           market_id,
                 'market_name':         market_name,
+                'going':               race_going,
                 'selection_id':        runner.get('selectionId', 0),
                 'race_coverage_pct':   Decimal('100'),
                 'race_total_count':    len(runners),
@@ -620,8 +653,136 @@ def analyze_and_save_all():
             'sl_declared_count': sl_count,           # from SL racecard (0 if unavailable)
             'missing_runners':   missing_runners,    # runners in SL not in Betfair
         })
+        timer.add('score_race', (time.perf_counter() - _race_t0) * 1000)
+    timer.stop('scoring')
+    _signal_report = []
+    if signal_costs.enabled:
+        signal_costs.print_report()
+        _signal_report = signal_costs.report(top=15)
+        signal_costs.disable()
+
+    return {
+        'today':          today,
+        'cutoff':         cutoff.isoformat(),
+        'races':          all_races_data,
+        'scrape':         sorted(_current_scrape_races),
+        'races_in':       len(races),
+        'horses_total':   _form_total_horses,
+        'form_enriched':  _form_enriched_count,
+        'history_horses': len(horse_history),
+        'signal_costs':   _signal_report,
+        'config':         {'version': _config['version'], 'config_version': _config['config_version']},
+    }
+
+
+def select_and_save(parts, timer=None):
+    """
+    The cross-race step over one or more score_races() parts: intraday
+    accumulation guard, top-5 selection (quality gates, hot-prospect slot),
+    Pass 2 saves every horse with its show_in_ui flag, then the coverage check,
+    manifest, push event and notifications.
+    """
+    timer = timer or StageTimer('analysis')
+    today  = parts[0]['today']
+    cutoff = min(datetime.fromisoformat(p['cutoff']) for p in parts)
+    _config = parts[0]['config']
+    all_races_data = [rd for p in parts for rd in p['races']]
+    if len(parts) > 1:
+        all_races_data.sort(key=lambda rd: (rd['race_time'], rd['venue']))
+    _races_in             = sum(p['races_in'] for p in parts)
+    _form_total_horses    = sum(p['horses_total'] for p in parts)
+    _form_enriched_count  = sum(p['form_enriched'] for p in parts)
+    _history_horses       = max(p['history_horses'] for p in parts)
+    _signal_report        = next((p['signal_costs'] for p in parts if p['signal_costs']), [])
+
+    # ── CHECK EXISTING UI PICKS (intraday accumulation guard) ─────────────────
+    # Each refresh only fetches FUTURE races, so previous picks are never overwritten.
+    # Without this guard, 3 new picks are added per 2-hour refresh → 9+ picks/day.
+    # Weekends have more racing cards → allow 8 picks; weekdays capped at 5.
+    _dow = datetime.now(timezone.utc).weekday()  # 0=Mon … 6=Sun
+    MAX_DAILY_UI_PICKS = 5   # 2026-04-17: Hard cap — 5 picks/day every day (free see 2, paid see 5)
+    from boto3.dynamodb.conditions import Key as _Key
+    timer.start('existing_picks')
+    _existing_resp = table.query(KeyConditionExpression=_Key('bet_date').eq(today))
+    _existing_items = _existing_resp.get('Items', [])
+    while _existing_resp.get('LastEvaluatedKey'):
+        _existing_resp = table.query(
+            KeyConditionExpression=_Key('bet_date').eq(today),
+            ExclusiveStartKey=_existing_resp['LastEvaluatedKey'])
+        _existing_items.extend(_existing_resp.get('Items', []))
+    timer.stop('existing_picks')
+    _existing_ui = [i for i in _existing_items if i.get('show_in_ui') is True]
+    _existing_ui_count = len(_existing_ui)
+    # Count UI picks whose races are PAST or within the 15-min cutoff as "locked".
+    # These races won't appear in this analysis run, so their show_in_ui=True
+    # records persist untouched.  Only races AFTER the cutoff are truly
+    # re-analysable: this run's selection engine will overwrite them (promote or
+    # demote) so they don't consume a permanent slot.
+    _locked_ui = []
+    for _eui in _existing_ui:
+        _ert = _eui.get('race_time', '')
+        try:
+            _ert_dt = datetime.fromisoformat(_ert.replace('Z', '+00:00'))
+            if _ert_dt.astimezone(timezone.utc) <= cutoff:
+                _locked_ui.append(_eui)
+        except Exception:
+            _locked_ui.append(_eui)  # treat unparseable as past
+    _locked_count = len(_locked_ui)
+    _locked_ui_ids = {i['bet_id'] for i in _locked_ui}
+
+    # Races in the CURRENT scrape (every part's card) — only picks whose race is
+    # in this scrape are re-analysed; the rest are preserved (see FIX 2026-04-18
+    # in score_races).
+    _current_scrape_races = {tuple(k) for p in parts for k in p['scrape']}
+
+    # Only track genuinely ranked picks (rank 1-5) as candidates for drop detection,
+    # AND only if their race appears in the current scrape's race list.
+    # Without the rank filter, every show_in_ui=True item (including previous drops)
+    # counts, causing exponential inflation across refreshes.
+    # Without the scrape-race filter, picks from a different scrape run get demoted
+    # simply because their race isn't in this run's data.
+    _reanalysable_ui_ids = set()
+    _preserved_ui_ids = set()  # picks kept because their race isn't in this scrape
+    for _eui in _existing_ui:
+        if _eui['bet_id'] in _locked_ui_ids:
+            continue
+        if int(_eui.get('pick_rank', 0)) <= 0:
+            continue
+        # Check if this pick's race is in the current scrape
+        _eui_course = (_eui.get('course') or _eui.get('venue') or '').lower().strip()
+        _eui_time = str(_eui.get('race_time', ''))[:16]
+        _race_in_scrape = (_eui_course, _eui_time) in _current_scrape_races
+        if not _race_in_scrape:
+            # Also try fuzzy match: course substring match at same time
+            _race_in_scrape = any(
+                _st == _eui_time and (_sc in _eui_course or _eui_course in _sc)
+                for _sc, _st in _current_scrape_races
+            )
+        if _race_in_scrape:
+            _reanalysable_ui_ids.add(_eui['bet_id'])
+        else:
+            _preserved_ui_ids.add(_eui['bet_id'])
+            _locked_ui_ids.add(_eui['bet_id'])  # treat as locked for slot counting
+            _locked_count += 1
+
+    if _preserved_ui_ids:
+        print(f"  Preserved {len(_preserved_ui_ids)} picks (race not in current scrape):")
+        for _pid in _preserved_ui_ids:
+            _pmatch = next((i for i in _existing_ui if i['bet_id'] == _pid), {})
+            print(f"    - {_pmatch.get('horse', _pid)} ({_pmatch.get('course', '?')} "
+                  f"{str(_pmatch.get('race_time', ''))[:16]})")
+
+    _slots_remaining = max(0, MAX_DAILY_UI_PICKS - _locked_count)
+    print(f"  Existing UI picks today: {_existing_ui_count} ({_locked_count} locked/past/preserved, "
+          f"{len(_reanalysable_ui_ids)} re-analysable) / {MAX_DAILY_UI_PICKS} "
+          f"({_slots_remaining} slots remaining)")
+    if _slots_remaining == 0:
+        print(f"  Daily pick cap reached — new horses will be saved as learning data only")
+    # Use remaining slots instead of TARGET_PICKS for this run
+    _effective_target = min(TARGET_PICKS, _slots_remaining)
 
     # ── SELECT TOP 5 CROSS-RACE BESTS ────────────────────────────────────────
+    timer.start('selection')
     import re as _re_s12  # for sprint distance detection in S12
     def _passes_quality_gates(r):
         """Quality gate filters applied at pick-selection time.
@@ -861,7 +1022,7 @@ def analyze_and_save_all():
         # Scores >= 95 (ELITE) bypass: at ELITE confidence our probability estimate likely
         # understates true chance (50%+ calibrated, may genuinely be 55-60%).
         # Source: "Efficiency of Racetrack Betting Markets", Kelly (1956), Sharp Sports Betting.
-        _wp = _win_prob_pct(score)
+        _wp = _win_prob_pct(score, r.get('market_name'))
         _ev = _expected_value(_wp, _best_odds)
         if _ev < -0.15 and score < 95:
             print(f"  [GATE-S11 REJECTED] {r['best']['horse']} score={score:.0f}: "
@@ -1012,7 +1173,10 @@ def analyze_and_save_all():
         print("  WARNING: No races met the minimum confidence threshold — no UI picks today")
     print("=" * 100 + "\n")
 
+    timer.stop('selection')
+
     # ── PASS 2 — SAVE ALL ITEMS ───────────────────────────────────────────────
+    timer.start('dynamodb_writes')
     total_saved = 0
     ui_promoted = 0
 
@@ -1033,6 +1197,7 @@ def analyze_and_save_all():
             }
             for h in _sorted_runners
         ]
+        _all_horses_blob = pack_blob(_all_horses_list)
 
         for r in race_data['runners']:
             item  = r['item']
@@ -1065,10 +1230,17 @@ def analyze_and_save_all():
                 item['bet_type']    = 'Each Way'
             item['sl_declared_count']   = _sl_decl
             item['missing_runners']     = _race_missing
-            item['all_horses']          = _all_horses_list  # full field for UI display
+            if is_ui or _is_dropped:
+                item['all_horses']      = _all_horses_list  # full field for UI display
+            else:
+                # Learning rows: same race-wide list on every runner — stored
+                # compressed (pick_record.expand_heavy restores it on read)
+                item.pop('all_horses', None)
+                item['all_horses_z']    = _all_horses_blob
 
             try:
-                table.put_item(Item=item)
+                with timer.sample('put_item'):
+                    table.put_item(Item=item)
                 total_saved += 1
                 if is_ui:
                     ui_promoted += 1
@@ -1082,6 +1254,7 @@ def analyze_and_save_all():
                           f"Score:{r['score']:3.0f}")
             except Exception as e:
                 print(f"  ERROR saving {item['horse']}: {e}")
+    timer.stop('dynamodb_writes')
 
     print(f"\nSaved {total_saved} horses | {ui_promoted} UI picks | "
           f"{total_saved - ui_promoted} learning records\n")
@@ -1132,6 +1305,20 @@ def analyze_and_save_all():
                     if float((i.get('score_breakdown') or {}).get(key, 0)) != 0)
             return round(100 * n / len(_all_scored_items))
 
+        # Timing: compare against the previous run's manifest before overwriting it
+        _timing = timer.summary()
+        timer.print_table(_timing)
+        timer.emit_metrics(_timing)
+        try:
+            _prev_timing = table.get_item(
+                Key={'bet_id': 'SYSTEM_ANALYSIS_MANIFEST', 'bet_date': 'STATUS'},
+                ProjectionExpression='timing').get('Item', {}).get('timing')
+        except Exception:
+            _prev_timing = None
+        _slow_stages = timer.regressions(_prev_timing, _timing)
+        for _slow in _slow_stages:
+            print(f"  [Timing ⚠] slower than last run: {_slow}")
+
         from comprehensive_pick_logic import get_going_conditions as _gwc
         _going_ok = bool(_gwc())
         _form_pct = (round(100 * _form_enriched_count / _form_total_horses)
@@ -1149,12 +1336,14 @@ def analyze_and_save_all():
             'min_field_coverage_pct': Decimal(str(_min_coverage)),
             'races_analyzed':         Decimal(str(len(all_races_data))),
             'runners_analyzed':       Decimal(str(len(_all_scored_items))),
+            'weights_version':        _config['version'],
+            'config_version':         _config['config_version'],
             # Stage statuses
             'stage_betfair':          'ok',
-            'stage_betfair_races':    Decimal(str(len(races))),
+            'stage_betfair_races':    Decimal(str(_races_in)),
             'stage_betfair_horses':   Decimal(str(_form_total_horses)),
             'stage_history':          'ok',
-            'stage_history_horses':   Decimal(str(len(horse_history))),
+            'stage_history_horses':   Decimal(str(_history_horses)),
             'stage_going':            'ok' if _going_ok else 'missing',
             'stage_form_enricher':    'ok' if _form_enriched_count > 0 else 'not_run',
             'stage_form_enriched':    Decimal(str(_form_enriched_count)),
@@ -1171,6 +1360,10 @@ def analyze_and_save_all():
             'sig_cd_bonus':           Decimal(str(_sig_pct('cd_bonus'))),
             'sig_jockey':             Decimal(str(_sig_pct('jockey_quality'))),
             'sig_distance':           Decimal(str(_sig_pct('distance_suitability'))),
+            # Stage timings (ms) + per-race / per-runner / per-write series
+            'timing':                 timer.manifest_item(_timing),
+            'timing_regressions':     _slow_stages,
+            'signal_costs':           timer.manifest_item(_signal_report),
         }
         table.put_item(Item=manifest)
         print(f"[STAGE 5/5] Analysis manifest saved — pipeline "
@@ -1178,6 +1371,16 @@ def analyze_and_save_all():
     except Exception as _me:
         print(f"[STAGE 5/5] Warning: manifest save failed — {_me}")
 
+    # ── PUSH: tell connected frontends the pick list changed ─────────────────
+    # One small delta event instead of every client re-polling the whole list
+    if ui_promoted > 0:
+        publish_event('picks', {'picks': sorted(
+            (pick_delta(r['item'])
+             for race_data in all_races_data
+             for r in race_data['runners']
+             if top_bet_ids.get(r['item']['bet_id'], 0) > 0),
+            key=lambda p: p['rank'])}, date_str=today)
+
     # ── WHATSAPP NOTIFICATIONS ────────────────────────────────────────────────
     if ui_promoted > 0:
         ui_pick_items = [
@@ -1194,9 +1397,34 @@ def analyze_and_save_all():
         elif err:
             print(f'[WhatsApp] Skipped: {err}')
 
-    return {'total': total_saved, 'ui_picks': ui_promoted, 'learning': total_saved - ui_promoted}
+    return {'total': total_saved, 'ui_picks': ui_promoted, 'learning': total_saved - ui_promoted,
+            'timing': timer.summary()}
 
 
+
+def pack_part(part):
+    """score_races() part → compressed bytes for the Step Functions reduce step.
+    'best' becomes an index into 'runners'; raw runners keep only what the S7
+    gate reads."""
+    races = []
+    for rd in part['races']:
+        slim = {k: v for k, v in rd.items() if k not in ('best', 'raw_runners', 'runners')}
+        slim['runners'] = [{k: rr[k] for k in ('item', 'score', 'horse', 'odds')} for rr in rd['runners']]
+        slim['best_idx'] = next(i for i, rr in enumerate(rd['runners']) if rr is rd['best'])
+        slim['raw_runners'] = [{'form': r.get('form', '')} for r in rd['raw_runners']]
+        races.append(slim)
+    return pack_blob(dict(part, races=races))
+
+
+def unpack_part(blob):
+    """pack_part() bytes → a part select_and_save() accepts (item numbers as Decimal)."""
+    part = unpack_blob(blob, decimals=True)
+    for rd in part['races']:
+        for rr in rd['runners']:
+            rr['score'], rr['odds'] = float(rr['score']), float(rr['odds'])
+        rd['best'] = rd['runners'][rd.pop('best_idx')]
+    return part
+
 if __name__ == "__main__":
     stats = analyze_and_save_all()
     if stats:
@@ -12,10 +12,11 @@ Integrates ALL learnings:
 """
 
 import json
-import boto3
 from decimal import Decimal
 from datetime import datetime, timezone
-from weather_going_inference import check_all_tracks_going
+from going_service import get_going_conditions as _get_dated_going
+from config_snapshot import get_snapshot
+from stage_profiler import signal_costs as _costs
 
 try:
     from track_daily_insights import get_track_insights
@@ -132,69 +133,51 @@ DEFAULT_WEIGHTS = {
     'irish_handicap_penalty':    10,  # Handicap race at Irish track (Curragh/Dundalk/Navan/Naas/Leopardstown)
 }
 
-# Cache for weights (reload every 5 minutes)
-_weights_cache = {'weights': None, 'timestamp': None}
+_table = None
+
+
+def _get_table():
+    """SureBetBets table handle — created on first use, then reused for every runner."""
+    global _table
+    if _table is None:
+        import boto3
+        _table = boto3.resource('dynamodb', region_name='eu-west-1').Table('SureBetBets')
+    return _table
 
-# Cache for going conditions (reload every hour)
-_going_cache = {'going_data': None, 'timestamp': None}
 
 def get_dynamic_weights():
-    """Load current weights from DynamoDB (auto-adjusted by learning system)"""
-    global _weights_cache
-    
-    # Check cache (5 minute TTL)
-    if _weights_cache['weights'] and _weights_cache['timestamp']:
-        age = (datetime.now() - _weights_cache['timestamp']).total_seconds()
-        if age < 300:  # 5 minutes
-            return _weights_cache['weights']
-    
+    """Current weights from the pinned config snapshot (auto-adjusted by learning system).
+    Pinned once per run by config_snapshot — every runner on the card is scored
+    with the same weights version, and no DynamoDB read/clock check per runner."""
+    weights = DEFAULT_WEIGHTS.copy()
     try:
-        dynamodb = boto3.resource('dynamodb', region_name='eu-west-1')
-        table = dynamodb.Table('SureBetBets')
-        
-        response = table.get_item(
-            Key={
-                'bet_id': 'SYSTEM_WEIGHTS',
-                'bet_date': 'CONFIG'
-            }
-        )
-        
-        if 'Item' in response:
-            weights = response['Item'].get('weights', {})
-            # Convert Decimal to float
-            weights_dict = {k: float(v) for k, v in weights.items()}
-            
-            # Update cache
-            _weights_cache['weights'] = weights_dict
-            _weights_cache['timestamp'] = datetime.now()
-            
-            return weights_dict
-        else:
-            return DEFAULT_WEIGHTS.copy()
+        weights.update(get_snapshot()['weights'])
     except Exception as e:
         print(f"Warning: Could not load dynamic weights, using defaults: {e}")
-        return DEFAULT_WEIGHTS.copy()
+    return weights
 
 
-def get_going_conditions():
-    """Get current going conditions for all tracks (cached for 1 hour)"""
-    global _going_cache
-    
-    # Check cache (1 hour TTL)
-    if _going_cache['going_data'] and _going_cache['timestamp']:
-        age = (datetime.now() - _going_cache['timestamp']).total_seconds()
-        if age < 3600:  # 1 hour
-            return _going_cache['going_data']
-    
+def get_weights_version():
+    """Version of the pinned weights (stored on every saved pick for backtests)."""
     try:
-        # Get going data (prioritizes official declarations)
-        going_data = check_all_tracks_going(use_official=True)
-        
-        # Update cache
-        _going_cache['going_data'] = going_data
-        _going_cache['timestamp'] = datetime.now()
-        
-        return going_data
+        return get_snapshot()['version']
+    except Exception:
+        return 0
+
+
+def _pinned_tiers(key):
+    """Extra tier-list names from SYSTEM_CONFIG.tiers (pinned with the weights)."""
+    try:
+        return list(get_snapshot().get('tiers', {}).get(key, []))
+    except Exception:
+        return []
+
+
+def get_going_conditions(course=None):
+    """Get today's going conditions (dated cache shared across processes — see going_service)"""
+    try:
+        # Prewarmed at pipeline start; a miss for `course` fetches just that track
+        return _get_dated_going(course)
     except Exception as e:
         print(f"Warning: Could not load going conditions: {e}")
         return {}
@@ -331,7 +314,11 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     """
     Comprehensive scoring system for horses
     Returns score and breakdown
+
+    Each signal block is bracketed by _costs.section() so SIGNAL_COSTS=1 can
+    charge wall time and HTTP requests per signal (stage_profiler.signal_costs).
     """
+    _costs.begin('setup')
     name = horse_data.get('name')
     odds = horse_data.get('odds', 0)
     form = horse_data.get('form') or ''
@@ -341,7 +328,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     weights = get_dynamic_weights()
     
     # Load going conditions
-    going_data = get_going_conditions()
+    going_data = get_going_conditions(course)
     
     # Load track insights from earlier races today
     track_insights = get_track_insights(course)
@@ -350,6 +337,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     breakdown = {}
     reasons = []
     
+    _costs.section('sweet_spot')
     # 1. SWEET SPOT CHECK (Graduated - give points based on odds)
     # LESSON 2026-04-03: Historical data shows 3.0–4.9 decimal (2/1–4/1) is a LOSING RANGE
     # (-£11.95 P&L). The PROVEN winning range is 5.0–8.0 decimal (4/1–7/1, +£25.20 P&L).
@@ -402,6 +390,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     score += sweet_spot_pts
     breakdown['sweet_spot'] = sweet_spot_pts
     
+    _costs.section('optimal_odds')
     # 2. OPTIMAL ODDS POSITION
     # WIDENED 2026-03-30: Winners in optimal range (3/1-4/1) were being under-rewarded
     # because tight bands excluded them. Widen to 1.5/3.0/4.5 to reward near-optimal market prices.
@@ -424,6 +413,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['optimal_odds'] = 0
     
+    _costs.section('form')
     # 3. FORM ANALYSIS
     wins = form.count('1')
     places = form.count('2') + form.count('3')
@@ -482,6 +472,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     if places > 0:
         reasons.append(f"{places} places (2nd/3rd): {place_points}pts")
     
+    _costs.section('course_bonus')
     # 4. COURSE BONUS
     course_bonus_pts = int(weights['course_bonus'])
     if course_winners_today > 0:
@@ -491,6 +482,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['course_performance'] = 0
     
+    _costs.section('claiming_jockey')
     # 4.5. CLAIMING JOCKEY BONUS (NEW 2026-02-20)
     # Claiming jockeys (indicated by numbers in brackets like (5), (7)) get weight allowances
     # In Heavy/Soft going, reduced weight is a significant advantage
@@ -521,6 +513,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['claiming_jockey'] = 0
     
+    _costs.section('graded_race')
     # 4b. GRADED RACE DETECTION
     # Grade 1/2/3 and Listed races are hand-selected elite fields.
     # Form-based going penalties are unreliable here: horses in Graded races are
@@ -537,6 +530,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
         'listed', 'group 1', 'group 2', 'group 3',
     ])
 
+    _costs.section('going_suitability')
     # 5. GOING CONDITIONS - Proper horse suitability assessment
     # February UK/Ireland: Soft/Heavy ground is the norm - this is a MAJOR differentiator
     # A horse that can't handle soft simply has little chance; proven soft-ground performers
@@ -676,6 +670,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
         else:
             breakdown['going_suitability'] = 0
 
+    _costs.section('heavy_going')
     # 5a. HEAVY GOING SPECIFIC PENALTY (Lesson: 2026-03-16 El Gavilan 5th at 3/1 fav, Class 4 Heavy Ffos Las)
     # Heavy is fundamentally different from Soft — extreme ground that very few horses handle.
     # Jack's Jury (9/1) won over Henderson's Jukebox Fury and 3/1 fav El Gavilan.
@@ -692,6 +687,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['heavy_going_penalty'] = 0
 
+    _costs.section('graded_going')
     # 5b. GRADED RACE GOING PENALTY CORRECTION
     # If a going penalty was applied but the race is Graded (Grd1/2/3/Listed),
     # remove the penalty. Graded-class horses are prepared for all conditions;
@@ -705,6 +701,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
         reasons = [r for r in reasons if 'questionable in' not in r and 'unproven in' not in r]
         reasons.append(f"Graded race - going penalty removed (elite field): 0pts")
 
+    _costs.section('cd_bonus')
     # 5c. C/D MARKER BONUS
     # C = course winner, D = distance winner, CD = both.
     # These are proven performance markers that our form string doesn't capture.
@@ -796,9 +793,9 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
             elif not cd_pts:
                 breakdown['cd_bonus'] = 0
 
+    _costs.section('database_history')
     # 6. DATABASE HISTORY
-    db = boto3.resource('dynamodb', region_name='eu-west-1')
-    table = db.Table('SureBetBets')
+    table = _get_table()
     
     try:
         response = table.scan(
@@ -819,6 +816,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     except:
         breakdown['database_history'] = 0
     
+    _costs.section('track_pattern')
     # 7. TRACK PATTERN BONUS (Learning from today's earlier races at this track)
     if track_insights.get('has_data') and track_insights.get('suggested_boost'):
         pattern_bonus = 0
@@ -842,6 +840,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['track_pattern_bonus'] = 0
     
+    _costs.section('trainer_reputation')
     # 8. TRAINER REPUTATION BONUS (Comprehensive UK + Irish trainers)
     # Elite jockeys for jockey quality analysis (added below)
     elite_jockeys_t1 = [
@@ -965,6 +964,13 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
         'Rebecca Curtis', 'R Curtis',
     ]
     
+    # Admin-managed additions from the pinned config snapshot (empty unless set)
+    elite_jockeys_t1  += _pinned_tiers('jockeys_t1')
+    elite_jockeys_t2  += _pinned_tiers('jockeys_t2')
+    elite_trainers_t1 += _pinned_tiers('trainers_t1')
+    elite_trainers_t2 += _pinned_tiers('trainers_t2')
+    elite_trainers_t3 += _pinned_tiers('trainers_t3')
+
     trainer_bonus = 0
     trainer_tier = 0
     if trainer:
@@ -995,6 +1001,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
             breakdown['trainer_reputation'] = trainer_bonus
             reasons.append(f"{tier_label} trainer ({trainer}): +{trainer_bonus}pts")
 
+    _costs.section('favorite_correction')
     # 9. FAVORITE CORRECTION — capped, doesn't stack heavily on trainer
     # Only applies when trainer_tier=1 (truly elite) to avoid inflating mediocre picks
     favorite_bonus = 0
@@ -1016,6 +1023,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['favorite_correction'] = 0
     
+    _costs.section('jockey_quality')
     # 10. JOCKEY QUALITY — tiered by actual calibre
     jockey_name = horse_data.get('jockey', '')
     is_elite_jockey = False
@@ -1058,6 +1066,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
         else:
             breakdown['jockey_quality'] = 0
     
+    _costs.section('novice_penalty')
     # 11. NOVICE RACE PENALTY (NEW - Lesson from Ascot 13:15)
     novice_penalty = 0
     race_name = race_data.get('market_name', '') if 'race_data' in locals() else horse_data.get('race_type', '')
@@ -1069,6 +1078,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['novice_penalty'] = 0
 
+    _costs.section('low_class_penalty')
     # 11b. LOW CLASS PENALTY (Lesson: 2026-02-28 Lingfield + 2026-03-16 Ffos Las 14:30)
     # Class 5/6 handicaps are designed by handicappers to produce unpredictable results.
     # AW Class 5/6: full penalty (going advantage = 0, form consistency unreliable).
@@ -1106,6 +1116,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['aw_low_class_penalty'] = 0
 
+    _costs.section('aw_evening')
     # 11c. AW EVENING RACING PENALTY (2026-03-25)
     # LESSON: Wolverhampton 20:00/20:30 — Burdett Estate (82/92) and Mr Nugget (87) all lost.
     # Evening AW races have inflated form signals: small fields, gambled-on horses, track bias
@@ -1155,6 +1166,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['aw_evening_penalty'] = 0
 
+    _costs.section('unknown_trainer')
     # 11d. UNKNOWN TRAINER PENALTY (2026-03-25)
     # LESSON: Brian Toomey, D M Simcock, K Woollacott — not in any trainer tier.
     # Horses from unlisted trainers score via form/odds only; reliability is lower.
@@ -1190,6 +1202,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['unknown_trainer_penalty'] = 0
 
+    _costs.section('irish_handicap')
     # 11e. IRISH HANDICAP VENUE PENALTY (2026-04-01)
     # LESSON: Dmaniac (Curragh, sc=107, no market leader) and I'm Spartacus (Dundalk, sc=84)
     # both lost. Irish flat/NH handicaps at these venues are notoriously competitive with
@@ -1216,6 +1229,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['irish_handicap_penalty'] = 0
 
+    _costs.section('bounce_back')
     # 12. BOUNCE-BACK PATTERN (NEW - Lesson from Ascot 13:15)
     # Detect patterns like 2-6-1 or 2-5-1 showing recovery after poor run
     bounce_back_pts = int(weights.get('bounce_back_bonus', 12))
@@ -1240,6 +1254,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['bounce_back'] = 0
     
+    _costs.section('short_form')
     # 13. SHORT FORM IMPROVEMENT (Updated 2026-03-25)
     # LESSON: Isabella Islay (4yo, form='93') improved 9th→3rd but scored 0 here
     # because (a) the race wasn't flagged as novice, (b) old code required '2' in form.
@@ -1271,6 +1286,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['short_form_improvement'] = 0
     
+    _costs.section('weight')
     # 14. WEIGHT ANALYSIS — relative within field + absolute heavy-weight penalty
     weight_penalty_pts   = int(weights.get('weight_penalty', 10))
     relative_weight_pts  = int(weights.get('relative_weight_bonus', 8))
@@ -1319,6 +1335,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     score += weight_net
     breakdown['weight_penalty'] = weight_net
 
+    _costs.section('official_rating')
     # 14b. OFFICIAL RATING BONUS — class horse indicator
     or_bonus_pts = int(weights.get('official_rating_bonus', 8))
     official_rating = horse_data.get('official_rating', '')
@@ -1342,14 +1359,14 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['official_rating_bonus'] = 0
 
+    _costs.section('jockey_course')
     # 14c. JOCKEY-COURSE FAMILIARITY — bonus if jockey has won here before
     jc_bonus_pts = int(weights.get('jockey_course_bonus', 8))
     jockey_for_course = str(horse_data.get('jockey', '')).strip()
     if jockey_for_course and course:
         try:
             jc_key = f"JOCKEY_COURSE_{jockey_for_course.replace(' ', '_')}_{course.replace(' ', '_')}"
-            _db_jc = boto3.resource('dynamodb', region_name='eu-west-1')
-            _tbl_jc = _db_jc.Table('SureBetBets')
+            _tbl_jc = _get_table()
             jc_resp = _tbl_jc.get_item(Key={'bet_id': jc_key, 'bet_date': 'HISTORY'})
             jc_item = jc_resp.get('Item', {})
             jc_wins = int(jc_item.get('course_wins', 0))
@@ -1375,6 +1392,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['jockey_course_bonus'] = 0
 
+    _costs.section('meeting_focus')
     # 14d. MEETING FOCUS SIGNALS (2026-03-19)
     # Trainer or jockey appearing ONLY at this meeting today signals a targeted, focused effort.
     # If they're not spread across multiple meetings they likely fancy this horse.
@@ -1435,6 +1453,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['meeting_focus'] = 0
 
+    _costs.section('age_unexposed')
     # 15. AGE BONUS (peak age varies by race type)
     age_bonus_pts = int(weights.get('age_bonus', 10))
     horse_age = horse_data.get('age', None)
@@ -1495,6 +1514,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['unexposed_bonus'] = 0
 
+    _costs.section('distance_suitability')
     # 13. DISTANCE SUITABILITY — actual distance matching using CD marker + form evidence
     distance_pts = int(weights.get('distance_suitability', 18))
     # Priority 1: CD marker proves this horse has won at this course/distance
@@ -1524,6 +1544,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['distance_suitability'] = 0
     
+    _costs.section('deep_form')
     # 16. DEEP FORM SIGNALS (2026-03-20) — from Racing Post last-6-race history
     # These use the detailed per-run table (course, distance, going, pos, OR) scraped by
     # form_enricher.py.  If no form_runs data is present, all signals score 0 gracefully.
@@ -1603,6 +1624,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['deep_form'] = 0
 
+    _costs.section('cheltenham')
     # 14. CHELTENHAM FESTIVAL BONUS (CRITICAL FOR SYSTEM SURVIVAL)
     # Apply Championship-specific scoring if at Cheltenham Festival (March 10-13, 2026)
     if is_cheltenham_festival(course):
@@ -1622,6 +1644,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['cheltenham_festival'] = 0
 
+    _costs.section('field_size_caps')
     # ── FINAL CAP: Class 5/6 races — hard ceiling of 80pts (v4.4 lesson)
     # Lesson: El Gavilan 100pts → 5th (Heavy), Beauzon 91pts → 6th (AW Class5),
     # Queen Of Steel 99pts → 3rd, El Rojo Grande 98pts → 2nd.
@@ -1679,6 +1702,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['small_field_bonus'] = 0
 
+    _costs.section('draw_bias')
     # 15. DRAW BIAS — UK/Irish track-specific stall advantage/disadvantage
     # Source: well-documented published draw statistics for UK/Irish flat tracks.
     # Only applies to flat races where stall draw is meaningful.
@@ -1751,6 +1775,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['draw_bias'] = 0
 
+    _costs.section('track_handedness')
     # 16. TRACK HANDEDNESS PREFERENCE
     # Some horses consistently run better on left-handed tracks vs right-handed.
     # Detected from form_runs course history if available.
@@ -1816,6 +1841,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
     else:
         breakdown['track_handedness'] = 0
 
+    _costs.section('pace_profile')
     # 17. PACE PROFILE — DISTANCE SPECIALISATION
     # Source: Modern Pace Handicapping — horses have metabolic specialisations for
     # distance ranges. Sprinters (≤7f) lack stamina for middle distances; stayers
@@ -1875,6 +1901,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
         score += _pace_pts
     breakdown['pace_profile'] = _pace_pts
 
+    _costs.section('hot_form')
     # ── LIVE TRAINER / JOCKEY HOT FORM (2026-03-30) ─────────────────────────
     # Use rolling 30-day DynamoDB results to detect trainers/jockeys on a hot streak
     # (+8/+6 pts) or cold streak (-5/-3 pts).  Does NOT require a static tier list.
@@ -1894,6 +1921,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
         breakdown['trainer_hot_form'] = 0
         breakdown['jockey_hot_form']  = 0
 
+    _costs.section('score_cap')
     # ── GENERAL SCORE CAP: 120pts ────────────────────────────────────────────
     # LESSON 2026-04-17: Marty McFly scored 145 (9th of 9), Solar Pass 142 (5th of 6).
     # UPDATED 2026-04-18: Backtest shows score 110-120 has 60% WR vs 120+ at 28.6%.
@@ -1906,6 +1934,7 @@ def analyze_horse_comprehensive(horse_data, course, avg_winner_odds=3.80, course
         breakdown['score_cap'] = -cap_reduction
         reasons.append(f"Score capped at {GENERAL_CAP}pts (was {score + cap_reduction:.0f}): -{cap_reduction:.0f}pts")
 
+    _costs.end()
     return score, breakdown, reasons
 
 
@@ -2115,6 +2144,7 @@ def format_pick_for_database(pick_data, race_data):
         
         # Comprehensive analysis
         'analysis_method': 'COMPREHENSIVE',
+        'weights_version': get_weights_version(),
         'analysis_score': Decimal(str(score)),
         'comprehensive_score': Decimal(str(score)),
         'form': horse.get('form', ''),
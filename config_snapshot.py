@@ -0,0 +1,250 @@
+"""
+CONFIG SNAPSHOT — versioned SYSTEM_WEIGHTS / SYSTEM_CONFIG shared by every process
+===================================================================================
+One read of the two CONFIG items (weights, thresholds, tier lists) per run,
+pinned for the whole analysis so a card is never scored with two weight
+versions.  Every write goes through save_weights()/save_config(), which bump
+a monotonically increasing `version` attribute with a conditional put —
+readers reload only when that version changes.
+
+DynamoDB items (SureBetBets):
+  bet_id='SYSTEM_WEIGHTS', bet_date='CONFIG'  → weights{}, version, updated_at, source
+  bet_id='SYSTEM_CONFIG',  bet_date='CONFIG'  → config{}, tiers{}, version, updated_at
+
+Cross-process sharing:
+  pin_snapshot() writes config_snapshot.json (cwd, /tmp in Lambda).  A later
+  process the same day reuses that file after a projected read of both
+  items' version and updated_at confirms neither has been written since.
+  Unversioned items (version 0) always reload.
+
+Usage:
+  from config_snapshot import pin_snapshot, get_snapshot, save_weights
+
+  snap = pin_snapshot()            # start of analyze_and_save_all
+  snap['weights']['recent_win']    # every runner scored with the same version
+  item['weights_version'] = snap['version']
+"""
+
+import os
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+REGION        = os.environ.get('AWS_DEFAULT_REGION', 'eu-west-1')
+TABLE_NAME    = 'SureBetBets'
+# Lambda code dir is read-only — share via /tmp there, cwd elsewhere
+SNAPSHOT_FILE = os.path.join('/tmp' if os.environ.get('AWS_LAMBDA_FUNCTION_NAME') else '.',
+                             'config_snapshot.json')
+
+WEIGHTS_KEY = {'bet_id': 'SYSTEM_WEIGHTS', 'bet_date': 'CONFIG'}
+CONFIG_KEY  = {'bet_id': 'SYSTEM_CONFIG',  'bet_date': 'CONFIG'}
+
+_pinned = None    # snapshot dict for this process
+_table  = None
+
+
+def _get_table():
+    global _table
+    if _table is None:
+        import boto3
+        _table = boto3.resource('dynamodb', region_name=REGION).Table(TABLE_NAME)
+    return _table
+
+
+def _floats(d):
+    out = {}
+    for k, v in (d or {}).items():
+        try:
+            out[k] = float(v)
+        except (TypeError, ValueError):
+            out[k] = v
+    return out
+
+
+def _to_plain(obj):
+    """Decimal → int/float recursively (tier lists may be nested)."""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, dict):
+        return {k: _to_plain(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_to_plain(v) for v in obj]
+    return obj
+
+
+def _read_versions():
+    """Cheap projected read of (weights version, config version, weights updated_at,
+    config updated_at) — versions are 0 if never versioned."""
+    import boto3
+    resp = boto3.resource('dynamodb', region_name=REGION).batch_get_item(RequestItems={
+        TABLE_NAME: {
+            'Keys': [WEIGHTS_KEY, CONFIG_KEY],
+            'ProjectionExpression': 'bet_id, #v, updated_at',
+            'ExpressionAttributeNames': {'#v': 'version'},
+        }
+    })
+    found = {i['bet_id']: i for i in resp.get('Responses', {}).get(TABLE_NAME, [])}
+    wt, cfg = found.get('SYSTEM_WEIGHTS', {}), found.get('SYSTEM_CONFIG', {})
+    return (int(wt.get('version', 0)), int(cfg.get('version', 0)),
+            wt.get('updated_at'), cfg.get('updated_at'))
+
+
+def _versions(snap):
+    return (int(snap.get('version', -1)), int(snap.get('config_version', -1)),
+            snap.get('weights_updated_at'), snap.get('config_updated_at'))
+
+
+def _reusable(cached):
+    """The on-disk snapshot is reused only if it was pinned today, both items are
+    versioned (a legacy / unversioned writer leaves version 0 and never bumps it)
+    and neither version nor updated_at has moved since."""
+    today = datetime.now(timezone.utc).date().isoformat()
+    if str(cached.get('loaded_at', ''))[:10] != today:
+        return False
+    current = _read_versions()
+    return current[0] > 0 and current[1] > 0 and _versions(cached) == current
+
+
+def load_snapshot():
+    """Read both CONFIG items from DynamoDB and return a fresh snapshot dict."""
+    table = _get_table()
+    wt  = table.get_item(Key=WEIGHTS_KEY).get('Item', {})
+    cfg = table.get_item(Key=CONFIG_KEY).get('Item', {})
+    return {
+        'version':            int(wt.get('version', 0)),
+        'config_version':     int(cfg.get('version', 0)),
+        'weights':            _floats(wt.get('weights')),
+        'config':             _floats(cfg.get('config')),
+        'tiers':              _to_plain(cfg.get('tiers', {})),
+        'weights_updated_at': wt.get('updated_at'),
+        'config_updated_at':  cfg.get('updated_at'),
+        'loaded_at':          datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def _write_file(snap):
+    try:
+        with open(SNAPSHOT_FILE, 'w') as f:
+            json.dump(snap, f, default=str)
+    except Exception:
+        pass
+
+
+def _read_file():
+    if not os.path.exists(SNAPSHOT_FILE):
+        return None
+    try:
+        with open(SNAPSHOT_FILE, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def pin_snapshot(force=False):
+    """
+    Load the config once and pin it for this run.
+    Reuses today's on-disk snapshot if neither item has been written since
+    (see _reusable); force=True always reads both items from DynamoDB.
+    """
+    global _pinned
+    snap = None
+    if not force:
+        cached = _read_file()
+        if cached is not None:
+            try:
+                if _reusable(cached):
+                    snap = cached
+            except Exception:
+                snap = None
+    if snap is None:
+        try:
+            snap = load_snapshot()
+            _write_file(snap)
+        except Exception as e:
+            # Pin an empty snapshot so callers fall back to their defaults
+            # once, instead of retrying DynamoDB on every runner scored
+            print(f"  [Config] Could not load config, using defaults: {e}")
+            snap = {'version': 0, 'config_version': 0, 'weights': {}, 'config': {},
+                    'tiers': {}, 'weights_updated_at': None, 'config_updated_at': None,
+                    'loaded_at': datetime.now(timezone.utc).isoformat()}
+    _pinned = snap
+    print(f"  [Config] Pinned weights v{snap['version']} "
+          f"({len(snap['weights'])} weights, {len(snap['config'])} thresholds)")
+    return snap
+
+
+def get_snapshot():
+    """Pinned snapshot for this process (pins on first use). Never re-reads DynamoDB."""
+    if _pinned is None:
+        return pin_snapshot()
+    return _pinned
+
+
+def use_snapshot(snap):
+    """Pin a snapshot another process already pinned (an analysis shard is handed the run's)."""
+    global _pinned
+    _pinned = snap
+    return _pinned
+
+
+def reload_if_bumped():
+    """For long-lived processes (api_server): re-pin only if either item was written since."""
+    if _pinned is None:
+        return pin_snapshot()
+    try:
+        if _read_versions() != _versions(_pinned):
+            return pin_snapshot(force=True)
+    except Exception as e:
+        print(f"  [Config] Version check failed, keeping v{_pinned['version']}: {e}")
+    return _pinned
+
+
+def _save(key, field, values, source, extra, keep=()):
+    """Conditional put that bumps `version` — fails if another writer got there first.
+    Attributes named in `keep` are carried over from the current item unless overridden."""
+    table = _get_table()
+    current = table.get_item(
+        Key=key,
+        ProjectionExpression=', '.join(('#v',) + tuple(keep)),
+        ExpressionAttributeNames={'#v': 'version'},
+    ).get('Item', {})
+    old_v = int(current.get('version', 0))
+    extra = {**{k: current[k] for k in keep if k in current}, **(extra or {})}
+    item = {
+        **key,
+        field:        {k: Decimal(str(float(v))) for k, v in values.items()},
+        'version':    old_v + 1,
+        'updated_at': datetime.now(timezone.utc).isoformat(),
+        'source':     source,
+        **extra,
+    }
+    if old_v:
+        table.put_item(Item=item, ConditionExpression='#v = :v',
+                       ExpressionAttributeNames={'#v': 'version'},
+                       ExpressionAttributeValues={':v': old_v})
+    else:
+        table.put_item(Item=item, ConditionExpression='attribute_not_exists(#v)',
+                       ExpressionAttributeNames={'#v': 'version'})
+    return old_v + 1
+
+
+def save_weights(weights, source, **extra):
+    """Write SYSTEM_WEIGHTS with a version bump. Returns the new version."""
+    return _save(WEIGHTS_KEY, 'weights', weights, source, extra)
+
+
+def save_config(config, source, tiers=None, **extra):
+    """Write SYSTEM_CONFIG thresholds (and optional tier lists) with a version bump."""
+    if tiers is not None:
+        extra['tiers'] = tiers
+    return _save(CONFIG_KEY, 'config', config, source, extra, keep=('tiers',))
+
+
+def seed_snapshot(weights=None, config=None, tiers=None, version=0):
+    """Pin an in-memory snapshot without touching DynamoDB (simulations / backtests)."""
+    global _pinned
+    _pinned = {'version': version, 'config_version': 0, 'weights': dict(weights or {}),
+               'config': dict(config or {}), 'tiers': dict(tiers or {}),
+               'weights_updated_at': None, 'config_updated_at': None,
+               'loaded_at': datetime.now(timezone.utc).isoformat()}
+    return _pinned
@@ -3,31 +3,35 @@ DAILY SELF-LEARNING SYSTEM
 ===========================
 Runs every evening (~20:00) after racing finishes.
 
-For each race today:
-  1. Find our prediction (highest-scoring horse we saved)
-  2. Fetch the actual winner from Betfair API (settled market)
-  3. If we were wrong: analyse what factors the winner had that we under-scored
-  4. Nudge scoring weights in DynamoDB → next run automatically uses new weights
-  5. Write a human-readable learning report to auto_refresh.log
+For the day's completed races, in one batch:
+  1. Fetch every winner with bulk listMarketBook calls (MARKET_BOOK_BATCH markets each)
+  2. Record result_won / jockey-course history on every runner we saved
+  3. Build a runner × factor matrix from each runner's score_breakdown
+     (breakdown points ÷ current weight = how strongly the factor fired)
+  4. One conditional-logit gradient step over all races: the winner should
+     out-score its field — regularised towards DEFAULT_WEIGHTS, each step
+     capped at ±MAX_NUDGE, weights clipped to [WEIGHT_MIN, WEIGHT_MAX]
+  5. Save the new weights and a learning report (auto_refresh.log + DynamoDB)
 
 Schema in DynamoDB:
-  - bet_id = 'SYSTEM_WEIGHTS'  → stores weight floats
-  - bet_id = 'LEARNING_LOG_<date>' → daily summary
-
-Learning rules (small nudges, ±0.5 to ±1.5):
-  - Winner was shorter odds than our pick  → +1pt to optimal_odds weight
-  - Winner had stronger form string        → +1pt to form weight
-  - Winner's trainer was Tier-1            → +0.5pt to trainer_reputation
-  - Winner was beaten favourite we backed  → -0.5pt to trainer_reputation (don't over-trust)
-  - We were correct                        → +0.5pt to every factor that was present
+  - bet_id = 'SYSTEM_WEIGHTS', bet_date = 'CONFIG' → versioned weights (config_snapshot.save_weights)
+  - bet_id = 'LEARNING_LOG_<date>' → daily summary (accuracy, log-loss, steps)
+
+Update rule, per factor j over races r with runners i (p = softmax of score / T):
+  grad_j = mean_r Σ_i (p_ri − won_ri) · x_rij / T  +  L2 · (w_j − default_j)
+  w_j   ← clip(w_j − LEARNING_RATE · grad_j, ±MAX_NUDGE)
 """
 
 import json
 import boto3
+import numpy as np
 import requests
 import datetime
 from decimal import Decimal
 from pathlib import Path
+import config_snapshot
+from config_snapshot import get_snapshot
+import pick_record
 
 BASE_DIR = Path(__file__).parent
 LOG_FILE = BASE_DIR / "auto_refresh.log"
@@ -56,6 +60,18 @@ MAX_NUDGE = 1.5    # maximum single-run adjustment per factor
 WEIGHT_MIN = 2.0   # floor so no weight goes to zero
 WEIGHT_MAX = 40.0  # ceiling
 
+# ── Batched update settings ──────────────────────────────────────────────────
+MARKET_BOOK_BATCH  = 40     # marketIds per listMarketBook call (well under Betfair's weight cap)
+SCORE_TEMPERATURE  = 10.0   # score points per unit of logit in the race softmax
+LEARNING_RATE      = 10.0   # weight points per unit of mean gradient
+L2_REGULARISATION  = 0.01   # pull towards DEFAULT_WEIGHTS (current weight when no default)
+MIN_RACES          = 5      # fewer usable races → no weight update
+# score_breakdown keys whose weight is stored under a different name
+FACTOR_ALIASES = {
+    'bounce_back':    'bounce_back_bonus',
+    'novice_penalty': 'novice_race_penalty',
+}
+
 
 def log(msg: str):
     ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -101,27 +117,23 @@ def betfair_post(endpoint, payload, app_key, session_token):
 
 # ── DynamoDB helpers ─────────────────────────────────────────────────────────
 def get_current_weights():
+    # Shared versioned snapshot (SYSTEM_WEIGHTS / CONFIG) — same read path as scoring
     try:
-        resp = table.get_item(Key={'bet_id': 'SYSTEM_WEIGHTS'})
-        item = resp.get('Item', {})
-        weights = item.get('weights', {})
+        weights = get_snapshot()['weights']
         if weights:
-            return {k: float(v) for k, v in weights.items()}
+            return dict(weights)
     except Exception as e:
         log(f"Could not load weights: {e}")
     return DEFAULT_WEIGHTS.copy()
 
 
 def save_weights(weights: dict):
+    # Versioned CONFIG item through the shared writer — the one scoring pins
     try:
-        table.put_item(Item={
-            'bet_id':      'SYSTEM_WEIGHTS',
-            'bet_date':    datetime.datetime.now().strftime('%Y-%m-%d'),
-            'weights':     {k: Decimal(str(round(v, 2))) for k, v in weights.items()},
-            'updated_at':  datetime.datetime.now().isoformat(),
-            'source':      'daily_learning',
-        })
-        log("Weights saved to DynamoDB")
+        version = config_snapshot.save_weights(
+            {k: round(v, 2) for k, v in weights.items()}, 'daily_learning',
+            based_on_weights_version=get_snapshot()['version'])
+        log(f"Weights saved to DynamoDB (v{version})")
     except Exception as e:
         log(f"Failed to save weights: {e}")
 
@@ -133,13 +145,16 @@ def get_completed_races():
     today = now.strftime('%Y-%m-%d')
     yesterday = (now - datetime.timedelta(days=1)).strftime('%Y-%m-%d')
 
-    from boto3.dynamodb.conditions import Attr
+    from boto3.dynamodb.conditions import Attr, Key
 
+    # bet_date is the partition key — query the two days instead of scanning the table
+    # (unsettled picks are needed here, so the settled_picks dataset does not apply)
     picks = []
     for date in [today, yesterday]:
-        kwargs = {'FilterExpression': Attr('bet_date').eq(date) & Attr('analysis_type').eq('comprehensive_7factor')}
+        kwargs = {'KeyConditionExpression': Key('bet_date').eq(date),
+                  'FilterExpression': Attr('analysis_type').eq('comprehensive_7factor')}
         while True:
-            resp = table.scan(**kwargs)
+            resp = table.query(**kwargs)
             picks.extend(resp.get('Items', []))
             lk = resp.get('LastEvaluatedKey')
             if not lk:
@@ -171,61 +186,63 @@ def get_completed_races():
     return by_market
 
 
-# ── Fetch winner from Betfair ─────────────────────────────────────────────────
-def get_market_winner(market_id: str, app_key, session_token):
-    """Return (winning_selection_id, winning_horse_name) or (None, None)."""
-    try:
-        resp = betfair_post('listMarketBook', {
-            'marketIds': [market_id],
-            'priceProjection': {'priceData': ['EX_BEST_OFFERS']},
-            'orderProjection': 'EXECUTABLE',
-            'matchProjection': 'NO_ROLLUP',
-        }, app_key, session_token)
-
-        if not resp:
-            return None, None
-
-        market = resp[0] if resp else {}
-        runners = market.get('runners', [])
-        winner = next((r for r in runners if r.get('status') == 'WINNER'), None)
-        if winner:
-            return str(winner.get('selectionId')), winner.get('runnerName', '')
-
-        # Market may not be settled yet — try catalogue
-        cat_resp = betfair_post('listMarketCatalogue', {
-            'filter': {'marketIds': [market_id]},
-            'marketProjection': ['RUNNER_DESCRIPTION'],
-        }, app_key, session_token)
-
-        if cat_resp:
-            cat_runners = cat_resp[0].get('runners', []) if cat_resp else []
-            winner = next((r for r in runners if r.get('status') == 'WINNER'), None)
+# ── Fetch winners from Betfair ───────────────────────────────────────────────
+def get_market_winners(market_ids, app_key, session_token, names=None):
+    """{market_id: (winning_selection_id, winning_horse_name)} for every settled market.
+
+    One listMarketBook call per MARKET_BOOK_BATCH markets; names come from
+    `names` ({(market_id, selection_id): horse}) and, for winners we did not
+    save, one listMarketCatalogue call for just those markets."""
+    names = names or {}
+    market_ids = list(market_ids)
+    winners = {}
+    for i in range(0, len(market_ids), MARKET_BOOK_BATCH):
+        chunk = market_ids[i:i + MARKET_BOOK_BATCH]
+        try:
+            books = betfair_post('listMarketBook', {'marketIds': chunk}, app_key, session_token) or []
+        except Exception as e:
+            log(f"  Could not fetch market books {chunk[0]}..: {e}")
+            continue
+        for book in books:
+            winner = next((r for r in book.get('runners', []) if r.get('status') == 'WINNER'), None)
             if winner:
-                sel_id = str(winner['selectionId'])
-                # Match to name
-                name = next((r.get('runnerName', '') for r in cat_runners
-                              if str(r.get('selectionId')) == sel_id), '')
-                return sel_id, name
+                winners[book['marketId']] = str(winner.get('selectionId'))
 
-    except Exception as e:
-        log(f"  Could not fetch winner for {market_id}: {e}")
-    return None, None
+    unnamed = [mid for mid, sel in winners.items() if (mid, sel) not in names]
+    if unnamed:
+        try:
+            cats = betfair_post('listMarketCatalogue', {
+                'filter': {'marketIds': unnamed},
+                'marketProjection': ['RUNNER_DESCRIPTION'],
+                'maxResults': len(unnamed),
+            }, app_key, session_token) or []
+            for cat in cats:
+                for r in cat.get('runners', []):
+                    names[(cat['marketId'], str(r.get('selectionId')))] = r.get('runnerName', '')
+        except Exception as e:
+            log(f"  Could not fetch runner names: {e}")
+
+    log(f"Winners for {len(winners)}/{len(market_ids)} markets "
+        f"({-(-len(market_ids) // MARKET_BOOK_BATCH)} listMarketBook call(s))")
+    return {mid: (sel, names.get((mid, sel), '')) for mid, sel in winners.items()}
 
 
-# ── Core learning logic ───────────────────────────────────────────────────────
-def analyse_race(market_picks: list, winner_sel_id: str, winner_name: str, weights: dict):
+# ── Per-race bookkeeping ──────────────────────────────────────────────────────
+def _score(pick):
+    return float(pick.get('combined_confidence', pick.get('comprehensive_score', 0)))
+
+
+def analyse_race(market_picks: list, winner_sel_id: str, winner_name: str):
     """
-    Compare our top pick to the actual winner.
-    Returns a dict of weight adjustments and a text summary.
+    Compare our top pick to the actual winner and record the result on every runner.
+    Returns (correct, summary).
     """
-    adjustments = {}
-
     if not winner_sel_id:
-        return adjustments, "No result available yet"
+        return False, "No result available yet"
 
     # Find our top pick for this race
-    our_pick = max(market_picks, key=lambda p: float(p.get('combined_confidence', p.get('comprehensive_score', 0))))
-    our_score = float(our_pick.get('combined_confidence', our_pick.get('comprehensive_score', 0)))
+    our_pick = max(market_picks, key=_score)
+    our_score = _score(our_pick)
     our_sel   = str(our_pick.get('selection_id', ''))
     our_name  = our_pick.get('horse', our_pick.get('horse_name', '?'))
     our_odds  = float(our_pick.get('odds', 0))
@@ -237,51 +254,12 @@ def analyse_race(market_picks: list, winner_sel_id: str, winner_name: str, weigh
 
     if correct:
         summary = f"CORRECT ✓ — {our_name} won (score={our_score:.0f}, odds={our_odds:.2f})"
-        # Reinforce: +0.3 to each factor proportional to score
-        for factor in weights:
-            adjustments[factor] = +0.3
     else:
-        winner_score  = float(winner_pick.get('combined_confidence', winner_pick.get('comprehensive_score', 0))) if winner_pick else 0
-        winner_odds   = float(winner_pick.get('odds', 0)) if winner_pick else 0
-        winner_bd     = winner_pick.get('score_breakdown', {}) if winner_pick else {}
-        our_bd        = our_pick.get('score_breakdown', {})
-
+        winner_score = _score(winner_pick) if winner_pick else 0
+        winner_odds  = float(winner_pick.get('odds', 0)) if winner_pick else 0
         summary = (f"WRONG ✗ — picked {our_name} (score={our_score:.0f}, odds={our_odds:.2f}), "
                    f"winner was {winner_name} (score={winner_score:.0f}, odds={winner_odds:.2f})")
 
-        # Market price signal: winner shorter SP → trust odds signal more
-        if winner_odds > 0 and our_odds > 0:
-            if winner_odds < our_odds * 0.75:
-                adjustments['optimal_odds'] = adjustments.get('optimal_odds', 0) + 1.0
-                summary += " | nudge +odds"
-
-        # Form: if winner had digits in form (wins) that we might have missed
-        winner_form = str(winner_pick.get('form', '') if winner_pick else '')
-        our_form    = str(our_pick.get('form', ''))
-        if winner_form and winner_form != '-' and our_form != '-':
-            try:
-                winner_recent_wins = sum(1 for c in winner_form[:5] if c == '1')
-                our_recent_wins    = sum(1 for c in our_form[:5] if c == '1')
-                if winner_recent_wins > our_recent_wins:
-                    adjustments['form'] = adjustments.get('form', 0) + 0.5
-                    summary += " | nudge +form"
-            except Exception:
-                pass
-
-        # Trainer: if winner came from elite trainer we rated low
-        w_trainer = (winner_pick.get('trainer', '') if winner_pick else '').lower()
-        o_trainer = our_pick.get('trainer', '').lower()
-        elite_trainers = ['henderson', 'mullins', 'o\'brien', 'gosden', 'stoute',
-                          'johnston', 'hannon', 'fahey', 'chapple-hyam', 'balding']
-        if any(t in w_trainer for t in elite_trainers) and not any(t in o_trainer for t in elite_trainers):
-            adjustments['trainer_reputation'] = adjustments.get('trainer_reputation', 0) + 0.5
-            summary += " | nudge +trainer"
-
-        # If we backed a horse that was over-hyped (we over-trusted trainer)
-        if our_odds < 2.5 and not correct:
-            adjustments['trainer_reputation'] = adjustments.get('trainer_reputation', 0) - 0.3
-            summary += " | nudge -trainer (over-trusted)"
-
     # ── Save result_won to EVERY horse in this race ──────────────────────────
     # This builds the horse history database used by complete_daily_analysis.py
     # to enrich future picks with actual win rate data.
@@ -335,33 +313,90 @@ def analyse_race(market_picks: list, winner_sel_id: str, winner_name: str, weigh
     except Exception as e:
         log(f"  Failed to update pick notes: {e}")
 
-    return adjustments, summary
-
+    return correct, summary
 
-# ── Apply weight adjustments ─────────────────────────────────────────────────
-def apply_adjustments(weights: dict, race_adjustments: list[dict]) -> dict:
-    """Average all race adjustments and apply, clipping to [WEIGHT_MIN, WEIGHT_MAX]."""
-    if not race_adjustments:
-        return weights
 
-    # Sum all adjustments
-    totals = {}
-    for adj in race_adjustments:
-        for k, v in adj.items():
-            totals[k] = totals.get(k, 0) + v
+# ── Batched weight update ────────────────────────────────────────────────────
+def build_matrix(by_market: dict, winners: dict, weights: dict):
+    """Runner × factor activations for every race whose winner we scored.
 
-    n = len(race_adjustments)
+    Returns (X, race_idx, won, factors): X[i, j] = breakdown points ÷ weight,
+    race_idx[i] = race number of row i (rows are contiguous per race),
+    won[i] = 1.0 for the winner.  Races without a breakdown or whose winner
+    is not among our runners carry no signal and are left out."""
+    factors = sorted(weights)
+    col = {f: j for j, f in enumerate(factors)}
+    rows, race_idx, won = [], [], []
+    n_races = 0
+    for market_id, picks in by_market.items():
+        winner_sel = winners.get(market_id, (None, ''))[0]
+        if not winner_sel or len(picks) < 2:
+            continue
+        block = []
+        has_winner = False
+        for pick in picks:
+            bd = pick_record.expand_heavy(pick).get('score_breakdown') or {}
+            x = np.zeros(len(factors))
+            for key, pts in bd.items():
+                j = col.get(FACTOR_ALIASES.get(key, key))
+                w = weights.get(factors[j]) if j is not None else None
+                if w:
+                    try:
+                        x[j] += float(pts) / float(w)
+                    except (TypeError, ValueError):
+                        pass
+            is_winner = str(pick.get('selection_id', '')) == winner_sel
+            has_winner |= is_winner
+            block.append((x, is_winner))
+        if not has_winner or not any(x.any() for x, _ in block):
+            continue
+        for x, is_winner in block:
+            rows.append(x)
+            race_idx.append(n_races)
+            won.append(1.0 if is_winner else 0.0)
+        n_races += 1
+    if not rows:
+        return np.zeros((0, len(factors))), np.zeros(0, dtype=int), np.zeros(0), factors
+    return np.vstack(rows), np.asarray(race_idx), np.asarray(won), factors
+
+
+def _race_softmax(z, race_idx):
+    """Softmax of z within each race (race_idx contiguous, starting at 0)."""
+    starts = np.flatnonzero(np.r_[True, race_idx[1:] != race_idx[:-1]])
+    e = np.exp(z - np.maximum.reduceat(z, starts)[race_idx])
+    return e / np.add.reduceat(e, starts)[race_idx]
+
+
+def gradient_step(weights: dict, X, race_idx, won, factors):
+    """One regularised, step-capped conditional-logit update over every race.
+    Returns (new_weights, stats)."""
+    n_races = int(race_idx[-1]) + 1 if len(race_idx) else 0
+    if n_races < MIN_RACES:
+        return dict(weights), {'races': n_races}
+
+    w = np.array([float(weights[f]) for f in factors])
+    prior = np.array([float(DEFAULT_WEIGHTS.get(f, weights[f])) for f in factors])
+    p = _race_softmax(X @ w / SCORE_TEMPERATURE, race_idx)
+
+    grad = X.T @ (p - won) / (SCORE_TEMPERATURE * n_races) + L2_REGULARISATION * (w - prior)
+    step = np.clip(-LEARNING_RATE * grad, -MAX_NUDGE, MAX_NUDGE)
+    new_w = np.clip(w + step, WEIGHT_MIN, WEIGHT_MAX)
+
+    active = np.abs(X).sum(axis=0) > 0     # factors that never fired keep their weight
     new_weights = dict(weights)
-    for factor, total in totals.items():
-        avg = total / n
-        # Cap per-run nudge
-        nudge = max(-MAX_NUDGE, min(MAX_NUDGE, avg))
-        if factor in new_weights:
-            new_weights[factor] = round(
-                max(WEIGHT_MIN, min(WEIGHT_MAX, new_weights[factor] + nudge)), 2
-            )
-
-    return new_weights
+    for j, f in enumerate(factors):
+        if active[j]:
+            new_weights[f] = round(float(new_w[j]), 2)
+
+    stats = {
+        'races':    n_races,
+        'runners':  len(won),
+        'log_loss': round(float(-np.log(p[won == 1.0] + 1e-12).mean()), 4),
+        'winner_p': round(float(p[won == 1.0].mean()), 4),
+        'steps':    {f: round(float(new_w[j] - w[j]), 2) for j, f in enumerate(factors)
+                     if active[j] and abs(new_w[j] - w[j]) > 0.005},
+    }
+    return new_weights, stats
 
 
 # ── Main ─────────────────────────────────────────────────────────────────────
@@ -385,33 +420,34 @@ def run_learning():
         log("No completed races found — nothing to learn from today")
         return
 
-    # 4. Process each market
-    all_adjustments = []
+    # 4. Every winner in bulk, then per-race bookkeeping
+    names = {(mid, str(p.get('selection_id', ''))): p.get('horse', p.get('horse_name', ''))
+             for mid, picks in by_market.items() for p in picks}
+    winners = get_market_winners(by_market.keys(), app_key, session, names)
+
     summaries       = []
     correct_count   = 0
     total_count     = 0
 
     for market_id, picks in by_market.items():
-        winner_id, winner_name = get_market_winner(market_id, app_key, session)
-        adj, summary = analyse_race(picks, winner_id, winner_name, weights)
+        winner_id, winner_name = winners.get(market_id, (None, ''))
+        correct, summary = analyse_race(picks, winner_id, winner_name)
         log(f"  [{picks[0].get('course','?')} {picks[0].get('race_time','')[:16]}] {summary}")
         summaries.append(summary)
-        if adj:
-            all_adjustments.append(adj)
         total_count += 1
-        if 'CORRECT' in summary:
+        if correct:
             correct_count += 1
 
-    # 5. Update weights
-    if all_adjustments:
-        new_weights = apply_adjustments(weights, all_adjustments)
-        changed = {k: f"{weights.get(k, 0):.1f}→{new_weights[k]:.1f}"
-                   for k in new_weights if abs(new_weights[k] - weights.get(k, 0)) > 0.05}
-        if changed:
-            log(f"Weight changes: {changed}")
+    # 5. One batched gradient step over the day's races
+    X, race_idx, won, factors = build_matrix(by_market, winners, weights)
+    new_weights, stats = gradient_step(weights, X, race_idx, won, factors)
+    if stats.get('steps'):
+        changed = {k: f"{weights.get(k, 0):.1f}→{new_weights[k]:.1f}" for k in stats['steps']}
+        log(f"Gradient step over {stats['races']} races / {stats['runners']} runners "
+            f"(log-loss {stats['log_loss']}, winner p {stats['winner_p']}): {changed}")
         save_weights(new_weights)
     else:
-        log("No weight adjustments needed today")
+        log(f"No weight adjustments needed today ({stats['races']} usable races, need {MIN_RACES})")
 
     # 6. Save daily learning summary to DynamoDB
     accuracy = round(100 * correct_count / total_count, 1) if total_count else 0
@@ -428,6 +464,7 @@ def run_learning():
             'accuracy_pct':   Decimal(str(accuracy)),
             'summaries':      summaries[:50],  # cap length
             'weight_snapshot':{k: Decimal(str(v)) for k, v in weights.items()},
+            'learning_stats': json.loads(json.dumps(stats), parse_float=Decimal),
             'created_at':     datetime.datetime.now().isoformat(),
         })
         log(f"Learning summary saved — {correct_count}/{total_count} correct ({accuracy}%)")
@@ -9,7 +9,7 @@ import sys
 import json
 import csv
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 from collections import defaultdict
 import boto3
 from decimal import Decimal
@@ -24,58 +24,17 @@ from learning_engine import (
 )
 
 def load_results_from_dynamodb(days_back=7):
-    """Load bet results from DynamoDB (default: last 7 days for weekly learning)"""
-    
-    dynamodb = boto3.resource('dynamodb', region_name='eu-west-1')
-    table = dynamodb.Table('SureBetBets')
-    
-    cutoff = datetime.now() - timedelta(days=days_back)
-    
+    """Load bet results (default: last 7 days for weekly learning) from the shared
+    settled-picks dataset — only the still-open days are queried, no table scan."""
+    import settled_picks
+
     try:
-        response = table.scan(
-            FilterExpression='#ts > :threshold AND attribute_exists(#outcome)',
-            ExpressionAttributeNames={
-                '#ts': 'timestamp',
-                '#outcome': 'outcome'
-            },
-            ExpressionAttributeValues={
-                ':threshold': cutoff.isoformat()
-            }
-        )
-        
-        items = response.get('Items', [])
-        
-        # Convert DynamoDB format to expected format
-        results = []
-        for item in items:
-            result_entry = {
-                'date': item.get('date', ''),
-                'sport': item.get('sport', 'horses'),  # Track sport type
-                'selection': {
-                    'selection_id': item.get('selection_id', ''),
-                    'runner_name': item.get('horse', item.get('dog', '')),  # Support horses and dogs
-                    'venue': item.get('course', ''),
-                    'odds': float(item.get('odds', 0)),
-                    'bet_type': item.get('bet_type', 'WIN'),
-                    'confidence': float(item.get('confidence', 0)),
-                    'tags': item.get('tags', ''),
-                    'why_now': item.get('why_now', ''),
-                    'stake': float(item.get('stake', 0))
-                },
-                'result': {
-                    'selection_id': item.get('selection_id', ''),
-                    'is_winner': item.get('outcome') == 'WON',
-                    'is_placed': item.get('outcome') in ['WON', 'PLACED'],
-                    'final_odds': float(item.get('odds', 0)),
-                    'actual_position': item.get('actual_position'),
-                    'profit_loss': float(item.get('profit_loss', 0))
-                }
-            }
-            results.append(result_entry)
-        
+        results = settled_picks.learning_results(days_back=days_back, ui_only=False)
+        items = settled_picks.rows(since=settled_picks.since_days(days_back),
+                                   fields=('bet_id', 'bet_date', 'outcome', 'feedback_processed'))
         print(f"Loaded {len(results)} completed bets from DynamoDB")
         return results, items  # Return both for processing later
-        
+
     except Exception as e:
         print(f"Error loading from DynamoDB: {e}")
         return [], []
@@ -235,16 +194,19 @@ def main():
     # Mark all processed bets as feedback_processed
     print("\n[7/7] Marking bets as processed...")
     try:
-        processed_count = 0
+        processed = []
         for item in raw_items:
             if item.get('outcome') and not item.get('feedback_processed'):
                 table.update_item(
-                    Key={'bet_id': item['bet_id']},
+                    Key={'bet_id': item['bet_id'], 'bet_date': item['bet_date']},
                     UpdateExpression='SET feedback_processed = :val',
                     ExpressionAttributeValues={':val': True}
                 )
-                processed_count += 1
-        print(f"  ✓ Marked {processed_count} bets as processed")
+                processed.append(item['bet_id'])
+        if processed:
+            import settled_picks
+            settled_picks.annotate(processed, feedback_processed=True)
+        print(f"  ✓ Marked {len(processed)} bets as processed")
     except Exception as e:
         print(f"  ⚠️ Error marking bets: {e}")
     
@@ -21,7 +21,25 @@ if (Test-Path lambda_deployment.zip) {
 }
 
 # Create deployment package
-Compress-Archive -Path lambda_function.py -DestinationPath lambda_deployment.zip -Force
+# config_snapshot.py: shared versioned SYSTEM_WEIGHTS/SYSTEM_CONFIG reader/writer
+# push_events.py: SSE delta events (/api/events, result settlement pushes)
+# pick_record.py: slim pick rows, projections, fast item codec, compressed blobs
+# lay_scanner.py + market_model.py: stored lay-the-favourite table (/api/favs-run)
+# http_client.py: pooled, retrying Sporting Life fetch for the lay table's winner map
+# api_*.py: per-route handler modules, imported by the router on first use.
+#   The same zip can back a standalone route function by pointing its handler
+#   at a route module, e.g. --handler api_picks.lambda_handler for /api/picks/*
+$routeModules = @('api_common.py', 'api_picks.py', 'api_results.py', 'api_cheltenham.py',
+                  'api_auth.py', 'api_billing.py', 'api_learning.py', 'api_favs.py', 'api_admin.py',
+                  'api_events.py')
+foreach ($m in $routeModules) {
+    if (-not (Test-Path $m)) {
+        Write-Host "ERROR: route module $m not found!" -ForegroundColor Red
+        exit 1
+    }
+}
+Compress-Archive -Path (@('lambda_function.py', 'config_snapshot.py', 'push_events.py', 'pick_record.py',
+                          'lay_scanner.py', 'market_model.py', 'http_client.py') + $routeModules) -DestinationPath lambda_deployment.zip -Force
 $zipSize = [math]::Round((Get-Item lambda_deployment.zip).Length / 1KB, 2)
 Write-Host "✓ Package created: $zipSize KB" -ForegroundColor Green
 
@@ -55,7 +55,8 @@ LAMBDAS = [
         'src'    : 'sf_betfair_fetch.py',
         'timeout': 120,
         'memory' : 256,
-        'bundle' : ['betfair_odds_fetcher.py'],
+        'bundle' : ['betfair_odds_fetcher.py', 'going_service.py', 'weather_going_inference.py', 'market_model.py',
+                    'race_card.py'],
         'env'    : {'PIPELINE_BUCKET': BUCKET},
     },
     {
@@ -70,6 +71,16 @@ LAMBDAS = [
             'form_enricher.py',
             'notify_picks.py',
             'weather_going_inference.py',
+            'going_service.py',
+            'config_snapshot.py',
+            'push_events.py',
+            'pick_record.py',
+            'http_client.py',
+            'stage_profiler.py',
+            'score_calibration.py',
+            'market_model.py',
+            'lay_scanner.py',
+            'race_card.py',
             'betfair_odds_fetcher.py',
             'ourhub_enricher.py',
             'trainer_form_stats.py',
@@ -85,7 +96,7 @@ LAMBDAS = [
         'src'    : 'sf_validate.py',
         'timeout': 30,
         'memory' : 128,
-        'bundle' : [],
+        'bundle' : ['pick_record.py'],
         'env'    : {},
     },
     {
@@ -103,8 +114,8 @@ LAMBDAS = [
         'src'    : 'sf_results_fetch.py',
         'timeout': 120,
         'memory' : 256,
-        'bundle' : [],
-        'env'    : {},
+        'bundle' : ['push_events.py'],
+        'env'    : {'PIPELINE_BUCKET': BUCKET},
     },
     {
         'name'   : 'surebet-sl-results',
@@ -112,8 +123,8 @@ LAMBDAS = [
         'src'    : 'sf_sl_results.py',
         'timeout': 120,
         'memory' : 256,
-        'bundle' : ['sl_results_fetcher.py'],
-        'env'    : {},
+        'bundle' : ['sl_results_fetcher.py', 'http_client.py', 'push_events.py'],
+        'env'    : {'PIPELINE_BUCKET': BUCKET},
     },
     {
         'name'   : 'surebet-fav-results',
@@ -121,8 +132,8 @@ LAMBDAS = [
         'src'    : 'sf_fav_results.py',
         'timeout': 120,
         'memory' : 256,
-        'bundle' : [],
-        'env'    : {},
+        'bundle' : ['lay_scanner.py', 'pick_record.py', 'market_model.py', 'http_client.py'],
+        'env'    : {'PIPELINE_BUCKET': BUCKET},
     },
     {
         'name'   : 'surebet-loss-report',
@@ -143,8 +154,8 @@ LAMBDAS = [
         'src'    : 'sf_learning.py',
         'timeout': 300,
         'memory' : 256,
-        'bundle' : ['learning_engine.py'],
-        'env'    : {'LEARNING_DAYS_BACK': '7'},
+        'bundle' : ['learning_engine.py', 'settled_picks.py', 'pick_record.py', 'score_calibration.py'],
+        'env'    : {'LEARNING_DAYS_BACK': '7', 'PIPELINE_BUCKET': BUCKET},
     },
     {
         'name'   : 'surebet-major-analysis',
@@ -360,13 +371,21 @@ def ensure_iam_role(iam, role_name, trust_policy, inline_policy_name, inline_pol
 
 # ── Lambda packaging ──────────────────────────────────────────────────────────
 
+# Packages the Lambda python3.11 runtime already provides — never re-bundled
+RUNTIME_PROVIDED   = {'boto3', 'botocore', 's3transfer', 'jmespath', 'dateutil', 'bin'}
+PIP_STRIP_DIRS     = {'__pycache__', 'tests', 'test'}
+PIP_STRIP_SUFFIXES = ('.dist-info', '.egg-info')
+
+
 def _build_zip(lf_config):
     """
     Build an in-memory zip for a Lambda function.
     Includes:
       - the handler file (renamed to handler module name)
       - any bundled source files from REPO_DIR
-      - pip-installed dependencies for 'requests' (Lambda needs it, not in runtime)
+      - pip-installed dependencies for 'requests' (Lambda needs it, not in runtime),
+        minus anything the runtime provides (boto3 & co.) and package metadata
+    Bundled modules import boto3/requests lazily — see import_time_profile.py.
     """
     buf = io.BytesIO()
     handler_module = lf_config['src'].replace('.py', '')
@@ -394,9 +413,9 @@ def _build_zip(lf_config):
 
         # pip dependencies — install to a temp dir, zip everything in
         pip_deps = lf_config.get('pip_deps', [])
-        # requests is needed by betfair_odds_fetcher and form_enricher
+        # requests is needed by betfair_odds_fetcher and http_client (pooled scraper sessions)
         if any(f in lf_config.get('bundle', []) + [lf_config['src']]
-               for f in ['betfair_odds_fetcher.py', 'form_enricher.py', 'sf_betfair_fetch.py', 'ourhub_enricher.py']):
+               for f in ['betfair_odds_fetcher.py', 'http_client.py', 'form_enricher.py', 'sf_betfair_fetch.py', 'ourhub_enricher.py']):
             pip_deps = list(set(pip_deps + ['requests']))
 
         if pip_deps:
@@ -414,11 +433,22 @@ def _build_zip(lf_config):
                     ] + pip_deps,
                     check=True,
                 )
+                skipped = 0
                 for root, dirs, files in os.walk(tmpdir):
+                    rel_root = os.path.relpath(root, tmpdir)
+                    # Slim the bundle: the python3.11 runtime already ships boto3/botocore,
+                    # and dist-info/tests/bytecode only add unzip time on a cold start
+                    if rel_root.split(os.sep)[0] in RUNTIME_PROVIDED or \
+                            any(part.endswith(PIP_STRIP_SUFFIXES) or part in PIP_STRIP_DIRS
+                                for part in rel_root.split(os.sep)):
+                        skipped += len(files)
+                        continue
                     for file in files:
                         full_path = os.path.join(root, file)
                         arc_path  = os.path.relpath(full_path, tmpdir)
                         zf.write(full_path, arc_path)
+                if skipped:
+                    _info(f'  Stripped {skipped} runtime-provided / metadata files')
 
     buf.seek(0)
     return buf.read()
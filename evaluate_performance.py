@@ -12,6 +12,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Tuple
 import pandas as pd
 
+import learning_analytics
+
 def load_selections(path: str) -> pd.DataFrame:
     """Load daily selections CSV"""
     if not os.path.exists(path):
@@ -64,11 +66,10 @@ def calculate_metrics(data: pd.DataFrame) -> Dict:
     
     # Win/Place rates - COUNT EW PLACED BETS AS WINS
     # For EW bets, both winners AND placed count as wins
-    data['effective_win'] = data.apply(lambda row: 
-        row.get('is_winner', False) or 
-        (row.get('is_placed', False) and row.get('bet_type', 'WIN') == 'EW'),
-        axis=1
-    )
+    is_winner = data["is_winner"].fillna(False).astype(bool) if "is_winner" in data.columns else False
+    is_placed = data["is_placed"].fillna(False).astype(bool) if "is_placed" in data.columns else False
+    bet_type = data["bet_type"] if "bet_type" in data.columns else "WIN"
+    data["effective_win"] = pd.Series(is_winner | (is_placed & (bet_type == "EW")), index=data.index)
     
     wins = data["effective_win"].sum()
     places = data["is_placed"].sum() if "is_placed" in data.columns else 0
@@ -80,24 +81,9 @@ def calculate_metrics(data: pd.DataFrame) -> Dict:
     data["p_win"] = pd.to_numeric(data["p_win"], errors="coerce")
     data["p_place"] = pd.to_numeric(data["p_place"], errors="coerce")
     
-    # Bin by predicted probability
-    bins = [0, 0.1, 0.2, 0.3, 0.4, 0.5, 1.0]
-    data["p_win_bin"] = pd.cut(data["p_win"], bins=bins)
-    
-    calibration = []
-    for bin_label, group in data.groupby("p_win_bin"):
-        if len(group) > 0:
-            predicted_prob = group["p_win"].mean()
-            # Use effective_win for calibration (includes EW places as wins)
-            actual_rate = group["effective_win"].mean()
-            count = len(group)
-            
-            calibration.append({
-                "predicted_prob": predicted_prob,
-                "actual_rate": actual_rate,
-                "count": count,
-                "error": abs(predicted_prob - actual_rate)
-            })
+    # Bin by predicted probability; effective_win includes EW places as wins
+    cal_table, cal_error = learning_analytics.calibration(data, "p_win", "effective_win")
+    calibration = cal_table.to_dict("records")
     
     # ROI calculation (simplified - needs actual odds at bet time)
     # Assuming we bet 1 unit per selection
@@ -112,7 +98,7 @@ def calculate_metrics(data: pd.DataFrame) -> Dict:
         "win_rate": round(win_rate, 3),
         "place_rate": round(place_rate, 3),
         "strike_rate_expected": round(data["p_win"].mean(), 3),
-        "calibration_error": round(sum(c["error"] * c["count"] for c in calibration) / total if calibration else 0, 3),
+        "calibration_error": round(cal_error, 3),
         "calibration_by_bin": calibration
     }
     
@@ -20,6 +20,8 @@ from decimal import Decimal
 from datetime import date, datetime, timedelta
 from boto3.dynamodb.conditions import Key
 
+import pick_record
+
 # ── Config ────────────────────────────────────────────────────────────────────
 TARGET_DATE = sys.argv[1] if len(sys.argv) > 1 else date.today().strftime('%Y-%m-%d')
 RECIPIENT   = 'charles.mccarthy@gmail.com'
@@ -33,7 +35,7 @@ def load_picks(date_str: str):
     db   = boto3.resource('dynamodb', region_name='eu-west-1')
     t    = db.Table('SureBetBets')
     resp = t.query(KeyConditionExpression=Key('bet_date').eq(date_str))
-    picks = resp.get('Items', [])
+    picks = [pick_record.expand_heavy(i) for i in resp.get('Items', [])]
     # Normalise Decimal → float
     return json.loads(json.dumps(picks, default=lambda o: float(o) if isinstance(o, Decimal) else str(o)))
 
@@ -3,9 +3,9 @@ favs_run.py  —  Parallel "Lay the Favourite" Analysis
 ======================================================
 READ-ONLY side-script. Does NOT update weights or UI.
 
-Scans today (and optionally N future days) from SureBetBets,
-identifies the market favourite in each race, applies a
-"Suspect Favourite" scoring model, and reports lay candidates.
+Reports today's (and optionally N future days') lay candidates: every
+race favourite on the card, scored by the "Suspect Favourite" model in
+lay_scanner.py — the same memoised rows /api/favs-run serves.
 
 Usage:
     python favs_run.py                     # today only, text output
@@ -14,6 +14,7 @@ Usage:
     python favs_run.py --json              # JSON output
     python favs_run.py --html              # save HTML to favs-run.html
     python favs_run.py --threshold 4       # only show score >= 4
+    python favs_run.py --max-odds 2.25     # short-price favourites only
 
 Scheduled daily at 14:00 via Windows Task Scheduler (favs_run_daily task).
 
@@ -33,243 +34,18 @@ Suspect Favourite Scoring (higher = more layable):
   9+   = STRONG LAY CANDIDATE  (red)
 """
 
-import sys
 import os
-import re
 import json
 import argparse
 from datetime import date, timedelta, datetime
-from decimal import Decimal
-
-import boto3
-from boto3.dynamodb.conditions import Key, Attr
-
-# ── helpers ────────────────────────────────────────────────────────────────
-
-def dec(o):
-    if isinstance(o, Decimal):
-        return float(o)
-    if isinstance(o, dict):
-        return {k: dec(v) for k, v in o.items()}
-    if isinstance(o, list):
-        return [dec(v) for v in o]
-    return o
-
-
-def odds_to_decimal(odds):
-    """Convert fractional (5/4) or decimal (2.25) odds to float decimal."""
-    if odds is None:
-        return None
-    try:
-        odds = float(odds)
-        return odds
-    except (TypeError, ValueError):
-        pass
-    try:
-        s = str(odds).strip()
-        if '/' in s:
-            n, d = s.split('/')
-            return float(n) / float(d) + 1.0
-    except Exception:
-        pass
-    return None
-
-
-def parse_form(form_str):
-    """Return list of recent positions (int where parseable) from form string."""
-    if not form_str:
-        return []
-    digits = []
-    for ch in str(form_str).replace('-', '').replace('/', ''):
-        if ch.isdigit():
-            digits.append(int(ch))
-        elif ch.upper() in ('U', 'F', 'P', 'R'):
-            digits.append(99)   # treated as non-finish
-    return digits[-6:]   # last 6 runs
-
-
-# ── Suspect Favourite Scoring ───────────────────────────────────────────────
-
-SCORE_LABELS = {
-    'class_up':              ('Class',         '+4  Moving up in class'),
-    'trip_new':              ('Trip',          '+2  Unproven at this distance'),
-    'going_unproven':        ('Going',         '+2  Unproven on current going'),
-    'draw_poor':             ('Draw',          '+1  Poor draw position'),
-    'layoff':                ('Layoff',        '+1  30-90 days off (stale form)'),
-    'pace_doubt':            ('Pace',          '+1  Pace may not suit'),
-    'rivals_close':          ('Rivals',        '+2  2nd/3rd fav within 25% of favourite score'),
-    'drift':                 ('Drift',         '+1  Market drift — open vs current price'),
-    'short_price':           ('Price',         '+1  5/4 or less / odds-on'),
-    'trainer_track':         ('Trainer@Track', '+1  Trainer win rate at this track'),
-    'trainer_cold':          ('TrainerCold',   '+1  Trainer cold last 14 days'),
-    'trainer_multiple':      ('MultiRunner',   '+1  Trainer with multiple runners in race'),
-    'current_form_no_wins':  ('FormNoWins',    '+1  No wins in last 4 races'),
-}
-
-SCORE_WEIGHTS = {
-    'class_up':              4,
-    'trip_new':              2,
-    'going_unproven':        2,
-    'draw_poor':             1,
-    'layoff':                1,
-    'pace_doubt':            1,
-    'rivals_close':          2,
-    'drift':                 1,
-    'short_price':           1,
-    'trainer_track':         1,
-    'trainer_cold':          1,
-    'trainer_multiple':      1,
-    'current_form_no_wins':  1,
-}
 
+# Scoring, the per-(date, race) memo and the SL winner-map cache are shared
+# with /api/favs-run and the pipeline — see lay_scanner.py.
+from lay_scanner import (SCORE_LABELS, SCORE_WEIGHTS, analyse_dates,   # noqa: F401
+                         odds_to_decimal, parse_form, score_favourite, verdict)
 
-def score_favourite(fav, all_horses_sorted, race_going=''):
-    """
-    Score how 'suspect' this favourite is for laying.
-    fav              — dict from DynamoDB (the pick record for the favourite)
-    all_horses_sorted — all horses sorted by odds ascending
-    race_going       — going string if available
-
-    Returns (total_score, flags_dict, details_list)
-    """
-    sb = fav.get('score_breakdown') or {}
-    flags = {}
-    details = []
-
-    fav_score = float(fav.get('comprehensive_score') or fav.get('score', 0))
-    fav_odds = odds_to_decimal(fav.get('odds') or fav.get('decimal_odds'))
-
-    # --- Short price (+1) ---
-    if fav_odds is not None and fav_odds <= 2.25:   # <= 5/4
-        flags['short_price'] = True
-        details.append('Short price (5/4 or less) — market may overshorten')
-
-    # --- Rivals close (+2) ---
-    rivals = [h for h in all_horses_sorted if h.get('horse') != fav.get('horse')]
-    if rivals:
-        r2_score = float(rivals[0].get('score', 0)) if len(rivals) >= 1 else 0
-        r3_score = float(rivals[1].get('score', 0)) if len(rivals) >= 2 else 0
-        # If nearest rival is within 25% of fav score
-        if fav_score > 0 and (r2_score / fav_score) >= 0.75:
-            flags['rivals_close'] = True
-            details.append(f'Rivals close: 2nd ({rivals[0].get("horse","")}) scored {r2_score:.0f} vs fav {fav_score:.0f} ({r2_score/fav_score*100:.0f}%)')
-        elif fav_score > 0 and len(rivals) >= 2 and (r3_score / fav_score) >= 0.70:
-            flags['rivals_close'] = True
-            details.append(f'3rd fav ({rivals[1].get("horse","")}) scored {r3_score:.0f} — field competitive')
-
-    # --- Going unproven (+2) ---
-    going_pts = float(sb.get('going_suitability', 0))
-    heavy_pts = float(sb.get('heavy_going_penalty', 0))
-    if going_pts == 0 and heavy_pts == 0:
-        flags['going_unproven'] = True
-        details.append('Going suitability = 0 — unproven on today\'s ground')
-
-    # --- Trip unproven (+2) ---
-    dist_pts = float(sb.get('distance_suitability', 0))
-    cd_pts = float(sb.get('cd_bonus', 0))
-    if dist_pts == 0 and cd_pts == 0:
-        flags['trip_new'] = True
-        details.append('Distance suitability = 0 & no CD bonus — unproven at this trip')
-
-    # --- Class up (+4) ---
-    # Proxy: no cd_bonus, no course_performance, no database_history, but has official_rating_bonus
-    or_pts = float(sb.get('official_rating_bonus', 0))
-    db_pts = float(sb.get('database_history', 0))
-    course_pts = float(sb.get('course_performance', 0))
-    if or_pts > 0 and cd_pts == 0 and course_pts == 0 and db_pts == 0:
-        flags['class_up'] = True
-        details.append('No prior wins at course/class — stepping up in class')
-
-    # --- Layoff (+1) ---
-    form_str = str(fav.get('form') or '')
-    # Check selection_reasons for layoff signals
-    reasons_text = ' '.join(str(r) for r in (fav.get('selection_reasons') or fav.get('reasons') or []))
-    if 'days off' in reasons_text.lower() or 'days since' in reasons_text.lower():
-        flags['layoff'] = True
-        details.append('Significant layoff flagged in selection reasons')
-    else:
-        # Heuristic: form string contains '-' or '//' indicating break
-        if '--' in form_str or form_str.count('-') >= 2:
-            flags['layoff'] = True
-            details.append(f'Form string suggests recent layoff: {form_str}')
-
-    # --- Draw poor (+1) ---
-    draw = fav.get('draw')
-    total_runners = float(fav.get('race_total_count') or fav.get('total_runners') or 0)
-    if draw and total_runners > 0:
-        draw_n = float(draw)
-        # High draw in large field flat races (draw bias heuristic for large fields)
-        if total_runners >= 10 and draw_n >= total_runners * 0.7:
-            flags['draw_poor'] = True
-            details.append(f'High draw ({draw_n:.0f}/{total_runners:.0f}) — potential draw disadvantage')
-
-    # --- Pace doubt (+1) ---
-    # If pace-related score contributions are zero and horse has no recent win
-    recent_win_pts = float(sb.get('recent_win', 0))
-    if going_pts == 0 and recent_win_pts == 0:
-        flags['pace_doubt'] = True
-        details.append('No going suitability or recent win signal — pace may not suit')
-
-    # --- Trainer at track win rate (+1) ---
-    fav_trainer = str(fav.get('trainer') or '').strip()
-    trainer_rep_pts = float(sb.get('trainer_reputation', 0))
-    if fav_trainer and trainer_rep_pts == 0:
-        flags['trainer_track'] = True
-        details.append(f'Trainer ({fav_trainer}) — no quality tier status at this track (win rate unverified)')
-
-    # --- Trainer cold last 14 days (+1) ---
-    meeting_pts = float(sb.get('meeting_focus', 0))
-    recent_form = form_str[-4:] if len(form_str) >= 4 else form_str
-    recent_wins_in_form = sum(1 for c in recent_form if c == '1')
-    if fav_trainer and meeting_pts == 0 and recent_wins_in_form == 0:
-        flags['trainer_cold'] = True
-        details.append(f'Trainer ({fav_trainer}) — no meeting focus & no win in recent form (cold indicator)')
-
-    # --- Trainer with multiple runners (+1) ---
-    if fav_trainer and all_horses_sorted:
-        multi_count = sum(
-            1 for h in all_horses_sorted
-            if (str(h.get('trainer') or '').strip().lower() == fav_trainer.lower()
-                and (h.get('horse') or '') != (fav.get('horse') or ''))
-        )
-        if multi_count >= 1:
-            flags['trainer_multiple'] = True
-            details.append(f'Trainer ({fav_trainer}) has {multi_count + 1} runners in race — possible divided loyalties')
-
-    # --- Drift (+1) ---
-    # Proxy: score_gap < 10 means rivals are close on our model = market may be drifting
-    score_gap = float(fav.get('score_gap') or 0)
-    if 0 < score_gap < 10:
-        flags['drift'] = True
-        details.append(f'Low score gap ({score_gap:.0f}) — field competitive, possible drift')
-    elif score_gap == 0 and fav_score > 0:
-        flags['drift'] = True
-        details.append('Score gap = 0 — our model does not separate the favourite clearly')
-
-    # --- Current form – no wins (+1) ---
-    # Horse with 2nd or worse over last 4 races
-    form_digits = _parse_form(form_str)
-    last_4 = form_digits[-4:] if len(form_digits) >= 4 else form_digits
-    if last_4 and all(pos >= 2 for pos in last_4):
-        flags['current_form_no_wins'] = True
-        details.append(f'No wins in last 4 races (form: {form_str[-8:]}) — 2nd or worse throughout')
-
-    total = sum(SCORE_WEIGHTS[f] for f in flags)
-    return total, flags, details
-
-
-# ── Verdict helpers ──────────────────────────────────────────────────────────
-
-def verdict(score):
-    if score >= 13:
-        return 'STRONG LAY CANDIDATE', 'RED'
-    elif score >= 9:
-        return 'STRONG LAY', 'AMBER'
-    elif score >= 4:
-        return 'CAUTION / TAKE A LOOK', 'YELLOW'
-    else:
-        return 'DO NOT SHOW', 'GREEN'
 
+# ── Console colours ─────────────────────────────────────────────────────────
 
 ANSI = {
     'RED':    '\033[91m',
@@ -285,236 +61,6 @@ def colour(text, colour_key):
     return ANSI.get(colour_key, '') + text + ANSI['RESET']
 
 
-# ── Main Analysis ──────────────────────────────────────────────────────────
-
-def _utc_to_local_hhmm(utc_hhmm: str, date_str: str) -> str:
-    """Convert UTC HH:MM string to UK local time (BST = UTC+1, late Mar – late Oct)."""
-    try:
-        d = date.fromisoformat(date_str[:10])
-        bst_start = date(d.year, 3, 31)
-        while bst_start.weekday() != 6:
-            bst_start = date(bst_start.year, bst_start.month, bst_start.day - 1)
-        bst_end = date(d.year, 10, 31)
-        while bst_end.weekday() != 6:
-            bst_end = date(bst_end.year, bst_end.month, bst_end.day - 1)
-        if not (bst_start <= d < bst_end):
-            return utc_hhmm
-        h, mn = map(int, utc_hhmm.split(':'))
-        total = h * 60 + mn + 60
-        return f'{(total // 60) % 24:02d}:{total % 60:02d}'
-    except Exception:
-        return utc_hhmm
-
-
-def _fetch_sl_winner_map():
-    """
-    Fetch https://www.sportinglife.com/racing/fast-results/all and return a lookup:
-        { (course_lower, local_hhmm): winner_name }
-    Used to determine if the favourite won or lost after the race.
-    Returns an empty dict on any network/parse error.
-    """
-    try:
-        import urllib.request as _ur
-        req = _ur.Request(
-            'https://www.sportinglife.com/racing/fast-results/all',
-            headers={
-                'User-Agent': (
-                    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-                    'AppleWebKit/537.36 (KHTML, like Gecko) '
-                    'Chrome/122.0.0.0 Safari/537.36'
-                ),
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'en-GB,en;q=0.5',
-                'Referer': 'https://www.sportinglife.com/',
-            },
-        )
-        with _ur.urlopen(req, timeout=15) as resp:
-            html = resp.read().decode('utf-8', errors='replace')
-    except Exception as e:
-        print(f'[favs_run] _fetch_sl_winner_map fetch error: {e}')
-        return {}
-
-    m = re.search(r'<script id="__NEXT_DATA__"[^>]*>(.*?)</script>', html, re.DOTALL)
-    if not m:
-        print('[favs_run] __NEXT_DATA__ not found in SL fast-results page')
-        return {}
-
-    try:
-        data = json.loads(m.group(1))
-    except Exception as e:
-        print(f'[favs_run] SL fast-results JSON parse error: {e}')
-        return {}
-
-    fast = data.get('props', {}).get('pageProps', {}).get('fastResults', [])
-    winner_map = {}
-    for fr in fast:
-        top_horses = fr.get('top_horses')
-        if not top_horses:
-            continue
-        course = fr.get('courseName', '')
-        off_time = fr.get('time', '')   # local HH:MM
-        if not course or not off_time:
-            continue
-        sorted_h = sorted(top_horses, key=lambda h: h.get('position', 99))
-        winner = sorted_h[0].get('horse_name', '') if sorted_h else ''
-        winner = re.sub(r'\s*\([A-Z]{2,3}\)\s*$', '', winner).strip()
-        if winner:
-            key = (course.lower().replace('-', ' ').strip(), off_time)
-            winner_map[key] = winner
-
-    print(f'[favs_run] SL winner_map: {len(winner_map)} races with results')
-    return winner_map
-
-
-def analyse_date(target_date_str, db_table, winner_map=None):
-    """Return list of race analysis dicts for one date."""
-    resp = db_table.query(
-        KeyConditionExpression=Key('bet_date').eq(target_date_str)
-    )
-    all_items = [dec(it) for it in resp.get('Items', [])]
-
-    if not all_items:
-        return []
-
-    # Group by race_time + course
-    races = {}
-    for it in all_items:
-        rt = str(it.get('race_time', ''))[:16]
-        course = it.get('course', '') or it.get('race_course', '')
-        key = f'{rt}|{course}'
-        if key not in races:
-            races[key] = []
-        races[key].append(it)
-
-    results = []
-    for race_key, runners in sorted(races.items()):
-        rt, course = race_key.split('|', 1)
-
-        # Sort by odds ascending — lowest odds = favourite
-        def sort_odds(h):
-            o = odds_to_decimal(h.get('odds') or h.get('decimal_odds'))
-            return o if o else 99.0
-
-        runners_sorted = sorted(runners, key=sort_odds)
-        fav = runners_sorted[0]
-        fav_odds_dec = sort_odds(fav)
-
-        # Only analyse if favourite is 5/4 (2.25) or less
-        if fav_odds_dec > 2.25:
-            continue
-
-        # Build all_horses_sorted for rival scoring
-        # Use the all_horses array from the favourite's own record if available
-        # otherwise use the race runners list
-        all_horses_raw = fav.get('all_horses') or []
-        if all_horses_raw:
-            all_horses_sorted = sorted(all_horses_raw, key=lambda h: float(h.get('odds') or 99))
-        else:
-            all_horses_sorted = [
-                {'horse': h.get('horse', ''), 'score': h.get('comprehensive_score', 0), 'odds': sort_odds(h)}
-                for h in runners_sorted
-            ]
-
-        lay_score, flags, details = score_favourite(fav, all_horses_sorted)
-
-        verd, verd_colour = verdict(lay_score)
-
-        race_name = fav.get('race_name') or f'{course} {rt[11:16]}'
-        fav_sys_score = float(fav.get('comprehensive_score') or fav.get('score', 0))
-
-        # Determine if favourite won/lost.
-        # Priority 1: SL fast-results winner map (most reliable — any finished race)
-        # Priority 2: scan DynamoDB runners for a pick with outcome='win'
-        # Priority 3: the favourite's own outcome field (only if it was a pick)
-        fav_name = fav.get('horse', '') or ''
-        fav_outcome = None
-
-        if winner_map:
-            # Convert UTC race_time to UK local for SL time matching.
-            # race_time may contain a Betfair UTC Z-suffix or tz offset — extract UTC time
-            # before converting to local so BST conversion is applied only once.
-            rt_raw = str(fav.get('race_time', '') or rt)
-            date_part = rt[:10] if len(rt) >= 10 else target_date_str
-            try:
-                tz_m = re.search(r'([+-])(\d{2}):(\d{2})\s*$', rt_raw)
-                if tz_m:
-                    # Has explicit offset (+01:00 BST or +00:00 UTC) — convert to UTC
-                    sign = 1 if tz_m.group(1) == '+' else -1
-                    offset_mins = sign * (int(tz_m.group(2)) * 60 + int(tz_m.group(3)))
-                    raw_hm = rt_raw[11:16]
-                    h2, m2 = map(int, raw_hm.split(':'))
-                    utc_total = h2 * 60 + m2 - offset_mins
-                    utc_hhmm = f'{(utc_total // 60) % 24:02d}:{utc_total % 60:02d}'
-                else:
-                    # No offset — Betfair UTC Z format or bare datetime, treat as UTC
-                    utc_hhmm = rt[11:16] if len(rt) >= 16 else ''
-            except Exception:
-                utc_hhmm = rt[11:16] if len(rt) >= 16 else ''
-            local_hhmm = _utc_to_local_hhmm(utc_hhmm, date_part)
-            # Normalise course: SL may return "Kempton Park" while DB stores "Kempton"
-            # Use substring matching in both directions to handle these variants.
-            course_key = course.lower().replace('-', ' ').strip()
-            fav_name_norm = re.sub(r"['\-]+", ' ', fav_name).strip().lower()
-            try:
-                lh, lm = map(int, local_hhmm.split(':'))
-                local_mins = lh * 60 + lm
-                best_diff = 999
-                best_winner = None
-                for (c_key, t_key), w_name in winner_map.items():
-                    # Fuzzy course match: exact OR one name contains the other
-                    if c_key != course_key and c_key not in course_key and course_key not in c_key:
-                        continue
-                    wh, wm = map(int, t_key.split(':'))
-                    diff = abs((wh * 60 + wm) - local_mins)
-                    if diff < best_diff:
-                        best_diff = diff
-                        best_winner = w_name.strip()
-                if best_winner and best_diff <= 10:
-                    w_norm = re.sub(r"['\-]+", ' ', best_winner).strip().lower()
-                    fav_outcome = 'win' if w_norm == fav_name_norm else 'loss'
-            except Exception:
-                pass
-
-        if fav_outcome is None:
-            # Fallback: scan all runners in this race for a settled outcome='win'
-            winner_name = None
-            for h in runners:
-                if (h.get('outcome') or '').lower() == 'win':
-                    winner_name = h.get('horse', '')
-                    break
-            if winner_name:
-                w_norm2 = re.sub(r"['\-]+", ' ', winner_name).strip().lower()
-                fn_norm2 = re.sub(r"['\-]+", ' ', fav_name).strip().lower()
-                fav_outcome = 'win' if w_norm2 == fn_norm2 else 'loss'
-            else:
-                fav_outcome = fav.get('outcome') or None
-
-        results.append({
-            'date':       target_date_str,
-            'race_time':  rt,
-            'course':     course,
-            'race_name':  race_name,
-            'favourite':  fav_name or '?',
-            'fav_odds':   fav_odds_dec,
-            'fav_sys_score': fav_sys_score,
-            'score_gap':  float(fav.get('score_gap') or 0),
-            'runners':    len(runners),
-            'lay_score':  lay_score,
-            'flags':      list(flags.keys()),
-            'details':    details,
-            'verdict':    verd,
-            'verdict_colour': verd_colour,
-            'form':       fav.get('form', ''),
-            'trainer':    fav.get('trainer', ''),
-            'jockey':     fav.get('jockey', ''),
-            'our_pick':   fav.get('show_in_ui', False),
-            'outcome':    fav_outcome,
-        })
-
-    results.sort(key=lambda r: r['lay_score'], reverse=True)
-    return results
-
-
 # ── Output ──────────────────────────────────────────────────────────────────
 
 def print_results(all_results, threshold=0):
@@ -527,7 +73,7 @@ def print_results(all_results, threshold=0):
     print(colour('=' * 72, 'BOLD'))
     print(colour('  FAVS-RUN  —  Suspect Favourite Lay Analysis', 'BOLD'))
     print(colour('=' * 72, 'BOLD'))
-    print(f'  Short-price favourites analysed:    {total_races}')
+    print(f'  Favourites analysed:                {total_races}')
     print(f'  Caution candidates (score 4+):      {len(lay_candidates)}')
     print(f'  Strong lay candidates (9–12):       {len(amber_lays) - len(strong_lays)}')
     print(f'  Red flag candidates (13+):          {len(strong_lays)}')
@@ -576,57 +122,6 @@ def print_results(all_results, threshold=0):
     print()
 
 
-# ── Entry point ──────────────────────────────────────────────────────────────
-
-def main():
-    parser = argparse.ArgumentParser(description='Favs-Run: Lay the Favourite Analysis')
-    parser.add_argument('--days', type=int, default=1,
-                        help='Number of days to analyse starting today (default: 1)')
-    parser.add_argument('--date', default=None,
-                        help='Specific start date YYYY-MM-DD (default: today)')
-    parser.add_argument('--json', action='store_true', dest='json_out',
-                        help='Output JSON instead of text')
-    parser.add_argument('--threshold', type=int, default=0,
-                        help='Minimum lay score to show (default: 0 = show all)')
-    args = parser.parse_args()
-
-    start_date = date.fromisoformat(args.date) if args.date else date.today()
-    dates = [
-        (start_date + timedelta(days=i)).strftime('%Y-%m-%d')
-        for i in range(args.days)
-    ]
-
-    db = boto3.resource('dynamodb', region_name='eu-west-1')
-    tbl = db.Table('SureBetBets')
-
-    all_results = []
-    for d in dates:
-        day_results = analyse_date(d, tbl)
-        all_results.extend(day_results)
-
-    if args.json_out:
-        print(json.dumps(all_results, indent=2, default=str))
-        return
-
-    print_results(all_results, threshold=args.threshold)
-
-    # Win/loss tracking hook (read-only comparison against outcomes)
-    settled = [r for r in all_results if r.get('outcome') not in (None, 'pending', '')]
-    if settled:
-        print(colour('  OUTCOME TRACKING (settled races)', 'BOLD'))
-        correct_lays = 0
-        for r in settled:
-            outcome = r.get('outcome', '')
-            lay_correct = outcome != 'win' and r['lay_score'] >= 4
-            correct_lays += 1 if lay_correct else 0
-            icon = 'OK' if lay_correct else '--'
-            print(f"  [{icon}] {r['course']} {r['race_time'][11:16]} "
-                  f"{r['favourite']} (lay:{r['lay_score']}) -> {outcome}")
-        print(f"\n  Lay accuracy: {correct_lays}/{len(settled)} = "
-              f"{correct_lays/len(settled)*100:.0f}%")
-        print()
-
-
 # ── HTML Output ─────────────────────────────────────────────────────────────
 
 def build_html(all_results, generated_at=None):
@@ -953,6 +448,8 @@ def main():
                         help='Save HTML report to favs-run.html')
     parser.add_argument('--threshold', type=int, default=0,
                         help='Minimum lay score to show in text output (default: 0 = show all)')
+    parser.add_argument('--max-odds', type=float, default=None, dest='max_odds',
+                        help='Only favourites at or below these decimal odds (default: all)')
     args = parser.parse_args()
 
     start_date = date.fromisoformat(args.date) if args.date else date.today()
@@ -961,13 +458,9 @@ def main():
         for i in range(args.days)
     ]
 
-    db = boto3.resource('dynamodb', region_name='eu-west-1')
-    tbl = db.Table('SureBetBets')
-
-    all_results = []
-    for d in dates:
-        day_results = analyse_date(d, tbl)
-        all_results.extend(day_results)
+    all_results, _ = analyse_dates(dates)
+    if args.max_odds:
+        all_results = [r for r in all_results if r['fav_odds'] <= args.max_odds]
 
     if args.json_out:
         print(json.dumps(all_results, indent=2, default=str))
@@ -42,12 +42,8 @@ import time
 import os
 from datetime import datetime, timezone
 
-try:
-    import requests
-    _HAS_REQUESTS = True
-except ImportError:
-    import urllib.request
-    _HAS_REQUESTS = False
+# http_client imports requests on first request — scoring-only callers never pay for it
+import http_client
 
 # ---------------------------------------------------------------------------
 # Cache file — avoids re-scraping the same horses on every refresh
@@ -76,7 +72,6 @@ def _save_cache():
         pass
 
 
-_load_cache()
 
 # ---------------------------------------------------------------------------
 # SL horse ID map — persistent name → numeric id
@@ -109,7 +104,19 @@ def _save_sl_ids():
         pass
 
 
-_load_sl_ids()
+
+_caches_loaded = False
+
+
+def _ensure_caches():
+    """Load form_cache.json + _sl_horse_ids.json on first use, not at import —
+    importing this module (e.g. via comprehensive_pick_logic in the API Lambda)
+    no longer parses both JSON files on every cold start."""
+    global _caches_loaded
+    if not _caches_loaded:
+        _load_cache()
+        _load_sl_ids()
+        _caches_loaded = True
 
 # ---------------------------------------------------------------------------
 # Today's pre-fetched form data (populated by enrich_runners)
@@ -134,25 +141,8 @@ _SL_HEADERS = {
 
 
 def _http_get(url, headers=None, timeout=15):
-    """Minimal HTTP GET — works with or without `requests` package."""
-    hdrs = headers or _SL_HEADERS
-    if _HAS_REQUESTS:
-        try:
-            r = requests.get(url, headers=hdrs, timeout=timeout, allow_redirects=True)
-            if r.status_code == 200:
-                return r.text
-        except Exception:
-            pass
-        return None
-    else:
-        try:
-            req = urllib.request.Request(url, headers=hdrs)
-            with urllib.request.urlopen(req, timeout=timeout) as resp:
-                if resp.status == 200:
-                    return resp.read().decode('utf-8', errors='replace')
-        except Exception:
-            pass
-        return None
+    """HTTP GET through the shared pooled client — body text on 200, else None."""
+    return http_client.get_text(url, headers=headers or _SL_HEADERS, timeout=timeout)
 
 
 # ---------------------------------------------------------------------------
@@ -310,6 +300,7 @@ def _fetch_sl_race_form(race_url: str) -> dict:
     Also updates _sl_id_map with any new horse IDs discovered.
     """
     global _sl_ids_dirty
+    _ensure_caches()
     html = _http_get(race_url, timeout=15)
     if not html:
         return {}
@@ -434,6 +425,7 @@ def fetch_form(horse_name: str, max_runs: int = 6, force_refresh: bool = False)
       3. SL profile page (/racing/profiles/horse/{id}) if horse ID is known
       4. Return [] — no data available for this horse
     """
+    _ensure_caches()
     cache_key = horse_name.lower().strip()
     now = datetime.now(timezone.utc)
 
@@ -482,6 +474,7 @@ def enrich_runners(races: list[dict], verbose: bool = True) -> list[dict]:
     then injects form data into each runner. Mutates races in-place and returns them.
     """
     global _today_form
+    _ensure_caches()
 
     # Step 1: Get today's SL race URLs (indexed by venue slug)
     today = datetime.now().strftime('%Y-%m-%d')
@@ -286,6 +286,65 @@ function toFractional(decimal) {
   return `${n/g}/${20/g}`;
 }
 
+// ---- ROI CSV download ----
+// The API streams the export to S3 and returns a pre-signed URL; an inline
+// text/csv body (S3 unavailable) is still handled the old way.
+function downloadRoiCsv() {
+  return fetch(API_BASE_URL + '/api/results/export-csv').then(r => {
+    const ct = r.headers.get('Content-Type') || '';
+    if (ct.includes('application/json')) {
+      return r.json().then(data => {
+        if (!data.url) throw new Error(data.error || 'Export failed');
+        const a = document.createElement('a');
+        a.href = data.url; a.click();
+      });
+    }
+    return r.text().then(csv => {
+      const blob = new Blob([csv], { type: 'text/csv' });
+      const url = URL.createObjectURL(blob);
+      const a = document.createElement('a');
+      a.href = url; a.download = 'BetBudAI_ROI_Data.csv'; a.click();
+      URL.revokeObjectURL(url);
+    });
+  });
+}
+
+// ---- Push channel (Server-Sent Events) ----
+// Picks and results arrive as small delta events (see push_events.py) instead
+// of re-polling the whole list. Browsers without EventSource keep the old
+// 30-minute poll between 12:00 and 18:00.
+const EVENTS_URL = process.env.REACT_APP_EVENTS_URL || API_BASE_URL + '/api/events';
+
+function usePushEvents(handlers, fallbackPoll) {
+  useEffect(() => {
+    if (typeof window === 'undefined' || !window.EventSource) {
+      if (!fallbackPoll) return undefined;
+      const iv = setInterval(() => { const h = new Date().getHours(); if (h >= 12 && h <= 18) fallbackPoll(); }, 30*60*1000);
+      return () => clearInterval(iv);
+    }
+    const es = new EventSource(EVENTS_URL);
+    const listeners = Object.entries(handlers).map(([kind, fn]) => {
+      const l = e => { try { fn(JSON.parse(e.data)); } catch (err) { /* malformed event — ignore */ } };
+      es.addEventListener(kind, l);
+      return [kind, l];
+    });
+    return () => { listeners.forEach(([k, l]) => es.removeEventListener(k, l)); es.close(); };
+  }, []); // eslint-disable-line react-hooks/exhaustive-deps
+}
+
+// Merge settled-result deltas into a picks list by bet_id (null fields are not sent values)
+function mergeResultDeltas(picks, results) {
+  const byId = {};
+  (results || []).forEach(r => { byId[r.bet_id] = r; });
+  return picks.map(p => {
+    const d = byId[p.bet_id];
+    if (!d) return p;
+    const upd = {};
+    Object.entries(d).forEach(([k, v]) => { if (v !== null && v !== undefined) upd[k] = v; });
+    return { ...p, ...upd };
+  });
+}
+
 // ---- App ----
 function App() {
   const [page, setPage] = useState('home');
@@ -631,7 +690,14 @@ function DailyPicksView({ isFreeUser, onUpgrade, authUser }) {
 
   useEffect(() => { const t = setInterval(() => setNow(new Date()), 60000); return () => clearInterval(t); }, []);
   useEffect(() => { const h = () => setIsMobile(window.innerWidth < 768); window.addEventListener('resize', h); return () => window.removeEventListener('resize', h); }, []);
-  useEffect(() => { loadPicks(); const iv = setInterval(() => { const h = new Date().getHours(); if (h >= 12 && h <= 18) loadPicks(); }, 30*60*1000); return () => clearInterval(iv); }, []); // eslint-disable-line react-hooks/exhaustive-deps
+  useEffect(() => { loadPicks(); }, []); // eslint-disable-line react-hooks/exhaustive-deps
+  usePushEvents({
+    picks:   () => loadPicks(),
+    results: ev => {
+      setAllPicks(prev => mergeResultDeltas(prev, ev.results));
+      fetch(API_BASE_URL + '/api/results/cumulative-roi').then(r => r.json()).then(d => { if (d?.success) setCumulRoi(d); }).catch(() => {});
+    },
+  }, () => loadPicks());
 
   const loadPicks = async () => {
     setLoading(true); setError(null);
@@ -741,7 +807,7 @@ function DailyPicksView({ isFreeUser, onUpgrade, authUser }) {
                 Across all bets, every €1 staked returned <span style={{ color: rv >= 0 ? '#34d399' : '#f87171', fontWeight:'700' }}>€{(1 + rv / 100).toFixed(2)}</span> on average — a {rv >= 0 ? 'profit' : 'loss'} of <span style={{ color: rv >= 0 ? '#34d399' : '#f87171', fontWeight:'700' }}>€{Math.abs(rv / 100).toFixed(2)}</span> per bet
               </div>
               <div style={{ marginTop:'8px' }}>
-                <span onClick={() => { fetch(API_BASE_URL + '/api/results/export-csv').then(r => r.text()).then(csv => { const blob = new Blob([csv], { type: 'text/csv' }); const url = URL.createObjectURL(blob); const a = document.createElement('a'); a.href = url; a.download = 'BetBudAI_ROI_Data.csv'; a.click(); URL.revokeObjectURL(url); }).catch(() => {}); }}
+                <span onClick={() => { downloadRoiCsv().catch(() => {}); }}
                   style={{ cursor:'pointer', fontSize:'12px', fontWeight:'700', color:'white', background:'linear-gradient(135deg,#059669,#047857)', border:'none', borderRadius:'8px', padding:'8px 18px', display:'inline-flex', alignItems:'center', gap:'6px' }}>
                   📥 Download Full History CSV
                 </span>
@@ -1236,7 +1302,14 @@ function Top5PicksView() {
 
   useEffect(() => { const t = setInterval(() => setNow(new Date()), 60000); return () => clearInterval(t); }, []);
   useEffect(() => { const h = () => setIsMobile(window.innerWidth < 768); window.addEventListener('resize', h); return () => window.removeEventListener('resize', h); }, []);
-  useEffect(() => { loadPicks(); const iv = setInterval(() => { const h = new Date().getHours(); if (h >= 12 && h <= 18) loadPicks(); }, 30*60*1000); return () => clearInterval(iv); }, []); // eslint-disable-line react-hooks/exhaustive-deps
+  useEffect(() => { loadPicks(); }, []); // eslint-disable-line react-hooks/exhaustive-deps
+  usePushEvents({
+    picks:   () => loadPicks(),
+    results: ev => {
+      setAllPicks(prev => mergeResultDeltas(prev, ev.results));
+      fetch(API_BASE_URL + '/api/results/cumulative-roi').then(r => r.json()).then(d => { if (d?.success) setCumulRoi(d); }).catch(() => {});
+    },
+  }, () => loadPicks());
 
   const loadPicks = async () => {
     setLoading(true); setError(null);
@@ -1348,7 +1421,7 @@ function Top5PicksView() {
                 Every €1 staked returned <span style={{ color: rv >= 0 ? '#34d399' : '#f87171', fontWeight:'700' }}>€{(1 + rv / 100).toFixed(2)}</span> on average
               </div>
               <div style={{ marginTop:'8px' }}>
-                <span onClick={() => { fetch(API_BASE_URL + '/api/results/export-csv').then(r => r.text()).then(csv => { const blob = new Blob([csv], { type: 'text/csv' }); const url = URL.createObjectURL(blob); const a = document.createElement('a'); a.href = url; a.download = 'BetBudAI_ROI_Data.csv'; a.click(); URL.revokeObjectURL(url); }).catch(() => {}); }}
+                <span onClick={() => { downloadRoiCsv().catch(() => {}); }}
                   style={{ cursor:'pointer', fontSize:'12px', fontWeight:'700', color:'white', background:'linear-gradient(135deg,#059669,#047857)', border:'none', borderRadius:'8px', padding:'8px 18px', display:'inline-flex', alignItems:'center', gap:'6px' }}>
                   📥 Download Full History CSV
                 </span>
@@ -1495,6 +1568,13 @@ function Top5PicksView() {
 }
 
 // ---- Yesterday's Results ----
+// race_fields is not rendered here, so the dashboard call leaves it out
+const DASHBOARD_FIELDS = [
+  'today.success', 'today.picks', 'today.summary',
+  'yesterday.success', 'yesterday.picks', 'yesterday.summary',
+  'roi',
+].join(',');
+
 function YesterdayResultsView({ isFreeUser }) {
   const [results, setResults]         = useState(null);
   const [loading, setLoading]         = useState(true);
@@ -1510,16 +1590,15 @@ function YesterdayResultsView({ isFreeUser }) {
   }, []);
 
   useEffect(() => { loadResults(); }, []); // eslint-disable-line react-hooks/exhaustive-deps
+  usePushEvents({ results: () => loadResults() });
 
   const loadResults = async () => {
     setLoading(true); setError(null);
     try {
-      const [todayRes, yestRes, cumulRes] = await Promise.all([
-        fetch(API_BASE_URL + '/api/results/today'),
-        fetch(API_BASE_URL + '/api/results/yesterday'),
-        fetch(API_BASE_URL + '/api/results/cumulative-roi'),
-      ]);
-      const [todayData, yestData, cumulData] = await Promise.all([todayRes.json(), yestRes.json(), cumulRes.json()]);
+      // One combined call (shared DynamoDB load, gzipped) instead of today + yesterday + ROI
+      const dashRes  = await fetch(API_BASE_URL + '/api/dashboard?fields=' + DASHBOARD_FIELDS);
+      const dashData = await dashRes.json();
+      const todayData = dashData.today || {}, yestData = dashData.yesterday || {}, cumulData = dashData.roi || {};
       if (cumulData.success) setCumulRoi(cumulData);
 
       const todayPicks = (todayData.success ? todayData.picks || [] : [])
@@ -1745,14 +1824,8 @@ function YesterdayResultsView({ isFreeUser }) {
                       onClick={() => {
                         const btn = document.getElementById('csv-download-btn');
                         if (btn) btn.textContent = '⏳ Downloading...';
-                        fetch(API_BASE_URL + '/api/results/export-csv')
-                          .then(r => r.text())
-                          .then(csv => {
-                            const blob = new Blob([csv], { type: 'text/csv' });
-                            const url = URL.createObjectURL(blob);
-                            const a = document.createElement('a');
-                            a.href = url; a.download = 'BetBudAI_ROI_Data.csv'; a.click();
-                            URL.revokeObjectURL(url);
+                        downloadRoiCsv()
+                          .then(() => {
                             if (btn) btn.textContent = '✅ Downloaded!';
                             setTimeout(() => { if (btn) btn.textContent = '📥 Download CSV'; }, 3000);
                           })
@@ -12,7 +12,6 @@ import glob
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Any
-from collections import defaultdict
 
 
 def load_all_results(days_back: int = 30) -> List[Dict]:
@@ -41,13 +40,50 @@ def load_all_results(days_back: int = 30) -> List[Dict]:
     return results
 
 
+def _results_frame(results_data) -> pd.DataFrame:
+    """A day's results file → one row per runner: market_id, selection_id, status, won, placed, result odds.
+    Results can be either a flat list of runners with market_id/selection_id, or
+    nested markets (a list, or a dict with a 'markets' key) containing runners."""
+    if isinstance(results_data, list) and results_data and 'market_id' in results_data[0]:
+        runners = pd.DataFrame(results_data)
+    else:
+        markets = results_data if isinstance(results_data, list) else results_data.get('markets', [])
+        runners = pd.json_normalize(markets, record_path='runners', meta=['market_id'],
+                                    errors='ignore') if markets else pd.DataFrame()
+    if runners.empty:
+        return runners
+    for col in ('status', 'is_winner', 'is_placed'):
+        if col not in runners:
+            runners[col] = None
+    status = runners['status'].fillna('UNKNOWN')
+    out = pd.DataFrame({
+        'market_id':    runners['market_id'].astype(str),
+        'selection_id': runners['selection_id'].astype(str),
+        'status':       status,
+        # Handle both old and new status formats
+        'won':          runners['is_winner'].fillna(False).astype(bool) | status.eq('WINNER'),
+        'placed':       runners['is_placed'].fillna(False).astype(bool) | status.isin(['WINNER', 'PLACED']),
+        'result_odds':  _first_numeric(runners, ['odds', 'last_price_traded', 'sp']),
+    })
+    return out.drop_duplicates(['market_id', 'selection_id'])
+
+
+def _first_numeric(df: pd.DataFrame, cols: List[str]) -> pd.Series:
+    """First parseable number across cols (try multiple field names), row-wise but vectorised."""
+    out = pd.Series(float('nan'), index=df.index)
+    for col in cols:
+        if col in df:
+            out = out.fillna(pd.to_numeric(df[col], errors='coerce'))
+    return out
+
+
 def merge_all_selections_with_results(days_back: int = 30) -> pd.DataFrame:
-    """Merge selections with results across all days"""
+    """Merge selections with results across all days (one merge per day file)"""
     
     history_path = Path(__file__).parent / "history"
     cutoff_date = datetime.now() - timedelta(days=days_back)
     
-    all_data = []
+    frames = []
     
     # Find all selection files
     for selections_file in sorted(history_path.glob("selections_*.csv")):
@@ -59,9 +95,6 @@ def merge_all_selections_with_results(days_back: int = 30) -> pd.DataFrame:
             if file_date < cutoff_date:
                 continue
             
-            # Load selections
-            selections_df = pd.read_csv(selections_file)
-            
             # Find corresponding results file
             results_file = history_path / f"results_{date_str}.json"
             
@@ -70,195 +103,106 @@ def merge_all_selections_with_results(days_back: int = 30) -> pd.DataFrame:
                 continue
             
             with open(results_file, 'r') as f:
-                results_data = json.load(f)
+                results_df = _results_frame(json.load(f))
+            if results_df.empty:
+                continue
             
-            # Results can be either:
-            # 1. Flat list of runners with market_id/selection_id
-            # 2. Nested dict with 'markets' key containing runners
-            if isinstance(results_data, list):
-                # Check if it's a flat list (new format)
-                if results_data and 'market_id' in results_data[0]:
-                    # Flat format: convert to dict for easier lookup
-                    results_lookup = {
-                        (str(r.get('market_id')), str(r.get('selection_id'))): r 
-                        for r in results_data
-                    }
-                else:
-                    # Old nested format
-                    markets = results_data
-                    results_lookup = None
-            else:
-                markets = results_data.get('markets', [])
-                results_lookup = None
+            selections_df = pd.read_csv(selections_file)
+            selections_df['market_id'] = selections_df.get('market_id', pd.Series('', index=selections_df.index)).astype(str)
+            selections_df['selection_id'] = selections_df.get('selection_id', pd.Series('', index=selections_df.index)).astype(str)
+            merged = selections_df.merge(results_df, on=['market_id', 'selection_id'], how='inner')
+            if merged.empty:
+                continue
             
-            # Merge selections with results
-            for _, row in selections_df.iterrows():
-                selection_id = str(row.get('selection_id', ''))
-                market_id = str(row.get('market_id', ''))
-                
-                # Find result for this selection
-                result = None
-                
-                # Use flat lookup if available
-                if results_lookup is not None:
-                    result = results_lookup.get((market_id, selection_id))
-                else:
-                    # Old nested format
-                    for market in markets:
-                        if str(market.get('market_id')) == market_id:
-                            for runner in market.get('runners', []):
-                                if str(runner.get('selection_id')) == selection_id:
-                                    result = runner
-                                    break
-                            break
-                
-                if result:
-                    # Handle both old and new status formats
-                    status = result.get('status', 'UNKNOWN')
-                    is_winner = result.get('is_winner', False) or status == 'WINNER'
-                    is_placed = result.get('is_placed', False) or status in ['WINNER', 'PLACED']
-                    
-                    # Extract odds (try multiple field names)
-                    odds = None
-                    for odds_field in ['odds', 'last_price_traded', 'sp']:
-                        if odds_field in row:
-                            try:
-                                odds = float(row[odds_field])
-                                break
-                            except (ValueError, TypeError):
-                                continue
-                    
-                    # If no odds in row, try result
-                    if odds is None and result:
-                        for odds_field in ['odds', 'last_price_traded', 'sp']:
-                            if odds_field in result:
-                                try:
-                                    odds = float(result[odds_field])
-                                    break
-                                except (ValueError, TypeError):
-                                    continue
-                    
-                    merged = {
-                        'date': date_str,
-                        'runner_name': row.get('runner_name', ''),
-                        'venue': row.get('venue', ''),
-                        'market_name': row.get('market_name', ''),
-                        'odds': odds if odds else 0.0,
-                        'p_win': float(row.get('p_win', 0)),
-                        'p_place': float(row.get('p_place', 0)),
-                        'bet_type': row.get('bet_type', 'EW'),
-                        'tags': row.get('tags', ''),
-                        'why_now': row.get('why_now', ''),
-                        'status': status,
-                        'won': is_winner,
-                        'placed': is_placed
-                    }
-                    all_data.append(merged)
+            # Odds from the selection row first, then the result
+            odds = _first_numeric(merged, ['odds', 'last_price_traded', 'sp']).fillna(merged['result_odds'])
+            frames.append(pd.DataFrame({
+                'date': date_str,
+                'runner_name': merged.get('runner_name', ''),
+                'venue': merged.get('venue', ''),
+                'market_name': merged.get('market_name', ''),
+                'odds': odds.fillna(0.0),
+                'p_win': pd.to_numeric(merged.get('p_win', 0), errors='coerce').fillna(0.0),
+                'p_place': pd.to_numeric(merged.get('p_place', 0), errors='coerce').fillna(0.0),
+                'bet_type': merged.get('bet_type', 'EW'),
+                'tags': merged.get('tags', ''),
+                'why_now': merged.get('why_now', ''),
+                'status': merged['status'],
+                'won': merged['won'],
+                'placed': merged['placed'],
+            }))
         
         except Exception as e:
             print(f"Error processing {selections_file}: {e}")
             continue
     
-    if not all_data:
+    if not frames:
         return pd.DataFrame()
     
-    return pd.DataFrame(all_data)
+    return pd.concat(frames, ignore_index=True)
 
 
 def analyze_tag_performance(df: pd.DataFrame) -> Dict[str, Dict]:
     """Analyze which selection strategies work best"""
+    import learning_analytics
+    if df.empty:
+        return {}
+    stats = learning_analytics.tag_stats(learning_analytics.prepare(df), min_n=3)  # Minimum sample size
     
-    tag_stats = defaultdict(lambda: {'wins': 0, 'places': 0, 'total': 0, 'p_win_avg': []})
-    
-    for _, row in df.iterrows():
-        tags = str(row.get('tags', '')).split(',')
-        
-        for tag in tags:
-            tag = tag.strip()
-            if not tag or tag == 'enhanced_analysis':
-                continue
-            
-            tag_stats[tag]['total'] += 1
-            tag_stats[tag]['p_win_avg'].append(row.get('p_win', 0))
-            
-            if row.get('won', False):
-                tag_stats[tag]['wins'] += 1
-            if row.get('placed', False):
-                tag_stats[tag]['places'] += 1
-    
-    # Calculate rates
     results = {}
-    for tag, stats in tag_stats.items():
-        if stats['total'] >= 3:  # Minimum sample size
-            win_rate = stats['wins'] / stats['total']
-            place_rate = stats['places'] / stats['total']
-            avg_p_win = sum(stats['p_win_avg']) / len(stats['p_win_avg'])
-            
-            results[tag] = {
-                'win_rate': win_rate,
-                'place_rate': place_rate,
-                'expected_win_rate': avg_p_win,
-                'calibration': win_rate - avg_p_win,
-                'sample_size': stats['total'],
-                'verdict': 'WORKING' if win_rate >= avg_p_win * 0.8 else 'FAILING'
-            }
+    for tag, r in stats.iterrows():
+        win_rate = float(r['win_rate'])
+        avg_p_win = float(r.get('expected_win_rate', 0.0))
+        results[tag] = {
+            'win_rate': win_rate,
+            'place_rate': float(r['place_rate']),
+            'expected_win_rate': avg_p_win,
+            'calibration': win_rate - avg_p_win,
+            'sample_size': int(r['n']),
+            'verdict': 'WORKING' if win_rate >= avg_p_win * 0.8 else 'FAILING'
+        }
     
     return results
 
 
 def analyze_odds_ranges(df: pd.DataFrame) -> Dict[str, Dict]:
     """Analyze performance by odds ranges - KEY FOR SWEET SPOT OPTIMIZATION"""
+    import learning_analytics
     
     if 'odds' not in df.columns or len(df) == 0:
         return {}
     
     # Filter out invalid odds
-    df_valid = df[df['odds'] > 0].copy()
+    df_valid = learning_analytics.prepare(df[df['odds'] > 0])
     
     if len(df_valid) == 0:
         return {}
     
-    # Define sweet spot ranges
-    ranges = {
-        'ultimate_sweet_spot': (3.5, 6.0),  # Perfect range
-        'sweet_spot': (3.0, 9.0),           # Target range  
-        'short_odds': (1.0, 3.0),           # Favorites
-        'medium_odds': (9.0, 15.0),         # Long shots
-        'long_odds': (15.0, 50.0),          # Very long
-        'extreme_odds': (50.0, 1000.0)      # Avoid
-    }
+    # Define sweet spot ranges (overlapping — each is its own mask)
+    ranges = [
+        ('ultimate_sweet_spot', 3.5, 6.0),     # Perfect range
+        ('sweet_spot',          3.0, 9.0),     # Target range
+        ('short_odds',          1.0, 3.0),     # Favorites
+        ('medium_odds',         9.0, 15.0),    # Long shots
+        ('long_odds',          15.0, 50.0),    # Very long
+        ('extreme_odds',       50.0, 1000.0),  # Avoid
+    ]
     
-    odds_stats = {}
+    # ROI: €1 level stake per bet, return includes stake (level_pl)
+    stats = learning_analytics.odds_bands(df_valid, ranges, odds_col='odds')
     
-    for range_name, (min_odds, max_odds) in ranges.items():
-        range_df = df_valid[(df_valid['odds'] >= min_odds) & (df_valid['odds'] < max_odds)]
-        
-        if len(range_df) == 0:
+    odds_stats = {}
+    for range_name, r in stats.iterrows():
+        if r['n'] == 0:
             continue
-        
-        total_bets = len(range_df)
-        wins = range_df['won'].sum()
-        win_rate = wins / total_bets if total_bets > 0 else 0
-        
-        # Calculate ROI (simple: assume €1 stake per bet)
-        total_stake = total_bets
-        total_return = 0
-        
-        for _, row in range_df.iterrows():
-            if row['won']:
-                total_return += row['odds']  # Return includes stake
-        
-        profit = total_return - total_stake
-        roi = (profit / total_stake * 100) if total_stake > 0 else 0
-        
         odds_stats[range_name] = {
-            'range': f"{min_odds:.1f}-{max_odds:.1f}",
-            'total_bets': int(total_bets),
-            'wins': int(wins),
-            'win_rate': float(win_rate),
-            'roi': float(roi),
-            'avg_odds': float(range_df['odds'].mean()),
-            'verdict': 'PROFITABLE' if roi > 0 else 'LOSING'
+            'range': r['range'],
+            'total_bets': int(r['n']),
+            'wins': int(r['wins']),
+            'win_rate': float(r['win_rate']),
+            'roi': float(r['roi']),
+            'avg_odds': float(r['avg_odds']),
+            'verdict': 'PROFITABLE' if r['roi'] > 0 else 'LOSING'
         }
     
     return odds_stats
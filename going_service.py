@@ -0,0 +1,200 @@
+"""
+GOING SERVICE — dated going-conditions cache shared across processes & Lambdas
+===============================================================================
+Replaces the per-process 1-hour cache in comprehensive_pick_logic with a
+per-DATE cache that is computed once for the day's courses and reused by
+every scoring process (local runs, refreshes, surebet-analysis Lambda).
+
+Lookup order for get_going_conditions():
+  1. In-process memory          (_mem[date])
+  2. Local file                 going_cache_{date}.json   (cwd, /tmp in Lambda)
+  3. S3                         s3://{PIPELINE_BUCKET}/daily/{date}/going_cache.json
+                                (+ daily/{date}/going/{course}.json for a course
+                                fetched on a scoring-time miss)
+  4. Weather API                one multi-location Open-Meteo request
+
+The prewarm writes the whole day in one object.  A miss at scoring time writes
+only that course's own key, so concurrent analysis shards never overwrite each
+other's entries (or re-PUT the whole cache per course).
+
+Going is prewarmed at the start of the morning pipeline (sf_betfair_fetch and
+complete_daily_analysis STAGE 0) for only the courses racing today, so the
+first analyze_horse_comprehensive() call no longer pays for a weather fetch.
+
+Usage:
+  from going_service import prewarm_going, get_going_conditions
+
+  prewarm_going(['Ascot', 'Kempton'])        # morning: fetch + persist
+  going = get_going_conditions('Ascot')      # scoring: memory/file/S3 hit
+"""
+
+import os
+import json
+from datetime import datetime
+
+BUCKET = os.environ.get('PIPELINE_BUCKET', 'surebet-pipeline-data')
+REGION = os.environ.get('AWS_DEFAULT_REGION', 'eu-west-1')
+USE_S3 = os.environ.get('GOING_CACHE_S3', '1') != '0'
+CACHE_DIR = '/tmp' if os.environ.get('AWS_LAMBDA_FUNCTION_NAME') else '.'
+
+_mem = {}   # date_str → {track: going_info}
+_seeded = set()     # dates pinned by seed_going — never persisted
+
+
+def _today():
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+def _cache_path(date_str):
+    return os.path.join(CACHE_DIR, f'going_cache_{date_str}.json')
+
+
+def _s3_key(date_str):
+    return f'daily/{date_str}/going_cache.json'
+
+
+def _course_key(date_str, course):
+    return f"daily/{date_str}/going/{course.lower().replace(' ', '_')}.json"
+
+
+def _load_local(date_str):
+    path = _cache_path(date_str)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            return json.load(f).get('tracks', {})
+    except Exception:
+        return None
+
+
+def _load_s3(date_str):
+    if not USE_S3:
+        return None
+    try:
+        import boto3
+        s3 = boto3.client('s3', region_name=REGION)
+        obj = s3.get_object(Bucket=BUCKET, Key=_s3_key(date_str))
+        return json.loads(obj['Body'].read().decode('utf-8')).get('tracks', {})
+    except Exception:
+        return None
+
+
+def _load_s3_course(date_str, course):
+    if not USE_S3:
+        return None
+    try:
+        import boto3
+        s3 = boto3.client('s3', region_name=REGION)
+        obj = s3.get_object(Bucket=BUCKET, Key=_course_key(date_str, course))
+        return json.loads(obj['Body'].read().decode('utf-8')).get('going')
+    except Exception:
+        return None
+
+
+def _persist(date_str, tracks, course=None):
+    """Local file always holds the whole day; S3 gets the whole day, or with
+    course= only that course's own key."""
+    if date_str in _seeded:
+        return
+    # Failed weather lookups stay in memory only so the next process retries them
+    tracks = {t: g for t, g in tracks.items() if g.get('source') != 'unavailable'}
+    payload = json.dumps({
+        'date': date_str,
+        'updated_at': datetime.now().isoformat(),
+        'tracks': tracks,
+    }, default=str)
+    try:
+        with open(_cache_path(date_str), 'w') as f:
+            f.write(payload)
+    except Exception as e:
+        print(f"  [Going] Local cache write failed: {e}")
+    if not USE_S3 or (course is not None and course not in tracks):
+        return
+    if course is None:
+        key, body = _s3_key(date_str), payload
+    else:
+        key = _course_key(date_str, course)
+        body = json.dumps({'date': date_str, 'course': course, 'going': tracks[course]}, default=str)
+    try:
+        import boto3
+        s3 = boto3.client('s3', region_name=REGION)
+        s3.put_object(Bucket=BUCKET, Key=key, Body=body.encode('utf-8'), ContentType='application/json')
+    except Exception as e:
+        print(f"  [Going] S3 cache write skipped: {e}")
+
+
+def _load(date_str):
+    """Memory → local file → S3. Returns dict (possibly empty), never None."""
+    if date_str in _mem:
+        return _mem[date_str]
+    tracks = _load_local(date_str)
+    if tracks is None:
+        tracks = _load_s3(date_str)
+        if tracks is not None:
+            # Mirror to local file so sibling processes skip the S3 read
+            try:
+                with open(_cache_path(date_str), 'w') as f:
+                    json.dump({'date': date_str, 'tracks': tracks}, f, default=str)
+            except Exception:
+                pass
+    _mem[date_str] = tracks or {}
+    return _mem[date_str]
+
+
+def _fetch(courses):
+    """Compute going for courses via weather_going_inference (one batched request)."""
+    from weather_going_inference import check_all_tracks_going
+    return check_all_tracks_going(courses, use_official=True)
+
+
+def prewarm_going(courses=None, date_str=None):
+    """
+    Compute and persist going for the day's courses (None = all known tracks).
+    Courses already cached for date_str are not re-fetched.
+    Returns the full cached going dict for the date.
+    """
+    from weather_going_inference import TRACK_LOCATIONS
+    date_str = date_str or _today()
+    cached = _load(date_str)
+    if courses is None:
+        courses = list(TRACK_LOCATIONS.keys())
+    # Courses without coordinates are skipped (no entry — same as before)
+    missing = sorted({c for c in courses if c in TRACK_LOCATIONS and c not in cached})
+    if missing:
+        cached.update(_fetch(missing))
+        _persist(date_str, cached)
+    print(f"  [Going] {len(cached)} tracks cached for {date_str} ({len(missing)} fetched)")
+    return cached
+
+
+def get_going_conditions(course=None, date_str=None):
+    """
+    Going conditions for today, keyed by track name.
+    Passing course guarantees that course is present (fetched on a cache miss);
+    without course, an empty cache falls back to all known tracks.
+    """
+    from weather_going_inference import TRACK_LOCATIONS
+    date_str = date_str or _today()
+    cached = _load(date_str)
+    if course is not None:
+        if course not in cached and course in TRACK_LOCATIONS:
+            # Another shard may already have fetched it; else fetch and write its own key
+            going = _load_s3_course(date_str, course) if date_str not in _seeded else None
+            if going is None:
+                going = _fetch([course]).get(course)
+            if going is not None:
+                cached[course] = going
+                _persist(date_str, cached, course=course)
+    elif not cached:
+        cached = prewarm_going(None, date_str)
+    return cached
+
+
+def seed_going(going_data, date_str=None):
+    """Pin going for a date in memory (simulations / backtests).  Nothing for the
+    date is persisted; a course missing from going_data is still fetched from
+    the weather API on first use, in memory only."""
+    date_str = date_str or _today()
+    _seeded.add(date_str)
+    _mem[date_str] = going_data
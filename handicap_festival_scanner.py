@@ -47,7 +47,7 @@ import ast, argparse, json, os, re, sys, time
 from datetime import date, datetime
 from decimal import Decimal
 from collections import defaultdict
-import requests
+import http_client
 from bs4 import BeautifulSoup
 import boto3
 from boto3.dynamodb.conditions import Attr
@@ -125,7 +125,7 @@ def fetch_rp_form(horse_name: str, max_runs: int = 8) -> list[dict]:
     ]
     for url in urls:
         try:
-            resp = requests.get(url, headers=RP_HEADERS, timeout=15)
+            resp = http_client.get(url, headers=RP_HEADERS, timeout=15)
             if resp.status_code != 200:
                 continue
             soup = BeautifulSoup(resp.content, "html.parser")
@@ -148,7 +148,7 @@ def fetch_rp_form(horse_name: str, max_runs: int = 8) -> list[dict]:
                     pass
             if runs:
                 return runs[:max_runs]
-        except requests.RequestException:
+        except http_client.HttpError:
             pass
     return []
 
@@ -569,3 +569,4 @@ if __name__ == "__main__":
     )
     args = parser.parse_args()
     run_scan(args)
+    http_client.print_metrics()
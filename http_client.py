@@ -0,0 +1,341 @@
+"""
+HTTP CLIENT — one pooled, retrying, instrumented client for every scraper
+=========================================================================
+Replaces the bare requests.get/post and urllib calls in form_enricher,
+sl_results_fetcher, handicap_festival_scanner, sleeper_scan,
+scrape_skysports_form and ourhub_enricher.
+
+  - ONE requests.Session with keep-alive pools per host
+    (HTTP_POOL_HOSTS pools × HTTP_POOL_SIZE connections each)
+  - per-host concurrency cap (HTTP_HOST_CONCURRENCY, or set_host_limit()) —
+    scrapers can fan out with fetch_many() without hammering one site
+  - retry with exponential backoff + jitter on connection errors, 429 and
+    5xx; a Retry-After header (seconds or HTTP date) wins over the backoff
+  - per-host metrics: requests, errors, retries, bytes, latency p50/p95/max
+  - record / replay (HTTP_MODE=record|replay, HTTP_CASSETTE_DIR): responses
+    are stored one JSON file per request, so a scraper can be re-run offline
+    against yesterday's pages.  Request headers are never written (API keys,
+    Betfair session tokens).
+
+Falls back to urllib (no pooling) when `requests` is not installed; requests
+is imported on first use so scoring-only importers never pay for it.
+
+Usage:
+    import http_client
+    r = http_client.get(url, headers=HEADERS, timeout=15)
+    if r.status_code == 200: html = r.text
+    html = http_client.get_text(url, headers=HEADERS)        # None unless 200
+    data = http_client.post(url, json=payload, headers=H).raise_for_status().json()
+    pages = http_client.fetch_many(urls, headers=HEADERS, max_workers=8)
+    http_client.print_metrics()
+
+    HTTP_MODE=record python sl_results_fetcher.py 2026-04-18    # capture
+    HTTP_MODE=replay python sl_results_fetcher.py 2026-04-18    # offline
+"""
+
+import os
+import json
+import time
+import base64
+import random
+import hashlib
+import threading
+import importlib.util
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, urlencode
+
+MAX_RETRIES      = int(os.environ.get('HTTP_MAX_RETRIES', '3'))
+BACKOFF_BASE     = float(os.environ.get('HTTP_BACKOFF', '0.5'))    # seconds, doubles per attempt
+BACKOFF_MAX      = float(os.environ.get('HTTP_BACKOFF_MAX', '30'))  # cap incl. Retry-After
+POOL_HOSTS       = int(os.environ.get('HTTP_POOL_HOSTS', '16'))
+POOL_SIZE        = int(os.environ.get('HTTP_POOL_SIZE', '10'))
+HOST_CONCURRENCY = int(os.environ.get('HTTP_HOST_CONCURRENCY', '4'))
+MODE             = os.environ.get('HTTP_MODE', 'live')             # live | record | replay
+CASSETTE_DIR     = os.environ.get('HTTP_CASSETTE_DIR', 'http_cassettes')
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+_LATENCY_KEEP = 500     # samples kept per host for percentiles
+
+_HAS_REQUESTS = importlib.util.find_spec('requests') is not None
+
+
+class HttpError(Exception):
+    """Network failure after retries, a replay miss, or raise_for_status()."""
+
+    def __init__(self, msg, status=None, url=None):
+        super().__init__(msg)
+        self.status = status
+        self.url = url
+
+
+class Response:
+    """The slice of requests.Response the scrapers use — also what replay returns."""
+
+    __slots__ = ('status_code', 'content', 'headers', 'url', 'encoding', 'elapsed_ms', 'from_cassette')
+
+    def __init__(self, status_code, content, headers=None, url='', encoding=None,
+                 elapsed_ms=0.0, from_cassette=False):
+        self.status_code   = status_code
+        self.content       = content or b''
+        self.headers       = {k.lower(): v for k, v in (headers or {}).items()}
+        self.url           = url
+        self.encoding      = encoding or 'utf-8'
+        self.elapsed_ms    = elapsed_ms
+        self.from_cassette = from_cassette
+
+    @property
+    def ok(self):
+        return 200 <= self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HttpError(f'HTTP {self.status_code} for {self.url}', self.status_code, self.url)
+        return self
+
+
+# ── Session, per-host limits ──────────────────────────────────────────────────
+_session     = None
+_lock        = threading.Lock()
+_host_sems   = {}
+_host_limits = {}
+
+
+def _get_session():
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                s = requests.Session()
+                # retries are ours (Retry-After aware, instrumented) — adapter never retries
+                adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE, max_retries=0)
+                s.mount('https://', adapter)
+                s.mount('http://', adapter)
+                _session = s
+    return _session
+
+
+def set_host_limit(host, n):
+    """Cap concurrent in-flight requests to one host (before its first request)."""
+    _host_limits[host] = n
+    _host_sems.pop(host, None)
+
+
+def _host_sem(host):
+    sem = _host_sems.get(host)
+    if sem is None:
+        with _lock:
+            sem = _host_sems.get(host)
+            if sem is None:
+                sem = threading.BoundedSemaphore(_host_limits.get(host, HOST_CONCURRENCY))
+                _host_sems[host] = sem
+    return sem
+
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+_metrics = {}
+
+
+def _record_metric(host, ms, nbytes, status, retries, error=False):
+    with _lock:
+        m = _metrics.setdefault(host, {'requests': 0, 'errors': 0, 'retries': 0, 'bytes': 0,
+                                       'status': {}, 'latency_ms': []})
+        m['requests'] += 1
+        m['retries']  += retries
+        m['bytes']    += nbytes
+        if error:
+            m['errors'] += 1
+        if status is not None:
+            m['status'][status] = m['status'].get(status, 0) + 1
+        lat = m['latency_ms']
+        lat.append(ms)
+        if len(lat) > _LATENCY_KEEP:
+            del lat[:len(lat) - _LATENCY_KEEP]
+
+
+def metrics():
+    """{host: {requests, errors, retries, bytes, status{}, p50_ms, p95_ms, max_ms}}"""
+    out = {}
+    with _lock:
+        for host, m in _metrics.items():
+            lat = sorted(m['latency_ms'])
+            pct = (lambda q: round(lat[min(len(lat) - 1, int(q * len(lat)))], 1)) if lat else (lambda q: 0.0)
+            out[host] = {
+                'requests': m['requests'], 'errors': m['errors'], 'retries': m['retries'],
+                'bytes': m['bytes'], 'status': dict(m['status']),
+                'p50_ms': pct(0.50), 'p95_ms': pct(0.95), 'max_ms': round(lat[-1], 1) if lat else 0.0,
+            }
+    return out
+
+
+def reset_metrics():
+    with _lock:
+        _metrics.clear()
+
+
+def print_metrics():
+    snap = metrics()
+    if not snap:
+        return
+    print(f"  [HTTP] {'host':32} {'reqs':>5} {'err':>4} {'retry':>5} {'KB':>8} {'p50':>7} {'p95':>7} {'max':>7}")
+    for host, m in sorted(snap.items(), key=lambda kv: -kv[1]['requests']):
+        print(f"  [HTTP] {host[:32]:32} {m['requests']:5d} {m['errors']:4d} {m['retries']:5d} "
+              f"{m['bytes'] / 1024:8.1f} {m['p50_ms']:7.0f} {m['p95_ms']:7.0f} {m['max_ms']:7.0f}")
+
+
+# ── Record / replay ───────────────────────────────────────────────────────────
+
+def _cassette_path(method, url, params, body):
+    key = json.dumps([method, url, sorted((params or {}).items()), body], default=str, sort_keys=True)
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+    return os.path.join(CASSETTE_DIR, urlsplit(url).netloc or 'local', f'{digest}.json')
+
+
+def _load_cassette(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        c = json.load(f)
+    return Response(c['status'], base64.b64decode(c['body_b64']), c.get('headers'), c['url'],
+                    c.get('encoding'), from_cassette=True)
+
+
+def _save_cassette(path, method, resp):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'method': method, 'url': resp.url, 'status': resp.status_code,
+                'headers': {k: v for k, v in resp.headers.items() if k in ('content-type', 'retry-after')},
+                'encoding': resp.encoding, 'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'body_b64': base64.b64encode(resp.content).decode('ascii'),
+            }, f, indent=1)
+    except Exception as e:
+        print(f"  [HTTP] cassette not written for {resp.url}: {e}")
+
+
+# ── Core request ──────────────────────────────────────────────────────────────
+
+def _retry_after(resp):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), else None."""
+    val = resp.headers.get('retry-after')
+    if not val:
+        return None
+    try:
+        return max(0.0, float(val))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(val).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def _backoff(attempt, resp=None):
+    wait = _retry_after(resp) if resp is not None else None
+    if wait is None:
+        wait = BACKOFF_BASE * (2 ** attempt) * (0.5 + random.random() / 2)
+    return min(wait, BACKOFF_MAX)
+
+
+def _send_once(method, url, headers, params, data, json_body, timeout, allow_redirects):
+    if _HAS_REQUESTS:
+        r = _get_session().request(method, url, headers=headers, params=params, data=data, json=json_body,
+                                   timeout=timeout, allow_redirects=allow_redirects)
+        return Response(r.status_code, r.content, r.headers, r.url, r.encoding)
+    import urllib.request
+    import urllib.error
+    if params:
+        url = f"{url}{'&' if '?' in url else '?'}{urlencode(params)}"
+    hdrs = dict(headers or {})
+    if json_body is not None:
+        data = json.dumps(json_body).encode('utf-8')
+        hdrs.setdefault('Content-Type', 'application/json')
+    elif isinstance(data, str):
+        data = data.encode('utf-8')
+    req = urllib.request.Request(url, data=data, headers=hdrs, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return Response(resp.status, resp.read(), dict(resp.headers), resp.geturl(),
+                            resp.headers.get_content_charset())
+    except urllib.error.HTTPError as e:
+        return Response(e.code, e.read(), dict(e.headers or {}), url)
+
+
+def request(method, url, headers=None, params=None, data=None, json=None, timeout=15,
+            retries=None, allow_redirects=True):
+    """
+    One HTTP request through the shared pool, with retries.
+    Returns a Response for any HTTP status (callers check status_code);
+    raises HttpError only when no response was obtained at all.
+    """
+    method = method.upper()
+    retries = MAX_RETRIES if retries is None else retries
+    host = urlsplit(url).netloc
+    cassette = None
+    if MODE in ('record', 'replay'):
+        cassette = _cassette_path(method, url, params, json if json is not None else data)
+        if MODE == 'replay':
+            if not os.path.exists(cassette):
+                raise HttpError(f'replay miss: {method} {url}', url=url)
+            resp = _load_cassette(cassette)
+            _record_metric(host, 0.0, len(resp.content), resp.status_code, 0)
+            return resp
+
+    resp, last_exc, attempt = None, None, 0
+    t0 = time.perf_counter()
+    with _host_sem(host):
+        while True:
+            try:
+                resp = _send_once(method, url, headers, params, data, json, timeout, allow_redirects)
+                last_exc = None
+            except Exception as e:
+                resp, last_exc = None, e
+            if attempt >= retries or (resp is not None and resp.status_code not in RETRY_STATUS):
+                break
+            time.sleep(_backoff(attempt, resp))
+            attempt += 1
+    ms = (time.perf_counter() - t0) * 1000
+
+    if resp is None:
+        _record_metric(host, ms, 0, None, attempt, error=True)
+        raise HttpError(f'{method} {url} failed after {attempt + 1} attempt(s): {last_exc}', url=url)
+    resp.elapsed_ms = ms
+    _record_metric(host, ms, len(resp.content), resp.status_code, attempt, error=resp.status_code >= 400)
+    if cassette:
+        _save_cassette(cassette, method, resp)
+    return resp
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def get_text(url, **kwargs):
+    """Body text for a 200, else None. Never raises."""
+    try:
+        r = request('GET', url, **kwargs)
+        return r.text if r.status_code == 200 else None
+    except HttpError:
+        return None
+
+
+def fetch_many(urls, max_workers=8, **kwargs):
+    """get_text() over many URLs in parallel → {url: text or None}.
+    Per-host caps still apply, so max_workers can exceed HOST_CONCURRENCY."""
+    from concurrent.futures import ThreadPoolExecutor
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as ex:
+        return dict(zip(urls, ex.map(lambda u: get_text(u, **kwargs), urls)))
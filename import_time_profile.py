@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+import_time_profile.py
+======================
+Cold-start import profile for the Lambda entry modules.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for
+each module and reports:
+  - total cumulative import time (ms)
+  - the heaviest individual imports underneath it
+  - any HEAVY dependency (boto3, requests, stripe …) pulled in at import time
+    that the module is expected to defer to first use
+
+Budgets live in import_budget.json ({module: {"max_ms": .., "forbid": [..]}}).
+A module over budget, or importing a forbidden package at import time, is a
+regression and the script exits 1 — run it before every Lambda deploy.
+
+Wall-clock import times swing with the machine and its load, so the check is
+relative: every run also times a stdlib REFERENCE import, and each max_ms is
+scaled by (reference now / "_reference_ms" recorded when the budgets were
+written). Each timing is the median of --runs fresh interpreters, and --update
+writes current × HEADROOM so a budget only trips on a real regression.
+
+The repo directory is APPENDED to sys.path so site-packages (== the Lambda
+runtime's boto3) wins over the vendored copies in the repo root.
+
+Usage:
+    python import_time_profile.py                    # profile + check budgets
+    python import_time_profile.py lambda_api_picks   # one module
+    python import_time_profile.py --top 25           # show more offenders
+    python import_time_profile.py --runs 5           # median of 5 interpreters per module
+    python import_time_profile.py --update           # rewrite budgets (current × HEADROOM)
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_DIR    = Path(__file__).parent
+BUDGET_FILE = REPO_DIR / 'import_budget.json'
+
+# Entry modules whose import cost lands on a Lambda cold start
+DEFAULT_MODULES = [
+    'lambda_api_picks',
+    'api_common',
+    'api_picks',
+    'comprehensive_pick_logic',
+    'complete_daily_analysis',
+    'form_enricher',
+    'trainer_form_stats',
+    'going_service',
+    'config_snapshot',
+    'weather_going_inference',
+]
+
+# Packages that must be deferred to first use unless a module's budget says otherwise
+HEAVY = ['boto3', 'botocore', 'requests', 'stripe', 'urllib3', 'selenium', 'pandas', 'numpy']
+
+# Stdlib import timed alongside the modules — the machine-speed yardstick
+REFERENCE = 'urllib.request'
+HEADROOM  = 2.0      # --update: budget = median × HEADROOM (floor MIN_BUDGET_MS)
+MIN_BUDGET_MS = 20
+
+_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def profile_module(module):
+    """Return {'total_ms', 'imports': [(name, self_ms, cum_ms, depth)], 'error'}."""
+    code = f"import sys; sys.path.append({str(REPO_DIR)!r}); import {module}"
+    env = {**os.environ, 'AWS_DEFAULT_REGION': os.environ.get('AWS_DEFAULT_REGION', 'eu-west-1')}
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, cwd=os.path.expanduser('~'), env=env, timeout=120,
+    )
+    imports = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            self_us, cum_us, indent, name = m.groups()
+            imports.append((name, int(self_us) / 1000, int(cum_us) / 1000, len(indent) // 2))
+    # importtime prints post-order: keep only the subtree ending at the module's own
+    # top-level line (drops interpreter start-up imports such as `site`)
+    end = max((i for i, imp in enumerate(imports) if imp[0] == module and imp[3] == 0), default=None)
+    total = None
+    if end is not None:
+        start = max((i + 1 for i in range(end) if imports[i][3] == 0), default=0)
+        total = imports[end][2]
+        imports = imports[start:end + 1]
+    error = None
+    if proc.returncode != 0:
+        error = (proc.stderr.strip().splitlines() or ['unknown error'])[-1]
+    return {'total_ms': total, 'imports': imports, 'error': error}
+
+
+def profile_median(module, runs):
+    """profile_module() `runs` times; the run with the median total_ms."""
+    results = [profile_module(module) for _ in range(max(1, runs))]
+    ok = sorted((r for r in results if not r['error'] and r['total_ms'] is not None),
+                key=lambda r: r['total_ms'])
+    return ok[len(ok) // 2] if ok else results[-1]
+
+
+def _load_budgets():
+    if BUDGET_FILE.exists():
+        with open(BUDGET_FILE, 'r') as f:
+            return json.load(f)
+    return {}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('modules', nargs='*', default=DEFAULT_MODULES)
+    ap.add_argument('--top', type=int, default=10, help='heaviest imports to list per module')
+    ap.add_argument('--runs', type=int, default=3, help='fresh interpreters per module (median is used)')
+    ap.add_argument('--update', action='store_true', help='write current timings × HEADROOM as new budgets')
+    args = ap.parse_args()
+
+    budgets = _load_budgets()
+    failures = []
+
+    ref_ms = profile_median(REFERENCE, args.runs)['total_ms'] or 0.0
+    ref_budget = budgets.get('_reference_ms')
+    scale = ref_ms / ref_budget if ref_budget and ref_ms else 1.0
+    # Only ever loosen: a fast run must not tighten budgets below what was recorded
+    scale = max(scale, 1.0)
+    print(f"reference {REFERENCE}: {ref_ms:.1f} ms"
+          + (f" (recorded {ref_budget} ms → budgets × {scale:.2f})" if ref_budget else " (no recorded reference)"))
+
+    for module in args.modules:
+        res = profile_median(module, args.runs)
+        print(f"\n{'=' * 72}\n{module}")
+        if res['error']:
+            print(f"  ❌ import failed: {res['error']}")
+            failures.append(f"{module}: import failed")
+            continue
+
+        total = res['total_ms'] or 0.0
+        top_level = {name.split('.')[0] for name, _, _, _ in res['imports']}
+        heavy_loaded = [h for h in HEAVY if h in top_level]
+        budget = budgets.get(module, {})
+        max_ms = budget.get('max_ms')
+        if max_ms is not None:
+            max_ms = round(max_ms * scale)
+        forbid = budget.get('forbid', [])
+
+        status = '✅' if max_ms is None or total <= max_ms else '❌'
+        print(f"  {status} total {total:7.1f} ms" + (f"  (budget {max_ms} ms)" if max_ms else "  (no budget)"))
+        print(f"  heavy deps at import: {', '.join(heavy_loaded) or 'none'}")
+
+        offenders = sorted((i for i in res['imports'] if i[0] != module), key=lambda i: -i[2])
+        for name, self_ms, cum_ms, depth in offenders[:args.top]:
+            print(f"    {cum_ms:7.1f} ms cum  {self_ms:6.1f} ms self  {'  ' * depth}{name}")
+
+        if max_ms is not None and total > max_ms:
+            failures.append(f"{module}: {total:.0f} ms > budget {max_ms} ms")
+        bad = [h for h in forbid if h in top_level]
+        if bad:
+            failures.append(f"{module}: imports {', '.join(bad)} at import time (must be lazy)")
+
+        if args.update:
+            budgets[module] = {
+                'max_ms': int(round(max(total * HEADROOM, MIN_BUDGET_MS))),
+                'forbid': [h for h in HEAVY if h not in heavy_loaded] if not forbid else forbid,
+            }
+
+    if args.update:
+        budgets['_reference_ms'] = round(ref_ms, 1)
+        with open(BUDGET_FILE, 'w') as f:
+            json.dump(budgets, f, indent=2, sort_keys=True)
+        print(f"\nBudgets written → {BUDGET_FILE.name}")
+
+    print(f"\n{'=' * 72}")
+    if failures:
+        print("IMPORT-TIME REGRESSIONS:")
+        for f in failures:
+            print(f"  ❌ {f}")
+        sys.exit(1)
+    print("All modules within import budget ✅")
+
+
+if __name__ == '__main__':
+    main()
@@ -12,109 +12,90 @@ Run this BEFORE making final picks for late races
 """
 
 import json
-import boto3
 from datetime import datetime, timedelta
 from decimal import Decimal
 from collections import defaultdict
 
+_OUTCOME_LABEL = {'win': 'WON', 'placed': 'PLACED', 'loss': 'LOST'}
+
+_ODDS_RANGES = [
+    ('favorites_2-3',   2.0,  3.0),
+    ('sweet_spot_3-9',  3.0,  9.0),
+    ('outsiders_9-15',  9.0, 15.0),
+    ('longshots_15+',  15.0, float('inf')),
+]
+
+
 def get_todays_results():
     """Get results from races that finished earlier today"""
-    dynamodb = boto3.resource('dynamodb', region_name='eu-west-1')
-    table = dynamodb.Table('SureBetBets')
-    
+    import settled_picks
+
     today = datetime.now().strftime('%Y-%m-%d')
-    
-    resp = table.query(
-        KeyConditionExpression=boto3.dynamodb.conditions.Key('bet_date').eq(today)
-    )
-    
-    items = resp.get('Items', [])
-    
-    # Filter to only races that have results
-    finished_races = [i for i in items if i.get('outcome') in ['WON', 'LOST', 'PLACED']]
-    
+
+    # Today is always an open day: one Query, without re-querying every open day
+    # and rewriting the shared dataset on each call
+    finished_races = settled_picks.day_rows(today)
+    for r in finished_races:
+        r['outcome'] = _OUTCOME_LABEL[r['outcome']]   # this module's WON / LOST / PLACED labels
+
     return finished_races
 
+def _results_frame(results):
+    import pandas as pd
+    import learning_analytics
+    df = pd.DataFrame(results)
+    for col in ('trainer', 'course', 'going', 'outcome', 'odds'):
+        if col not in df:
+            df[col] = None
+    df['trainer'] = df['trainer'].fillna('Unknown')
+    df['won'] = df['outcome'].eq('WON')
+    df['placed'] = df['outcome'].isin(['WON', 'PLACED'])
+    df['lost'] = df['outcome'].eq('LOST')
+    return learning_analytics.prepare(df)
+
+
 def analyze_trainer_performance_today(results):
     """See which trainers are winning/losing today"""
-    trainer_stats = defaultdict(lambda: {'wins': 0, 'losses': 0, 'total': 0})
-    
-    for result in results:
-        trainer = result.get('trainer', 'Unknown')
-        outcome = result.get('outcome')
-        
-        trainer_stats[trainer]['total'] += 1
-        if outcome == 'WON':
-            trainer_stats[trainer]['wins'] += 1
-        elif outcome == 'LOST':
-            trainer_stats[trainer]['losses'] += 1
-    
-    # Calculate win rates
+    import learning_analytics
+    df = _results_frame(results)
+    stats = learning_analytics.group_stats(df, 'trainer')
+    losses = df.groupby('trainer')['lost'].sum() if len(df) else {}
+
+    trainer_stats = {}
     hot_trainers = []
     cold_trainers = []
-    
-    for trainer, stats in trainer_stats.items():
-        if stats['total'] >= 2:  # At least 2 races
-            win_rate = stats['wins'] / stats['total']
-            stats['win_rate'] = win_rate
-            
-            if win_rate >= 0.5:
-                hot_trainers.append((trainer, stats))
-            elif win_rate == 0:
-                cold_trainers.append((trainer, stats))
-    
+    for trainer, r in stats.iterrows():
+        entry = {'wins': int(r['wins']), 'losses': int(losses[trainer]), 'total': int(r['n'])}
+        trainer_stats[trainer] = entry
+        if entry['total'] >= 2:  # At least 2 races
+            entry['win_rate'] = float(r['win_rate'])
+            if entry['win_rate'] >= 0.5:
+                hot_trainers.append((trainer, entry))
+            elif entry['win_rate'] == 0:
+                cold_trainers.append((trainer, entry))
+
     return hot_trainers, cold_trainers, trainer_stats
 
 def analyze_going_performance_today(results):
     """See if certain going conditions favor different odds ranges"""
-    going_stats = defaultdict(lambda: {'heavy': [], 'soft': [], 'good': [], 'firm': []})
-    
-    for result in results:
-        course = result.get('course', '')
-        outcome = result.get('outcome')
-        odds = float(result.get('odds', 0))
-        
-        # Infer going from our weather system
-        # For now, track by outcome and odds
-        if outcome == 'WON':
-            going_stats[course]['wins'].append(odds)
-    
-    return going_stats
+    import learning_analytics
+    df = _results_frame(results)
+    stats = learning_analytics.group_stats(df, 'going')
+    winner_odds = df[df['won']].groupby('going')['odds_eff'].mean() if len(df) else {}
+    return {
+        going: {'runners': int(r['n']), 'wins': int(r['wins']), 'win_rate': float(r['win_rate']),
+                'avg_winner_odds': round(float(winner_odds.get(going, 0.0)), 2)}
+        for going, r in stats.iterrows() if going
+    }
 
 def analyze_odds_range_performance(results):
     """See which odds ranges are hitting today"""
-    odds_performance = {
-        'favorites_2-3': {'wins': 0, 'total': 0},
-        'sweet_spot_3-9': {'wins': 0, 'total': 0},
-        'outsiders_9-15': {'wins': 0, 'total': 0},
-        'longshots_15+': {'wins': 0, 'total': 0}
+    import learning_analytics
+    stats = learning_analytics.odds_bands(_results_frame(results), _ODDS_RANGES)
+    return {
+        category: {'wins': int(r['wins']), 'total': int(r['n']), 'win_rate': float(r['win_rate'])}
+        for category, r in stats.iterrows()
     }
-    
-    for result in results:
-        outcome = result.get('outcome')
-        odds = float(result.get('odds', 0))
-        
-        if 2 <= odds < 3:
-            category = 'favorites_2-3'
-        elif 3 <= odds < 9:
-            category = 'sweet_spot_3-9'
-        elif 9 <= odds < 15:
-            category = 'outsiders_9-15'
-        else:
-            category = 'longshots_15+'
-        
-        odds_performance[category]['total'] += 1
-        if outcome == 'WON':
-            odds_performance[category]['wins'] += 1
-    
-    # Calculate win rates
-    for category, stats in odds_performance.items():
-        if stats['total'] > 0:
-            stats['win_rate'] = stats['wins'] / stats['total']
-        else:
-            stats['win_rate'] = 0
-    
-    return odds_performance
 
 def get_track_patterns_today(results):
     """Identify which tracks have specific patterns emerging"""
@@ -124,9 +105,9 @@ def get_track_patterns_today(results):
         if result.get('outcome') == 'WON':
             course = result.get('course', '')
             horse = result.get('horse', '')
-            odds = float(result.get('odds', 0))
+            odds = float(result.get('odds') or 0)
             trainer = result.get('trainer', '')
-            score = float(result.get('comprehensive_score', 0))
+            score = float(result.get('comprehensive_score') or 0)
             
             track_winners[course].append({
                 'horse': horse,
@@ -0,0 +1,682 @@
+"""
+LAY SCANNER — every favourite on the card, lay-vulnerability scored in one pass
+===============================================================================
+/api/favs-run used to re-derive the lay table per request from the day's
+DynamoDB rows: only races we had scored, only favourites at 2.25 or shorter,
+one _score_fav call per race.  The scanner covers every UK/IRE WIN market in
+the Betfair fetch (daily/{date}/response_horses.json) and joins our scored
+rows where they exist:
+
+  1. gather  — one row per race favourite, features as columns (market
+               probabilities from market_model, card metadata, and the
+               score_breakdown points when the race was scored)
+  2. flag    — each suspect-favourite flag is one column-wise comprehension
+               over all favourites; lay_score = Σ SCORE_WEIGHTS
+  3. persist — s3://{PIPELINE_BUCKET}/daily/{date}/lay_scan.json
+               {version, date, scanned_at, races: [...]}
+
+Races we did not score get the card / market flags only (short price, rivals
+close on market probability, drift from the morning price, trainer with
+multiple runners, form, layoff, draw) and carry scored=False.
+
+  lay_scanner.scan_and_store(date)       # sf_analysis, after every analysis run —
+                                         # merged into the stored table by race_key
+  lay_scanner.settle(date, winner_map)   # sf_fav_results — fills outcomes
+  lay_scanner.analyse_dates(dates)       # /api/favs-run, favs_run CLI + HTML
+
+analyse_date() is the one read path: a per-(date, race) memo in front of the
+stored table (scanned and stored on a miss), with open races settled from
+the shared SL fast-results cache (sl_winner_map()) or our settled rows.
+Settled days stay in memory for the life of the process; open days are
+re-read after MEMO_TTL_S so the refresh runs' prices show up.
+
+score_favourite(fav, all_horses_sorted) scores a single favourite through the
+same columns.
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from datetime import date as _date, datetime, timezone
+
+import pick_record
+
+REGION       = 'eu-west-1'
+TABLE        = 'SureBetBets'
+BUCKET       = os.environ.get('PIPELINE_BUCKET', 'surebet-pipeline-data')
+SCAN_VERSION = 1
+SHORT_PRICE  = 2.25          # 5/4 — the 'short_price' flag (and the old analysis cut-off)
+MATCH_WINDOW_MIN = 10        # SL off-time vs our race time tolerance
+MEMO_TTL_S   = 300           # open (unsettled) days are re-read from the table after this
+WINNER_MAP_TTL_S = 120       # SL fast-results are re-fetched after this
+SL_FAST_RESULTS = 'https://www.sportinglife.com/racing/fast-results/all'
+_SL_HEADERS = {
+    'User-Agent': (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+        'AppleWebKit/537.36 (KHTML, like Gecko) '
+        'Chrome/122.0.0.0 Safari/537.36'
+    ),
+    'Accept':          'text/html,application/xhtml+xml',
+    'Accept-Language': 'en-GB,en;q=0.5',
+    'Referer':         'https://www.sportinglife.com/',
+}
+
+SCORE_LABELS = {
+    'class_up':              ('Class',         '+4  Moving up in class'),
+    'trip_new':              ('Trip',          '+2  Unproven at this distance'),
+    'going_unproven':        ('Going',         '+2  Unproven on current going'),
+    'draw_poor':             ('Draw',          '+1  Poor draw position'),
+    'layoff':                ('Layoff',        '+1  30-90 days off (stale form)'),
+    'pace_doubt':            ('Pace',          '+1  Pace may not suit'),
+    'rivals_close':          ('Rivals',        '+2  2nd/3rd fav within 25% of favourite score'),
+    'drift':                 ('Drift',         '+1  Market drift — open vs current price'),
+    'short_price':           ('Price',         '+1  5/4 or less / odds-on'),
+    'trainer_track':         ('Trainer@Track', '+1  Trainer win rate at this track'),
+    'trainer_cold':          ('TrainerCold',   '+1  Trainer cold last 14 days'),
+    'trainer_multiple':      ('MultiRunner',   '+1  Trainer with multiple runners in race'),
+    'current_form_no_wins':  ('FormNoWins',    '+1  No wins in last 4 races'),
+}
+
+SCORE_WEIGHTS = {
+    'class_up':              4,
+    'trip_new':              2,
+    'going_unproven':        2,
+    'draw_poor':             1,
+    'layoff':                1,
+    'pace_doubt':            1,
+    'rivals_close':          2,
+    'drift':                 1,
+    'short_price':           1,
+    'trainer_track':         1,
+    'trainer_cold':          1,
+    'trainer_multiple':      1,
+    'current_form_no_wins':  1,
+}
+
+# breakdown points read per favourite (0 when the race was not scored)
+_BREAKDOWN = ('going_suitability', 'heavy_going_penalty', 'distance_suitability', 'cd_bonus',
+              'official_rating_bonus', 'database_history', 'course_performance', 'recent_win',
+              'trainer_reputation', 'meeting_focus')
+
+ITEM_FIELDS = ('bet_id', 'market_id', 'selection_id', 'horse', 'course', 'race_course', 'race_time',
+               'race_name', 'odds', 'decimal_odds', 'comprehensive_score', 'score_breakdown',
+               'score_breakdown_z', 'selection_reasons', 'selection_reasons_z', 'form', 'trainer',
+               'jockey', 'draw', 'race_total_count', 'score_gap', 'show_in_ui', 'outcome',
+               'fav_outcome', 'result_winner_name')
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+
+def odds_to_decimal(odds):
+    """Convert fractional (5/4) or decimal (2.25) odds to float decimal."""
+    if odds is None:
+        return None
+    try:
+        return float(odds)
+    except (TypeError, ValueError):
+        pass
+    try:
+        s = str(odds).strip()
+        if '/' in s:
+            n, d = s.split('/')
+            return float(n) / float(d) + 1.0
+    except Exception:
+        pass
+    return None
+
+
+def parse_form(form_str):
+    """Return list of recent positions (int where parseable) from form string."""
+    if not form_str:
+        return []
+    digits = []
+    for ch in str(form_str).replace('-', '').replace('/', ''):
+        if ch.isdigit():
+            digits.append(int(ch))
+        elif ch.upper() in ('U', 'F', 'P', 'R'):
+            digits.append(99)   # treated as non-finish
+    return digits[-6:]   # last 6 runs
+
+
+def verdict(score):
+    if score >= 13:
+        return 'STRONG LAY CANDIDATE', 'RED'
+    elif score >= 9:
+        return 'STRONG LAY', 'AMBER'
+    elif score >= 4:
+        return 'CAUTION / TAKE A LOOK', 'YELLOW'
+    return 'DO NOT SHOW', 'GREEN'
+
+
+def utc_to_local_hhmm(utc_hhmm, date_str):
+    """Convert UTC HH:MM to UK local time (BST = UTC+1, late Mar – late Oct)."""
+    try:
+        d = _date.fromisoformat(date_str[:10])
+        bst_start = _date(d.year, 3, 31)
+        while bst_start.weekday() != 6:
+            bst_start = _date(bst_start.year, bst_start.month, bst_start.day - 1)
+        bst_end = _date(d.year, 10, 31)
+        while bst_end.weekday() != 6:
+            bst_end = _date(bst_end.year, bst_end.month, bst_end.day - 1)
+        if not (bst_start <= d < bst_end):
+            return utc_hhmm
+        h, mn = map(int, utc_hhmm.split(':'))
+        total = h * 60 + mn + 60
+        return f'{(total // 60) % 24:02d}:{total % 60:02d}'
+    except Exception:
+        return utc_hhmm
+
+
+def norm_name(name):
+    n = re.sub(r'\s*\([A-Z]{2,3}\)\s*$', '', name or '').strip().lower()
+    return re.sub(r"\s+", ' ', re.sub(r"['\-]+", ' ', n)).strip()
+
+
+def _norm_course(course):
+    return (course or '').lower().replace('-', ' ').strip()
+
+
+def _utc_hhmm(race_time):
+    """UTC HH:MM from a stored race time ('...Z', '+01:00' offsets or bare UTC)."""
+    rt = str(race_time or '')
+    try:
+        tz_m = re.search(r'([+-])(\d{2}):(\d{2})\s*$', rt)
+        if tz_m and len(rt) >= 16:
+            sign = 1 if tz_m.group(1) == '+' else -1
+            offset = sign * (int(tz_m.group(2)) * 60 + int(tz_m.group(3)))
+            h, m = map(int, rt[11:16].split(':'))
+            total = h * 60 + m - offset
+            return f'{(total // 60) % 24:02d}:{total % 60:02d}'
+    except ValueError:
+        pass
+    return rt[11:16]
+
+
+def local_hhmm(race_time, date_str):
+    """UK local HH:MM (the SL off time) for a stored race time."""
+    return utc_to_local_hhmm(_utc_hhmm(race_time), date_str)
+
+
+def race_key(race_time, course):
+    """(race_time[:19], course_lower) — the one race identity every consumer uses."""
+    return str(race_time or '')[:19], _norm_course(course)
+
+
+# ── Gather: one row per race favourite ───────────────────────────────────────
+
+def _runner_odds(r):
+    o = odds_to_decimal(r.get('odds') or r.get('decimal_odds'))
+    return o if o and o > 1.0 else 99.0
+
+
+def _favourite_row(date_str, race_time, course, runners, scored):
+    """Feature row for one race.  runners: card/item dicts with horse, odds,
+    trainer, form, draw, market_prob; scored: {horse_lower: item} for the race."""
+    ordered = sorted(runners, key=_runner_odds)
+    fav = ordered[0]
+    name = fav.get('horse') or fav.get('name') or ''
+    item = scored.get(name.strip().lower())
+    src = item or fav
+    sb = (item or {}).get('score_breakdown') or {}
+
+    rivals = [scored.get((h.get('horse') or h.get('name') or '').strip().lower()) for h in ordered[1:3]]
+    trainer = str(src.get('trainer') or fav.get('trainer') or '').strip()
+    probs = [h.get('market_prob') for h in ordered[:2]]
+
+    row = {
+        'date':         date_str,
+        'race_time':    str(race_time or '')[:19],
+        'course':       course,
+        'market_id':    fav.get('market_id') or (item or {}).get('market_id', ''),
+        'race_name':    (item or {}).get('race_name') or f'{course} {str(race_time)[11:16]}',
+        'favourite':    name or '?',
+        'bet_id':       (item or {}).get('bet_id', ''),
+        'fav_odds':     _runner_odds(fav),
+        'scored':       item is not None,
+        'fav_sys_score': float((item or {}).get('comprehensive_score') or 0),
+        'r2_score':     float((rivals[0] or {}).get('comprehensive_score') or 0) if rivals else 0.0,
+        'r3_score':     float((rivals[1] or {}).get('comprehensive_score') or 0) if len(rivals) > 1 else 0.0,
+        'r2_name':      (ordered[1].get('horse') or ordered[1].get('name') or '') if len(ordered) > 1 else '',
+        'n_rivals':     len(ordered) - 1,
+        'score_gap':    float((item or {}).get('score_gap') or 0),
+        'fav_market_prob':    probs[0],
+        'second_market_prob': probs[1] if len(probs) > 1 else None,
+        'price_movement': fav.get('price_movement'),
+        'form':         str(src.get('form') or ''),
+        'trainer':      trainer,
+        'jockey':       src.get('jockey', ''),
+        'draw':         src.get('draw'),
+        'runners':      len(runners),
+        'same_trainer': sum(1 for h in ordered[1:]
+                            if trainer and str(h.get('trainer') or '').strip().lower() == trainer.lower()),
+        'reasons_text': ' '.join(str(r) for r in ((item or {}).get('selection_reasons') or [])),
+        'our_pick':     bool((item or {}).get('show_in_ui', False)),
+        'outcome':      (item or {}).get('fav_outcome') or None,
+    }
+    for k in _BREAKDOWN:
+        row[k] = float(sb.get(k, 0) or 0)
+    return row
+
+
+# ── Flag: column-wise over every favourite ───────────────────────────────────
+
+def _flag_columns(rows):
+    """{flag: [detail or None per row]} — each flag computed over all rows at once."""
+    col = {k: [r[k] for r in rows] for k in rows[0]} if rows else {}
+    n = len(rows)
+    if not n:
+        return {}
+    scored = col['scored']
+    fav_score, r2, r3 = col['fav_sys_score'], col['r2_score'], col['r3_score']
+    going, heavy = col['going_suitability'], col['heavy_going_penalty']
+    dist, cd = col['distance_suitability'], col['cd_bonus']
+    form_digits = [parse_form(f) for f in col['form']]
+    last4 = [d[-4:] for d in form_digits]
+    recent_wins = [sum(1 for c in (f[-4:] if len(f) >= 4 else f) if c == '1') for f in col['form']]
+    draws = [odds_to_decimal(d) if d not in (None, '') else None for d in col['draw']]
+    rng = range(n)
+
+    def _rivals(i):
+        if scored[i] and fav_score[i] > 0:
+            if r2[i] / fav_score[i] >= 0.75:
+                return (f"Rivals close: 2nd ({col['r2_name'][i]}) scored {r2[i]:.0f} vs fav "
+                        f"{fav_score[i]:.0f} ({r2[i] / fav_score[i] * 100:.0f}%)")
+            if col['n_rivals'][i] >= 2 and r3[i] / fav_score[i] >= 0.70:
+                return f'3rd fav scored {r3[i]:.0f} — field competitive'
+            return None
+        p1, p2 = col['fav_market_prob'][i], col['second_market_prob'][i]
+        if not scored[i] and p1 and p2 and p2 / p1 >= 0.75:
+            return f"Rivals close in the market: 2nd fav {p2 * 100:.0f}% vs fav {p1 * 100:.0f}%"
+        return None
+
+    def _layoff(i):
+        text = col['reasons_text'][i].lower()
+        if 'days off' in text or 'days since' in text:
+            return 'Significant layoff flagged in selection reasons'
+        f = col['form'][i]
+        if '--' in f or f.count('-') >= 2:
+            return f'Form string suggests recent layoff: {f}'
+        return None
+
+    def _drift(i):
+        if col['price_movement'][i] == 'drifting':
+            return 'Price drifting since the morning snapshot'
+        gap = col['score_gap'][i]
+        if scored[i] and 0 < gap < 10:
+            return f'Low score gap ({gap:.0f}) — field competitive, possible drift'
+        if scored[i] and gap == 0 and fav_score[i] > 0:
+            return 'Score gap = 0 — our model does not separate the favourite clearly'
+        return None
+
+    def _draw(i):
+        d, total = draws[i], col['runners'][i]
+        if d and total >= 10 and d >= total * 0.7:
+            return f'High draw ({d:.0f}/{total:.0f}) — potential draw disadvantage'
+        return None
+
+    trainer = col['trainer']
+    return {
+        'short_price': [('Short price (5/4 or less) — market may overshorten'
+                         if col['fav_odds'][i] <= SHORT_PRICE else None) for i in rng],
+        'rivals_close': [_rivals(i) for i in rng],
+        'going_unproven': [("Going suitability = 0 — unproven on today's ground"
+                            if scored[i] and going[i] == 0 and heavy[i] == 0 else None) for i in rng],
+        'trip_new': [('Distance suitability = 0 & no CD bonus — unproven at this trip'
+                      if scored[i] and dist[i] == 0 and cd[i] == 0 else None) for i in rng],
+        'class_up': [('No prior wins at course/class — stepping up in class'
+                      if scored[i] and col['official_rating_bonus'][i] > 0 and cd[i] == 0
+                      and col['course_performance'][i] == 0 and col['database_history'][i] == 0
+                      else None) for i in rng],
+        'layoff': [_layoff(i) for i in rng],
+        'draw_poor': [_draw(i) for i in rng],
+        'pace_doubt': [('No going suitability or recent win signal — pace may not suit'
+                        if scored[i] and going[i] == 0 and col['recent_win'][i] == 0 else None)
+                       for i in rng],
+        'trainer_track': [(f'Trainer ({trainer[i]}) — no quality tier status at this track'
+                           if scored[i] and trainer[i] and col['trainer_reputation'][i] == 0 else None)
+                          for i in rng],
+        'trainer_cold': [(f'Trainer ({trainer[i]}) — no meeting focus & no win in recent form'
+                          if scored[i] and trainer[i] and col['meeting_focus'][i] == 0
+                          and recent_wins[i] == 0 else None) for i in rng],
+        'trainer_multiple': [(f"Trainer ({trainer[i]}) has {col['same_trainer'][i] + 1} runners in race"
+                              if trainer[i] and col['same_trainer'][i] >= 1 else None) for i in rng],
+        'drift': [_drift(i) for i in rng],
+        'current_form_no_wins': [(f"No wins in last 4 races (form: {col['form'][i][-8:]}) — 2nd or worse throughout"
+                                  if last4[i] and all(p >= 2 for p in last4[i]) else None) for i in rng],
+    }
+
+
+def _score_rows(rows):
+    """Add flags / details / lay_score / verdict to every row (in place)."""
+    flags = _flag_columns(rows)
+    for i, row in enumerate(rows):
+        hit = [f for f in SCORE_WEIGHTS if flags[f][i]]
+        row['flags'] = hit
+        row['details'] = [flags[f][i] for f in hit]
+        row['lay_score'] = sum(SCORE_WEIGHTS[f] for f in hit)
+        row['verdict'], row['verdict_colour'] = verdict(row['lay_score'])
+    return rows
+
+
+def score_favourite(fav, all_horses_sorted, race_going=''):
+    """Single favourite (a scored pick row) → (total_score, flags_dict, details_list).
+    all_horses_sorted: the race's runners by odds ascending, with 'horse' and 'score'."""
+    scored = {str(h.get('horse') or '').strip().lower():
+              {**h, 'comprehensive_score': h.get('score', h.get('comprehensive_score', 0))}
+              for h in all_horses_sorted}
+    scored[str(fav.get('horse') or '').strip().lower()] = fav
+    runners = [{'horse': h.get('horse'), 'odds': h.get('odds'), 'trainer': h.get('trainer')}
+               for h in all_horses_sorted if h.get('horse') != fav.get('horse')]
+    runners.insert(0, {'horse': fav.get('horse'), 'odds': 1.0001, 'trainer': fav.get('trainer')})
+    row = _favourite_row('', fav.get('race_time', ''), fav.get('course', ''), runners, scored)
+    row['fav_odds'] = odds_to_decimal(fav.get('odds') or fav.get('decimal_odds')) or 99.0
+    row['runners'] = float(fav.get('race_total_count') or fav.get('total_runners') or 0)
+    _score_rows([row])
+    return row['lay_score'], {f: True for f in row['flags']}, row['details']
+
+
+# ── Sources ───────────────────────────────────────────────────────────────────
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _client(service):
+    """One boto3 client per service, created under a lock (analyse_dates fans out)."""
+    with _clients_lock:
+        if service not in _clients:
+            import boto3
+            _clients[service] = boto3.client(service, region_name=REGION)
+        return _clients[service]
+
+
+def _s3():
+    return _client('s3')
+
+
+def _scan_key(date_str):
+    return f'daily/{date_str}/lay_scan.json'
+
+
+def load_card(date_str):
+    """The Betfair fetch for the day (every UK/IRE WIN market), [] if missing."""
+    try:
+        body = _s3().get_object(Bucket=BUCKET, Key=f'daily/{date_str}/response_horses.json')['Body'].read()
+        return json.loads(body).get('races', [])
+    except Exception:
+        return []
+
+
+def load_items(date_str, dynamodb=None):
+    """Scored rows for the day (slim projection, heavy attributes expanded)."""
+    if dynamodb is None:
+        dynamodb = _client('dynamodb')
+    expr, names = pick_record.projection(ITEM_FIELDS)
+    pages = dynamodb.get_paginator('query').paginate(
+        TableName=TABLE, KeyConditionExpression='bet_date = :d',
+        ExpressionAttributeValues={':d': {'S': date_str}},
+        ProjectionExpression=expr, ExpressionAttributeNames=names)
+    return [pick_record.expand_heavy(pick_record.plain_item(it))
+            for page in pages for it in page.get('Items', [])]
+
+
+# ── Scan ──────────────────────────────────────────────────────────────────────
+
+def scan(date_str, races=None, items=None):
+    """Every race favourite for a date, scored. races defaults to the day's card
+    (falling back to our scored rows grouped by race); items to our scored rows."""
+    t0 = time.perf_counter()
+    races = load_card(date_str) if races is None else races
+    items = load_items(date_str) if items is None else items
+
+    by_market, by_race = {}, {}
+    for it in items:
+        horse = str(it.get('horse') or '').strip().lower()
+        if it.get('market_id'):
+            by_market.setdefault(it['market_id'], {})[horse] = it
+        course = (it.get('course') or it.get('race_course') or '').strip()
+        by_race.setdefault((str(it.get('race_time', ''))[:19], course), []).append(it)
+
+    rows = []
+    if races:
+        import market_model
+        for race in races:
+            runners = [dict(r, horse=r.get('name', r.get('horse', '')), market_id=race.get('market_id'))
+                       for r in race.get('runners', [])]
+            if not runners:
+                continue
+            if any(r.get('market_prob') is None for r in runners):
+                market_model.annotate_race({'runners': runners})
+            rows.append(_favourite_row(date_str, race.get('race_time') or race.get('start_time'),
+                                       race.get('course') or race.get('venue') or '',
+                                       runners, by_market.get(race.get('market_id'), {})))
+    else:
+        import market_model
+        for (rt, course), runners in sorted(by_race.items()):
+            market_model.annotate_race({'runners': runners})
+            rows.append(_favourite_row(date_str, rt, course, runners,
+                                       {str(r.get('horse') or '').strip().lower(): r for r in runners}))
+
+    _score_rows(rows)
+    for row in rows:                      # working columns not needed by readers
+        for k in _BREAKDOWN + ('r2_score', 'r3_score', 'r2_name', 'n_rivals', 'same_trainer', 'reasons_text'):
+            row.pop(k, None)
+    rows.sort(key=lambda r: (-r['lay_score'], r['race_time']))
+    print(f"[LayScan] {date_str}: {len(rows)} favourites ({sum(r['scored'] for r in rows)} scored), "
+          f"{sum(r['lay_score'] >= 4 for r in rows)} caution+ ({(time.perf_counter() - t0) * 1000:.0f} ms)")
+    return rows
+
+
+def store(date_str, rows):
+    try:
+        _s3().put_object(
+            Bucket=BUCKET, Key=_scan_key(date_str),
+            Body=json.dumps({'version': SCAN_VERSION, 'date': date_str,
+                             'scanned_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                             'races': rows}, default=str).encode('utf-8'),
+            ContentType='application/json')
+    except Exception as e:
+        print(f'[LayScan] store skipped for {date_str}: {e}')
+
+
+def load_scan(date_str):
+    """The stored table for a date, or None (never scanned / older version)."""
+    try:
+        payload = json.loads(_s3().get_object(Bucket=BUCKET, Key=_scan_key(date_str))['Body'].read())
+    except Exception:
+        return None
+    return payload['races'] if payload.get('version') == SCAN_VERSION else None
+
+
+def merge_rows(stored, rows):
+    """Fold a fresh scan into the stored table by race_key.  The card only holds
+    races still to run, so stored rows the scan no longer sees (finished races,
+    with their outcomes) are kept; a re-scanned race takes the new prices but
+    keeps a settled outcome."""
+    merged = {race_key(r['race_time'], r['course']): r for r in stored or []}
+    for row in rows:
+        key = race_key(row['race_time'], row['course'])
+        old = merged.get(key)
+        if old is not None and old.get('outcome') and not row.get('outcome'):
+            row = dict(row, outcome=old['outcome'])
+        merged[key] = row
+    return _sorted_rows(merged)
+
+
+def scan_and_store(date_str, races=None, items=None):
+    """Scan the current card and merge it into the day's stored table → the merged rows."""
+    rows = scan(date_str, races, items)
+    if not rows:
+        return rows
+    merged = merge_rows(load_scan(date_str), rows)
+    store(date_str, merged)
+    return merged
+
+
+# ── Outcomes ──────────────────────────────────────────────────────────────────
+
+def match_winner(winner_map, course, race_time, date_str):
+    """SL fast-results {(course_lower, local_hhmm): winner} → winner for our race, or None."""
+    if not winner_map:
+        return None
+    course_key = _norm_course(course)
+    local = local_hhmm(race_time, date_str)
+    try:
+        lh, lm = map(int, local.split(':'))
+    except ValueError:
+        return None
+    best, best_diff = None, MATCH_WINDOW_MIN + 1
+    for (c_key, t_key), w_name in winner_map.items():
+        # Fuzzy course match: exact OR one name contains the other (Kempton / Kempton Park)
+        if c_key != course_key and c_key not in course_key and course_key not in c_key:
+            continue
+        try:
+            wh, wm = map(int, t_key.split(':'))
+        except ValueError:
+            continue
+        diff = abs(wh * 60 + wm - (lh * 60 + lm))
+        if diff < best_diff:
+            best, best_diff = w_name.strip(), diff
+    return best
+
+
+def apply_outcomes(rows, winner_map=None, items=None):
+    """Fill row['outcome'] ('win' / 'loss') where still open, from the SL winner
+    map and then our settled rows. Returns the number of rows newly settled."""
+    winners = {}
+    for it in items or []:
+        key = race_key(it.get('race_time'), it.get('course') or it.get('race_course'))
+        if str(it.get('outcome') or '').lower() in ('win', 'won'):
+            winners[key] = it.get('horse', '')
+        elif it.get('result_winner_name') and key not in winners:
+            winners[key] = it['result_winner_name']
+    n = 0
+    for row in rows:
+        if row.get('outcome'):
+            continue
+        w = (match_winner(winner_map, row['course'], row['race_time'], row['date'])
+             or winners.get(race_key(row['race_time'], row['course'])))
+        if w:
+            row['outcome'] = 'win' if norm_name(w) == norm_name(row['favourite']) else 'loss'
+            n += 1
+    return n
+
+
+def settle(date_str, winner_map, items=None):
+    """Fill outcomes in the stored table (sf_fav_results). Returns rows settled."""
+    rows = load_scan(date_str)
+    if not rows:
+        return 0
+    n = apply_outcomes(rows, winner_map, items)
+    if n:
+        store(date_str, rows)
+    print(f'[LayScan] {date_str}: {n} favourite outcome(s) settled')
+    return n
+
+
+# ── SL fast-results: one cached winner map per process ───────────────────────
+
+_winner_map = {'at': 0.0, 'map': {}}
+_winner_map_lock = threading.Lock()
+
+
+def fetch_winner_map():
+    """SL fast-results → {(course_lower, local_hhmm): winner_name} for today's
+    finished races. {} on any network / parse error."""
+    import http_client
+    try:
+        html = http_client.get(SL_FAST_RESULTS, headers=_SL_HEADERS, timeout=15).raise_for_status().text
+    except Exception as e:
+        print(f'[LayScan] SL fast-results fetch error: {e}')
+        return {}
+    m = re.search(r'<script id="__NEXT_DATA__"[^>]*>(.*?)</script>', html, re.DOTALL)
+    if not m:
+        print('[LayScan] __NEXT_DATA__ not found in SL fast-results page')
+        return {}
+    try:
+        fast = json.loads(m.group(1)).get('props', {}).get('pageProps', {}).get('fastResults', [])
+    except Exception as e:
+        print(f'[LayScan] SL fast-results JSON parse error: {e}')
+        return {}
+    out = {}
+    for fr in fast:
+        course, off_time = fr.get('courseName', ''), fr.get('time', '')   # local HH:MM
+        top = sorted(fr.get('top_horses') or [], key=lambda h: h.get('position', 99))
+        if not course or not off_time or not top:
+            continue
+        winner = re.sub(r'\s*\([A-Z]{2,3}\)\s*$', '', top[0].get('horse_name', '')).strip()
+        if winner:
+            out[(_norm_course(course), off_time)] = winner
+    print(f'[LayScan] SL winner_map: {len(out)} races with results')
+    return out
+
+
+def sl_winner_map(max_age_s=WINNER_MAP_TTL_S):
+    """fetch_winner_map(), shared by every caller in the process for max_age_s."""
+    with _winner_map_lock:
+        if time.time() - _winner_map['at'] > max_age_s:
+            _winner_map['map'] = fetch_winner_map()
+            _winner_map['at'] = time.time()
+        return _winner_map['map']
+
+
+# ── Per-(date, race) memo ─────────────────────────────────────────────────────
+
+_memo = {}          # date_str → {'at': loaded_at, 'races': {race_key: row}}
+_memo_lock = threading.Lock()
+
+
+def _sorted_rows(races):
+    return sorted(races.values(), key=lambda r: (-r['lay_score'], r['race_time']))
+
+
+def _analyse(date_str, winner_map=None, dynamodb=None):
+    """(rows, precomputed) — precomputed is False when the day had to be scanned."""
+    today = _date.today().isoformat()
+    with _memo_lock:
+        entry = _memo.get(date_str)
+    settled = entry is not None and entry.get('settled')
+    if entry is not None and (settled or time.time() - entry['at'] <= MEMO_TTL_S):
+        races, precomputed = entry['races'], True
+    else:
+        items = None
+        rows = load_scan(date_str)
+        precomputed = rows is not None
+        if rows is None:
+            items = load_items(date_str, dynamodb)
+            rows = scan(date_str, items=items)
+            if rows:
+                store(date_str, rows)
+        races = {race_key(r['race_time'], r['course']): r for r in rows}
+        if date_str < today and any(not r.get('outcome') for r in rows):
+            # Past day the results job never closed — settle from our rows once and persist
+            if apply_outcomes(rows, None, items if items is not None else load_items(date_str, dynamodb)):
+                store(date_str, rows)
+        entry = {'at': time.time(), 'races': races,
+                 # Empty days are not pinned — a late backfill must still show up
+                 'settled': date_str < today and bool(rows) and all(r.get('outcome') for r in rows)}
+        with _memo_lock:
+            _memo[date_str] = entry
+
+    if date_str == today:
+        # SL fast-results only covers today's card; kept in the memo, persisted by sf_fav_results
+        apply_outcomes(list(races.values()), sl_winner_map() if winner_map is None else winner_map)
+    return _sorted_rows(races), precomputed
+
+
+def analyse_date(date_str, winner_map=None, dynamodb=None):
+    """Every favourite for a date, scored and (where finished) settled. Rows are
+    shared with the memo — copy before mutating."""
+    return _analyse(date_str, winner_map, dynamodb)[0]
+
+
+def analyse_dates(dates, winner_map=None, dynamodb=None, max_workers=8):
+    """analyse_date() over several days in parallel → (rows, n_precomputed)."""
+    from concurrent.futures import ThreadPoolExecutor
+    if winner_map is None and _date.today().isoformat() in dates:
+        winner_map = sl_winner_map()       # fetched once, before the fan-out
+    with ThreadPoolExecutor(max_workers=min(max_workers, max(1, len(dates)))) as ex:
+        per_day = list(ex.map(lambda d: _analyse(d, winner_map, dynamodb), dates))
+    return [r for rows, _ in per_day for r in rows], sum(1 for _, hit in per_day if hit)
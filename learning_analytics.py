@@ -0,0 +1,206 @@
+"""
+LEARNING ANALYTICS — vectorised band / group / calibration stats for settled picks
+=================================================================================
+One pandas layer under every learning report.  The reports used to loop over
+dicts and iterrows() per job (auto_fix_thresholds band stats, intraday trainer
+and odds tables, generate_learning_insights tag / odds tables, evaluate_performance
+calibration); here each is one groupby / merge over a frame built straight from
+the settled-picks dataset's columns — a year of picks in well under a second.
+
+  df = frame(since='2026-01-01', ui_only=True)   # settled_picks → DataFrame
+  group_stats(df, 'trainer')                     # n, wins, places, rates, P&L, ROI
+  odds_bands(df, ODDS_BANDS)                     # (label, lo, hi) ranges — may overlap
+  score_bands(df, width=5)
+  tag_stats(df)                                  # comma-separated tags, exploded
+  calibration(df, 'p_win')                       # predicted vs actual per bin
+  report(df)                                     # all of the above, JSON-ready
+
+Frame columns (added by prepare()): odds_eff (SP when settled, else taken
+price), won, placed, level_pl (1-unit level-stakes win P&L), score, dow.
+Any frame with won / odds columns works — the CSV-based reports pass their own.
+Stats columns: n, wins, places, pl, avg_odds, win_rate, place_rate, roi (%).
+
+Requires pandas (requirements-prompt.txt).
+"""
+
+import pandas as pd
+
+ODDS_BANDS = [
+    ('short_odds',   1.0,  3.0),
+    ('losing_band',  3.0,  5.0),
+    ('sweet_spot',   5.0,  8.0),
+    ('upper_range',  8.0, 15.0),
+    ('longshot',    15.0, 200.0),
+]
+DIMENSIONS = ('trainer', 'jockey', 'course', 'going', 'dow')
+CALIBRATION_BINS = [0, 0.1, 0.2, 0.3, 0.4, 0.5, 1.0]
+_DOW = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+
+# ── Frames ────────────────────────────────────────────────────────────────────
+
+def frame(since=None, until=None, ui_only=False, sport=None):
+    """Settled picks as a prepared DataFrame (built column-wise, no per-row dicts)."""
+    import settled_picks
+    cols = settled_picks.load()['columns']
+    df = pd.DataFrame({c: v for c, v in cols.items() if c != 'score_breakdown'})
+    if df.empty:
+        return prepare(df)
+    mask = pd.Series(True, index=df.index)
+    if since:
+        mask &= df['bet_date'] >= since
+    if until:
+        mask &= df['bet_date'] <= until
+    if ui_only:
+        mask &= df['show_in_ui'].eq(True)
+    if sport:
+        mask &= df['sport'].fillna('horses').eq(sport)
+    return prepare(df[mask].reset_index(drop=True))
+
+
+def prepare(df):
+    """Add the derived columns every stat uses; idempotent, tolerant of missing inputs."""
+    df = df.copy()
+    n = len(df)
+    if 'won' not in df:
+        df['won'] = df['outcome'].eq('win') if 'outcome' in df else pd.Series(False, index=df.index)
+    if 'placed' not in df:
+        df['placed'] = (df['outcome'].isin(['win', 'placed']) if 'outcome' in df
+                        else df['won'])
+    df['won'] = df['won'].fillna(False).astype(bool)
+    df['placed'] = df['placed'].fillna(False).astype(bool)
+
+    odds = pd.to_numeric(df['odds'], errors='coerce') if 'odds' in df else pd.Series(0.0, index=df.index)
+    if 'sp_odds' in df:
+        sp = pd.to_numeric(df['sp_odds'], errors='coerce')
+        odds = sp.where(sp > 1, odds)
+    df['odds_eff'] = odds.fillna(0.0)
+    df['level_pl'] = df['odds_eff'].sub(1).where(df['won'], -1.0)
+
+    if 'score' not in df:
+        df['score'] = (pd.to_numeric(df['comprehensive_score'], errors='coerce').fillna(0.0)
+                       if 'comprehensive_score' in df else 0.0)
+    if 'bet_date' in df and n:
+        df['dow'] = pd.Categorical.from_codes(
+            pd.to_datetime(df['bet_date'], errors='coerce').dt.dayofweek.fillna(0).astype(int),
+            categories=_DOW)
+    return df
+
+
+# ── Group stats ───────────────────────────────────────────────────────────────
+
+def _summarise(g, pl_col='level_pl', stake=1.0):
+    """Aggregate a grouped frame → one row per group with the standard columns.
+    pl_col / stake: which P&L column to total and the stake per bet for ROI
+    (default: 1-unit level stakes)."""
+    out = g.agg(n=('won', 'size'), wins=('won', 'sum'), places=('placed', 'sum'),
+                pl=(pl_col, 'sum'), avg_odds=('odds_eff', 'mean'))
+    out['win_rate'] = out['wins'] / out['n']
+    out['place_rate'] = out['places'] / out['n']
+    out['roi'] = 100 * out['pl'] / (out['n'] * stake)
+    return out
+
+
+def group_stats(df, by, min_n=1, pl_col='level_pl', stake=1.0):
+    """Stats per value of one or more columns, most bets first."""
+    if df.empty:
+        return pd.DataFrame()
+    out = _summarise(df.groupby(by, observed=True, dropna=True), pl_col, stake)
+    return out[out['n'] >= min_n].sort_values('n', ascending=False)
+
+
+def odds_bands(df, bands=ODDS_BANDS, odds_col='odds_eff', pl_col='level_pl', stake=1.0):
+    """Stats per odds range [lo, hi); ranges may overlap, so each band is one
+    boolean mask rather than a pd.cut bucket."""
+    odds = df[odds_col] if len(df) else pd.Series(dtype=float)
+    parts = []
+    for label, lo, hi in bands:
+        parts.append(df[(odds >= lo) & (odds < hi)].assign(band=label))
+    labels = [label for label, _, _ in bands]
+    if len(df):
+        out = _summarise(pd.concat(parts).groupby('band'), pl_col, stake)
+    else:
+        out = pd.DataFrame(columns=['n', 'wins', 'places', 'pl', 'avg_odds', 'win_rate', 'place_rate', 'roi'])
+    out = out.reindex(labels)
+    out[['n', 'wins', 'places']] = out[['n', 'wins', 'places']].fillna(0).astype(int)
+    out = out.fillna(0.0)
+    out.insert(0, 'range', [f'{lo:.1f}-{hi:.1f}' for _, lo, hi in bands])
+    return out
+
+
+def score_bands(df, width=5, pl_col='level_pl', stake=1.0):
+    """Stats per score bucket (lower bound: 87 → 85 with width 5)."""
+    if df.empty:
+        return pd.DataFrame()
+    bucket = (df['score'] // width * width).astype(int).rename('bucket')
+    return _summarise(df.groupby(bucket), pl_col, stake).sort_index()
+
+
+def tag_stats(df, col='tags', sep=',', exclude=('enhanced_analysis',), min_n=1):
+    """Stats per tag of a delimited tag column (one row per tag occurrence)."""
+    if df.empty or col not in df:
+        return pd.DataFrame()
+    tags = df[col].fillna('').astype(str).str.split(sep).explode().str.strip()
+    tags = tags[(tags != '') & ~tags.isin(exclude)]
+    exploded = df.loc[tags.index].assign(tag=tags.values)
+    out = _summarise(exploded.groupby('tag'))
+    if 'p_win' in exploded:
+        out['expected_win_rate'] = exploded.groupby('tag')['p_win'].mean()
+    return out[out['n'] >= min_n].sort_values('n', ascending=False)
+
+
+def calibration(df, prob_col='p_win', outcome_col='won', bins=CALIBRATION_BINS):
+    """Predicted vs actual rate per probability bin, plus the count-weighted error."""
+    p = pd.to_numeric(df[prob_col], errors='coerce') if prob_col in df else pd.Series(dtype=float)
+    if p.notna().sum() == 0:
+        return pd.DataFrame(), 0.0
+    if p.max() > 1.0:                     # stored as a percentage (win_probability)
+        p = p / 100.0
+    g = (pd.DataFrame({'p': p, 'hit': df[outcome_col].astype(float)})
+         .dropna().groupby(pd.cut(p, bins=bins), observed=True))
+    out = g.agg(predicted_prob=('p', 'mean'), actual_rate=('hit', 'mean'), count=('hit', 'size'))
+    out['error'] = (out['predicted_prob'] - out['actual_rate']).abs()
+    weighted = float((out['error'] * out['count']).sum() / len(df)) if len(df) else 0.0
+    return out, weighted
+
+
+# ── Report ────────────────────────────────────────────────────────────────────
+
+def to_records(stats):
+    """DataFrame of stats → {index: {col: plain value}} for JSON / the old dict reports."""
+    if stats is None or len(stats) == 0:
+        return {}
+    plain = stats.astype(object).where(stats.notna(), None)
+    return {(k if isinstance(k, (str, int)) else str(k)): {c: (v.item() if hasattr(v, 'item') else v)
+                                                           for c, v in row.items()}
+            for k, row in plain.iterrows()}
+
+
+def report(df, min_n=3):
+    """Every breakdown the learning jobs use, JSON-ready."""
+    cal, cal_err = calibration(df, 'win_probability')
+    return {
+        'n':                len(df),
+        'win_rate':         float(df['won'].mean()) if len(df) else 0.0,
+        'roi':              float(100 * df['level_pl'].sum() / len(df)) if len(df) else 0.0,
+        'odds_bands':       to_records(odds_bands(df)),
+        'score_bands':      to_records(score_bands(df)),
+        'tags':             to_records(tag_stats(df, min_n=min_n)),
+        **{dim: to_records(group_stats(df, dim, min_n=min_n)) for dim in DIMENSIONS if dim in df},
+        'calibration':      to_records(cal),
+        'calibration_error': cal_err,
+    }
+
+
+if __name__ == '__main__':
+    import sys
+    import json
+    import time
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+    import settled_picks
+    t0 = time.perf_counter()
+    df = frame(since=settled_picks.since_days(days))
+    rep = report(df)
+    print(json.dumps({k: rep[k] for k in ('n', 'win_rate', 'roi', 'odds_bands', 'score_bands')},
+                     indent=2, default=str))
+    print(f"[Analytics] {len(df)} settled picks, {days} days, {(time.perf_counter() - t0) * 1000:.0f} ms")
@@ -46,6 +46,15 @@ def load_historical_results(days_back=7):
                         })
                         break
     
+    if not results:
+        # No local history files (Lambda, fresh checkout) — use the shared
+        # settled-picks dataset in the same {date, selection, result} shape
+        try:
+            import settled_picks
+            results = settled_picks.learning_results(days_back=days_back)
+        except Exception as e:
+            print(f"Settled-picks dataset unavailable: {e}")
+    
     return results
 
 def analyze_performance_patterns(results):
@@ -292,8 +301,17 @@ def calculate_optimal_stakes(bankroll=1000.0, target_weekly_return=0.50):
     
     return stakes
 
-def calculate_bet_stake(odds, p_win, bankroll=1000.0, bet_type='WIN', p_place=None, ew_fraction=0.2):
-    """Calculate optimal stake for a bet using fractional Kelly"""
+def calculate_bet_stake(odds, p_win=None, bankroll=1000.0, bet_type='WIN', p_place=None, ew_fraction=0.2,
+                        score=None, market_name=None):
+    """Calculate optimal stake for a bet using fractional Kelly.
+    With `score`, p_win comes from the fitted score → win-probability table
+    (score_calibration) rather than the caller's estimate."""
+    
+    if score is not None:
+        import score_calibration
+        p_win = score_calibration.win_prob(score, market_name) / 100.0
+    if not p_win:
+        return 0
     
     # Kelly Criterion: f = (bp - q) / b
     # f = fraction of bankroll to bet
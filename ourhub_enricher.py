@@ -13,7 +13,7 @@ Free tier: 80 requests/day, 10/min — uses 3 calls per enrichment run.
 import os
 import json
 import time
-import requests
+import http_client
 from datetime import datetime
 
 _API_BASE = 'https://api.ourhub.site/api'
@@ -26,7 +26,8 @@ def _get(endpoint, date_str):
     """Call OurHub API with rate-limit-safe retry."""
     url = f'{_API_BASE}/{endpoint}/{date_str}'
     try:
-        r = requests.get(url, headers=_HEADERS, timeout=_TIMEOUT)
+        # one retry: the free tier's Retry-After is honoured, then we give up
+        r = http_client.get(url, headers=_HEADERS, timeout=_TIMEOUT, retries=1)
         if r.status_code == 429:
             print(f'  [OurHub] Rate limited on {endpoint} — skipping')
             return None
@@ -0,0 +1,196 @@
+"""
+PICK RECORD — slim pick rows, per-endpoint projections, fast item codec
+=======================================================================
+SureBetBets items carry a few large nested attributes (all_horses,
+score_breakdown, selection_reasons) next to ~40 scalars.  List endpoints only
+need the scalars for the hundreds of learning rows they filter, rank and build
+race cards from; the blobs matter for the handful of picks actually shown.
+
+  PickRecord        __slots__ row with exactly CARD_FIELDS — what a list
+                    endpoint reads for every runner of the day
+  CARD_FIELDS       projection for those reads (see projection())
+  LIST_FIELDS       CARD_FIELDS + result columns, for flat pick lists
+  plain_item()      low-level DynamoDB item → plain dict with float numbers in
+                    one pass (no Decimal round trip; ~3x faster than
+                    TypeDeserializer + decimal_to_float)
+  pack_blob() /     zlib-compressed JSON for heavy nested attributes:
+  expand_heavy()    learning rows store all_horses as all_horses_z (Binary);
+                    expand_heavy() restores the plain attribute on read
+                    (to_plain() does it too, so a converted item never
+                    carries a Binary into json.dumps)
+
+Usage:
+  from pick_record import PickRecord, CARD_FIELDS, projection, plain_item
+  expr, names = projection(CARD_FIELDS)
+  rows = [PickRecord.from_item(plain_item(i)) for i in resp['Items']]
+"""
+
+import json
+import zlib
+from decimal import Decimal
+
+# Scalars every list endpoint needs per runner: UI flag / stake / sport filters,
+# per-race dedup, and the race-card rows (horse, jockey, trainer, odds, score)
+CARD_FIELDS = (
+    'bet_id', 'bet_date', 'course', 'race_course', 'race_time', 'horse', 'jockey', 'trainer',
+    'odds', 'decimal_odds', 'comprehensive_score', 'analysis_score', 'show_in_ui', 'stake',
+    'sport', 'outcome', 'created_at',
+)
+
+# Flat pick lists (/api/picks/yesterday): card fields + settlement columns
+LIST_FIELDS = CARD_FIELDS + (
+    'race_name', 'pick_rank', 'is_learning_pick', 'is_hot_prospect', 'confidence_grade', 'form',
+    'bet_type', 'ew_fraction', 'sp_odds', 'profit', 'finish_position', 'result_emoji',
+    'result_winner_name', 'winner_horse', 'result_analysis', 'updated_at',
+)
+
+# Nested attributes that may be stored compressed as <name>_z
+HEAVY_FIELDS = ('all_horses', 'score_breakdown', 'selection_reasons')
+BLOB_SUFFIX  = '_z'
+
+
+def projection(fields):
+    """(ProjectionExpression, ExpressionAttributeNames) with every name aliased,
+    so reserved words (name, status, date …) never break a projection."""
+    names = {f'#p{i}': f for i, f in enumerate(fields)}
+    return ', '.join(names), names
+
+
+# ── Fast codec ────────────────────────────────────────────────────────────────
+
+def _attr(v):
+    (t, x), = v.items()
+    if t == 'S':
+        return x
+    if t == 'N':
+        return float(x)
+    if t == 'BOOL':
+        return x
+    if t == 'M':
+        return {k: _attr(y) for k, y in x.items()}
+    if t == 'L':
+        return [_attr(y) for y in x]
+    if t == 'NULL':
+        return None
+    if t == 'B':
+        return bytes(x)
+    if t == 'NS':
+        return [float(n) for n in x]
+    return list(x)          # SS / BS
+
+
+def plain_item(low_item):
+    """Low-level client item ({'odds': {'N': '3.5'}, ...}) → plain dict, numbers as float."""
+    return {k: _attr(v) for k, v in low_item.items()}
+
+
+def _plain(obj):
+    t = type(obj)
+    if t is dict:
+        return {k: _plain(v) for k, v in obj.items()}
+    if t is list:
+        return [_plain(v) for v in obj]
+    if t is Decimal:
+        return float(obj)
+    return obj
+
+
+def to_plain(obj):
+    """Resource-style item(s) (Decimal numbers) → plain dict(s), numbers as float.
+    Compressed <name>_z blobs (Binary) are expanded, so the result always
+    JSON-serialises."""
+    out = _plain(obj)
+    for item in (out if type(out) is list else [out]):
+        if type(item) is dict:
+            expand_heavy(item)
+    return out
+
+
+# ── Heavy attributes ──────────────────────────────────────────────────────────
+
+def _json_default(o):
+    if isinstance(o, Decimal):
+        return int(o) if o == o.to_integral_value() else float(o)
+    raise TypeError(f'not JSON serialisable: {type(o).__name__}')
+
+
+def pack_blob(obj):
+    """Nested attribute → compressed bytes (stored as a DynamoDB Binary)."""
+    return zlib.compress(json.dumps(obj, separators=(',', ':'), default=_json_default).encode('utf-8'), 6)
+
+
+def unpack_blob(data, decimals=False):
+    """decimals=True parses non-integer numbers as Decimal (ready to put back into DynamoDB)."""
+    if data is None:
+        return None
+    if hasattr(data, 'value'):          # boto3 Binary wrapper
+        data = data.value
+    return json.loads(zlib.decompress(bytes(data)), parse_float=Decimal if decimals else None)
+
+
+def expand_heavy(item):
+    """Restore <name> from <name>_z in place (plain attribute wins if both exist)."""
+    for field in HEAVY_FIELDS:
+        key = field + BLOB_SUFFIX
+        if key in item:
+            blob = item.pop(key)
+            if field not in item:
+                try:
+                    item[field] = unpack_blob(blob)
+                except Exception as e:
+                    print(f"  [PickRecord] could not unpack {key} on {item.get('bet_id')}: {e}")
+    return item
+
+
+# ── Slim row ──────────────────────────────────────────────────────────────────
+
+class PickRecord:
+    """One runner's card-level scalars. dict-style get() so list handlers that
+    filter/rank items work unchanged on records."""
+
+    __slots__ = CARD_FIELDS
+
+    bet_id: str
+    bet_date: str
+    course: str
+    race_course: str
+    race_time: str
+    horse: str
+    jockey: str
+    trainer: str
+    odds: float
+    decimal_odds: float
+    comprehensive_score: float
+    analysis_score: float
+    show_in_ui: bool
+    stake: float
+    sport: str
+    outcome: str
+    created_at: str
+
+    def __init__(self, **fields):
+        for name in CARD_FIELDS:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_item(cls, item):
+        rec = cls.__new__(cls)
+        get = item.get
+        for name in CARD_FIELDS:
+            v = get(name)
+            setattr(rec, name, float(v) if type(v) is Decimal else v)
+        return rec
+
+    def get(self, name, default=None):
+        v = getattr(self, name, None)
+        return default if v is None else v
+
+    @property
+    def key(self):
+        return {'bet_id': self.bet_id, 'bet_date': self.bet_date}
+
+    def to_dict(self):
+        return {n: getattr(self, n) for n in CARD_FIELDS if getattr(self, n) is not None}
+
+    def __repr__(self):
+        return f'PickRecord({self.horse!r} @ {self.course} {str(self.race_time)[:16]})'
@@ -0,0 +1,409 @@
+"""
+PIPELINE SCHEDULER — in-process DAG runner for the orchestrator phases
+======================================================================
+surebet_orchestrator.run_phase used to shell out to every step in turn: a
+new interpreter per step, boto3 and every shared module re-imported each
+time, and validate_picks waiting on notify_picks although neither reads
+the other's output.  This runs a phase as a dependency graph instead:
+
+  - steps declare `after` (ids they need); anything whose dependencies
+    are done is started, up to max_workers at once
+  - ready steps start in priority order: explicit `priority`, then the
+    longest estimated path to the end of the graph (est_s), so the
+    critical path is never queued behind a side branch
+  - steps run in this process (exec of the script as __main__) so warm
+    modules, boto3 loaders and module-level caches carry across steps;
+    `isolate: True` (or isolate=True for the whole run) keeps the old
+    subprocess behaviour for a step.  An in-process step sees
+    sys.argv == [script], never the orchestrator's own arguments, and
+    runs in the process cwd (execute_script refuses any other cwd)
+  - per-step timeout_s and retries / retry_delay_s.  A timed-out in-process
+    step cannot be killed (its thread is abandoned), so it is never retried
+    — a step that needs retries should be isolated
+  - a failed step with abort_on_fail skips everything downstream of it;
+    a soft failure lets its dependents run
+
+run_dag() returns the run manifest — one record per step (status,
+attempts, start offset, runtime, reason) plus wall time, the serial sum
+and the critical path — and hands it to an optional sink
+(dynamodb_sink() persists it where surebet_orchestrator --status reads it).
+
+  import pipeline_scheduler as ps
+  manifest = ps.run_dag(steps, runner, max_workers=4,
+                        sink=ps.dynamodb_sink(table, 'ORCH_MANIFEST', 'refresh'))
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import builtins
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timezone
+from decimal import Decimal
+
+REGION          = 'eu-west-1'
+DEFAULT_TIMEOUT = 600
+MAX_WORKERS     = 4
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+# ── Shared warm state ─────────────────────────────────────────────────────────
+
+def client(service):
+    """One boto3 client per service for every step in the process."""
+    with _clients_lock:
+        if service not in _clients:
+            import boto3
+            _clients[service] = boto3.client(service, region_name=REGION)
+        return _clients[service]
+
+
+def warm(modules=(), services=('dynamodb', 's3')):
+    """Import shared modules and create the common clients once, before any step runs."""
+    t0 = time.perf_counter()
+    for name in modules:
+        try:
+            __import__(name)
+        except Exception as e:
+            print(f'[Scheduler] warm import {name} skipped: {e}')
+    for svc in services:
+        try:
+            client(svc)
+        except Exception as e:
+            print(f'[Scheduler] warm client {svc} skipped: {e}')
+    print(f'[Scheduler] warmed {len(modules)} module(s), {len(services)} client(s) '
+          f'({(time.perf_counter() - t0) * 1000:.0f} ms)')
+
+
+# ── Per-thread stdout (parallel steps keep their own output) ──────────────────
+
+class _ThreadOutput(io.TextIOBase):
+    """sys.stdout / sys.stderr stand-in: writes from a thread with a registered
+    buffer go there, everything else to the real stream."""
+
+    def __init__(self, real):
+        self.real = real
+        self.buffers = {}
+
+    def write(self, s):
+        buf = self.buffers.get(threading.get_ident())
+        return (buf if buf is not None else self.real).write(s)
+
+    def flush(self):
+        self.real.flush()
+
+    def reconfigure(self, **kwargs):        # scripts call sys.stdout.reconfigure(encoding=...)
+        if hasattr(self.real, 'reconfigure'):
+            self.real.reconfigure(**kwargs)
+
+    @property
+    def encoding(self):
+        return getattr(self.real, 'encoding', 'utf-8')
+
+
+class _ThreadArgv(list):
+    """sys.argv stand-in: a thread running a step sees that step's argv, everything
+    else the process's real arguments (scripts read sys.argv[1] / '--test' in sys.argv)."""
+
+    def __init__(self, real):
+        super().__init__(real)
+        self.argvs = {}
+
+    def _view(self):
+        argv = self.argvs.get(threading.get_ident())
+        return list.copy(self) if argv is None else argv
+
+    def __getitem__(self, i):
+        return self._view()[i]
+
+    def __len__(self):
+        return len(self._view())
+
+    def __iter__(self):
+        return iter(self._view())
+
+    def __contains__(self, x):
+        return x in self._view()
+
+    def __repr__(self):
+        return repr(self._view())
+
+
+_outputs = {}       # 'out' / 'err' → the installed _ThreadOutput, 'argv' → _ThreadArgv
+_outputs_lock = threading.Lock()
+
+
+def _install_output():
+    with _outputs_lock:
+        if not isinstance(sys.stdout, _ThreadOutput):
+            sys.stdout = _outputs['out'] = _ThreadOutput(sys.stdout)
+        if not isinstance(sys.stderr, _ThreadOutput):
+            sys.stderr = _outputs['err'] = _ThreadOutput(sys.stderr)
+        if not isinstance(sys.argv, _ThreadArgv):
+            sys.argv = _outputs['argv'] = _ThreadArgv(sys.argv)
+
+
+# ── Executing one script ──────────────────────────────────────────────────────
+
+def _exec_inprocess(path, out, err):
+    """exec the script as __main__ in a fresh namespace; returns its exit code."""
+    ident = threading.get_ident()
+    _outputs['out'].buffers[ident], _outputs['err'].buffers[ident] = out, err
+    _outputs['argv'].argvs[ident] = [str(path)]
+    try:
+        with open(path, encoding='utf-8') as f:
+            code = compile(f.read(), str(path), 'exec')
+        exec(code, {'__name__': '__main__', '__file__': str(path), '__builtins__': builtins})
+        return 0
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        if isinstance(e.code, int):
+            return e.code
+        print(e.code, file=err)
+        return 1
+    except BaseException:
+        import traceback
+        err.write(traceback.format_exc())
+        return 1
+    finally:
+        _outputs['out'].buffers.pop(ident, None)
+        _outputs['err'].buffers.pop(ident, None)
+        _outputs['argv'].argvs.pop(ident, None)
+
+
+def execute_script(path, timeout_s=DEFAULT_TIMEOUT, isolate=False, python=None, cwd=None):
+    """Run one pipeline script → {exit_code, stdout, stderr, runtime_s, timed_out}.
+    In-process by default; isolate=True runs `python -X utf8 path` in a subprocess.
+    An in-process step runs in the process cwd, so a different `cwd` is refused
+    (chdir once before run_dag instead)."""
+    t0 = time.perf_counter()
+    if not isolate and cwd is not None and os.path.realpath(cwd) != os.path.realpath(os.getcwd()):
+        raise ValueError(f'in-process step {path} cannot run in {cwd} (process cwd is {os.getcwd()})')
+    if isolate:
+        try:
+            proc = subprocess.run([python or sys.executable, '-X', 'utf8', str(path)],
+                                  capture_output=True, text=True, encoding='utf-8',
+                                  cwd=cwd, timeout=timeout_s)
+            return {'exit_code': proc.returncode, 'stdout': proc.stdout, 'stderr': proc.stderr,
+                    'runtime_s': round(time.perf_counter() - t0, 1), 'timed_out': False}
+        except subprocess.TimeoutExpired as e:
+            return {'exit_code': -1, 'stdout': e.stdout or '', 'stderr': e.stderr or '',
+                    'runtime_s': round(time.perf_counter() - t0, 1), 'timed_out': True}
+
+    _install_output()
+    out, err, box = io.StringIO(), io.StringIO(), {}
+    worker = threading.Thread(target=lambda: box.setdefault('rc', _exec_inprocess(path, out, err)),
+                              name=f'step:{os.path.basename(str(path))}', daemon=True)
+    worker.start()
+    worker.join(timeout_s)
+    timed_out = worker.is_alive()       # a thread cannot be killed — it is abandoned as a daemon
+    return {'exit_code': -1 if timed_out else box.get('rc', 1), 'stdout': out.getvalue(),
+            'stderr': err.getvalue(), 'runtime_s': round(time.perf_counter() - t0, 1),
+            'timed_out': timed_out}
+
+
+# ── Graph ─────────────────────────────────────────────────────────────────────
+
+def _validate(steps):
+    ids = [s['id'] for s in steps]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f'duplicate step ids: {ids}')
+    known = set(ids)
+    for s in steps:
+        missing = [d for d in s.get('after', ()) if d not in known]
+        if missing:
+            raise ValueError(f"step {s['id']} depends on unknown step(s) {missing}")
+    # Kahn's algorithm — raises on a cycle
+    indeg = {s['id']: len(s.get('after', ())) for s in steps}
+    children = {i: [] for i in ids}
+    for s in steps:
+        for d in s.get('after', ()):
+            children[d].append(s['id'])
+    queue = [i for i in ids if indeg[i] == 0]
+    seen = 0
+    while queue:
+        i = queue.pop()
+        seen += 1
+        for c in children[i]:
+            indeg[c] -= 1
+            if indeg[c] == 0:
+                queue.append(c)
+    if seen != len(ids):
+        raise ValueError('step dependencies contain a cycle')
+    return children
+
+
+def _rank(steps, children):
+    """Longest estimated time from each step to the end of the graph (its own est_s included)."""
+    by_id = {s['id']: s for s in steps}
+    memo = {}
+
+    def tail(i):
+        if i not in memo:
+            memo[i] = float(by_id[i].get('est_s', 1)) + max((tail(c) for c in children[i]), default=0.0)
+        return memo[i]
+    return {i: tail(i) for i in by_id}
+
+
+def _descendants(i, children):
+    out, stack = set(), list(children[i])
+    while stack:
+        c = stack.pop()
+        if c not in out:
+            out.add(c)
+            stack.extend(children[c])
+    return out
+
+
+def critical_path(steps, records):
+    """Chain of finished steps that set the wall time: from the last finisher,
+    follow the dependency that finished latest."""
+    by_id = {s['id']: s for s in steps}
+    done = {i: r for i, r in records.items() if r.get('end_s') is not None}
+    if not done:
+        return []
+    cur = max(done, key=lambda i: done[i]['end_s'])
+    path = [cur]
+    while True:
+        deps = [d for d in by_id[cur].get('after', ()) if d in done]
+        if not deps:
+            break
+        cur = max(deps, key=lambda d: done[d]['end_s'])
+        path.append(cur)
+    return path[::-1]
+
+
+# ── Run ───────────────────────────────────────────────────────────────────────
+
+def run_dag(steps, runner, max_workers=MAX_WORKERS, sink=None, name=''):
+    """Run steps (dicts with id, after, priority, est_s, retries, retry_delay_s,
+    abort_on_fail) through runner(step) → {'ok': bool, 'reason': str, ...};
+    'retryable': False stops the retries.
+    Returns the manifest."""
+    children = _validate(steps)
+    rank = _rank(steps, children)
+    order = {s['id']: n for n, s in enumerate(steps)}
+    by_id = {s['id']: s for s in steps}
+    records = {s['id']: {'status': 'pending', 'attempts': 0, 'reason': ''} for s in steps}
+    t0 = time.perf_counter()
+    started_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+    def _attempt(step):
+        rec = records[step['id']]
+        rec['start_s'] = round(time.perf_counter() - t0, 2)
+        res = {'ok': False, 'reason': 'not run'}
+        for attempt in range(int(step.get('retries', 0)) + 1):
+            rec['attempts'] = attempt + 1
+            try:
+                res = runner(step) or {'ok': False, 'reason': 'runner returned nothing'}
+            except Exception as e:
+                res = {'ok': False, 'reason': f'{type(e).__name__}: {e}'}
+            if res.get('ok'):
+                break
+            if res.get('retryable') is False:       # e.g. an in-process step still running after its timeout
+                break
+            if attempt < int(step.get('retries', 0)):
+                print(f"[Scheduler] {step['id']} failed ({res.get('reason')}) — retry {attempt + 1}")
+                time.sleep(float(step.get('retry_delay_s', 5)))
+        rec['end_s'] = round(time.perf_counter() - t0, 2)
+        rec['runtime_s'] = round(rec['end_s'] - rec['start_s'], 2)
+        return res
+
+    remaining = {s['id']: set(s.get('after', ())) for s in steps}
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        while True:
+            ready = [i for i, deps in remaining.items()
+                     if records[i]['status'] == 'pending' and not deps]
+            ready.sort(key=lambda i: (-float(by_id[i].get('priority', 0)), -rank[i], order[i]))
+            for i in ready[:max(0, max_workers - len(running))]:
+                records[i]['status'] = 'running'
+                running[ex.submit(_attempt, by_id[i])] = i
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                i = running.pop(fut)
+                res = fut.result()
+                rec = records[i]
+                rec['status'] = 'ok' if res.get('ok') else 'failed'
+                rec['reason'] = res.get('reason', '')
+                if res.get('ok') or not by_id[i].get('abort_on_fail'):
+                    for c in children[i]:
+                        remaining[c].discard(i)
+                else:
+                    for c in _descendants(i, children):
+                        if records[c]['status'] == 'pending':
+                            records[c]['status'] = 'skipped'
+                            records[c]['reason'] = f'upstream {i} failed'
+                remaining.pop(i, None)
+
+    wall = round(time.perf_counter() - t0, 2)
+    serial = round(sum(r.get('runtime_s', 0) for r in records.values()), 2)
+    counts = {k: sum(1 for r in records.values() if r['status'] == k) for k in ('ok', 'failed', 'skipped')}
+    manifest = {
+        'name':          name,
+        'started_at':    started_at,
+        'status':        'ok' if not counts['failed'] and not counts['skipped']
+                         else ('partial' if counts['ok'] else 'failed'),
+        'wall_s':        wall,
+        'serial_s':      serial,
+        'critical_path': critical_path(steps, records),
+        'counts':        counts,
+        'steps':         records,
+    }
+    print(f"[Scheduler] {name or 'run'}: {counts['ok']} ok, {counts['failed']} failed, "
+          f"{counts['skipped']} skipped — wall {wall}s vs serial {serial}s, "
+          f"critical path {' → '.join(manifest['critical_path']) or '-'}")
+    if sink:
+        try:
+            sink(manifest)
+        except Exception as e:
+            print(f'[Scheduler] manifest sink failed: {e}')
+    return manifest
+
+
+# ── Manifest sinks ────────────────────────────────────────────────────────────
+
+def _to_dynamo(obj):
+    if isinstance(obj, dict):
+        return {k: _to_dynamo(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_to_dynamo(v) for v in obj]
+    if isinstance(obj, float):
+        return Decimal(str(round(obj, 4)))
+    return obj
+
+
+def dynamodb_sink(table, partition, phase, date_str=None):
+    """Sink writing the manifest as one SureBetBets row:
+    bet_date=partition, bet_id=PHASE_{PHASE}_{date}."""
+    def _sink(manifest):
+        day = date_str or manifest['started_at'][:10]
+        failed = [{'step': i, 'reason': r['reason']} for i, r in manifest['steps'].items() if r['status'] == 'failed']
+        skipped = [i for i, r in manifest['steps'].items() if r['status'] == 'skipped']
+        table.put_item(Item=_to_dynamo({
+            'bet_date':      partition,
+            'bet_id':        f'PHASE_{phase.upper()}_{day}',
+            'phase':         phase,
+            'date':          day,
+            'status':        manifest['status'],
+            'timestamp':     manifest['started_at'],
+            'steps_passed':  manifest['counts']['ok'],
+            'steps_failed':  manifest['counts']['failed'],
+            'steps_skipped': manifest['counts']['skipped'],
+            'failed_steps':  json.dumps(failed),
+            'skipped_steps': json.dumps(skipped),
+            'wall_s':        manifest['wall_s'],
+            'serial_s':      manifest['serial_s'],
+            'critical_path': manifest['critical_path'],
+            'manifest':      json.dumps(manifest, default=str),
+        }))
+    return _sink
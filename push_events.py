@@ -0,0 +1,161 @@
+"""
+PUSH EVENTS — tiny delta events for the frontend (picks published, results settled)
+===================================================================================
+Replaces whole-list polling of /api/results/today + cumulative-roi with a
+Server-Sent Events channel.  Writers append one small JSON event per change;
+readers fetch only the events after their cursor (the SSE Last-Event-ID).
+
+Event kinds:
+  picks    {date, picks: [{bet_id, horse, course, race_time, odds, score, rank}]}
+           — analyze_and_save_all published / re-ranked the day's UI picks
+  results  {date, results: [{bet_id, outcome, finish_position, sp_odds, profit, winner_horse}]}
+           — one or more UI picks settled
+
+Storage (one object per event, keys sort by time so the key is the cursor):
+  S3     s3://{PIPELINE_BUCKET}/events/{date}/{YYYYmmddTHHMMSSffffff}-{rand}.json
+  local  {PUSH_EVENTS_DIR}/{date}/...   when PUSH_EVENTS_DIR is set
+         (push_server.py — the local stand-in SSE server used for tests)
+
+Transport:
+  /api/events (api_events.py) returns whatever is newer than Last-Event-ID as a
+  text/event-stream body and closes; EventSource reconnects after `retry` ms.
+  push_server.py keeps the stream open and pushes as events land.
+
+Usage:
+  from push_events import publish_event
+  publish_event('results', {'results': [...]}, date_str='2026-04-18')
+"""
+
+import os
+import json
+import uuid
+from datetime import datetime
+
+BUCKET     = os.environ.get('PIPELINE_BUCKET', 'surebet-pipeline-data')
+REGION     = os.environ.get('AWS_DEFAULT_REGION', 'eu-west-1')
+LOCAL_DIR  = os.environ.get('PUSH_EVENTS_DIR', '')
+PREFIX     = 'events'
+
+# EventSource reconnect delay — short while races are running, long otherwise
+RETRY_RACING_MS  = 60_000
+RETRY_IDLE_MS    = 300_000
+RACING_HOURS_UTC = (11, 20)
+
+_s3 = None
+
+
+def _get_s3():
+    global _s3
+    if _s3 is None:
+        import boto3
+        _s3 = boto3.client('s3', region_name=REGION)
+    return _s3
+
+
+def _today():
+    return datetime.utcnow().strftime('%Y-%m-%d')
+
+
+def _new_id():
+    return f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+
+
+def publish_event(kind, data, date_str=None):
+    """Append one event. Never raises — a failed push must not fail the pipeline."""
+    date_str = date_str or _today()
+    event_id = _new_id()
+    body = json.dumps({'id': event_id, 'kind': kind, 'date': date_str,
+                       'ts': datetime.utcnow().isoformat() + 'Z', **data}, default=str)
+    try:
+        if LOCAL_DIR:
+            os.makedirs(os.path.join(LOCAL_DIR, date_str), exist_ok=True)
+            with open(os.path.join(LOCAL_DIR, date_str, f'{event_id}.json'), 'w') as f:
+                f.write(body)
+        else:
+            _get_s3().put_object(Bucket=BUCKET, Key=f'{PREFIX}/{date_str}/{event_id}.json',
+                                 Body=body.encode('utf-8'), ContentType='application/json')
+        print(f"  [Push] {kind} event {event_id} ({len(body)} bytes)")
+        return event_id
+    except Exception as e:
+        print(f"  [Push] {kind} event not published: {e}")
+        return None
+
+
+def _list_ids(date_str, since=None, limit=1000):
+    if LOCAL_DIR:
+        folder = os.path.join(LOCAL_DIR, date_str)
+        if not os.path.isdir(folder):
+            return []
+        ids = sorted(n[:-5] for n in os.listdir(folder) if n.endswith('.json'))
+        return [i for i in ids if not since or i > since][:limit]
+    kwargs = {'Bucket': BUCKET, 'Prefix': f'{PREFIX}/{date_str}/', 'MaxKeys': limit}
+    if since:
+        kwargs['StartAfter'] = f'{PREFIX}/{date_str}/{since}.json'
+    keys = [o['Key'] for o in _get_s3().list_objects_v2(**kwargs).get('Contents', [])]
+    return [k.rsplit('/', 1)[-1][:-5] for k in keys]
+
+
+def read_events(since=None, date_str=None, limit=100):
+    """Events for date_str newer than cursor `since`, oldest first."""
+    date_str = date_str or _today()
+    out = []
+    for event_id in _list_ids(date_str, since, limit):
+        if LOCAL_DIR:
+            with open(os.path.join(LOCAL_DIR, date_str, f'{event_id}.json'), 'r') as f:
+                out.append(json.load(f))
+        else:
+            obj = _get_s3().get_object(Bucket=BUCKET, Key=f'{PREFIX}/{date_str}/{event_id}.json')
+            out.append(json.loads(obj['Body'].read()))
+    return out
+
+
+def latest_event_id(date_str=None):
+    """Cursor of the newest event today (None if there are none yet) — keys only."""
+    ids = _list_ids(date_str or _today())
+    return ids[-1] if ids else None
+
+
+def start_of_day_id(date_str=None):
+    """Cursor that sorts before every event of the day — handed out on first
+    connect when nothing has been published yet, so the first event is not skipped."""
+    return (date_str or _today()).replace('-', '') + 'T000000000000'
+
+
+def retry_ms(now=None):
+    h = (now or datetime.utcnow()).hour
+    return RETRY_RACING_MS if RACING_HOURS_UTC[0] <= h < RACING_HOURS_UTC[1] else RETRY_IDLE_MS
+
+
+def format_sse(events, retry=None):
+    """Render events as a text/event-stream chunk."""
+    lines = []
+    if retry is not None:
+        lines.append(f'retry: {retry}\n')
+    for ev in events:
+        lines.append(f"id: {ev['id']}\nevent: {ev['kind']}\ndata: {json.dumps(ev, default=str)}\n")
+    return '\n'.join(lines) + '\n'
+
+
+# ── Payload builders shared by the publishers ─────────────────────────────────
+
+def pick_delta(item):
+    return {
+        'bet_id':    item.get('bet_id'),
+        'horse':     item.get('horse'),
+        'course':    item.get('course'),
+        'race_time': str(item.get('race_time', '')),
+        'odds':      float(item.get('odds') or 0),
+        'score':     float(item.get('comprehensive_score') or item.get('analysis_score') or 0),
+        'rank':      int(item.get('pick_rank') or 0),
+    }
+
+
+def result_delta(item):
+    return {
+        'bet_id':          item.get('bet_id'),
+        'outcome':         item.get('outcome'),
+        'finish_position': item.get('finish_position'),
+        'sp_odds':         float(item['sp_odds']) if item.get('sp_odds') is not None else None,
+        'profit':          float(item['profit']) if item.get('profit') is not None else None,
+        'winner_horse':    item.get('winner_horse') or item.get('result_winner_name'),
+    }
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+push_server.py
+==============
+Local stand-in for the /api/events push channel — a long-lived SSE stream
+backed by the local event store (PUSH_EVENTS_DIR), for frontend development
+and end-to-end tests without AWS.
+
+  GET  /api/events            text/event-stream, held open; pushes each new
+                              event as it lands (honours Last-Event-ID)
+  POST /api/events/publish    {"kind": "results", "data": {...}, "date": "..."}
+                              appends an event (what the pipeline does in prod)
+
+Usage:
+    python push_server.py                       # :8787, ./push_events_local
+    python push_server.py --port 9000 --dir /tmp/events
+
+    # frontend:  REACT_APP_EVENTS_URL=http://localhost:8787/api/events npm start
+    # publish :  curl -X POST localhost:8787/api/events/publish \\
+    #              -d '{"kind":"results","data":{"results":[{"bet_id":"x","outcome":"win"}]}}'
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+POLL_SECONDS      = 1.0
+HEARTBEAT_SECONDS = 15.0
+
+
+class PushHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _cors(self):
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type,Last-Event-ID')
+        self.send_header('Access-Control-Allow-Methods', 'GET,POST,OPTIONS')
+
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self._cors()
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        import push_events
+        if urlparse(self.path).path != '/api/events/publish':
+            self.send_error(404)
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            req = json.loads(self.rfile.read(length) or b'{}')
+            event_id = push_events.publish_event(req['kind'], req.get('data', {}), req.get('date'))
+            body = json.dumps({'success': event_id is not None, 'id': event_id}).encode()
+            self.send_response(200)
+        except Exception as e:
+            body = json.dumps({'success': False, 'error': str(e)}).encode()
+            self.send_response(400)
+        self._cors()
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        import push_events
+        url = urlparse(self.path)
+        if url.path != '/api/events':
+            self.send_error(404)
+            return
+        qp = {k: v[0] for k, v in parse_qs(url.query).items()}
+        date_str = qp.get('date')
+        cursor = self.headers.get('Last-Event-ID') or qp.get('since')
+        if not cursor:
+            cursor = push_events.latest_event_id(date_str) or push_events.start_of_day_id(date_str)
+
+        self.send_response(200)
+        self._cors()
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'keep-alive')
+        self.end_headers()
+
+        last_beat = time.time()
+        try:
+            # The cursor goes out at once so a reconnect resumes from it
+            self.wfile.write(push_events.format_sse([{'id': cursor, 'kind': 'hello'}], retry=3000).encode())
+            self.wfile.flush()
+            while True:
+                events = push_events.read_events(since=cursor, date_str=date_str)
+                if events:
+                    self.wfile.write(push_events.format_sse(events).encode())
+                    self.wfile.flush()
+                    cursor = events[-1]['id']
+                elif time.time() - last_beat >= HEARTBEAT_SECONDS:
+                    self.wfile.write(b': ping\n\n')
+                    self.wfile.flush()
+                    last_beat = time.time()
+                time.sleep(POLL_SECONDS)
+        except (BrokenPipeError, ConnectionResetError):
+            pass   # client went away
+
+    def log_message(self, fmt, *args):
+        print(f"  [PushServer] {self.address_string()} {fmt % args}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--port', type=int, default=8787)
+    ap.add_argument('--dir', default=os.environ.get('PUSH_EVENTS_DIR') or 'push_events_local')
+    args = ap.parse_args()
+
+    # push_events reads PUSH_EVENTS_DIR at import — set it before the first import
+    os.environ['PUSH_EVENTS_DIR'] = os.path.abspath(args.dir)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    server = ThreadingHTTPServer(('0.0.0.0', args.port), PushHandler)
+    print(f"[PushServer] SSE on http://localhost:{args.port}/api/events  (store: {os.environ['PUSH_EVENTS_DIR']})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+RACE CARD — compact handoff of the day's Betfair card between Lambdas
+=====================================================================
+surebet-betfair-fetch used to hand surebet-analysis an S3 key: analysis
+downloaded response_horses.json, wrote it back to /tmp, then
+complete_daily_analysis.load_races re-read and re-parsed it from disk.  The
+card now travels as a reference the state machine passes along:
+
+  ref = {'schema': 1, 'date', 'races', 'runners', 's3_key': None | key,
+         'shards': [{'course', 'races', 'runners', 'data': b64}          inline
+                    | {'course', 'races', 'runners', 'offset', 'length'}]}   in S3
+
+One shard per course (or a single '*' shard).  Each shard is
+MAGIC + schema byte + zlib(compact JSON {'pos': [...], 'races': [...]}),
+where pos is each race's index on the original card, so a merged load comes
+back in fetch order.  When the base64 shards fit in INLINE_LIMIT they ride in
+the Step Functions state itself (no S3 at all); otherwise the shards are
+concatenated into one object and each shard is a byte range of it, so a
+course shard reads only its own bytes.
+
+  import race_card
+  ref   = race_card.pack(races, date_str)                 # sf_betfair_fetch
+  races = race_card.load(ref)                             # sf_analysis — one decode, in memory
+  races = race_card.load(ref, courses=['Ascot'])          # just one course
+  refs  = race_card.split(ref)                            # one ref per course shard
+
+response_horses.json is still written by the fetch for the other readers
+(lay_scanner.load_card, health checks); analysis no longer touches it.
+"""
+
+import os
+import json
+import zlib
+import base64
+import threading
+from datetime import datetime, timezone
+
+REGION         = 'eu-west-1'
+BUCKET         = os.environ.get('PIPELINE_BUCKET', 'surebet-pipeline-data')
+SCHEMA_VERSION = 1
+MAGIC          = b'SBRC'
+INLINE_LIMIT   = 180000     # base64 bytes kept in the state; Step Functions caps state data at 256 KB
+ALL_COURSES    = '*'
+
+_blobs = {}                 # s3_key → object bytes, latest run only (keys are per fetch run, never stale)
+_lock  = threading.Lock()
+
+
+def _course(race):
+    return race.get('course') or race.get('venue') or ''
+
+
+def _serialize(obj):
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f"Cannot serialise {type(obj)}")
+
+
+def encode(races, positions=None):
+    """races → shard bytes (MAGIC, schema byte, zlib JSON)."""
+    body = {'pos': list(positions if positions is not None else range(len(races))), 'races': races}
+    raw = json.dumps(body, separators=(',', ':'), default=_serialize).encode('utf-8')
+    return MAGIC + bytes([SCHEMA_VERSION]) + zlib.compress(raw, 9)
+
+
+def decode(blob):
+    """Shard bytes → (positions, races). ValueError on a foreign or newer payload."""
+    blob = bytes(blob)
+    if blob[:len(MAGIC)] != MAGIC:
+        raise ValueError('not a race-card payload')
+    version = blob[len(MAGIC)]
+    if version != SCHEMA_VERSION:
+        raise ValueError(f'race-card schema {version}, this build reads {SCHEMA_VERSION}')
+    body = json.loads(zlib.decompress(blob[len(MAGIC) + 1:]))
+    return body['pos'], body['races']
+
+
+def pack(races, date_str, by_course=True, inline_limit=INLINE_LIMIT, s3=None):
+    """Encode the card into a ref; inline when it fits, else one S3 object of byte-ranged shards."""
+    groups = {}
+    for i, race in enumerate(races):
+        groups.setdefault(_course(race) if by_course else ALL_COURSES, []).append(i)
+
+    shards, blobs = [], []
+    for course, idx in groups.items():
+        blob = encode([races[i] for i in idx], idx)
+        blobs.append(blob)
+        shards.append({'course': course, 'races': len(idx),
+                       'runners': sum(len(races[i].get('runners', [])) for i in idx)})
+
+    ref = {'schema': SCHEMA_VERSION, 'date': date_str, 'races': len(races),
+           'runners': sum(s['runners'] for s in shards), 's3_key': None, 'shards': shards}
+
+    inline = [base64.b64encode(b).decode('ascii') for b in blobs]
+    if sum(len(d) for d in inline) <= inline_limit:
+        for shard, data in zip(shards, inline):
+            shard['data'] = data
+        where = 'inline'
+    else:
+        offset = 0
+        for shard, blob in zip(shards, blobs):
+            shard['offset'], shard['length'] = offset, len(blob)
+            offset += len(blob)
+        stamp = datetime.now(timezone.utc).strftime('%H%M%S')
+        key = f'daily/{date_str}/race_card/{stamp}.bin'
+        body = b''.join(blobs)
+        if s3 is None:
+            import boto3
+            s3 = boto3.client('s3', region_name=REGION)
+        s3.put_object(Bucket=BUCKET, Key=key, Body=body, ContentType='application/octet-stream')
+        with _lock:
+            _blobs.clear()
+            _blobs[key] = body
+        ref['s3_key'] = key
+        where = f's3://{BUCKET}/{key}'
+    print(f"[RaceCard] {len(races)} races / {len(shards)} shard(s), "
+          f"{sum(len(b) for b in blobs) // 1024} KB packed → {where}")
+    return ref
+
+
+def _shard_bytes(ref, shard, s3):
+    if 'data' in shard:
+        return base64.b64decode(shard['data'])
+    key = ref['s3_key']
+    with _lock:
+        body = _blobs.get(key)
+    if body is not None:
+        return body[shard['offset']:shard['offset'] + shard['length']]
+    if s3 is None:
+        import boto3
+        s3 = boto3.client('s3', region_name=REGION)
+    end = shard['offset'] + shard['length'] - 1
+    return s3.get_object(Bucket=BUCKET, Key=key, Range=f"bytes={shard['offset']}-{end}")['Body'].read()
+
+
+def load(ref, courses=None, s3=None):
+    """Races from a ref (all shards, or just `courses`), in original card order."""
+    if ref.get('schema') != SCHEMA_VERSION:
+        raise ValueError(f"race-card schema {ref.get('schema')}, this build reads {SCHEMA_VERSION}")
+    wanted = {c.lower() for c in courses} if courses else None
+    shards = [s for s in ref['shards'] if wanted is None or s['course'].lower() in wanted]
+    if ref.get('s3_key') and len(shards) > 1:
+        # Several shards from S3 → one GET of the object, cached for this run
+        with _lock:
+            cached = ref['s3_key'] in _blobs
+        if not cached:
+            if s3 is None:
+                import boto3
+                s3 = boto3.client('s3', region_name=REGION)
+            body = s3.get_object(Bucket=BUCKET, Key=ref['s3_key'])['Body'].read()
+            with _lock:
+                _blobs.clear()
+                _blobs[ref['s3_key']] = body
+    merged = []
+    for shard in shards:
+        pos, races = decode(_shard_bytes(ref, shard, s3))
+        merged.extend(zip(pos, races))
+    merged.sort(key=lambda pr: pr[0])
+    return [race for _, race in merged]
+
+
+def split(ref):
+    """One ref per course shard (for a Map state over courses)."""
+    return [dict(ref, races=s['races'], runners=s['runners'], shards=[s]) for s in ref['shards']]
@@ -0,0 +1,268 @@
+"""
+RP EXTRACTOR — browserless Racing Post results / racecard extraction
+====================================================================
+Reads what a headless Chrome used to render, straight from the HTML:
+
+  1. embedded JSON — <script type="application/json">, JSON-LD and
+     window.__*_STATE__ = {...} blobs the page hydrates from
+  2. static markup — lxml XPath over the same data-test-selector /
+     class hooks the Selenium scrapers used
+
+No browser, no fixed sleeps: pages come through http_client (pooled,
+retrying, per-host concurrency cap instead of time.sleep(2) between pages),
+so results and racecards scrape inside a 256 MB Lambda in seconds.
+Selenium stays as an explicit fallback only (selenium_racing_post_scraper.py
+--selenium, sleeper_scan.py --selenium).
+
+Functions:
+  fetch_results(date_str)        → [race_data]  (same shape as
+                                   SeleniumRacingPostScraper.scrape_race_result)
+  result_urls(html, date_str)    → race result URLs from the day's index page
+  parse_result(html, url)        → race_data or None
+  parse_racecard(html)           → {horse_lower: {trainer, jockey, form}}
+  embedded_json(html)            → parsed JSON blobs found in the page
+
+Requires lxml (imported on first parse).
+"""
+
+import re
+import json
+
+import http_client
+
+RP_BASE = 'https://www.racingpost.com'
+RP_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                   '(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36'),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-GB,en;q=0.9',
+}
+RP_HOST_CONCURRENCY = 3     # parallel page fetches against racingpost.com
+
+_SCRIPT_JSON = re.compile(
+    r'<script[^>]*type="application/(?:ld\+)?json"[^>]*>(.*?)</script>', re.S | re.I)
+_STATE_JSON = re.compile(r'window\.__[A-Z0-9_]+__\s*=\s*(\{.*?\})\s*;?\s*</script>', re.S)
+_TIME = re.compile(r'(\d{1,2}:\d{2})')
+_CLASS = re.compile(r'Class (\d)', re.I)
+_COURSE = re.compile(r'/results/\d+/([\w-]+)/')
+
+http_client.set_host_limit('www.racingpost.com', RP_HOST_CONCURRENCY)
+
+
+def parse_odds(odds_text):
+    """'9/2' → 5.5, '5.5' → 5.5, 'EVS' → 2.0, else None."""
+    try:
+        t = str(odds_text).strip().upper().rstrip('FJ').strip()   # 9/2F, 2/1JF
+        if 'EVS' in t or 'EVENS' in t:
+            return 2.0
+        if '/' in t:
+            num, den = t.split('/', 1)
+            return round(float(num) / float(den) + 1, 2)
+        if t.replace('.', '', 1).isdigit():
+            return float(t)
+    except (ValueError, ZeroDivisionError):
+        pass
+    return None
+
+
+def _doc(html):
+    import lxml.html
+    return lxml.html.fromstring(html)
+
+
+def _text(node, xpath):
+    found = node.xpath(xpath)
+    if not found:
+        return None
+    el = found[0]
+    return (el if isinstance(el, str) else el.text_content()).strip() or None
+
+
+def _cls(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# ── Embedded JSON ─────────────────────────────────────────────────────────────
+
+def embedded_json(html):
+    blobs = []
+    for raw in _SCRIPT_JSON.findall(html) + _STATE_JSON.findall(html):
+        try:
+            blobs.append(json.loads(raw))
+        except ValueError:
+            continue
+    return blobs
+
+
+def _walk_runners(obj, out, depth=0):
+    """Collect dicts that look like runners (a horse name plus trainer/jockey/position)."""
+    if depth > 10:
+        return
+    if isinstance(obj, list):
+        for item in obj:
+            _walk_runners(item, out, depth + 1)
+    elif isinstance(obj, dict):
+        name = obj.get('horseName') or obj.get('horse_name') or obj.get('horse') or obj.get('name')
+        if isinstance(name, str) and name and any(
+                k in obj for k in ('trainerName', 'trainer', 'jockeyName', 'jockey',
+                                   'position', 'finishPosition', 'raceOutcomeCode')):
+            out.append(obj)
+        for v in obj.values():
+            if isinstance(v, (dict, list)):
+                _walk_runners(v, out, depth + 1)
+
+
+def _json_runners(html):
+    runners = []
+    for blob in embedded_json(html):
+        _walk_runners(blob, runners)
+    return runners
+
+
+def _name_of(d, *keys):
+    for k in keys:
+        v = d.get(k)
+        if isinstance(v, dict):
+            v = v.get('name')
+        if v:
+            return str(v).strip()
+    return None
+
+
+# ── Results ───────────────────────────────────────────────────────────────────
+
+def result_urls(html, date_str):
+    """Race result URLs from the /results/{date} index (no winning-times / anchors)."""
+    pat = re.compile(r'href="((?:https://www\.racingpost\.com)?/results/\d+/[\w-]+/'
+                     + re.escape(date_str) + r'/\d+[^"#]*)"')
+    urls = []
+    for href in pat.findall(html):
+        url = href if href.startswith('http') else RP_BASE + href
+        if 'winning-times' not in url and url not in urls:
+            urls.append(url)
+    return urls
+
+
+def _race_meta(url, title):
+    m = _COURSE.search(url)
+    meta = {
+        'url': url,
+        'course': m.group(1).replace('-', ' ').title() if m else None,
+        'race_time': None,
+        'race_class': None,
+        'going': None,
+        'winner': None,
+        'runners': [],
+    }
+    if title:
+        m = _TIME.search(title)
+        if m:
+            meta['race_time'] = m.group(1)
+        m = _CLASS.search(title)
+        if m:
+            meta['race_class'] = f'Class {m.group(1)}'
+    return meta
+
+
+def _result_from_json(html, race):
+    for r in _json_runners(html):
+        pos = r.get('position') or r.get('finishPosition') or r.get('raceOutcomeCode')
+        name = _name_of(r, 'horseName', 'horse_name', 'horse', 'name')
+        if pos is None or not name:
+            continue
+        race['runners'].append({
+            'position':   str(pos).strip(),
+            'horse_name': name,
+            'odds':       parse_odds(r.get('startingPrice') or r.get('sp') or r.get('odds') or ''),
+            'jockey':     _name_of(r, 'jockeyName', 'jockey'),
+            'trainer':    _name_of(r, 'trainerName', 'trainer'),
+        })
+
+
+def _result_from_markup(doc, race):
+    rows = doc.xpath(f"//table[{_cls('rp-horseTable')}]//tr[not({_cls('rp-horseTable__header')})]")
+    for row in rows:
+        pos = (_text(row, ".//span[@data-test-selector='text-position']")
+               or _text(row, f".//*[{_cls('rp-horseTable__pos')}]"))
+        if not pos:
+            continue
+        name = (_text(row, ".//a[@data-test-selector='link-horseName']")
+                or _text(row, f".//*[{_cls('rp-horseTable__horse__name')}]")
+                or _text(row, './/a'))
+        if not name:
+            continue
+        race['runners'].append({
+            'position':   pos,
+            'horse_name': name,
+            'odds':       parse_odds(_text(row, ".//span[@data-test-selector='text-sp']") or ''),
+            'jockey':     _text(row, ".//a[@data-test-selector='link-jockeyName']"),
+            'trainer':    _text(row, ".//a[@data-test-selector='link-trainerName']"),
+        })
+
+
+def parse_result(html, url):
+    """One result page → race_data (course, race_time, race_class, winner, runners) or None."""
+    doc = _doc(html)
+    race = _race_meta(url, _text(doc, '//h1'))
+    _result_from_json(html, race)
+    if not race['runners']:
+        _result_from_markup(doc, race)
+    if not race['runners']:
+        return None
+    race['going'] = _text(doc, "//*[@data-test-selector='text-going']")
+    race['winner'] = next((r['horse_name'] for r in race['runners'] if r['position'] == '1'), None)
+    return race
+
+
+def fetch_results(date_str, max_workers=RP_HOST_CONCURRENCY):
+    """Every result for a date, browserless. [] when the index can't be read."""
+    index = http_client.get_text(f'{RP_BASE}/results/{date_str}', headers=RP_HEADERS, timeout=20)
+    if not index:
+        print(f'  [RPExtract] results index unavailable for {date_str}')
+        return []
+    urls = result_urls(index, date_str)
+    print(f'  [RPExtract] {len(urls)} race URLs for {date_str}')
+    pages = http_client.fetch_many(urls, max_workers=max_workers, headers=RP_HEADERS, timeout=20)
+    results = []
+    for url in urls:
+        html = pages.get(url)
+        if not html:
+            continue
+        try:
+            race = parse_result(html, url)
+        except Exception as e:
+            print(f'  [RPExtract] parse error {url}: {e}')
+            continue
+        if race:
+            results.append(race)
+    print(f'  [RPExtract] parsed {len(results)}/{len(urls)} races')
+    return results
+
+
+# ── Racecards ─────────────────────────────────────────────────────────────────
+
+def parse_racecard(html):
+    """Racecard page → {horse_name_lower: {trainer, jockey, form}}."""
+    horse_data = {}
+    for r in _json_runners(html):
+        name = _name_of(r, 'horseName', 'horse_name', 'horse', 'name')
+        trainer = _name_of(r, 'trainerName', 'trainer') or ''
+        jockey = _name_of(r, 'jockeyName', 'jockey') or ''
+        if name and (trainer or jockey):
+            horse_data[name.lower()] = {'trainer': trainer, 'jockey': jockey,
+                                        'form': str(r.get('form') or r.get('formFigures') or '')}
+    if horse_data:
+        return horse_data
+
+    doc = _doc(html)
+    rows = doc.xpath("//*[contains(@class, 'RC-runnerRow') or contains(@class, 'runner-row')] | //tr[@class='runner']")
+    for row in rows:
+        name = _text(row, ".//*[contains(@class, 'RC-runnerName') or contains(@class, 'horse-name')]")
+        if not name:
+            continue
+        horse_data[name.lower()] = {
+            'trainer': _text(row, ".//*[contains(@class, 'RC-runnerTrainer') or contains(@class, 'trainer')]") or '',
+            'jockey':  _text(row, ".//*[contains(@class, 'RC-runnerJockey') or contains(@class, 'jockey')]") or '',
+            'form':    _text(row, ".//*[contains(@class, 'RC-runnerForm') or contains(@class, 'form-figures')]") or '',
+        }
+    return horse_data
@@ -0,0 +1,288 @@
+"""
+SCORE CALIBRATION — fitted score → win-probability lookup, per race type
+========================================================================
+_win_prob_pct used a hand-written step curve (90-94 → 25%, 100+ → 32% ...),
+the same for a 5-runner chase and a 20-runner flat handicap, and EV gates /
+Kelly stakes were sized from it.  This module fits the curve from the
+settled-picks history instead and ships it as a tiny lookup table:
+
+  fit()              settled picks → isotonic (pool-adjacent-violators) curve
+                     per race type, shrunk towards the static curve where a
+                     score band is thin; saved to S3 + /tmp
+  win_prob(score, race_type)   O(1): table[race_type][int(score)]
+  drift_report()     predicted vs observed strike rate per score band over
+                     the last DRIFT_DAYS — flags bands off by > DRIFT_TOLERANCE
+
+Storage:
+  s3://{PIPELINE_BUCKET}/learning/win_calibration.json
+  {version, fitted_at, n, score_max, tables: {race_type: [pct per score point]},
+   counts: {race_type: n}, drift: {...}}
+
+Race types come from the Betfair market name (race_type()): chase, hurdle,
+nhf, flat.  A type with fewer than MIN_TYPE_N settled picks uses the 'all'
+table; with no table at all win_prob() falls back to STATIC_CURVE.
+
+  python score_calibration.py            # fit + drift report, upload
+  python score_calibration.py --report   # drift report for the current table
+
+Pure Python (runs in the learning / analysis Lambdas without numpy).
+"""
+
+import os
+import json
+import time
+from datetime import datetime, timezone
+
+REGION          = 'eu-west-1'
+BUCKET          = os.environ.get('PIPELINE_BUCKET', 'surebet-pipeline-data')
+S3_KEY          = 'learning/win_calibration.json'
+LOCAL_PATH      = os.path.join('/tmp' if os.environ.get('AWS_LAMBDA_FUNCTION_NAME') else '.',
+                               'win_calibration.json')
+TABLE_VERSION   = 1
+SCORE_MAX       = 150        # table covers integer scores 0..SCORE_MAX (higher clamps)
+BIN_WIDTH       = 5          # scores pooled per bin before the isotonic fit
+PRIOR_STRENGTH  = 20         # pseudo-picks of STATIC_CURVE mixed into every bin
+MIN_TYPE_N      = 150        # settled picks needed before a race type gets its own table
+MAX_PCT         = 60         # no table entry claims more than this
+FIT_DAYS        = 180
+DRIFT_DAYS      = 30
+DRIFT_TOLERANCE = 5.0        # percentage points, predicted vs observed
+DRIFT_MIN_N     = 20         # picks per band before drift is judged
+RACE_TYPES      = ('chase', 'hurdle', 'nhf', 'flat')
+
+# Hand-written curve the tables replace (lower score bound → win %)
+STATIC_CURVE = ((130, 38), (110, 35), (100, 32), (95, 28), (90, 25),
+                (85, 22), (80, 19), (75, 16), (70, 14), (0, 12))
+
+_table = None       # loaded once per process
+
+
+def static_pct(score):
+    for lo, pct in STATIC_CURVE:
+        if score >= lo:
+            return pct
+    return STATIC_CURVE[-1][1]
+
+
+def race_type(market_name):
+    """Betfair market name ('2m4f Hcap Hrd', '3m Nov Chs', '2m NHF', '7f Hcap') → race type."""
+    m = str(market_name or '').lower()
+    if 'chs' in m or 'chase' in m:
+        return 'chase'
+    if 'hrd' in m or 'hurdle' in m:
+        return 'hurdle'
+    if 'nhf' in m or 'bumper' in m or 'n.h. flat' in m or 'national hunt flat' in m:
+        return 'nhf'
+    return 'flat'
+
+
+# ── Fit ───────────────────────────────────────────────────────────────────────
+
+def _pav(values, weights):
+    """Weighted pool-adjacent-violators: the non-decreasing sequence closest to values."""
+    blocks = []     # [mean, weight, size]
+    for v, w in zip(values, weights):
+        blocks.append([v, w, 1])
+        while len(blocks) > 1 and blocks[-2][0] > blocks[-1][0]:
+            v2, w2, n2 = blocks.pop()
+            v1, w1, n1 = blocks.pop()
+            blocks.append([(v1 * w1 + v2 * w2) / (w1 + w2), w1 + w2, n1 + n2])
+    out = []
+    for v, _, n in blocks:
+        out.extend([v] * n)
+    return out
+
+
+def _fit_table(scores, wins):
+    """Per-point win % (0..SCORE_MAX) from (score, won) pairs."""
+    n_bins = SCORE_MAX // BIN_WIDTH + 1
+    n = [0] * n_bins
+    k = [0] * n_bins
+    for s, w in zip(scores, wins):
+        b = min(max(int(s), 0), SCORE_MAX) // BIN_WIDTH
+        n[b] += 1
+        k[b] += 1 if w else 0
+    # Shrink each bin towards the static curve at its midpoint, then force monotonic
+    prior = [static_pct(b * BIN_WIDTH + BIN_WIDTH / 2) / 100.0 for b in range(n_bins)]
+    rate = [(k[b] + PRIOR_STRENGTH * prior[b]) / (n[b] + PRIOR_STRENGTH) for b in range(n_bins)]
+    fitted = _pav(rate, [n[b] + PRIOR_STRENGTH for b in range(n_bins)])
+    # Linear interpolation between bin midpoints → one entry per score point
+    table = []
+    for s in range(SCORE_MAX + 1):
+        x = (s - BIN_WIDTH / 2) / BIN_WIDTH
+        lo = min(max(int(x), 0), n_bins - 1)
+        hi = min(lo + 1, n_bins - 1)
+        t = min(max(x - lo, 0.0), 1.0)
+        p = fitted[lo] + (fitted[hi] - fitted[lo]) * t
+        table.append(round(min(100 * p, MAX_PCT), 1))
+    return table
+
+
+def _history(days):
+    import settled_picks
+    rows = settled_picks.rows(since=settled_picks.since_days(days),
+                              fields=('bet_date', 'comprehensive_score', 'outcome', 'market_name', 'sport'))
+    return [r for r in rows if (r.get('sport') or 'horses') == 'horses'
+            and r.get('comprehensive_score') is not None]
+
+
+def fit(days=FIT_DAYS, upload=True):
+    """Fit the 'all' table and one per race type with enough history; save and return it."""
+    global _table
+    t0 = time.perf_counter()
+    rows = _history(days)
+    scores = [float(r['comprehensive_score']) for r in rows]
+    wins = [r['outcome'] == 'win' for r in rows]
+    types = [race_type(r.get('market_name')) for r in rows]
+
+    tables = {'all': _fit_table(scores, wins)}
+    counts = {'all': len(rows)}
+    for rt in RACE_TYPES:
+        idx = [i for i, t in enumerate(types) if t == rt]
+        counts[rt] = len(idx)
+        if len(idx) >= MIN_TYPE_N:
+            tables[rt] = _fit_table([scores[i] for i in idx], [wins[i] for i in idx])
+
+    previous = _table or load()
+    drift = drift_report(previous) if previous else None
+    _table = {
+        'version':   TABLE_VERSION,
+        'fitted_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'days':      days,
+        'n':         len(rows),
+        'score_max': SCORE_MAX,
+        'tables':    tables,
+        'counts':    counts,
+        'drift':     drift,
+    }
+    save(_table, upload)
+    print(f"[Calibration] fitted {len(rows)} picks over {days}d — tables: "
+          f"{', '.join(f'{k}={counts[k]}' for k in tables)} "
+          f"({(time.perf_counter() - t0) * 1000:.0f} ms)")
+    return _table
+
+
+# ── Storage ───────────────────────────────────────────────────────────────────
+
+def save(table, upload=True):
+    body = json.dumps(table, separators=(',', ':'))
+    try:
+        with open(LOCAL_PATH, 'w') as f:
+            f.write(body)
+    except Exception as e:
+        print(f"  [Calibration] local write skipped: {e}")
+    if upload:
+        try:
+            import boto3
+            boto3.client('s3', region_name=REGION).put_object(
+                Bucket=BUCKET, Key=S3_KEY, Body=body.encode('utf-8'), ContentType='application/json')
+        except Exception as e:
+            print(f"  [Calibration] S3 write skipped: {e}")
+
+
+def load():
+    """The fitted table — memory, then S3, then the local copy. None when never fitted."""
+    global _table
+    if _table is not None:
+        return _table
+    for read in (_read_s3, _read_local):
+        t = read()
+        if isinstance(t, dict) and t.get('version') == TABLE_VERSION and t.get('tables', {}).get('all'):
+            _table = t
+            print(f"[Calibration] loaded table fitted {t.get('fitted_at')} on {t.get('n')} picks")
+            return _table
+    _table = {}     # remember the miss; win_prob() uses STATIC_CURVE
+    return None
+
+
+def use(table):
+    """Pin a table loaded elsewhere (an analysis shard is handed the run's); {} = never fitted."""
+    global _table
+    _table = table or {}
+    return _table or None
+
+
+def _read_s3():
+    try:
+        import boto3
+        body = boto3.client('s3', region_name=REGION).get_object(Bucket=BUCKET, Key=S3_KEY)['Body'].read()
+        return json.loads(body)
+    except Exception:
+        return None
+
+
+def _read_local():
+    try:
+        with open(LOCAL_PATH) as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+# ── Apply ─────────────────────────────────────────────────────────────────────
+
+def win_prob(score, market_name=None, table=None):
+    """Calibrated win probability in % for a score (market_name picks the race-type table)."""
+    t = table if table is not None else load()
+    if not t:
+        return float(static_pct(score))
+    tables = t['tables']
+    curve = tables.get(race_type(market_name)) if market_name is not None else None
+    curve = curve or tables['all']
+    return curve[min(max(int(score), 0), len(curve) - 1)]
+
+
+# ── Drift ─────────────────────────────────────────────────────────────────────
+
+def drift_report(table=None, days=DRIFT_DAYS, width=10):
+    """Predicted (table and static curve) vs observed strike rate per score band."""
+    table = table if table is not None else load()
+    rows = _history(days)
+    bands = {}
+    for r in rows:
+        s = float(r['comprehensive_score'])
+        b = bands.setdefault(int(s // width * width), {'n': 0, 'wins': 0, 'pred': 0.0, 'static': 0.0})
+        b['n'] += 1
+        b['wins'] += 1 if r['outcome'] == 'win' else 0
+        b['pred'] += win_prob(s, r.get('market_name'), table)
+        b['static'] += static_pct(s)
+
+    out, err, err_static, n_judged = [], 0.0, 0.0, 0
+    for lo in sorted(bands):
+        b = bands[lo]
+        observed = 100.0 * b['wins'] / b['n']
+        predicted = b['pred'] / b['n']
+        static = b['static'] / b['n']
+        drifted = b['n'] >= DRIFT_MIN_N and abs(predicted - observed) > DRIFT_TOLERANCE
+        out.append({'band': f'{lo}-{lo + width - 1}', 'n': b['n'], 'observed_pct': round(observed, 1),
+                    'predicted_pct': round(predicted, 1), 'static_pct': round(static, 1),
+                    'drifted': drifted})
+        if b['n'] >= DRIFT_MIN_N:
+            err += abs(predicted - observed) * b['n']
+            err_static += abs(static - observed) * b['n']
+            n_judged += b['n']
+
+    report = {
+        'days':             days,
+        'n':                len(rows),
+        'bands':            out,
+        'mean_abs_error':   round(err / n_judged, 2) if n_judged else None,
+        'static_abs_error': round(err_static / n_judged, 2) if n_judged else None,
+        'drifted_bands':    [b['band'] for b in out if b['drifted']],
+    }
+    print(f"[Calibration] drift over {days}d ({len(rows)} picks): "
+          f"table error {report['mean_abs_error']} pts, static curve {report['static_abs_error']} pts, "
+          f"drifted bands {report['drifted_bands'] or 'none'}")
+    return report
+
+
+if __name__ == '__main__':
+    import sys
+    if '--report' in sys.argv:
+        rep = drift_report()
+    else:
+        rep = fit()['drift'] or drift_report()
+    for b in rep['bands']:
+        flag = '  DRIFT' if b['drifted'] else ''
+        print(f"  {b['band']:>8}  n={b['n']:<5} observed {b['observed_pct']:5.1f}%  "
+              f"table {b['predicted_pct']:5.1f}%  static {b['static_pct']:5.1f}%{flag}")
@@ -11,7 +11,9 @@ Usage:
   python scrape_skysports_form.py --discover  # only find horse IDs, print dict
   python scrape_skysports_form.py --profiles  # assume IDs known, fetch profiles
 """
-import re, json, os, sys, time, boto3, requests
+import re, json, os, sys, time, boto3
+
+import http_client
 from datetime import date, datetime
 from bs4 import BeautifulSoup
 
@@ -89,7 +91,7 @@ def extract_horse_ids_from_result_page(result_id: int) -> dict:
     """Fetch a Sky Sports race result page, return {display_name_lower: (id, slug)}"""
     url = f"https://www.skysports.com/racing/results/full-result/{result_id}"
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=12, allow_redirects=True)
+        resp = http_client.get(url, headers=HEADERS, timeout=12, allow_redirects=True)
         if resp.status_code != 200:
             return {}
         # Verify this is a race result page with horse links
@@ -223,7 +225,7 @@ def fetch_form_profile(horse_name: str, horse_id: int, slug: str) -> dict | None
     """Fetch Sky Sports form profile page and parse key data."""
     url = f"https://www.skysports.com/racing/form-profiles/horse/{horse_id}/{slug}"
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=15)
+        resp = http_client.get(url, headers=HEADERS, timeout=15)
         if resp.status_code != 200:
             print(f"    HTTP {resp.status_code} for {horse_name}")
             return None
@@ -433,6 +435,7 @@ def main():
         print(f"  Missed:  {len(missed)} horses")
         for h in missed:
             print(f"    - {h}")
+    http_client.print_metrics()
     print(f"\nDone.")
 
 
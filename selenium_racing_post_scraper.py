@@ -1,38 +1,44 @@
 """
-Selenium-Based Racing Post Results Scraper
+Racing Post Results Scraper
 
-Fully automated results fetching using Selenium to handle JavaScript-rendered content.
-Zero manual work required.
+Fully automated results fetching. Default path is browserless: rp_extractor
+reads each results page's embedded JSON / static HTML over the pooled HTTP
+client (no Chrome, no fixed sleeps). The Selenium scraper below is kept as an
+explicit fallback for pages that only render client-side.
 
 Usage:
     python selenium_racing_post_scraper.py                # Fetch today's results
     python selenium_racing_post_scraper.py 2026-02-03     # Fetch specific date
-    python selenium_racing_post_scraper.py --update-db    # Update database with results
+    python selenium_racing_post_scraper.py --no-update    # Don't touch the database
+    python selenium_racing_post_scraper.py --selenium     # Force headless Chrome
+    python selenium_racing_post_scraper.py --selenium-fallback   # Chrome only if nothing parsed
 
 Requirements:
-    pip install selenium webdriver-manager
+    pip install lxml                          # browserless path
+    pip install selenium webdriver-manager    # --selenium fallback only
 """
 
 import boto3
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from datetime import datetime, timedelta
 from decimal import Decimal
 import time
 import re
 import json
 
+import rp_extractor
+
 dynamodb = boto3.resource('dynamodb', region_name='eu-west-1')
 table = dynamodb.Table('SureBetBets')
 
 class SeleniumRacingPostScraper:
     def __init__(self, headless=True):
         """Initialize Selenium WebDriver"""
+        from selenium import webdriver
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+        from webdriver_manager.chrome import ChromeDriverManager
+
         chrome_options = Options()
         
         if headless:
@@ -81,6 +87,7 @@ class SeleniumRacingPostScraper:
     
     def get_race_urls_for_date(self, date_str):
         """Get all race result URLs for a specific date"""
+        from selenium.webdriver.common.by import By
         url = f'https://www.racingpost.com/results/{date_str}'
         
         print(f"\nFetching race list for {date_str}...")
@@ -114,6 +121,8 @@ class SeleniumRacingPostScraper:
     
     def scrape_race_result(self, race_url):
         """Scrape a single race result page"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
         print(f"\n{'='*80}")
         print(f"Scraping: {race_url}")
         
@@ -321,104 +330,126 @@ class SeleniumRacingPostScraper:
     
     def match_and_update_database(self, results, date_str):
         """Match results with database and update"""
-        # Get our picks
-        response = table.query(
-            KeyConditionExpression='bet_date = :date',
-            FilterExpression='show_in_ui = :ui',
-            ExpressionAttributeValues={
-                ':date': date_str,
-                ':ui': True
-            }
-        )
-        
-        our_picks = response['Items']
-        
-        print(f"\n{'='*80}")
-        print(f"MATCHING RESULTS WITH DATABASE")
-        print(f"{'='*80}")
-        print(f"Our picks: {len(our_picks)}")
-        print(f"Scraped results: {len(results)}\n")
+        return match_and_update_database(results, date_str)
+
+
+def match_and_update_database(results, date_str):
+    """Match results with database and update"""
+    # Get our picks
+    response = table.query(
+        KeyConditionExpression='bet_date = :date',
+        FilterExpression='show_in_ui = :ui',
+        ExpressionAttributeValues={
+            ':date': date_str,
+            ':ui': True
+        }
+    )
+    
+    our_picks = response['Items']
+    
+    print(f"\n{'='*80}")
+    print(f"MATCHING RESULTS WITH DATABASE")
+    print(f"{'='*80}")
+    print(f"Our picks: {len(our_picks)}")
+    print(f"Scraped results: {len(results)}\n")
+    
+    matched = 0
+    updated = 0
+    
+    for pick in our_picks:
+        pick_course = pick.get('course', '').lower().strip()
+        pick_time = pick.get('race_time', '')
+        pick_horse = pick.get('horse_name', '').lower().strip()
         
-        matched = 0
-        updated = 0
+        # Extract time from ISO format (2026-02-03T15:35:00.000Z -> 15:35)
+        if 'T' in pick_time:
+            pick_time = pick_time.split('T')[1][:5]
         
-        for pick in our_picks:
-            pick_course = pick.get('course', '').lower().strip()
-            pick_time = pick.get('race_time', '')
-            pick_horse = pick.get('horse_name', '').lower().strip()
+        # Find matching race
+        for result in results:
+            result_course = result.get('course', '').lower().strip()
+            result_time = result.get('race_time', '')
             
-            # Extract time from ISO format (2026-02-03T15:35:00.000Z -> 15:35)
-            if 'T' in pick_time:
-                pick_time = pick_time.split('T')[1][:5]
+            # Check if course and time match
+            course_match = (pick_course in result_course or result_course in pick_course)
+            time_match = (result_time == pick_time)
             
-            # Find matching race
-            for result in results:
-                result_course = result.get('course', '').lower().strip()
-                result_time = result.get('race_time', '')
+            if course_match and time_match:
+                matched += 1
                 
-                # Check if course and time match
-                course_match = (pick_course in result_course or result_course in pick_course)
-                time_match = (result_time == pick_time)
+                # Find our horse in the results
+                winner = result.get('winner', '').lower()
                 
-                if course_match and time_match:
-                    matched += 1
-                    
-                    # Find our horse in the results
-                    winner = result.get('winner', '').lower()
-                    
-                    outcome = 'loss'
-                    profit = -30.0
-                    winning_odds = None
+                outcome = 'loss'
+                profit = -30.0
+                winning_odds = None
+                
+                # Check if our horse won
+                for runner in result.get('runners', []):
+                    runner_name = runner['horse_name'].lower()
                     
-                    # Check if our horse won
-                    for runner in result.get('runners', []):
-                        runner_name = runner['horse_name'].lower()
+                    # Flexible matching (handles (IRE), spacing differences, etc.)
+                    if (pick_horse in runner_name or runner_name in pick_horse or
+                        pick_horse.replace(' ', '') == runner_name.replace(' ', '')):
                         
-                        # Flexible matching (handles (IRE), spacing differences, etc.)
-                        if (pick_horse in runner_name or runner_name in pick_horse or
-                            pick_horse.replace(' ', '') == runner_name.replace(' ', '')):
-                            
-                            if runner['position'] == '1':
-                                outcome = 'win'
-                                winning_odds = runner.get('odds')
-                                if winning_odds:
-                                    profit = (winning_odds * 30) - 30
-                                break
+                        if runner['position'] == '1':
+                            outcome = 'win'
+                            winning_odds = runner.get('odds')
+                            if winning_odds:
+                                profit = (winning_odds * 30) - 30
+                            break
+                
+                # Update database
+                try:
+                    table.update_item(
+                        Key={
+                            'bet_date': date_str,
+                            'bet_id': pick['bet_id']
+                        },
+                        UpdateExpression='SET outcome = :outcome, profit_loss = :profit, '
+                                       'actual_winner = :winner, result_updated = :updated',
+                        ExpressionAttributeValues={
+                            ':outcome': outcome,
+                            ':profit': Decimal(str(profit)),
+                            ':winner': result.get('winner'),
+                            ':updated': 'yes'
+                        }
+                    )
                     
-                    # Update database
-                    try:
-                        table.update_item(
-                            Key={
-                                'bet_date': date_str,
-                                'bet_id': pick['bet_id']
-                            },
-                            UpdateExpression='SET outcome = :outcome, profit_loss = :profit, '
-                                           'actual_winner = :winner, result_updated = :updated',
-                            ExpressionAttributeValues={
-                                ':outcome': outcome,
-                                ':profit': Decimal(str(profit)),
-                                ':winner': result.get('winner'),
-                                ':updated': 'yes'
-                            }
-                        )
-                        
-                        updated += 1
-                        
-                        status = "WIN" if outcome == 'win' else "LOSS"
-                        print(f"✓ {pick_time} {pick_course:15} {pick_horse:20} {status} {profit:+.0f} EUR")
-                        
-                    except Exception as e:
-                        print(f"✗ Error updating {pick_horse}: {e}")
+                    updated += 1
                     
-                    break  # Found match, move to next pick
-        
-        print(f"\n{'='*80}")
-        print(f"DATABASE UPDATE COMPLETE")
-        print(f"{'='*80}")
-        print(f"Matched: {matched}/{len(our_picks)} picks")
-        print(f"Updated: {updated} entries")
-        
-        return updated
+                    status = "WIN" if outcome == 'win' else "LOSS"
+                    print(f"✓ {pick_time} {pick_course:15} {pick_horse:20} {status} {profit:+.0f} EUR")
+                    
+                except Exception as e:
+                    print(f"✗ Error updating {pick_horse}: {e}")
+                
+                break  # Found match, move to next pick
+    
+    print(f"\n{'='*80}")
+    print(f"DATABASE UPDATE COMPLETE")
+    print(f"{'='*80}")
+    print(f"Matched: {matched}/{len(our_picks)} picks")
+    print(f"Updated: {updated} entries")
+    
+    return updated
+
+
+def fetch_all_results(date_str=None, use_selenium=False):
+    """Browserless by default; headless Chrome only when asked (or nothing parsed
+    and use_selenium is set)."""
+    if not date_str:
+        date_str = datetime.now().strftime('%Y-%m-%d')
+    results = [] if use_selenium == 'only' else rp_extractor.fetch_results(date_str)
+    if results or not use_selenium:
+        return results
+    print("Browserless path found no results — falling back to Selenium")
+    scraper = SeleniumRacingPostScraper(headless=True)
+    try:
+        return scraper.fetch_all_results(date_str)
+    finally:
+        del scraper
+
 
 def main():
     import sys
@@ -426,55 +457,53 @@ def main():
     # Parse command line args
     date_str = datetime.now().strftime('%Y-%m-%d')
     update_db = True
+    use_selenium = False
     
-    if len(sys.argv) > 1:
-        arg = sys.argv[1]
+    for arg in sys.argv[1:]:
         if arg == '--help' or arg == '-h':
             print(__doc__)
             return
         elif arg == '--no-update':
             update_db = False
+        elif arg == '--selenium':
+            use_selenium = 'only'
+        elif arg == '--selenium-fallback':
+            use_selenium = True
         else:
             date_str = arg
     
     print(f"\n{'='*80}")
-    print(f"SELENIUM RACING POST SCRAPER")
+    print(f"RACING POST RESULTS SCRAPER")
     print(f"{'='*80}")
     print(f"Date: {date_str}")
     print(f"Update database: {update_db}")
+    print(f"Mode: {'selenium' if use_selenium == 'only' else 'browserless' + (' + selenium fallback' if use_selenium else '')}")
     print(f"{'='*80}\n")
     
-    # Create scraper
-    scraper = SeleniumRacingPostScraper(headless=True)
+    t0 = time.time()
+    results = fetch_all_results(date_str, use_selenium)
+    print(f"\nFetched {len(results)} races in {time.time() - t0:.1f}s")
     
-    try:
-        # Fetch results
-        results = scraper.fetch_all_results(date_str)
-        
-        # Save results to JSON
-        output_file = f"race_results_{date_str}.json"
-        with open(output_file, 'w') as f:
-            json.dump(results, f, indent=2)
-        
-        print(f"\nResults saved to: {output_file}")
-        
-        # Update database
-        if update_db and results:
-            updated = scraper.match_and_update_database(results, date_str)
-            
-            if updated > 0:
-                print(f"\n✓ Successfully updated {updated} results in database")
-                print("\nRun learning: python complete_race_learning.py learn")
-            else:
-                print("\n⚠ No database entries updated")
-                print("Possible reasons:")
-                print("  - Course/time names don't match exactly")
-                print("  - No picks made for these races")
-                print("  - Results already recorded")
+    # Save results to JSON
+    output_file = f"race_results_{date_str}.json"
+    with open(output_file, 'w') as f:
+        json.dump(results, f, indent=2)
+    
+    print(f"\nResults saved to: {output_file}")
+    
+    # Update database
+    if update_db and results:
+        updated = match_and_update_database(results, date_str)
         
-    finally:
-        # Cleanup
-        del scraper
+        if updated > 0:
+            print(f"\n✓ Successfully updated {updated} results in database")
+            print("\nRun learning: python complete_race_learning.py learn")
+        else:
+            print("\n⚠ No database entries updated")
+            print("Possible reasons:")
+            print("  - Course/time names don't match exactly")
+            print("  - No picks made for these races")
+            print("  - Results already recorded")
     
     print(f"\n{'='*80}")
     print("DONE")
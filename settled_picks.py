@@ -0,0 +1,303 @@
+"""
+SETTLED PICKS — one incremental settled-results dataset for every learning job
+==============================================================================
+The learning jobs each used to pull history their own way: auto_fix_thresholds
+scanned the whole table and filtered in Python, daily_learning_cycle ran an
+unpaginated full scan on `timestamp`, sf_learning queried 7 days per night,
+intraday_learning_system re-queried today.  This module keeps one columnar
+copy of every settled pick (UI and learning rows) and only ever queries the
+days that can still change.
+
+Storage (same high-water-mark idea as api_results' ROI export):
+  settled_picks.json.gz                     cwd (/tmp in Lambda)
+  s3://{PIPELINE_BUCKET}/learning/settled_picks.json.gz
+  {version, start, through, refreshed_at, columns: {name: [values...]}}
+
+`through` is the last bet_date treated as final.  A refresh drops the rows
+after `through`, re-queries those days (one Query per bet_date, settled rows
+only, slim projection) and advances `through` over days older than
+SETTLE_GRACE_DAYS.  The first build backfills from SETTLED_START in parallel.
+
+  import settled_picks
+  settled_picks.rows(since='2026-04-01', ui_only=True)   # [{bet_id, horse, outcome, ...}]
+  settled_picks.learning_results(days_back=7)            # learning_engine input shape
+  settled_picks.day_rows('2026-04-08')                   # one open day, not persisted
+  settled_picks.refresh()                                # nightly (sf_learning)
+
+Outcomes are normalised to 'win' / 'placed' / 'loss'.
+"""
+
+import os
+import json
+import gzip
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import pick_record
+
+REGION            = 'eu-west-1'
+TABLE             = 'SureBetBets'
+BUCKET            = os.environ.get('PIPELINE_BUCKET', 'surebet-pipeline-data')
+S3_KEY            = 'learning/settled_picks.json.gz'
+LOCAL_PATH        = os.path.join('/tmp' if os.environ.get('AWS_LAMBDA_FUNCTION_NAME') else '.',
+                                 'settled_picks.json.gz')
+DATASET_VERSION   = 3
+SETTLED_START     = os.environ.get('SETTLED_PICKS_START', '2026-02-01')
+SETTLE_GRACE_DAYS = 3        # results / corrections land within this many days
+REFRESH_AFTER_S   = 3600     # load() re-queries the open days when older than this
+
+COLUMNS = (
+    'bet_id', 'bet_date', 'race_time', 'course', 'horse', 'trainer', 'jockey', 'sport',
+    'market_id', 'selection_id', 'odds', 'sp_odds', 'comprehensive_score', 'show_in_ui',
+    'is_learning_pick', 'pick_rank', 'bet_type', 'ew_fraction', 'stake', 'outcome',
+    'finish_position', 'profit', 'profit_loss', 'confidence_grade', 'analysis_type',
+    'win_probability', 'going', 'market_name', 'score_breakdown', 'feedback_processed',
+)
+_QUERY_FIELDS = COLUMNS + ('result_emoji',)
+
+_OUTCOMES = {
+    'win': 'win', 'won': 'win', 'winner': 'win',
+    'placed': 'placed', 'place': 'placed',
+    'loss': 'loss', 'lost': 'loss', 'lose': 'loss',
+}
+
+_dataset = None     # in-process copy shared by every job in the same run
+
+
+def normalise_outcome(item):
+    """'win' / 'placed' / 'loss' from outcome or result_emoji, else None (pending, void, NR)."""
+    for raw in (item.get('outcome'), item.get('result_emoji')):
+        oc = _OUTCOMES.get(str(raw or '').strip().lower())
+        if oc:
+            return oc
+    return None
+
+
+# ── Storage ───────────────────────────────────────────────────────────────────
+
+def _empty():
+    return {'version': DATASET_VERSION, 'start': SETTLED_START, 'through': None,
+            'refreshed_at': 0, 'columns': {c: [] for c in COLUMNS}}
+
+
+def _valid(ds):
+    return (isinstance(ds, dict) and ds.get('version') == DATASET_VERSION
+            and ds.get('start') == SETTLED_START and set(ds.get('columns', {})) == set(COLUMNS))
+
+
+def _read_local():
+    try:
+        with gzip.open(LOCAL_PATH, 'rb') as f:
+            return json.loads(f.read())
+    except Exception:
+        return None
+
+
+def _read_s3():
+    try:
+        import boto3
+        body = boto3.client('s3', region_name=REGION).get_object(Bucket=BUCKET, Key=S3_KEY)['Body'].read()
+        return json.loads(gzip.decompress(body))
+    except Exception:
+        return None
+
+
+def save(ds=None, upload=True):
+    """Write the dataset locally and (upload=True) to S3. Non-fatal."""
+    ds = ds or _dataset
+    if ds is None:
+        return
+    blob = gzip.compress(json.dumps(ds, separators=(',', ':')).encode('utf-8'), 6)
+    try:
+        with open(LOCAL_PATH, 'wb') as f:
+            f.write(blob)
+    except Exception as e:
+        print(f"  [SettledPicks] local write skipped: {e}")
+    if upload:
+        try:
+            import boto3
+            boto3.client('s3', region_name=REGION).put_object(
+                Bucket=BUCKET, Key=S3_KEY, Body=blob,
+                ContentType='application/json', ContentEncoding='gzip')
+        except Exception as e:
+            print(f"  [SettledPicks] S3 write skipped: {e}")
+
+
+# ── Incremental refresh ───────────────────────────────────────────────────────
+
+def _query_settled_day(client, date_str):
+    expr, names = pick_record.projection(_QUERY_FIELDS)
+    pages = client.get_paginator('query').paginate(
+        TableName=TABLE,
+        KeyConditionExpression='bet_date = :d',
+        FilterExpression='attribute_exists(outcome) OR attribute_exists(result_emoji)',
+        ExpressionAttributeValues={':d': {'S': date_str}},
+        ProjectionExpression=expr,
+        ExpressionAttributeNames=names,
+    )
+    out = []
+    for page in pages:
+        for low in page.get('Items', []):
+            item = pick_record.plain_item(low)
+            oc = normalise_outcome(item)
+            if oc:
+                item['outcome'] = oc
+                out.append(item)
+    return out
+
+
+def _drop_after(ds, through):
+    cols = ds['columns']
+    keep = [i for i, d in enumerate(cols['bet_date']) if through is not None and d <= through]
+    if len(keep) != len(cols['bet_date']):
+        ds['columns'] = {c: [vals[i] for i in keep] for c, vals in cols.items()}
+
+
+def refresh(ds=None, max_workers=8):
+    """Re-query every day after `through`, append, advance the high-water mark. Returns the dataset."""
+    global _dataset
+    from concurrent.futures import ThreadPoolExecutor
+    import boto3
+
+    ds = ds or _dataset or _empty()
+    t0 = time.perf_counter()
+    today = datetime.now(timezone.utc).date()
+    through = ds['through']
+    first = (date.fromisoformat(through) + timedelta(days=1)) if through else date.fromisoformat(SETTLED_START)
+    days = [(first + timedelta(days=i)).isoformat() for i in range(max(0, (today - first).days + 1))]
+
+    client = boto3.client('dynamodb', region_name=REGION)
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        fetched = list(ex.map(lambda d: _query_settled_day(client, d), days))
+
+    _drop_after(ds, through)
+    cols = ds['columns']
+    n_new = 0
+    for items in fetched:
+        for item in items:
+            for c in COLUMNS:
+                cols[c].append(item.get(c))
+            n_new += 1
+
+    closed_until = (today - timedelta(days=SETTLE_GRACE_DAYS)).isoformat()
+    closed = [d for d in days if d <= closed_until]
+    if closed:
+        ds['through'] = closed[-1]
+    ds['refreshed_at'] = time.time()
+    _dataset = ds
+    save(ds)
+    print(f"  [SettledPicks] {len(days)} day(s) queried, {n_new} open-day rows, "
+          f"{len(cols['bet_id'])} total, through {ds['through']} "
+          f"({(time.perf_counter() - t0) * 1000:.0f} ms)")
+    return ds
+
+
+def load(max_age_s=REFRESH_AFTER_S):
+    """The dataset — memory, then local file, then S3 (newest `through` wins),
+    refreshed when older than max_age_s (0 = always re-query the open days)."""
+    global _dataset
+    if _dataset is None:
+        candidates = [d for d in (_read_local(), _read_s3()) if _valid(d)]
+        if candidates:
+            _dataset = max(candidates, key=lambda d: (d.get('through') or '', d.get('refreshed_at') or 0))
+    if _dataset is None or time.time() - (_dataset.get('refreshed_at') or 0) > max_age_s:
+        try:
+            refresh(_dataset)
+        except Exception as e:
+            print(f"  [SettledPicks] refresh failed (using cached rows): {e}")
+    if _dataset is None:
+        _dataset = _empty()
+    return _dataset
+
+
+# ── Readers ───────────────────────────────────────────────────────────────────
+
+def rows(since=None, until=None, ui_only=False, sport=None, fields=None, max_age_s=REFRESH_AFTER_S):
+    """Settled rows as dicts, bet_date in [since, until], oldest first."""
+    cols = load(max_age_s)['columns']
+    fields = fields or COLUMNS
+    dates = cols['bet_date']
+    ui = cols['show_in_ui']
+    sp = cols['sport']
+    out = []
+    for i, d in enumerate(dates):
+        if (since and d < since) or (until and d > until):
+            continue
+        if ui_only and ui[i] is not True:
+            continue
+        if sport and (sp[i] or 'horses') != sport:
+            continue
+        out.append({f: cols[f][i] for f in fields})
+    out.sort(key=lambda r: (r.get('bet_date') or '', r.get('race_time') or ''))
+    return out
+
+
+def day_rows(date_str, fields=None):
+    """Settled rows for one (open) day straight from DynamoDB — one Query, nothing
+    persisted. For intraday readers that want today's results as they land
+    without rewriting the shared dataset on every call."""
+    import boto3
+    fields = fields or COLUMNS
+    items = _query_settled_day(boto3.client('dynamodb', region_name=REGION), date_str)
+    out = [{f: it.get(f) for f in fields} for it in items]
+    out.sort(key=lambda r: r.get('race_time') or '')
+    return out
+
+
+def since_days(days_back):
+    return (datetime.now(timezone.utc).date() - timedelta(days=days_back - 1)).isoformat()
+
+
+def learning_results(days_back=7, ui_only=True):
+    """Rows in the {'date','sport','selection','result'} shape learning_engine consumes."""
+    out = []
+    for r in rows(since=since_days(days_back), ui_only=ui_only):
+        odds = float(r.get('odds') or 0)
+        out.append({
+            'date':  r['bet_date'],
+            'sport': r.get('sport') or 'horses',
+            'selection': {
+                'selection_id': r.get('selection_id') or '',
+                'runner_name':  r.get('horse') or '',
+                'venue':        r.get('course') or '',
+                'odds':         odds,
+                'bet_type':     r.get('bet_type') or 'WIN',
+                'confidence':   float(r.get('comprehensive_score') or 0),
+                'tags':         '',
+                'why_now':      '',
+                'stake':        float(r.get('stake') or 10),
+            },
+            'result': {
+                'selection_id':    r.get('selection_id') or '',
+                'is_winner':       r['outcome'] == 'win',
+                'is_placed':       r['outcome'] in ('win', 'placed'),
+                'final_odds':      float(r.get('sp_odds') or odds),
+                'actual_position': r.get('finish_position'),
+                'profit_loss':     float(r.get('profit_loss') or r.get('profit') or 0),
+            },
+        })
+    return out
+
+
+def annotate(bet_ids, **values):
+    """Set columns on rows already in the dataset (e.g. feedback_processed) and persist."""
+    ds = load()
+    ids = set(bet_ids)
+    cols = ds['columns']
+    for i, bid in enumerate(cols['bet_id']):
+        if bid in ids:
+            for c, v in values.items():
+                cols[c][i] = v
+    save(ds)
+
+
+if __name__ == '__main__':
+    import sys
+    if '--rebuild' in sys.argv:
+        _dataset = None
+        refresh(_empty())
+    else:
+        load(max_age_s=0)
+    n = len(_dataset['columns']['bet_id'])
+    ui = sum(1 for v in _dataset['columns']['show_in_ui'] if v is True)
+    print(f"[SettledPicks] {n} settled rows ({ui} UI) through {_dataset['through']}")
@@ -0,0 +1,794 @@
+"""
+SFN LOCAL — run the Step Functions state machines on one machine
+================================================================
+The pipeline only ran inside AWS: step_functions/*.json interpreted by Step
+Functions, the sf_*.py handlers deployed by deploy_step_functions.py.  This
+module interprets the same ASL definitions in-process so a whole morning /
+refresh / evening / learning / major-analysis execution can be benchmarked and
+regression-tested locally.
+
+  Pass     Parameters / Result / ResultPath (JSONPath + States.* intrinsics)
+  Task     lambda:invoke (or a bare Lambda ARN) → the sf_*.py handler named by
+           deploy_step_functions.LAMBDAS, imported and called in this process
+           with that function's env; ResultSelector, ResultPath, OutputPath
+  Retry    ErrorEquals / IntervalSeconds / MaxAttempts / BackoffRate
+           (intervals scaled by --sleep-scale, 0 by default)
+  Catch    ErrorEquals / ResultPath / Next, error output {Error, Cause}
+  Map      ItemsPath / ItemSelector (or Parameters, with $$.Map.Item) over an
+           ItemProcessor (or Iterator); iterations run one after another and
+           the report adds what MaxConcurrency would make of them
+  Choice, Wait, Succeed, Fail
+
+Handler exceptions surface the way lambda:invoke reports them (Error = the
+exception type, Cause = {errorMessage, errorType}); payloads are JSON
+round-tripped and over-size state data raises States.DataLimitExceeded.
+
+AWS calls go to a local stand-in, never the real account:
+  --aws moto       in-process S3 / DynamoDB / Secrets Manager mocks (pip install moto)
+  --aws endpoint   LocalStack / DynamoDB Local at --endpoint-url (AWS_ENDPOINT_URL)
+The pipeline bucket and the SureBetBets table are created on start; seed them
+with --seed-s3 KEY=FILE and --seed-items FILE.  Network-bound functions (Betfair,
+Sporting Life) can be replaced with a canned payload: --stub NAME=FILE.
+
+Every state is timed; the report lists per-state latency, attempts, and Lambda
+runs that overran their deployed timeout.  States inside a Map iteration are
+listed as Map[i].State; est_wall_ms is the run with each Map's iterations
+list-scheduled over its MaxConcurrency slots.  --report writes it as JSON and
+--baseline compares a run against a saved report (exit 1 on regressions).
+
+  python sfn_local.py morning --stub surebet-betfair-fetch=fixtures/fetch.json
+  python sfn_local.py refresh --seed-s3 daily/2026-10-19/response_horses.json=races.json
+  python sfn_local.py evening --report evening.json --baseline evening_base.json
+"""
+
+import argparse
+import contextlib
+import copy
+import importlib
+import io
+import json
+import os
+import re
+import sys
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+REPO_DIR    = Path(__file__).parent
+SF_DIR      = REPO_DIR / 'step_functions'
+LAMBDAS_DIR = SF_DIR / 'lambdas'
+REGION      = 'eu-west-1'
+BUCKET      = os.environ.get('PIPELINE_BUCKET', 'surebet-pipeline-data')
+TABLE       = 'SureBetBets'
+
+MACHINES = {
+    'morning':        'morning_sm.json',
+    'refresh':        'refresh_sm.json',
+    'evening':        'evening_sm.json',
+    'learning':       'learning_sm.json',
+    'major_analysis': 'major_analysis_sm.json',
+}
+
+# Functions the state machines call that deploy_step_functions does not deploy
+EXTRA_FUNCTIONS = {
+    'BettingPicksAPI': {'name': 'BettingPicksAPI', 'handler': 'lambda_api_picks.lambda_handler',
+                        'timeout': 30, 'env': {}},
+}
+
+MAX_TRANSITIONS  = 1000
+DATA_LIMIT_BYTES = 262144          # Step Functions state input/output limit
+REGRESSION_MIN_MS = 50             # ignore states faster than this in baseline comparisons
+_TERMINAL        = ('States.Runtime', 'States.DataLimitExceeded')   # never caught by States.ALL
+
+
+class StatesError(Exception):
+    """An ASL error (States.* or a task error) with Error / Cause as Step Functions reports it."""
+
+    def __init__(self, error, cause=''):
+        super().__init__(f'{error}: {cause}')
+        self.error = error
+        self.cause = cause
+
+
+# ── JSONPath / intrinsics ─────────────────────────────────────────────────────
+
+_PATH_TOKEN = re.compile(r"\.([A-Za-z_][\w-]*)|\[(\d+)\]|\['([^']*)'\]")
+
+
+def _path_tokens(path):
+    rest = path[1:]
+    tokens, pos = [], 0
+    while pos < len(rest):
+        m = _PATH_TOKEN.match(rest, pos)
+        if not m:
+            raise StatesError('States.Runtime', f'Unsupported JSONPath {path!r}')
+        tokens.append(int(m.group(2)) if m.group(2) is not None else (m.group(1) or m.group(3)))
+        pos = m.end()
+    return tokens
+
+
+def get_path(data, path, context=None):
+    """Value at a reference path ($.a.b[0]; $$. reads the context object)."""
+    if path.startswith('$$'):
+        data, path = context or {}, path[1:]
+    cur = data
+    for tok in _path_tokens(path):
+        try:
+            cur = cur[tok]
+        except (KeyError, IndexError, TypeError):
+            raise StatesError('States.Runtime', f'Path {path!r} not found in input')
+    return cur
+
+
+def set_path(data, path, value):
+    """ResultPath semantics: '$' replaces, null keeps the input, else a deep-set copy."""
+    if path is None:
+        return data
+    if path == '$':
+        return value
+    tokens = _path_tokens(path)
+    out = copy.deepcopy(data) if isinstance(data, dict) else {}
+    cur = out
+    for tok in tokens[:-1]:
+        if not isinstance(cur.get(tok), dict):
+            cur[tok] = {}
+        cur = cur[tok]
+    cur[tokens[-1]] = value
+    return out
+
+
+def _split_args(text):
+    args, depth, quote, start, i = [], 0, False, 0, 0
+    while i < len(text):
+        ch = text[i]
+        if quote:
+            if ch == '\\':
+                i += 1
+            elif ch == "'":
+                quote = False
+        elif ch == "'":
+            quote = True
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            args.append(text[start:i].strip())
+            start = i + 1
+        i += 1
+    if text[start:].strip():
+        args.append(text[start:].strip())
+    return args
+
+
+def _format(template, *values):
+    parts = template.split('{}')
+    if len(parts) - 1 != len(values):
+        raise StatesError('States.IntrinsicFailure', 'States.Format argument count mismatch')
+    out = parts[0]
+    for v, part in zip(values, parts[1:]):
+        out += (json.dumps(v) if isinstance(v, (dict, list)) else str(v)) + part
+    return out
+
+
+_INTRINSICS = {
+    'States.Format':       _format,
+    'States.StringToJson': lambda s: json.loads(s),
+    'States.JsonToString': lambda v: json.dumps(v, separators=(',', ':')),
+    'States.Array':        lambda *a: list(a),
+    'States.ArrayGetItem': lambda arr, i: arr[int(i)],
+    'States.ArrayLength':  lambda arr: len(arr),
+    'States.ArrayContains': lambda arr, v: v in arr,
+    'States.ArrayUnique':  lambda arr: [v for n, v in enumerate(arr) if v not in arr[:n]],
+    'States.ArrayRange':   lambda a, b, step: list(range(int(a), int(b) + 1, int(step))),
+    'States.ArrayPartition': lambda arr, n: [arr[i:i + int(n)] for i in range(0, len(arr), int(n))],
+    'States.StringSplit':  lambda s, sep: [p for p in re.split('[' + re.escape(sep) + ']', s) if p],
+    'States.MathAdd':      lambda a, b: a + b,
+    'States.UUID':         lambda: str(uuid.uuid4()),
+}
+
+
+def intrinsic(expr, data, context):
+    """Evaluate a States.* call (nested calls, 'strings', numbers, paths, null/true/false)."""
+    expr = expr.strip()
+    m = re.match(r'^(States\.\w+)\((.*)\)$', expr, re.S)
+    if not m:
+        raise StatesError('States.Runtime', f'Not an intrinsic function: {expr!r}')
+    fn = _INTRINSICS.get(m.group(1))
+    if fn is None:
+        raise StatesError('States.Runtime', f'Unsupported intrinsic {m.group(1)}')
+    args = []
+    for a in _split_args(m.group(2)):
+        if a.startswith("'"):
+            args.append(a[1:-1].replace("\\'", "'").replace('\\{', '{').replace('\\}', '}'))
+        elif a.startswith('$'):
+            args.append(get_path(data, a, context))
+        elif a.startswith('States.'):
+            args.append(intrinsic(a, data, context))
+        else:
+            args.append(json.loads(a))
+    try:
+        return fn(*args)
+    except StatesError:
+        raise
+    except Exception as e:
+        raise StatesError('States.IntrinsicFailure', f'{m.group(1)}: {e}')
+
+
+def _resolve(value, data, context):
+    if value.startswith('States.'):
+        return intrinsic(value, data, context)
+    return get_path(data, value, context)
+
+
+def render(template, data, context):
+    """Parameters / ResultSelector: keys ending '.$' are paths or intrinsics, the rest literal."""
+    if isinstance(template, dict):
+        out = {}
+        for k, v in template.items():
+            if k.endswith('.$') and isinstance(v, str):
+                out[k[:-2]] = _resolve(v, data, context)
+            else:
+                out[k] = render(v, data, context)
+        return out
+    if isinstance(template, list):
+        return [render(v, data, context) for v in template]
+    return template
+
+
+# ── Choice rules ──────────────────────────────────────────────────────────────
+
+_COMPARATORS = {
+    'Equals':             lambda a, b: a == b,
+    'LessThan':           lambda a, b: a < b,
+    'GreaterThan':        lambda a, b: a > b,
+    'LessThanEquals':     lambda a, b: a <= b,
+    'GreaterThanEquals':  lambda a, b: a >= b,
+}
+_KINDS = {'String': str, 'Numeric': (int, float), 'Boolean': bool, 'Timestamp': str}
+
+
+def _rule_matches(rule, data, context):
+    if 'And' in rule:
+        return all(_rule_matches(r, data, context) for r in rule['And'])
+    if 'Or' in rule:
+        return any(_rule_matches(r, data, context) for r in rule['Or'])
+    if 'Not' in rule:
+        return not _rule_matches(rule['Not'], data, context)
+    var = rule['Variable']
+    try:
+        value, present = get_path(data, var, context), True
+    except StatesError:
+        value, present = None, False
+    for op, expected in rule.items():
+        if op in ('Variable', 'Next'):
+            continue
+        if op == 'IsPresent':
+            return present == expected
+        if not present:
+            return False
+        if op == 'IsNull':
+            return (value is None) == expected
+        if op.startswith('Is') and op[2:] in _KINDS:
+            kind = _KINDS[op[2:]]
+            ok = isinstance(value, kind) and not (op == 'IsNumeric' and isinstance(value, bool))
+            return ok == expected
+        if op == 'StringMatches':
+            pattern = re.escape(expected).replace(r'\*', '.*')
+            return isinstance(value, str) and re.fullmatch(pattern, value) is not None
+        if op.endswith('Path'):
+            op, expected = op[:-4], get_path(data, expected, context)
+        for kind, typ in _KINDS.items():
+            if op.startswith(kind) and op[len(kind):] in _COMPARATORS:
+                if not isinstance(value, typ) or (kind == 'Numeric' and isinstance(value, bool)):
+                    return False
+                return _COMPARATORS[op[len(kind):]](value, expected)
+        raise StatesError('States.Runtime', f'Unsupported Choice operator {op}')
+    raise StatesError('States.Runtime', f'Empty Choice rule on {var}')
+
+
+# ── Lambda functions ──────────────────────────────────────────────────────────
+
+def _function_table():
+    from deploy_step_functions import LAMBDAS
+    table = {fn['name']: fn for fn in LAMBDAS}
+    table.update(EXTRA_FUNCTIONS)
+    return table
+
+
+def function_name(resource, params):
+    """Deployed function name from a lambda:invoke FunctionName or a bare Lambda ARN."""
+    name = (params or {}).get('FunctionName') if resource.endswith(':lambda:invoke') else resource
+    name = str(name or '')
+    if name.startswith('PLACEHOLDER_'):
+        name = name[len('PLACEHOLDER_'):]
+    if ':function:' in name:
+        name = name.split(':function:', 1)[1].split(':', 1)[0]
+    return name
+
+
+def _lambda_error(e):
+    """A handler exception as lambda:invoke surfaces it: Error = type, Cause = the error JSON."""
+    return StatesError(type(e).__name__, json.dumps({
+        'errorMessage': str(e), 'errorType': type(e).__name__,
+        'stackTrace': traceback.format_exc().splitlines()[-6:]}))
+
+
+class _Context:
+    """The bits of the Lambda context object the handlers use."""
+
+    def __init__(self, fn):
+        self.function_name = fn['name']
+        self.memory_limit_in_mb = fn.get('memory', 128)
+        self.invoked_function_arn = f"arn:aws:lambda:{REGION}:000000000000:function:{fn['name']}"
+        self.aws_request_id = str(uuid.uuid4())
+        self._deadline = time.time() + fn.get('timeout', 60)
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self._deadline - time.time()) * 1000))
+
+
+class LocalLambdas:
+    """Invokes sf_*.py handlers in-process (or returns a canned stub payload)."""
+
+    def __init__(self, stubs=None, quiet=False, enforce_timeouts=False):
+        self.functions = _function_table()
+        self.stubs = stubs or {}
+        self.quiet = quiet
+        self.enforce_timeouts = enforce_timeouts
+        self.logs = {}
+        for p in (str(REPO_DIR), str(LAMBDAS_DIR)):
+            if p not in sys.path:
+                sys.path.insert(0, p)
+
+    def invoke(self, name, payload):
+        """→ (result payload, info dict). Raises StatesError the way lambda:invoke reports failures."""
+        info = {'function': name, 'over_timeout': False, 'stub': name in self.stubs}
+        event = json.loads(json.dumps(payload))
+        if name in self.stubs:
+            stub = self.stubs[name]
+            try:
+                return (stub(event) if callable(stub) else copy.deepcopy(stub)), info
+            except Exception as e:
+                raise _lambda_error(e)
+
+        fn = self.functions.get(name)
+        if fn is None:
+            raise StatesError('Lambda.ResourceNotFoundException', f'Function not found: {name}')
+        module_name, attr = fn['handler'].rsplit('.', 1)
+        os.environ.update(fn.get('env') or {})
+        cwd, buf = os.getcwd(), io.StringIO()
+        redirect = contextlib.redirect_stdout(buf) if self.quiet else contextlib.nullcontext()
+        t0 = time.perf_counter()
+        try:
+            with redirect:
+                handler = getattr(importlib.import_module(module_name), attr)
+                result = handler(event, _Context(fn))
+        except Exception as e:
+            raise _lambda_error(e)
+        finally:
+            os.chdir(cwd)
+            elapsed = time.perf_counter() - t0
+            self.logs[name] = buf.getvalue()
+        info['over_timeout'] = elapsed > fn.get('timeout', 60)
+        if info['over_timeout']:
+            print(f"[SfnLocal] {name} ran {elapsed:.1f}s — over its {fn.get('timeout')}s Lambda timeout")
+            if self.enforce_timeouts:
+                raise StatesError('Sandbox.Timedout', f"Task timed out after {fn.get('timeout')} seconds")
+        try:
+            return json.loads(json.dumps(result)), info
+        except (TypeError, ValueError) as e:
+            raise StatesError('Runtime.MarshalError', f'Unable to marshal response: {e}')
+
+
+# ── Interpreter ───────────────────────────────────────────────────────────────
+
+def load_definition(machine):
+    """ASL dict for a short name ('morning') or a path to a definition file."""
+    path = Path(machine)
+    if not path.suffix:
+        path = SF_DIR / MACHINES[machine]
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def _matches(error, names):
+    """ErrorEquals semantics: States.ALL catches everything but the terminal runtime errors,
+    States.TaskFailed everything but States.Timeout."""
+    if error in names:
+        return True
+    if 'States.ALL' in names:
+        return error not in _TERMINAL
+    return 'States.TaskFailed' in names and error != 'States.Timeout' and error not in _TERMINAL
+
+
+def _makespan(durations, slots):
+    """Wall time of `durations` started in order on `slots` lanes (0 = one lane each)."""
+    lanes = [0.0] * max(1, min(slots or len(durations), len(durations)))
+    for d in durations:
+        i = lanes.index(min(lanes))
+        lanes[i] += d
+    return max(lanes)
+
+
+def _check_size(data, state):
+    size = len(json.dumps(data))
+    if size > DATA_LIMIT_BYTES:
+        raise StatesError('States.DataLimitExceeded',
+                          f'{state} output is {size} bytes (limit {DATA_LIMIT_BYTES})')
+    return size
+
+
+class Execution:
+    """One run of a state machine definition; run() returns the report dict."""
+
+    def __init__(self, definition, lambdas, name='local', start_time=None, sleep_scale=0.0):
+        self.definition = definition
+        self.lambdas = lambdas
+        self.name = name
+        self.start_time = start_time or datetime.now(timezone.utc)
+        self.sleep_scale = sleep_scale
+        self.execution_name = f'local-{uuid.uuid4().hex[:12]}'     # $$.Execution.Name, unique per run
+        self.states = []
+
+    def _sleep(self, seconds):
+        if self.sleep_scale and seconds > 0:
+            time.sleep(seconds * self.sleep_scale)
+
+    def _context(self, state_name, entered, retry_count, execution_input):
+        started = self.start_time.strftime('%Y-%m-%dT%H:%M:%S.') + f'{self.start_time.microsecond // 1000:03d}Z'
+        return {
+            'Execution': {'Id': f'arn:aws:states:{REGION}:000000000000:execution:{self.name}:{self.execution_name}',
+                          'Name': self.execution_name, 'StartTime': started, 'Input': execution_input},
+            'StateMachine': {'Id': f'arn:aws:states:{REGION}:000000000000:stateMachine:{self.name}',
+                             'Name': self.name},
+            'State': {'Name': state_name, 'EnteredTime': entered, 'RetryCount': retry_count},
+        }
+
+    def _task(self, state, effective, ctx, rec):
+        params = render(state['Parameters'], effective, ctx) if 'Parameters' in state else effective
+        resource = state.get('Resource', '')
+        name = function_name(resource, params)
+        rec['function'] = name
+        payload = params.get('Payload', {}) if resource.endswith(':lambda:invoke') else params
+        result, info = self.lambdas.invoke(name, payload)
+        rec.update(over_timeout=info['over_timeout'], stub=info['stub'])
+        if state.get('TimeoutSeconds') and time.perf_counter() - rec['_t0'] > state['TimeoutSeconds']:
+            raise StatesError('States.Timeout', f"{rec['name']} exceeded TimeoutSeconds")
+        if resource.endswith(':lambda:invoke'):
+            result = {'Payload': result, 'StatusCode': 200, 'ExecutedVersion': '$LATEST'}
+        return result
+
+    def _map(self, name, state, effective, ctx, ctx_base, rec):
+        items = get_path(effective, state.get('ItemsPath', '$'), ctx)
+        if not isinstance(items, list):
+            raise StatesError('States.Runtime', f'{name}: ItemsPath did not select an array')
+        selector = state.get('ItemSelector', state.get('Parameters'))
+        processor = state.get('ItemProcessor') or state['Iterator']
+        results, raw, adjusted = [], [], []
+        for i, value in enumerate(items):
+            item_ctx = dict(ctx, Map={'Item': {'Index': i, 'Value': value}})
+            item = render(selector, effective, item_ctx) if selector is not None else value
+            t0 = time.perf_counter()
+            output, saved = self._run_machine(processor, copy.deepcopy(item), ctx_base, prefix=f'{name}[{i}].')
+            ms = (time.perf_counter() - t0) * 1000
+            results.append(output)
+            raw.append(ms)
+            adjusted.append(ms - saved)
+        parallel = _makespan(adjusted, state.get('MaxConcurrency', 0)) if items else 0.0
+        rec.update(iterations=len(items), max_concurrency=state.get('MaxConcurrency', 0),
+                   parallel_ms=round(parallel, 1), saved_ms=round(sum(raw) - parallel, 1))
+        return results
+
+    def _run_state(self, name, state, data, ctx_base):
+        """Run one state with its Retry policy → (output, next_name|None, status)."""
+        kind = state['Type']
+        rec = {'name': name, 'type': kind, 'attempts': 0, 'status': 'ok', 'error': None,
+               'start_ms': round((time.perf_counter() - self._t0) * 1000, 1), '_t0': time.perf_counter()}
+        self.states.append(rec)
+        retry_counts = [0] * len(state.get('Retry', []))
+        entered = datetime.now(timezone.utc).isoformat()
+        try:
+            while True:
+                rec['attempts'] += 1
+                ctx = self._context(name, entered, rec['attempts'] - 1, ctx_base)
+                try:
+                    effective = get_path(data, state.get('InputPath', '$'), ctx) \
+                        if state.get('InputPath', '$') is not None else {}
+                    if kind == 'Task':
+                        result = self._task(state, effective, ctx, rec)
+                        if 'ResultSelector' in state:
+                            result = render(state['ResultSelector'], result, ctx)
+                    elif kind == 'Pass':
+                        result = state['Result'] if 'Result' in state else \
+                            (render(state['Parameters'], effective, ctx) if 'Parameters' in state else effective)
+                    elif kind == 'Map':
+                        result = self._map(name, state, effective, ctx, ctx_base, rec)
+                        if 'ResultSelector' in state:
+                            result = render(state['ResultSelector'], result, ctx)
+                    elif kind in ('Choice', 'Wait', 'Succeed', 'Fail'):
+                        result = effective
+                    else:
+                        raise StatesError('States.Runtime', f'State type {kind} is not supported locally')
+                    break
+                except StatesError as e:
+                    for n, retrier in enumerate(state.get('Retry', [])):
+                        if _matches(e.error, retrier['ErrorEquals']):
+                            if retry_counts[n] < retrier.get('MaxAttempts', 3):
+                                self._sleep(retrier.get('IntervalSeconds', 1)
+                                            * retrier.get('BackoffRate', 2.0) ** retry_counts[n])
+                                retry_counts[n] += 1
+                                print(f"[SfnLocal] {name}: {e.error} — retry {retry_counts[n]}")
+                                break
+                            raise
+                    else:
+                        raise
+
+            if kind == 'Fail':
+                raise StatesError(state.get('Error', 'States.Fail'), state.get('Cause', ''))
+            if kind == 'Choice':
+                for rule in state['Choices']:
+                    if _rule_matches(rule, effective, ctx):
+                        return effective, rule['Next'], 'ok'
+                if 'Default' not in state:
+                    raise StatesError('States.NoChoiceMatched', f'No Choice rule matched in {name}')
+                return effective, state['Default'], 'ok'
+            if kind == 'Wait':
+                if 'Seconds' in state or 'SecondsPath' in state:
+                    secs = state.get('Seconds') or get_path(effective, state['SecondsPath'], ctx)
+                    self._sleep(float(secs))
+                return effective, state.get('Next'), 'ok'
+            if kind == 'Succeed':
+                return effective, None, 'ok'
+
+            output = set_path(data, state.get('ResultPath', '$'), result)
+            if state.get('OutputPath', '$') is None:
+                output = {}
+            elif state.get('OutputPath', '$') != '$':
+                output = get_path(output, state['OutputPath'], ctx)
+            rec['output_bytes'] = _check_size(output, name)
+            return output, (None if state.get('End') else state.get('Next')), 'ok'
+
+        except StatesError as e:
+            rec['error'] = e.error
+            for catcher in state.get('Catch', []):
+                if _matches(e.error, catcher['ErrorEquals']):
+                    rec['status'] = 'caught'
+                    output = set_path(data, catcher.get('ResultPath', '$'), {'Error': e.error, 'Cause': e.cause})
+                    return output, catcher['Next'], 'caught'
+            rec['status'] = 'failed'
+            rec['cause'] = e.cause
+            raise
+        finally:
+            rec['ms'] = round((time.perf_counter() - rec.pop('_t0')) * 1000, 1)
+
+    def _run_machine(self, definition, data, ctx_base, prefix=''):
+        """StartAt → End over one definition (the machine, or a Map's ItemProcessor)
+        → (output, ms the Maps it ran directly would save with their concurrency)."""
+        current, transitions, saved = definition['StartAt'], 0, 0.0
+        while current is not None:
+            transitions += 1
+            if transitions > MAX_TRANSITIONS:
+                raise StatesError('States.Runtime', f'More than {MAX_TRANSITIONS} transitions')
+            state = definition['States'].get(current)
+            if state is None:
+                raise StatesError('States.Runtime', f'Unknown state {prefix}{current!r}')
+            first = len(self.states)
+            data, current, _ = self._run_state(prefix + current, state, data, ctx_base)
+            saved += self.states[first].get('saved_ms', 0.0)
+        return data, saved
+
+    def run(self, execution_input=None):
+        data = execution_input if execution_input is not None else {}
+        self._t0 = time.perf_counter()
+        report = {'state_machine': self.name, 'started_at': datetime.now(timezone.utc).isoformat(),
+                  'status': 'SUCCEEDED', 'error': None, 'cause': None}
+        saved = 0.0
+        try:
+            data, saved = self._run_machine(self.definition, data, execution_input or {})
+        except StatesError as e:
+            report.update(status='FAILED', error=e.error, cause=e.cause)
+        report['output'] = data if report['status'] == 'SUCCEEDED' else None
+        report['wall_ms'] = round((time.perf_counter() - self._t0) * 1000, 1)
+        report['est_wall_ms'] = round(report['wall_ms'] - saved, 1)
+        report['states'] = self.states
+        return report
+
+
+# ── Local AWS stand-in ────────────────────────────────────────────────────────
+
+@contextlib.contextmanager
+def local_aws(backend='moto', endpoint_url=None):
+    """S3 + DynamoDB that never reach the real account, with the bucket and table created."""
+    os.environ.setdefault('AWS_DEFAULT_REGION', REGION)
+    for var in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        os.environ[var] = 'testing'
+    os.environ.pop('AWS_PROFILE', None)
+    os.environ.pop('AWS_SESSION_TOKEN', None)
+
+    if backend == 'moto':
+        try:
+            from moto import mock_aws
+        except ImportError:
+            raise SystemExit("[SfnLocal] --aws moto needs moto: pip install 'moto[s3,dynamodb]'")
+        mock = mock_aws()
+        mock.start()
+    elif backend == 'endpoint':
+        if not endpoint_url:
+            raise SystemExit('[SfnLocal] --aws endpoint needs --endpoint-url (e.g. http://localhost:4566)')
+        os.environ['AWS_ENDPOINT_URL'] = endpoint_url
+        mock = None
+    else:
+        raise SystemExit(f'[SfnLocal] unknown --aws backend {backend!r}')
+
+    try:
+        import boto3
+        s3 = boto3.client('s3', region_name=REGION)
+        try:
+            s3.create_bucket(Bucket=BUCKET, CreateBucketConfiguration={'LocationConstraint': REGION})
+        except Exception as e:
+            if 'BucketAlready' not in str(e):
+                raise
+        ddb = boto3.client('dynamodb', region_name=REGION)
+        try:
+            ddb.create_table(
+                TableName=TABLE,
+                KeySchema=[{'AttributeName': 'bet_date', 'KeyType': 'HASH'},
+                           {'AttributeName': 'bet_id', 'KeyType': 'RANGE'}],
+                AttributeDefinitions=[{'AttributeName': 'bet_date', 'AttributeType': 'S'},
+                                      {'AttributeName': 'bet_id', 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST',
+            )
+        except Exception as e:
+            if 'ResourceInUse' not in str(e):
+                raise
+        yield
+    finally:
+        if mock is not None:
+            mock.stop()
+
+
+def seed(s3_files=(), items_file=None):
+    """Upload KEY=FILE pairs to the pipeline bucket and put_item a JSON list into SureBetBets."""
+    import boto3
+    s3 = boto3.client('s3', region_name=REGION)
+    for key, path in s3_files:
+        s3.put_object(Bucket=BUCKET, Key=key, Body=Path(path).read_bytes())
+        print(f'[SfnLocal] seeded s3://{BUCKET}/{key}')
+    if items_file:
+        items = json.loads(Path(items_file).read_text(encoding='utf-8'), parse_float=Decimal)
+        table = boto3.resource('dynamodb', region_name=REGION).Table(TABLE)
+        with table.batch_writer(overwrite_by_pkeys=['bet_date', 'bet_id']) as batch:
+            for item in items:
+                batch.put_item(Item=item)
+        print(f'[SfnLocal] seeded {len(items)} item(s) into {TABLE}')
+
+
+# ── Reports ───────────────────────────────────────────────────────────────────
+
+def print_report(report):
+    print(f"\n[SfnLocal] {report['state_machine']}: {report['status']} in {report['wall_ms']:.0f} ms"
+          + (f" (≈{report['est_wall_ms']:.0f} ms with Map concurrency)"
+             if report.get('est_wall_ms', report['wall_ms']) < report['wall_ms'] else '')
+          + (f"  ({report['error']})" if report['error'] else ''))
+    total = max(report['wall_ms'], 1)
+    for s in report['states']:
+        bar = '█' * max(1, int(30 * s['ms'] / total)) if s['ms'] >= 1 else ''
+        flags = ''.join([
+            f"  x{s['attempts']}" if s['attempts'] > 1 else '',
+            f"  {s['status']}: {s['error']}" if s['status'] != 'ok' else '',
+            '  stub' if s.get('stub') else '',
+            '  OVER LAMBDA TIMEOUT' if s.get('over_timeout') else '',
+            f"  {s['iterations']} item(s), ≈{s['parallel_ms']:.0f} ms at concurrency {s['max_concurrency'] or 'max'}"
+            if 'iterations' in s else '',
+        ])
+        print(f"  {s['name']:30} {s['type']:8} {s['ms']:9.1f} ms  {bar}{flags}")
+
+
+def compare(report, baseline, tolerance=0.25, min_ms=REGRESSION_MIN_MS):
+    """States slower than baseline by more than `tolerance` (and min_ms) plus status changes."""
+    base = {s['name']: s for s in baseline.get('states', [])}
+    regressions = []
+    if report['status'] != baseline.get('status'):
+        regressions.append(f"status {baseline.get('status')} → {report['status']}")
+    for s in report['states']:
+        b = base.get(s['name'])
+        if not b:
+            continue
+        if s['status'] != b['status']:
+            regressions.append(f"{s['name']}: {b['status']} → {s['status']}")
+        if s['ms'] - b['ms'] > min_ms and s['ms'] > b['ms'] * (1 + tolerance):
+            regressions.append(f"{s['name']}: {b['ms']:.0f} → {s['ms']:.0f} ms")
+    return regressions
+
+
+def _schedule_start(machine, date_str):
+    """Execution StartTime for the date at the machine's first EventBridge schedule."""
+    from deploy_step_functions import SCHEDULES, STATE_MACHINES
+    day = datetime.strptime(date_str, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    sm_name = next((m['name'] for m in STATE_MACHINES if m['file'] == MACHINES.get(machine)), None)
+    for sched in SCHEDULES:
+        if sched['state_machine'] == sm_name:
+            minute, hour = sched['cron'][5:].split()[:2]
+            return day + timedelta(hours=int(hour), minutes=int(minute))
+    return day
+
+
+def run(machine, date_str=None, execution_input=None, stubs=None, quiet=False,
+        enforce_timeouts=False, sleep_scale=0.0, lambdas=None):
+    """Execute one state machine against whatever AWS is active → report dict."""
+    if date_str:
+        start = _schedule_start(machine, date_str)
+    else:
+        start = datetime.now(timezone.utc)
+    lambdas = lambdas or LocalLambdas(stubs=stubs, quiet=quiet, enforce_timeouts=enforce_timeouts)
+    execution = Execution(load_definition(machine), lambdas, name=Path(machine).stem,
+                          start_time=start, sleep_scale=sleep_scale)
+    return execution.run(execution_input)
+
+
+def _pairs(values, flag):
+    out = []
+    for v in values or []:
+        if '=' not in v:
+            raise SystemExit(f'[SfnLocal] {flag} expects NAME=FILE, got {v!r}')
+        out.append(tuple(v.split('=', 1)))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Run a SureBet state machine locally')
+    ap.add_argument('machine', help=f"{' | '.join(MACHINES)} or a path to an ASL file")
+    ap.add_argument('--date', help='Execution date YYYY-MM-DD (StartTime = its scheduled run)')
+    ap.add_argument('--input', default='{}', help='Execution input JSON')
+    ap.add_argument('--aws', default='moto', choices=['moto', 'endpoint'])
+    ap.add_argument('--endpoint-url', help='LocalStack / DynamoDB Local URL for --aws endpoint')
+    ap.add_argument('--stub', action='append', metavar='NAME=FILE',
+                    help='Return the JSON in FILE instead of invoking function NAME')
+    ap.add_argument('--seed-s3', action='append', metavar='KEY=FILE')
+    ap.add_argument('--seed-items', metavar='FILE', help='JSON list of SureBetBets items')
+    ap.add_argument('--repeat', type=int, default=1, help='Run N times (first run includes imports)')
+    ap.add_argument('--sleep-scale', type=float, default=0.0, help='Multiplier on Retry / Wait delays')
+    ap.add_argument('--enforce-timeouts', action='store_true',
+                    help='Fail tasks that overrun their deployed Lambda timeout (Sandbox.Timedout)')
+    ap.add_argument('--quiet', action='store_true', help='Hide handler output')
+    ap.add_argument('--report', help='Write the (last) report as JSON')
+    ap.add_argument('--baseline', help='Compare against a saved report; exit 1 on regressions')
+    ap.add_argument('--tolerance', type=float, default=0.25)
+    args = ap.parse_args()
+
+    stubs = {name: json.loads(Path(path).read_text(encoding='utf-8'))
+             for name, path in _pairs(args.stub, '--stub')}
+    with local_aws(args.aws, args.endpoint_url):
+        seed(_pairs(args.seed_s3, '--seed-s3'), args.seed_items)
+        lambdas = LocalLambdas(stubs=stubs, quiet=args.quiet, enforce_timeouts=args.enforce_timeouts)
+        reports = []
+        for _ in range(max(1, args.repeat)):
+            report = run(args.machine, args.date, json.loads(args.input),
+                         sleep_scale=args.sleep_scale, lambdas=lambdas)
+            print_report(report)
+            reports.append(report)
+
+    if len(reports) > 1:
+        walls = sorted(r['wall_ms'] for r in reports)
+        print(f"\n[SfnLocal] {len(reports)} runs: first {reports[0]['wall_ms']:.0f} ms, "
+              f"median {walls[len(walls) // 2]:.0f} ms, best {walls[0]:.0f} ms")
+    report = reports[-1]
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, indent=2, default=str), encoding='utf-8')
+        print(f'[SfnLocal] report → {args.report}')
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text(encoding='utf-8')),
+                              args.tolerance)
+        for r in regressions:
+            print(f'[SfnLocal] REGRESSION {r}')
+        if regressions:
+            sys.exit(1)
+        print('[SfnLocal] no regressions against baseline')
+    sys.exit(0 if report['status'] == 'SUCCEEDED' else 2)
+
+
+if __name__ == '__main__':
+    main()
@@ -20,7 +20,7 @@ Usage:
 import re
 import sys
 import json
-import requests
+import http_client
 import boto3
 from datetime import date, datetime
 from decimal import Decimal
@@ -123,11 +123,11 @@ def _to_frac(dec: float) -> str:
     return f'{num//g}/{den//g}'
 def fetch(url: str) -> str | None:
     try:
-        r = requests.get(url, headers=HEADERS, timeout=30)
+        r = http_client.get(url, headers=HEADERS, timeout=30)
         if r.status_code == 200:
             return r.text
         print(f"  HTTP {r.status_code}: {url}")
-    except Exception as e:
+    except http_client.HttpError as e:
         print(f"  Error fetching {url}: {e}")
     return None
 
@@ -326,7 +326,24 @@ def fetch_fast_results():
 
 
 # ── Step 3: Match race results against pending DynamoDB picks ──────────────────
+def settlement(finish_pos, odds, stake, winner, total_runners):
+    """(outcome, result_emoji, profit, position_label, result_analysis) for a WIN bet
+    from our horse's finishing position (None = not in the result list)."""
+    if finish_pos == 1:
+        return 'win', 'WIN', round((odds - 1) * stake, 2), '1st', \
+            f'Won at {_to_frac(odds)} ({total_runners} runners)'
+    if finish_pos in (2, 3):
+        pos_label = '2nd' if finish_pos == 2 else '3rd'
+        # WIN bet — stake lost; each-way would differ
+        return 'placed', 'PLACED', -round(stake, 2), pos_label, \
+            f'{pos_label} of {total_runners}, winner: {winner}'
+    pos_label = f'{finish_pos}th' if finish_pos else 'Unplaced'
+    analysis = f'{pos_label} of {total_runners}, winner: {winner}' if finish_pos else f'Unplaced, winner: {winner}'
+    return 'loss', 'LOSS', -round(stake, 2), pos_label, analysis
+
+
 def update_results(date_str):
+    """Settle the date's pending UI picks from Sporting Life → bet_ids updated by this run."""
     db = boto3.resource('dynamodb', region_name='eu-west-1')
     t = db.Table('SureBetBets')
 
@@ -341,7 +358,7 @@ def update_results(date_str):
     pending = [p for p in picks if not p.get('outcome') or p.get('outcome') in UNRESOLVED]
     if not pending:
         print(f"\nAll picks already settled with new format for {date_str}")
-        return
+        return []
 
     print(f"\n{len(pending)} pending pick(s) to resolve:")
     for p in pending:
@@ -436,6 +453,7 @@ def update_results(date_str):
     # Match and update
     print(f"\n{'='*55}")
     updated = 0
+    updated_ids = []
     for pick in pending:
         horse = pick.get('horse') or pick.get('horse_name', '')
         course = pick.get('course', '').strip()
@@ -490,25 +508,8 @@ def update_results(date_str):
         winner_draw    = _rd.get('draw_map', {}).get(winner)
         winner_sp      = _rd.get('sp_map', {}).get(winner, '')
 
-        # Determine outcome based on position
-        if finish_pos == 1:
-            outcome_lc   = 'win'
-            result_emoji = 'WIN'
-            profit = round((odds - 1) * stake, 2)
-            pos_label    = '1st'
-            analysis     = f'Won at {_to_frac(odds)} ({total_runners} runners)'
-        elif finish_pos in (2, 3):
-            outcome_lc   = 'placed'
-            result_emoji = 'PLACED'
-            profit = -round(stake, 2)   # WIN bet — stake lost; each-way would differ
-            pos_label    = '2nd' if finish_pos == 2 else '3rd'
-            analysis     = f'{pos_label} of {total_runners}, winner: {winner}'
-        else:
-            outcome_lc   = 'loss'
-            result_emoji = 'LOSS'
-            profit = -round(stake, 2)
-            pos_label    = f'{finish_pos}th' if finish_pos else 'Unplaced'
-            analysis     = f'{pos_label} of {total_runners}, winner: {winner}' if finish_pos else f'Unplaced, winner: {winner}'
+        outcome_lc, result_emoji, profit, pos_label, analysis = settlement(
+            finish_pos, odds, stake, winner, total_runners)
 
         icon = '✅' if outcome_lc == 'win' else ('🥈' if outcome_lc == 'placed' else '❌')
         print(f"  {icon} {result_emoji:<7} | {horse:<30} | {pos_label} | Winner: {winner:<25} | P&L: {profit:+.2f}")
@@ -595,6 +596,7 @@ def update_results(date_str):
             }
         )
         updated += 1
+        updated_ids.append(bet_id)
 
     print(f"\nUpdated {updated}/{len(pending)} pending picks")
 
@@ -622,6 +624,7 @@ def update_results(date_str):
         rt = str(p.get('race_time', ''))[:16]
         pos = p.get('finish_position', '')
         print(f"  {emoji or outcome:<8} | {horse:<30} | pos:{pos!s:<3} | {course:<15} | {rt} | {pnl:+.2f}")
+    return updated_ids
 
 
 if __name__ == '__main__':
@@ -629,3 +632,4 @@ if __name__ == '__main__':
     print(f" Sporting Life Results Fetcher — {TARGET_DATE}")
     print(f"{'='*55}")
     update_results(TARGET_DATE)
+    http_client.print_metrics()
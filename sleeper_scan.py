@@ -21,8 +21,8 @@ Usage:
 
 import json, os, sys, re, time, argparse
 from datetime import datetime, timezone, timedelta
-import requests
-from bs4 import BeautifulSoup
+import http_client
+import rp_extractor
 
 ROOT = os.path.dirname(os.path.abspath(__file__))
 BETFAIR_API = "https://api.betfair.com/exchange/betting/rest/v1.0"
@@ -127,8 +127,8 @@ NH_RACE_KEYWORDS = {
 # ─────────────────────────────────────────────────────────────────────────────
 
 def bf_post(endpoint, payload, timeout=30):
-    r = requests.post(f"{BETFAIR_API}/{endpoint}/", headers=BF_HEADERS,
-                      json=payload, timeout=timeout)
+    r = http_client.post(f"{BETFAIR_API}/{endpoint}/", headers=BF_HEADERS,
+                         json=payload, timeout=timeout)
     r.raise_for_status()
     return r.json()
 
@@ -233,6 +233,10 @@ def get_bf_odds(market_ids):
 # RACING POST RACECARD SCRAPER
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Headless Chrome is an explicit fallback only (--selenium or RP_SELENIUM=1)
+USE_SELENIUM = os.environ.get("RP_SELENIUM") == "1"
+
+
 def _selenium_driver():
     """Create a headless Chrome driver. Returns None if Selenium not available."""
     try:
@@ -260,7 +264,8 @@ def _selenium_driver():
 def scrape_rp_venue(venue, date_str):
     """
     Scrape Racing Post racecard for a venue+date.
-    Tries requests first; falls back to Selenium for JS-rendered content.
+    Browserless (rp_extractor: embedded JSON, then static markup); Selenium
+    only when USE_SELENIUM is set (--selenium) and the static page is empty.
     Returns dict: {horse_name_lower: {trainer, jockey, form}}
     """
     slug = RP_VENUE_SLUGS.get(venue)
@@ -269,20 +274,19 @@ def scrape_rp_venue(venue, date_str):
 
     url = f"https://www.racingpost.com/racecards/{slug}/{date_str}"
 
-    # --- Attempt 1: plain requests (fast, works if RP serves static HTML) ---
+    # --- Attempt 1: plain HTTP + lxml (embedded JSON or static HTML) ---
     horse_data = {}
     try:
-        resp = requests.get(url, headers=RP_HEADERS, timeout=20)
+        resp = http_client.get(url, headers=RP_HEADERS, timeout=20)
         if resp.status_code == 200:
-            soup = BeautifulSoup(resp.text, "html.parser")
-            horse_data = _parse_rp_soup(soup)
+            horse_data = rp_extractor.parse_racecard(resp.text)
     except Exception:
         pass
 
-    if horse_data:
+    if horse_data or not USE_SELENIUM:
         return horse_data
 
-    # --- Attempt 2: Selenium for JS-rendered pages ---
+    # --- Attempt 2 (explicit fallback): Selenium for JS-rendered pages ---
     driver = _selenium_driver()
     if driver is None:
         return {}
@@ -299,69 +303,7 @@ def scrape_rp_venue(venue, date_str):
         except Exception:
             pass
 
-    soup = BeautifulSoup(page_src, "html.parser")
-    horse_data = _parse_rp_soup(soup)
-    if not horse_data:
-        horse_data = _scrape_rp_json_fallback(soup)
-    return horse_data
-
-
-def _parse_rp_soup(soup):
-    """Extract runner data from a BeautifulSoup RP racecard page."""
-    horse_data = {}
-
-    # RP racecard structure: each runner row contains horse name, trainer, jockey
-    # Try multiple selector patterns as RP changes markup
-    for row in soup.select("[class*='RC-runnerRow'], [class*='runner-row'], tr.runner"):
-        name_el    = row.select_one("[class*='RC-runnerName'], [class*='horse-name'], .runnerName")
-        trainer_el = row.select_one("[class*='RC-runnerTrainer'], [class*='trainer'], .trainerName")
-        jockey_el  = row.select_one("[class*='RC-runnerJockey'], [class*='jockey'], .jockeyName")
-        form_el    = row.select_one("[class*='RC-runnerForm'], [class*='form-figures'], .form")
-
-        if not name_el:
-            continue
-
-        name    = name_el.get_text(strip=True).lower()
-        trainer = trainer_el.get_text(strip=True) if trainer_el else ""
-        jockey  = jockey_el.get_text(strip=True)  if jockey_el  else ""
-        form    = form_el.get_text(strip=True)     if form_el    else ""
-
-        if name:
-            horse_data[name] = {"trainer": trainer, "jockey": jockey, "form": form}
-
-    return horse_data
-
-
-def _scrape_rp_json_fallback(soup):
-    """Try to extract runner data from RP embedded JSON blobs."""
-    horse_data = {}
-    for script in soup.find_all("script", type="application/json"):
-        try:
-            data = json.loads(script.string or "{}")
-            # Walk the JSON looking for runner arrays
-            _extract_runners_from_json(data, horse_data)
-        except Exception:
-            continue
-    return horse_data
-
-
-def _extract_runners_from_json(obj, out, depth=0):
-    if depth > 8:
-        return
-    if isinstance(obj, list):
-        for item in obj:
-            _extract_runners_from_json(item, out, depth+1)
-    elif isinstance(obj, dict):
-        # Look for runner/horse name fields
-        name = obj.get("horseName") or obj.get("horse") or obj.get("name") or ""
-        trainer = obj.get("trainerName") or obj.get("trainer") or ""
-        jockey  = obj.get("jockeyName")  or obj.get("jockey")  or ""
-        form    = obj.get("form") or ""
-        if name and (trainer or jockey):
-            out[name.lower()] = {"trainer": trainer, "jockey": jockey, "form": form}
-        for v in obj.values():
-            if isinstance(v, (dict, list)):
-                _extract_runners_from_json(v, out, depth+1)
+    return rp_extractor.parse_racecard(page_src)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -585,8 +527,13 @@ def main():
     parser.add_argument("--day",  type=int, choices=[1,2,3,4], help="Festival day (1-4)")
     parser.add_argument("--all",  action="store_true",         help="Scan all 4 days")
     parser.add_argument("--min",  type=int, default=40,        help="Min sleeper score (default 40)")
+    parser.add_argument("--selenium", action="store_true",
+                        help="Fall back to headless Chrome when a racecard has no static data")
     args = parser.parse_args()
 
+    global USE_SELENIUM
+    USE_SELENIUM = USE_SELENIUM or args.selenium
+
     today = datetime.now().strftime("%Y-%m-%d")
 
     if args.all:
@@ -609,6 +556,7 @@ def main():
 
     if len(days) > 1 and all_results:
         print(f"\n  FESTIVAL TOTAL: {len(all_results)} sleeper candidates across {len(days)} days")
+    http_client.print_metrics()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,327 @@
+"""
+STAGE PROFILER — per-stage timings, metrics and opt-in cProfile for pipeline runs
+=================================================================================
+analyze_and_save_all used to print stage banners with no timings. StageTimer
+records wall-clock per stage plus per-item series (one sample per race scored,
+per runner scored, per DynamoDB write), and the run writes them into
+SYSTEM_ANALYSIS_MANIFEST under `timing`, so each run can be compared with
+the last one.
+
+  timer = StageTimer('analysis')
+  timer.start('form_enrichment'); ...; timer.stop('form_enrichment')
+  with timer.stage('ourhub'): ...
+  with timer.sample('score_race'): ...          # series → n / p50 / p95 / max
+  timer.summary()                               # plain dict (JSON / manifest)
+  timer.regressions(previous_summary)           # stages ≥ REGRESSION_FACTOR × last run
+  timer.emit_metrics()                          # CloudWatch Embedded Metric Format line
+
+Metrics go out as one EMF log line (namespace SureBet/Pipeline, dimension Run)
+— CloudWatch extracts them from Lambda logs with no API call. Outside Lambda
+the line is only printed when PIPELINE_METRICS=1.
+
+cProfile is opt-in: PIPELINE_PROFILE=1 wraps the run (see profiled()), prints
+the top functions by cumulative time and writes {label}_{utc}.prof to /tmp
+(Lambda, also uploaded to s3://{PIPELINE_BUCKET}/profiles/{date}/) or cwd.
+
+Per-signal cost accounting (SIGNAL_COSTS=1, or PIPELINE_PROFILE=1):
+signal_costs splits a scoring call into named sections and charges each one
+its wall time and the outbound HTTP requests it made — every request, whether
+boto3, requests or urllib, passes through http.client, so hidden per-runner
+DynamoDB / network calls show up against the signal that made them.
+
+  signal_costs.begin('setup')        # first section of one runner
+  signal_costs.section('going')      # closes the previous section
+  signal_costs.end()
+  signal_costs.report()              # worst first: ms, I/O calls, hosts, cache hit %
+
+"Cache hit %" is the share of a signal's calls that made no request at all —
+only reported for signals that made a request at least once. Disabled, every
+call is a single attribute check.
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from decimal import Decimal
+
+METRICS_NAMESPACE = 'SureBet/Pipeline'
+REGRESSION_FACTOR = 1.5      # stage slower than this × previous run → flagged
+REGRESSION_MIN_MS = 500      # ignore stages too short to matter
+PROFILE_TOP       = 30
+
+_IN_LAMBDA = bool(os.environ.get('AWS_LAMBDA_FUNCTION_NAME'))
+
+
+class StageTimer:
+    def __init__(self, run):
+        self.run     = run
+        self.started = time.perf_counter()
+        self.stages  = {}      # name → ms (insertion order = pipeline order)
+        self.series  = {}      # name → [ms, ...]
+        self._open   = {}
+
+    # ── stages ────────────────────────────────────────────────────────────
+    def start(self, name):
+        self._open[name] = time.perf_counter()
+
+    def stop(self, name):
+        t0 = self._open.pop(name, None)
+        if t0 is None:
+            return 0.0
+        ms = (time.perf_counter() - t0) * 1000
+        self.stages[name] = self.stages.get(name, 0.0) + ms   # re-entered stages accumulate
+        return ms
+
+    @contextmanager
+    def stage(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    # ── per-item series ───────────────────────────────────────────────────
+    def add(self, name, ms):
+        self.series.setdefault(name, []).append(ms)
+
+    @contextmanager
+    def sample(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - t0) * 1000)
+
+    # ── reporting ─────────────────────────────────────────────────────────
+    def summary(self):
+        def _stats(vals):
+            s = sorted(vals)
+            pick = lambda q: round(s[min(len(s) - 1, int(q * len(s)))], 2)
+            return {'n': len(s), 'total_ms': round(sum(s), 1), 'mean_ms': round(sum(s) / len(s), 2),
+                    'p50_ms': pick(0.50), 'p95_ms': pick(0.95), 'max_ms': round(s[-1], 2)}
+        return {
+            'run':       self.run,
+            'total_ms':  round((time.perf_counter() - self.started) * 1000, 1),
+            'stages_ms': {k: round(v, 1) for k, v in self.stages.items()},
+            'series':    {k: _stats(v) for k, v in self.series.items() if v},
+        }
+
+    def manifest_item(self, summary=None):
+        """summary() with Decimal numbers, ready for a DynamoDB put."""
+        return json.loads(json.dumps(self.summary() if summary is None else summary),
+                          parse_float=Decimal, parse_int=Decimal)
+
+    def regressions(self, previous, current=None):
+        """['form_enrichment 9120ms vs 4210ms last run (2.2x)', ...]"""
+        if not previous:
+            return []
+        current = current or self.summary()
+        prev_stages = previous.get('stages_ms') or {}
+        out = []
+        for name, ms in current['stages_ms'].items():
+            before = float(prev_stages.get(name) or 0)
+            if ms >= REGRESSION_MIN_MS and before > 0 and ms >= before * REGRESSION_FACTOR:
+                out.append(f'{name} {ms:.0f}ms vs {before:.0f}ms last run ({ms / before:.1f}x)')
+        return out
+
+    def print_table(self, summary=None):
+        s = summary or self.summary()
+        total = s['total_ms'] or 1
+        print(f"\n[Timing] {self.run} — {total / 1000:.1f}s total")
+        for name, ms in s['stages_ms'].items():
+            print(f"  [Timing] {name:24} {ms:9.0f} ms  {100 * ms / total:5.1f}%")
+        for name, st in s['series'].items():
+            print(f"  [Timing] {name:24} n={st['n']:<5} p50={st['p50_ms']:.1f}ms "
+                  f"p95={st['p95_ms']:.1f}ms max={st['max_ms']:.1f}ms total={st['total_ms']:.0f}ms")
+
+    def emit_metrics(self, summary=None, **dimensions):
+        """One CloudWatch EMF line: stage_<name>_ms, <series>_p95_ms, total_ms."""
+        if not (_IN_LAMBDA or os.environ.get('PIPELINE_METRICS') == '1'):
+            return
+        s = summary or self.summary()
+        values = {'total_ms': s['total_ms']}
+        values.update({f'stage_{k}_ms': v for k, v in s['stages_ms'].items()})
+        for k, st in s['series'].items():
+            values[f'{k}_p95_ms'] = st['p95_ms']
+            values[f'{k}_count'] = st['n']
+        dims = {'Run': self.run, **{k: str(v) for k, v in dimensions.items()}}
+        print(json.dumps({
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace':  METRICS_NAMESPACE,
+                    'Dimensions': [list(dims)],
+                    'Metrics':    [{'Name': k, 'Unit': 'Count' if k.endswith('_count') else 'Milliseconds'}
+                                   for k in values],
+                }],
+            },
+            **dims,
+            **values,
+        }, separators=(',', ':')))
+
+
+# ── Opt-in cProfile ───────────────────────────────────────────────────────────
+
+def profiling_enabled():
+    return os.environ.get('PIPELINE_PROFILE', '').lower() in ('1', 'true', 'yes')
+
+
+@contextmanager
+def profiled(label):
+    """cProfile the block when PIPELINE_PROFILE=1; otherwise a no-op."""
+    if not profiling_enabled():
+        yield
+        return
+    import cProfile
+    import pstats
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        path = os.path.join('/tmp' if _IN_LAMBDA else '.', f'{label}_{stamp}.prof')
+        try:
+            prof.dump_stats(path)
+            print(f"\n[Profile] {label} → {path}")
+            pstats.Stats(prof).sort_stats('cumulative').print_stats(PROFILE_TOP)
+            if _IN_LAMBDA:
+                _upload_profile(path, label, stamp)
+        except Exception as e:
+            print(f"[Profile] could not write profile: {e}")
+
+
+def _upload_profile(path, label, stamp):
+    import boto3
+    bucket = os.environ.get('PIPELINE_BUCKET', 'surebet-pipeline-data')
+    key = f"profiles/{stamp[:4]}-{stamp[4:6]}-{stamp[6:8]}/{label}_{stamp}.prof"
+    boto3.client('s3').upload_file(path, bucket, key)
+    print(f"[Profile] uploaded s3://{bucket}/{key}")
+
+
+# ── Per-signal cost accounting ───────────────────────────────────────────────
+
+_io_pending = []           # hosts of requests made since the last section boundary
+_io_patched = False
+_io_lock    = threading.Lock()
+
+
+def _patch_http_client():
+    """Count every outbound request (http.client.HTTPConnection.putrequest)."""
+    global _io_patched
+    with _io_lock:
+        if _io_patched:
+            return
+        import http.client
+        original = http.client.HTTPConnection.putrequest
+
+        def putrequest(conn, *args, **kwargs):
+            if signal_costs.enabled:
+                _io_pending.append(conn.host)
+            return original(conn, *args, **kwargs)
+
+        http.client.HTTPConnection.putrequest = putrequest
+        _io_patched = True
+
+
+class SignalCosts:
+    def __init__(self):
+        self.enabled  = False
+        self.rows     = {}     # section → {'calls', 'ms', 'io', 'io_calls', 'hosts'}
+        self._current = None
+        self._t0      = 0.0
+
+    def enable(self):
+        _patch_http_client()
+        self.rows = {}
+        self.enabled = True
+
+    def enable_from_env(self):
+        if os.environ.get('SIGNAL_COSTS') == '1' or profiling_enabled():
+            self.enable()
+        return self.enabled
+
+    def disable(self):
+        self.enabled = False
+        self._current = None
+
+    # ── section boundaries (hot path: one attribute check when disabled) ──
+    def begin(self, name):
+        if not self.enabled:
+            return
+        _io_pending.clear()
+        self._current = name
+        self._t0 = time.perf_counter()
+
+    def section(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._charge(now)
+        self._current = name
+        self._t0 = now
+
+    def end(self):
+        if not self.enabled:
+            return
+        self._charge(time.perf_counter())
+        self._current = None
+
+    def _charge(self, now):
+        if self._current is None:
+            return
+        row = self.rows.get(self._current)
+        if row is None:
+            row = self.rows[self._current] = {'calls': 0, 'ms': 0.0, 'io': 0, 'io_calls': 0, 'hosts': {}}
+        row['calls'] += 1
+        row['ms'] += (now - self._t0) * 1000
+        if _io_pending:
+            row['io'] += len(_io_pending)
+            row['io_calls'] += 1
+            for host in _io_pending:
+                row['hosts'][host] = row['hosts'].get(host, 0) + 1
+            _io_pending.clear()
+
+    # ── reporting ─────────────────────────────────────────────────────────
+    def report(self, top=None):
+        """[{signal, calls, total_ms, mean_us, share_pct, io_requests, io_per_call,
+        cache_hit_pct, hosts}] — most expensive first."""
+        total = sum(r['ms'] for r in self.rows.values()) or 1
+        out = []
+        for name, r in self.rows.items():
+            out.append({
+                'signal':        name,
+                'calls':         r['calls'],
+                'total_ms':      round(r['ms'], 1),
+                'mean_us':       round(1000 * r['ms'] / r['calls'], 1),
+                'share_pct':     round(100 * r['ms'] / total, 1),
+                'io_requests':   r['io'],
+                'io_per_call':   round(r['io'] / r['calls'], 2),
+                'cache_hit_pct': (round(100 * (r['calls'] - r['io_calls']) / r['calls'], 1)
+                                  if r['io'] else None),
+                'hosts':         dict(r['hosts']),
+            })
+        out.sort(key=lambda x: x['total_ms'], reverse=True)
+        return out[:top] if top else out
+
+    def print_report(self, top=15):
+        rows = self.report()
+        if not rows:
+            return
+        total = sum(r['total_ms'] for r in rows)
+        print(f"\n[SignalCost] {len(rows)} signals, {total / 1000:.2f}s scoring, "
+              f"{sum(r['io_requests'] for r in rows)} HTTP requests — top {min(top, len(rows))}:")
+        for r in rows[:top]:
+            io = ''
+            if r['io_requests']:
+                hosts = ', '.join(f'{h}×{n}' for h, n in sorted(r['hosts'].items(), key=lambda kv: -kv[1]))
+                io = f"  io={r['io_requests']} ({r['io_per_call']}/call, cache hit {r['cache_hit_pct']}%) [{hosts}]"
+            print(f"  [SignalCost] {r['signal']:22} {r['total_ms']:9.1f} ms {r['share_pct']:5.1f}%  "
+                  f"n={r['calls']:<5} {r['mean_us']:8.1f} µs/call{io}")
+
+
+signal_costs = SignalCosts()
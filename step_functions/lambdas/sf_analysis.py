@@ -2,22 +2,46 @@
 Lambda: surebet-analysis
 ============================
 Phase : Morning / Refresh
-Input : {"date": "YYYY-MM-DD", "s3_key": "daily/.../response_horses.json"}
-Output: {"success": true, "date": "...", "picks_count": N}
+Input : {"date": "YYYY-MM-DD", "race_card": {...} | null,
+         "s3_key": "daily/.../response_horses.json", "mode": "full" | "prepare" | "shard" | "reduce"}
+Output: {"success": true, "date": "...", "picks_count": N, "stages_ms": {stage: ms}}
 
-1. Downloads response_horses.json from S3 → /tmp/
+1. Loads the card into memory: the race_card ref from surebet-betfair-fetch
+   (race_card.py — one decode, no /tmp file), else response_horses.json from S3
 2. Runs comprehensive 7-factor scoring engine (complete_daily_analysis.py)
 3. Saves all horses + top-5 UI picks to DynamoDB SureBetBets
-4. Returns count of show_in_ui=True picks saved
+4. Rebuilds the day's lay-the-favourite table (lay_scanner → daily/{date}/lay_scan.json)
+5. Returns count of show_in_ui=True picks saved
+
+The morning / refresh machines split that one invocation across a Map over
+course shards, so analysis wall time tracks the biggest meeting rather than
+the number of meetings:
+
+  prepare  card → S3-backed race_card ref (one byte range per course) and the
+           day-wide inputs (horse history, SL declared fields, pinned config,
+           calibration table, OurHub data), once, to daily/{date}/analysis/{run_id}/
+           → {"race_card": ref, "inputs_key": key}
+  shard    one course: score_races() (Pass 1, no writes) → the part to
+           daily/{date}/analysis/{run_id}/{course}.bin
+           → {"course", "races", "runners", "result_key", "stages_ms"}
+  reduce   {"shards": [shard outputs]}: select_and_save() over every part —
+           intraday accumulation guard, cross-race top-5, Pass 2 writes,
+           manifest, notify — then the lay scan; same output as full.
+           A failed shard's races are left out of the scrape, so the guard
+           keeps whatever picks they already had.
 
 Bundled source files required in zip:
   complete_daily_analysis.py, comprehensive_pick_logic.py,
-  form_enricher.py, notify_picks.py, weather_going_inference.py
+  form_enricher.py, notify_picks.py, weather_going_inference.py, going_service.py,
+  lay_scanner.py, market_model.py, race_card.py
 """
 
 import os
+import re
 import sys
+import gzip
 import json
+import time
 import datetime
 import boto3
 from boto3.dynamodb.conditions import Key, Attr
@@ -28,42 +52,182 @@ REGION = os.environ.get('AWS_DEFAULT_REGION', 'eu-west-1')
 sys.path.insert(0, '/var/task')
 
 
+def _run_prefix(date_str, run_id):
+    return f'daily/{date_str}/analysis/{run_id}'
+
+
+def _load_card(event, date_str, s3):
+    card = event.get('race_card')
+    if card:
+        import race_card
+        races = race_card.load(card, s3=s3)
+        print(f"[sf_analysis] Race card: {len(races)} races from {len(card['shards'])} shard(s)"
+              f" ({'s3' if card.get('s3_key') else 'inline'})")
+        return races
+    s3_key = event.get('s3_key', f'daily/{date_str}/response_horses.json')
+    print(f"[sf_analysis] Downloading s3://{BUCKET}/{s3_key} ...")
+    obj = s3.get_object(Bucket=BUCKET, Key=s3_key)
+    return json.loads(obj['Body'].read()).get('races', [])
+
+
+def _count_ui_picks(date_str):
+    db    = boto3.resource('dynamodb', region_name=REGION)
+    table = db.Table('SureBetBets')
+    kwargs = {'KeyConditionExpression': Key('bet_date').eq(date_str),
+              'FilterExpression':       Attr('show_in_ui').eq(True)}
+    count = 0
+    while True:
+        resp = table.query(**kwargs)
+        count += len(resp.get('Items', []))
+        if not resp.get('LastEvaluatedKey'):
+            return count
+        kwargs['ExclusiveStartKey'] = resp['LastEvaluatedKey']
+
+
+def _lay_scan(date_str, races):
+    # ── Lay-the-favourite table (non-fatal) ──────────────────────────────────
+    try:
+        import lay_scanner
+        lay_scanner.scan_and_store(date_str, races=races)
+    except Exception as e:
+        print(f"[sf_analysis] Lay scan skipped: {e}")
+
+
+def _prepare(event, date_str, s3):
+    """Card as an S3-backed ref — each Map iteration then carries a few hundred
+    bytes of state, not the inline card — plus the day-wide scoring inputs,
+    loaded once for every shard."""
+    import race_card
+    from complete_daily_analysis import load_day_inputs
+    run_id = event.get('run_id', 'adhoc')
+    card   = event.get('race_card')
+    if not card or not card.get('s3_key'):
+        card = race_card.pack(_load_card(event, date_str, s3), date_str, inline_limit=0, s3=s3)
+
+    inputs = load_day_inputs()
+    inputs['sl_declared'] = [[c, t, n] for (c, t), n in inputs['sl_declared'].items()]   # tuple keys
+    inputs_key = f'{_run_prefix(date_str, run_id)}/day_inputs.json.gz'
+    s3.put_object(Bucket=BUCKET, Key=inputs_key, ContentType='application/json', ContentEncoding='gzip',
+                  Body=gzip.compress(json.dumps(inputs, separators=(',', ':'), default=str).encode('utf-8')))
+    print(f"[sf_analysis] Prepared {card['races']} races in {len(card['shards'])} course shard(s), "
+          f"config v{inputs['snapshot']['version']}, {len(inputs['horse_history'])} horses of history")
+    return {'success': True, 'date': date_str, 'race_card': card, 'inputs_key': inputs_key}
+
+
+def _shard(event, date_str, s3):
+    """Pass 1 over one course; the part goes to S3 (Map results share the 256 KB state limit)."""
+    import race_card
+    from complete_daily_analysis import score_races, pack_part
+    from stage_profiler import StageTimer
+    t0     = time.perf_counter()
+    course = event['course']
+    timer  = StageTimer('analysis_shard')
+    with timer.stage('load_races'):
+        races = race_card.load(event['race_card'], courses=[course], s3=s3)
+    inputs = {}
+    if event.get('inputs_key'):
+        with timer.stage('day_inputs'):
+            body = s3.get_object(Bucket=BUCKET, Key=event['inputs_key'])['Body'].read()
+            inputs = json.loads(gzip.decompress(body))
+            inputs['sl_declared'] = {(c, t): n for c, t, n in inputs['sl_declared']}
+    print(f"[sf_analysis] Shard {course}: scoring {len(races)} race(s)")
+    part = score_races(races, timer, **inputs)
+
+    slug = re.sub(r'[^a-z0-9]+', '-', course.lower()).strip('-') or 'all'
+    result_key = f"{_run_prefix(date_str, event.get('run_id', 'adhoc'))}/{slug}.bin"
+    with timer.stage('save_part'):
+        s3.put_object(Bucket=BUCKET, Key=result_key, Body=pack_part(part),
+                      ContentType='application/octet-stream')
+    return {
+        'success'    : True,
+        'course'     : course,
+        'races'      : len(part['races']),
+        'runners'    : sum(len(rd['runners']) for rd in part['races']),
+        'result_key' : result_key,
+        'ms'         : round((time.perf_counter() - t0) * 1000, 1),
+        'stages_ms'  : timer.summary()['stages_ms'],
+    }
+
+
+def _reduce(event, date_str, s3):
+    """The cross-race step over every shard part, then the lay scan."""
+    import race_card
+    from complete_daily_analysis import select_and_save, unpack_part
+    from stage_profiler import StageTimer
+    shards = event.get('shards') or []
+    failed = [s.get('course') for s in shards if s.get('failed') or not s.get('result_key')]
+    timer  = StageTimer('analysis')
+    parts  = []
+    with timer.stage('load_parts'):
+        for shard in shards:
+            if shard.get('failed') or not shard.get('result_key'):
+                continue
+            body = s3.get_object(Bucket=BUCKET, Key=shard['result_key'])['Body'].read()
+            parts.append(unpack_part(body))
+            timer.add('shard_total', shard.get('ms', 0.0))
+            for stage, ms in (shard.get('stages_ms') or {}).items():
+                timer.add(f'shard_{stage}', ms)
+    if failed:
+        print(f"[sf_analysis] {len(failed)} shard(s) failed, their picks are left as they were: {failed}")
+    if shards and not parts:
+        raise RuntimeError(f'All {len(shards)} analysis shard(s) failed')
+
+    summary = {}
+    if any(p['races'] for p in parts):
+        print(f"[sf_analysis] Selecting top picks across {len(parts)} course shard(s) for {date_str} ...")
+        summary = select_and_save(parts, timer) or {}
+    else:
+        print("[sf_analysis] No races scored — nothing to select")
+
+    if event.get('race_card'):
+        _lay_scan(date_str, race_card.load(event['race_card'], s3=s3))
+
+    picks_count = _count_ui_picks(date_str)
+    print(f"[sf_analysis] Done — {picks_count} UI pick(s) saved for {date_str}")
+    return {
+        'success'       : True,
+        'date'          : date_str,
+        'picks_count'   : picks_count,
+        'shards_failed' : failed,
+        'stages_ms'     : (summary.get('timing') or {}).get('stages_ms', {}),
+    }
+
+
 def lambda_handler(event, context):
     date_str = event.get('date', datetime.datetime.utcnow().strftime('%Y-%m-%d'))
-    # Accept s3_key from upstream or build it
-    s3_key   = event.get('s3_key', f'daily/{date_str}/response_horses.json')
+    mode     = event.get('mode', 'full')
 
     # /tmp is writable; chdir there so relative paths in complete_daily_analysis work
     os.makedirs('/tmp', exist_ok=True)
     os.chdir('/tmp')
 
-    # ── Download races from S3 ────────────────────────────────────────────────
     s3 = boto3.client('s3', region_name=REGION)
-    print(f"[sf_analysis] Downloading s3://{BUCKET}/{s3_key} ...")
-    obj        = s3.get_object(Bucket=BUCKET, Key=s3_key)
-    races_data = json.loads(obj['Body'].read().decode('utf-8'))
+    if mode == 'prepare':
+        return _prepare(event, date_str, s3)
+    if mode == 'shard':
+        return _shard(event, date_str, s3)
+    if mode == 'reduce':
+        return _reduce(event, date_str, s3)
+    if mode != 'full':
+        raise ValueError(f'Unknown analysis mode {mode!r}')
 
-    with open('/tmp/response_horses.json', 'w') as fh:
-        json.dump(races_data, fh)
+    # ── Load races into memory ───────────────────────────────────────────────
+    races = _load_card(event, date_str, s3)
 
     # ── Run analysis ─────────────────────────────────────────────────────────
-    # complete_daily_analysis reads 'response_horses.json' from cwd (/tmp)
     from complete_daily_analysis import analyze_and_save_all
     print(f"[sf_analysis] Scoring all horses and selecting top picks for {date_str} ...")
-    analyze_and_save_all()
+    summary = analyze_and_save_all(races=races) or {}
+
+    _lay_scan(date_str, races)
 
     # ── Count saved UI picks ──────────────────────────────────────────────────
-    db    = boto3.resource('dynamodb', region_name=REGION)
-    table = db.Table('SureBetBets')
-    resp  = table.query(
-        KeyConditionExpression = Key('bet_date').eq(date_str),
-        FilterExpression       = Attr('show_in_ui').eq(True),
-    )
-    picks_count = len(resp.get('Items', []))
+    picks_count = _count_ui_picks(date_str)
     print(f"[sf_analysis] Done — {picks_count} UI pick(s) saved for {date_str}")
 
     return {
         'success'     : True,
         'date'        : date_str,
         'picks_count' : picks_count,
+        'stages_ms'   : (summary.get('timing') or {}).get('stages_ms', {}),
     }
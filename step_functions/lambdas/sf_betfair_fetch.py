@@ -3,12 +3,17 @@ Lambda: surebet-betfair-fetch
 ===================================
 Phase : Morning / Refresh
 Input : {"date": "YYYY-MM-DD"}   (optional — defaults to today UTC)
-Output: {"success": true, "date": "...", "race_count": N, "s3_key": "..."}
+Output: {"success": true, "date": "...", "race_count": N, "s3_key": "...",
+         "race_card": {...}}
 
 Fetches UK/IRE horse-racing markets from Betfair Exchange (next 24h),
-writes price-movement data, then uploads
+writes price-movement data, prewarms the dated going cache
+(daily/{date}/going_cache.json), then hands the card to the downstream
+analysis Lambda as a race_card ref (compressed per-course shards, inline in
+the state when small enough — race_card.py).  The full card is still
+archived at
   s3://surebet-pipeline-data/daily/{date}/response_horses.json
-for the downstream analysis Lambda.
+for lay_scanner and the health checks.
 
 Credentials: AWS Secrets Manager  → 'betfair-credentials'
              {username, password, app_key}
@@ -136,6 +141,16 @@ def lambda_handler(event, context):
         except Exception as e:
             print(f"[sf_betfair_fetch] Warning: could not save morning snapshot: {e}")
 
+    # ── GOING PREWARM: one batched weather call for today's courses ───────────
+    # Persisted to s3://.../daily/{date}/going_cache.json so surebet-analysis
+    # (and every refresh) reads it instead of fetching per track.
+    try:
+        from going_service import prewarm_going
+        courses = sorted({(r.get('course') or r.get('venue') or '') for r in races} - {''})
+        prewarm_going(courses, date_str)
+    except Exception as e:
+        print(f"[sf_betfair_fetch] Warning: going prewarm failed: {e}")
+
     payload_bytes = json.dumps({'races': races}, default=_serialize).encode('utf-8')
 
     key = f'daily/{date_str}/response_horses.json'
@@ -147,10 +162,21 @@ def lambda_handler(event, context):
     )
 
     print(f"[sf_betfair_fetch] Saved {len(races)} races → s3://{BUCKET}/{key}")
+
+    # ── RACE CARD HANDOFF: compact ref for surebet-analysis ──────────────────
+    # Falls back to the s3_key above if packing fails (analysis accepts both).
+    card = None
+    try:
+        import race_card
+        card = race_card.pack(races, date_str, s3=s3)
+    except Exception as e:
+        print(f"[sf_betfair_fetch] Warning: race card pack failed (analysis reads s3_key): {e}")
+
     return {
         'success'   : True,
         'date'      : date_str,
         'race_count': len(races),
         's3_key'    : key,
+        'race_card' : card,
         'run_type'  : run_type,
     }
@@ -3,14 +3,17 @@ Lambda: surebet-fav-results
 ============================
 Phase : Evening (runs after FetchSLResults, before FetchResults)
 Input : {"date": "YYYY-MM-DD"}
-Output: {"success": true, "date": "...", "races_processed": N, "favs_updated": N}
+Output: {"success": true, "date": "...", "races_processed": N, "favs_updated": N, "lay_settled": N}
 
 For every race on the given date this Lambda:
   1. Queries ALL DynamoDB runners (no show_in_ui filter) — to find each race's favourite
-  2. Fetches the Sporting Life fast-results winner map (one HTTP request)
+  2. Fetches the Sporting Life fast-results winner map (one HTTP request, via
+     lay_scanner's shared cache — the same map the API and favs_run CLI use)
   3. Determines whether the favourite won or lost
   4. Writes  fav_outcome = 'win' | 'loss'  and  race_winner_name  back to the
-     favourite's DynamoDB row so that the /api/favs-run endpoint can display it.
+     favourite's DynamoDB row.
+  5. Settles the stored lay table (lay_scanner, daily/{date}/lay_scan.json) from
+     the same winner map — that table is what /api/favs-run serves.
 
 This is intentionally lightweight — it does not touch any pick selection logic,
 weights, or learning data.
@@ -18,7 +21,6 @@ weights, or learning data.
 
 import concurrent.futures
 import datetime
-import json
 import os
 import re
 import urllib.request
@@ -27,6 +29,8 @@ from decimal import Decimal
 import boto3
 from boto3.dynamodb.conditions import Key
 
+import lay_scanner
+
 REGION = os.environ.get('AWS_DEFAULT_REGION', 'eu-west-1')
 SL_BASE = 'https://www.sportinglife.com'
 _SL_HEADERS = {
@@ -52,46 +56,6 @@ def _floatify(o):
     return o
 
 
-# ── Odds → decimal ──────────────────────────────────────────────────────────
-
-def _odds_dec(odds):
-    if odds is None:
-        return None
-    try:
-        return float(odds)
-    except (TypeError, ValueError):
-        pass
-    try:
-        s = str(odds).strip()
-        if '/' in s:
-            n, d = s.split('/')
-            return float(n) / float(d) + 1.0
-    except Exception:
-        pass
-    return None
-
-
-# ── UTC → UK local (BST = UTC+1, late Mar–late Oct) ─────────────────────────
-
-def _utc_to_local_hhmm(utc_hhmm: str, date_str: str) -> str:
-    try:
-        from datetime import date as _d
-        d = _d.fromisoformat(date_str[:10])
-        bst_start = _d(d.year, 3, 31)
-        while bst_start.weekday() != 6:
-            bst_start = _d(bst_start.year, bst_start.month, bst_start.day - 1)
-        bst_end = _d(d.year, 10, 31)
-        while bst_end.weekday() != 6:
-            bst_end = _d(bst_end.year, bst_end.month, bst_end.day - 1)
-        if not (bst_start <= d < bst_end):
-            return utc_hhmm
-        h, mn = map(int, utc_hhmm.split(':'))
-        total = h * 60 + mn + 60
-        return f'{(total // 60) % 24:02d}:{total % 60:02d}'
-    except Exception:
-        return utc_hhmm
-
-
 # ── Shared HTTP helper ───────────────────────────────────────────────────────
 
 def _sl_http(url: str) -> str:
@@ -189,52 +153,10 @@ def _fetch_per_race_winners(date_str: str, limit_courses=None) -> dict:
     return extra
 
 
-# ── Fetch SL fast-results → {(course_lower, local_hhmm): winner_name} ───────
-
-def _fetch_sl_winner_map() -> dict:
-    url = 'https://www.sportinglife.com/racing/fast-results/all'
-    try:
-        req = urllib.request.Request(url, headers=_SL_HEADERS)
-        with urllib.request.urlopen(req, timeout=20) as resp:
-            html = resp.read().decode('utf-8', errors='replace')
-    except Exception as e:
-        print(f'[fav_results] SL fetch error: {e}')
-        return {}
-
-    m = re.search(r'<script id="__NEXT_DATA__"[^>]*>(.*?)</script>', html, re.DOTALL)
-    if not m:
-        return {}
-    try:
-        data = json.loads(m.group(1))
-    except Exception:
-        return {}
-
-    fast = data.get('props', {}).get('pageProps', {}).get('fastResults', [])
-    winner_map: dict = {}
-    for fr in fast:
-        top_horses = fr.get('top_horses')
-        if not top_horses:
-            continue
-        course   = fr.get('courseName', '')
-        off_time = fr.get('time', '')
-        if not course or not off_time:
-            continue
-        sorted_h = sorted(top_horses, key=lambda h: h.get('position', 99))
-        winner   = sorted_h[0].get('horse_name', '') if sorted_h else ''
-        winner   = re.sub(r'\s*\([A-Z]{2,3}\)\s*$', '', winner).strip()
-        if winner:
-            winner_map[(course.lower().replace('-', ' ').strip(), off_time)] = winner
-
-    print(f'[fav_results] SL winner_map: {len(winner_map)} completed races')
-    return winner_map
-
+# ── Favourite outcome from the race winner ────────────────────────────────────
 
-# ── Normalise horse name for comparison ──────────────────────────────────────
-
-def _norm_horse(name: str) -> str:
-    n = re.sub(r'\s*\([A-Z]{2,3}\)\s*$', '', name or '').strip().lower()
-    n = re.sub(r"['\-]", '', n)
-    return re.sub(r'\s+', ' ', n).strip()
+def _fav_outcome(winner_name: str, fav_name: str) -> str:
+    return 'win' if lay_scanner.norm_name(winner_name) == lay_scanner.norm_name(fav_name) else 'loss'
 
 
 # ── Main Lambda handler ───────────────────────────────────────────────────────
@@ -261,8 +183,8 @@ def lambda_handler(event, context):
     if not all_items:
         return {'success': True, 'date': date_str, 'races_processed': 0, 'favs_updated': 0}
 
-    # ── 2. Fetch SL winner map ────────────────────────────────────────────────
-    winner_map = _fetch_sl_winner_map()
+    # ── 2. Fetch SL winner map (lay_scanner's shared fast-results cache) ─────
+    winner_map = lay_scanner.sl_winner_map()
 
     # ── 3. Group runners by race (race_time + course) ─────────────────────────
     races: dict = {}
@@ -274,14 +196,14 @@ def lambda_handler(event, context):
 
     races_processed = 0
     favs_updated    = 0
-    unresolved_races = []   # (fav_name, fav_bet_id, race_hhmm, course_key)
+    unresolved_races = []   # (fav_name, fav_bet_id, race_time, course)
 
     for race_key, runners in sorted(races.items()):
         rt, course = race_key.split('|', 1)
 
         # Find favourite — lowest decimal odds runner (skip odds<=0 = missing data)
         def _sort_odds(h):
-            o = _odds_dec(h.get('odds') or h.get('decimal_odds'))
+            o = lay_scanner.odds_to_decimal(h.get('odds') or h.get('decimal_odds'))
             return o if o is not None and o > 0 else 99.0
 
         runners_sorted = sorted(runners, key=_sort_odds)
@@ -308,32 +230,16 @@ def lambda_handler(event, context):
                 continue
 
         # ── Resolve winner from SL winner_map ────────────────────────────────
-        race_hhmm  = rt[11:16] if len(rt) >= 16 else ''
-        course_key = course.lower().replace('-', ' ').strip()
+        # SL off times are UK local; our race_time is UTC — match_winner converts
+        race_hhmm  = lay_scanner.local_hhmm(rt, date_str) if len(rt) >= 16 else ''
 
         winner_name  = None
         fav_outcome  = None
 
         try:
-            lh, lm       = map(int, race_hhmm.split(':'))
-            local_mins   = lh * 60 + lm
-            best_diff    = 999
-            best_winner  = None
-            for (c_key, t_key), w_name in winner_map.items():
-                if c_key != course_key:
-                    continue
-                wh, wm = map(int, t_key.split(':'))
-                diff = abs((wh * 60 + wm) - local_mins)
-                if diff < best_diff:
-                    best_diff = diff
-                    best_winner = w_name.strip()
-            if best_winner and best_diff <= 10:
-                winner_name = best_winner
-                fav_outcome = (
-                    'win'
-                    if _norm_horse(winner_name) == _norm_horse(fav_name)
-                    else 'loss'
-                )
+            winner_name = lay_scanner.match_winner(winner_map, course, rt, date_str)
+            if winner_name:
+                fav_outcome = _fav_outcome(winner_name, fav_name)
         except Exception as ex:
             print(f'  [fav_results] matching error {course} {race_hhmm}: {ex}')
 
@@ -343,26 +249,18 @@ def lambda_handler(event, context):
                 h_outcome = str(h.get('outcome') or '').lower()
                 if h_outcome in ('win', 'won'):
                     winner_name = (h.get('horse') or h.get('horse_name') or '').strip()
-                    fav_outcome = (
-                        'win'
-                        if _norm_horse(winner_name) == _norm_horse(fav_name)
-                        else 'loss'
-                    )
+                    fav_outcome = _fav_outcome(winner_name, fav_name)
                     break
                 # sl_results_fetcher writes result_winner_name to every settled pick in the race
                 rw = (h.get('result_winner_name') or h.get('winner_name') or '').strip()
                 if rw and not winner_name:
                     winner_name = rw
-                    fav_outcome = (
-                        'win'
-                        if _norm_horse(rw) == _norm_horse(fav_name)
-                        else 'loss'
-                    )
+                    fav_outcome = _fav_outcome(rw, fav_name)
                     break
 
         if fav_outcome is None:
             # Collect for per-race HTML scraping fallback (3rd tier)
-            unresolved_races.append((fav_name, fav_bet_id, race_hhmm, course_key))
+            unresolved_races.append((fav_name, fav_bet_id, rt, course))
             continue
 
         # ── Write fav_outcome + race_winner_name to DynamoDB ────────────────
@@ -382,49 +280,32 @@ def lambda_handler(event, context):
             )
             favs_updated += 1
             result_label = '✓ FAV LOST (LAY WIN)' if fav_outcome == 'loss' else '✗ FAV WON'
-            print(f'  [fav_results] {result_label}: {fav_name} @ {course} {local_hhmm} (winner: {winner_name})')
+            print(f'  [fav_results] {result_label}: {fav_name} @ {course} {race_hhmm} (winner: {winner_name})')
         except Exception as ex:
             print(f'  [fav_results] DynamoDB write error for {fav_name}: {ex}')
 
     # ── 3rd tier: per-race HTML scraping for unresolved favourites ─────────────
+    # Same {(course_lower, local_hhmm): winner} shape as the fast-results map, so
+    # lay_scanner.match_winner does the course / off-time matching here too.
     if unresolved_races:
-        unresolved_courses = {r[3] for r in unresolved_races}
+        unresolved_courses = {lay_scanner.race_key(rt, course)[1] for _, _, rt, course in unresolved_races}
         print(f'[fav_results] per-race fallback for {len(unresolved_races)} unresolved races '
               f'at: {", ".join(sorted(unresolved_courses))}')
         extra_map = _fetch_per_race_winners(date_str, limit_courses=unresolved_courses)
 
-        for (fav_name, fav_bet_id, race_hhmm, course_key) in unresolved_races:
+        for (fav_name, fav_bet_id, rt, course) in unresolved_races:
+            race_hhmm   = lay_scanner.local_hhmm(rt, date_str) if len(rt) >= 16 else ''
             winner_name = None
             fav_outcome = None
-            if extra_map and race_hhmm:
-                try:
-                    lh, lm = map(int, race_hhmm.split(':'))
-                    local_mins = lh * 60 + lm
-                    best_diff = 999
-                    best_winner = None
-                    for (c_key, t_key), w_name in extra_map.items():
-                        if c_key != course_key:
-                            continue
-                        try:
-                            wh, wm = map(int, t_key.split(':'))
-                            diff = abs((wh * 60 + wm) - local_mins)
-                            if diff < best_diff:
-                                best_diff = diff
-                                best_winner = w_name.strip()
-                        except ValueError:
-                            pass
-                    if best_winner and best_diff <= 10:
-                        winner_name = best_winner
-                        fav_outcome = (
-                            'win'
-                            if _norm_horse(winner_name) == _norm_horse(fav_name)
-                            else 'loss'
-                        )
-                except Exception as ex:
-                    print(f'  [fav_results] per-race match error {fav_name}: {ex}')
+            try:
+                winner_name = lay_scanner.match_winner(extra_map, course, rt, date_str)
+                if winner_name:
+                    fav_outcome = _fav_outcome(winner_name, fav_name)
+            except Exception as ex:
+                print(f'  [fav_results] per-race match error {fav_name}: {ex}')
 
             if fav_outcome is None:
-                print(f'  [fav_results] Still unresolved: {fav_name} @ {course_key} {race_hhmm}')
+                print(f'  [fav_results] Still unresolved: {fav_name} @ {course} {race_hhmm}')
                 continue
 
             expr_vals = {':fo': fav_outcome}
@@ -440,15 +321,23 @@ def lambda_handler(event, context):
                 )
                 favs_updated += 1
                 result_label = '✓ FAV LOST (LAY WIN)' if fav_outcome == 'loss' else '✗ FAV WON'
-                print(f'  [fav_results] {result_label}: {fav_name} @ {course_key} {race_hhmm} '
+                print(f'  [fav_results] {result_label}: {fav_name} @ {course} {race_hhmm} '
                       f'(winner: {winner_name}) [per-race scrape]')
             except Exception as ex:
                 print(f'  [fav_results] DynamoDB write error for {fav_name}: {ex}')
 
+    # ── Settle the stored lay table from the same winner map (non-fatal) ──────
+    lay_settled = 0
+    try:
+        lay_settled = lay_scanner.settle(date_str, winner_map, all_items)
+    except Exception as ex:
+        print(f'[fav_results] lay table settle skipped: {ex}')
+
     print(f'[fav_results] Done — {races_processed} races, {favs_updated} fav outcomes written')
     return {
         'success'        : True,
         'date'           : date_str,
         'races_processed': races_processed,
         'favs_updated'   : favs_updated,
+        'lay_settled'    : lay_settled,
     }
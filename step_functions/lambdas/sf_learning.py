@@ -5,14 +5,17 @@ Phase : Learning (nightly)
 Input : {"date": "YYYY-MM-DD"}   (optional — used for logging only)
 Output: {"success": true, "results_scanned": N, "patterns_found": N, "insights": [...]}
 
-1. Scans DynamoDB SureBetBets for the last 7 days of settled picks
+1. Refreshes the shared settled-picks dataset (settled_picks.py — queries only
+   the days after its high-water mark) and takes the last 7 days of UI picks
 2. Calls learning_engine.analyze_performance_patterns()
 3. Calls learning_engine.generate_learning_insights()
 4. Persists updated weights / insights to DynamoDB under
       bet_date='LEARNING_INSIGHTS', bet_id='latest'
-5. Returns a compact summary
+5. Refits the score → win-probability tables (score_calibration.py) from the
+   same dataset and records their drift against the last 30 days
+6. Returns a compact summary
 
-Bundled source: learning_engine.py
+Bundled source: learning_engine.py, settled_picks.py, pick_record.py, score_calibration.py
 """
 
 import os
@@ -20,7 +23,6 @@ import sys
 import json
 import datetime
 import boto3
-from boto3.dynamodb.conditions import Key, Attr
 from decimal import Decimal
 from collections import defaultdict
 
@@ -32,61 +34,13 @@ sys.path.insert(0, '/var/task')
 
 # ── DynamoDB helpers ──────────────────────────────────────────────────────────
 
-def _load_results_from_dynamodb(table):
-    """Query last DAYS_BACK days of settled picks from DynamoDB by bet_date."""
-    today   = datetime.datetime.utcnow().date()
-    results = []
-    SETTLED = {'win', 'won', 'WIN', 'loss', 'lost', 'LOSS', 'placed', 'PLACED'}
-
-    for days_ago in range(DAYS_BACK):
-        d = (today - datetime.timedelta(days=days_ago)).isoformat()
-        kwargs = {
-            'KeyConditionExpression': Key('bet_date').eq(d),
-            'FilterExpression': Attr('show_in_ui').eq(True),
-        }
-        while True:
-            resp  = table.query(**kwargs)
-            items = resp.get('Items', [])
-            for item in items:
-                outcome = str(item.get('outcome', '')).lower().strip()
-                if outcome not in {'win', 'won', 'loss', 'lost', 'placed'}:
-                    continue  # skip pending / unresolved
-
-                def _f(v):
-                    try: return float(v)
-                    except: return 0.0
-
-                is_winner = outcome in ('win', 'won')
-                is_placed = outcome in ('win', 'won', 'placed')
-
-                results.append({
-                    'date'  : item.get('bet_date', d),
-                    'sport' : item.get('sport', 'horses'),
-                    'selection': {
-                        'selection_id' : item.get('selection_id', ''),
-                        'runner_name'  : item.get('horse', item.get('dog', '')),
-                        'venue'        : item.get('course', ''),
-                        'odds'         : _f(item.get('odds')),
-                        'bet_type'     : item.get('bet_type', 'WIN'),
-                        'confidence'   : _f(item.get('comprehensive_score', item.get('confidence'))),
-                        'tags'         : item.get('tags', ''),
-                        'why_now'      : item.get('why_now', ''),
-                        'stake'        : _f(item.get('stake', 10)),
-                    },
-                    'result': {
-                        'is_winner'      : is_winner,
-                        'is_placed'      : is_placed,
-                        'final_odds'     : _f(item.get('odds')),
-                        'actual_position': item.get('actual_position'),
-                        'profit_loss'    : _f(item.get('profit_loss')),
-                    },
-                })
-            lk = resp.get('LastEvaluatedKey')
-            if not lk:
-                break
-            kwargs['ExclusiveStartKey'] = lk
-
-    return results
+def _load_results():
+    """Last DAYS_BACK days of settled UI picks from the shared settled-picks dataset.
+    refresh() re-queries only the days after its high-water mark and republishes
+    the dataset to S3 for the other learning jobs."""
+    import settled_picks
+    settled_picks.load(max_age_s=0)
+    return settled_picks.learning_results(days_back=DAYS_BACK, ui_only=True)
 
 
 def _persist_insights(table, insights, date_str):
@@ -109,7 +63,7 @@ def lambda_handler(event, context):
     table = db.Table('SureBetBets')
 
     print(f"[sf_learning] Loading results for last {DAYS_BACK} days ...")
-    results = _load_results_from_dynamodb(table)
+    results = _load_results()
     print(f"[sf_learning] {len(results)} settled picks found")
 
     if not results:
@@ -131,6 +85,14 @@ def lambda_handler(event, context):
         for v in analysis.values()
     ) if isinstance(analysis, dict) else 0
 
+    # Refit the calibration table the next analysis run loads (non-fatal)
+    drift = None
+    try:
+        import score_calibration
+        drift = (score_calibration.fit() or {}).get('drift')
+    except Exception as e:
+        print(f"[sf_learning] Calibration fit failed: {e}")
+
     # Compact insight summaries for Step Functions output
     insight_summaries = [str(i)[:200] for i in (insights or [])[:10]]
 
@@ -141,4 +103,6 @@ def lambda_handler(event, context):
         'results_scanned' : len(results),
         'patterns_found'  : patterns_found,
         'insights'        : insight_summaries,
+        'calibration_error': (drift or {}).get('mean_abs_error'),
+        'drifted_bands'   : (drift or {}).get('drifted_bands', []),
     }
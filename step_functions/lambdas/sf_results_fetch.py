@@ -134,6 +134,7 @@ def lambda_handler(event, context):
 
     recorded = 0
     winners  = 0
+    deltas   = []
 
     for pick in picks:
         market_id    = str(pick.get('market_id', ''))
@@ -164,9 +165,16 @@ def lambda_handler(event, context):
         recorded += 1
         if won:
             winners += 1
+        if pick.get('show_in_ui'):
+            deltas.append({'bet_id': pick['bet_id'], 'outcome': outcome, 'finish_position': None,
+                           'sp_odds': None, 'profit': None, 'winner_horse': result['winner_name']})
 
     print(f"[sf_results_fetch] {recorded} picks updated ({winners} winners) for {date_str}")
 
+    if deltas:
+        from push_events import publish_event
+        publish_event('results', {'results': deltas}, date_str=date_str)
+
     return {
         'success'         : True,
         'date'            : date_str,
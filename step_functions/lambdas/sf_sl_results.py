@@ -3,7 +3,8 @@ Lambda: surebet-sl-results
 ==========================
 Phase : Evening (runs before Betfair results fetch)
 Input : {"date": "YYYY-MM-DD"}
-Output: {"success": true, "date": "...", "results_recorded": N, "winners": N, "source": "sporting_life"}
+Output: {"success": true, "date": "...", "results_recorded": N, "winners": N, "newly_settled": N,
+         "source": "sporting_life"}
 
 Scrapes https://www.sportinglife.com/racing/fast-results/all  (__NEXT_DATA__ JSON)
 to get today's race results, then updates any matching DynamoDB picks with
@@ -14,7 +15,7 @@ ahead of Betfair market settlement — so this runs FIRST in the evening pipelin
 and catches the majority of picks.  The Betfair step that follows cleans up
 any remainder that have a market_id but weren't yet in the SL feed.
 
-Bundled alongside this file in the Lambda ZIP: sl_results_fetcher.py
+Bundled alongside this file in the Lambda ZIP: sl_results_fetcher.py, push_events.py
 """
 
 import datetime
@@ -35,10 +36,10 @@ def lambda_handler(event, context):
         import sl_results_fetcher as slr
 
         # update_results() does everything: fetch SL fast-results, match DynamoDB picks,
-        # write outcome / profit / winner_name and returns (updated, winners)
-        result = slr.update_results(date_str)
+        # write outcome / profit / winner_name; returns the bet_ids it settled this run
+        updated_ids = set(slr.update_results(date_str) or [])
 
-        # update_results returns None (prints inline); count settled picks post-run
+        # Count settled picks post-run
         import boto3
         from boto3.dynamodb.conditions import Key, Attr
         db = boto3.resource('dynamodb', region_name=os.environ.get('AWS_DEFAULT_REGION', 'eu-west-1'))
@@ -52,11 +53,19 @@ def lambda_handler(event, context):
         winners  = [p for p in settled if str(p.get('outcome', '')).lower() in ('win', 'won')]
 
         print(f'[sf_sl_results] Settled: {len(settled)}, Winners: {len(winners)}')
+
+        # Push only the picks this run settled (client merges by bet_id) — the
+        # rest were already pushed by the run that settled them
+        changed = [p for p in settled if p.get('bet_id') in updated_ids]
+        if changed:
+            from push_events import publish_event, result_delta
+            publish_event('results', {'results': [result_delta(p) for p in changed]}, date_str=date_str)
         return {
             'success'         : True,
             'date'            : date_str,
             'results_recorded': len(settled),
             'winners'         : len(winners),
+            'newly_settled'   : len(changed),
             'source'          : 'sporting_life',
         }
 
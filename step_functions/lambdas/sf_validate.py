@@ -16,6 +16,8 @@ import boto3
 from boto3.dynamodb.conditions import Key, Attr
 from decimal import Decimal
 
+import pick_record
+
 REGION    = os.environ.get('AWS_DEFAULT_REGION', 'eu-west-1')
 MIN_FIELD = 2   # minimum runners in all_horses to consider a pick valid
 
@@ -30,7 +32,7 @@ def lambda_handler(event, context):
         KeyConditionExpression = Key('bet_date').eq(date_str),
         FilterExpression       = Attr('show_in_ui').eq(True),
     )
-    picks = resp.get('Items', [])
+    picks = [pick_record.expand_heavy(i) for i in resp.get('Items', [])]
 
     if not picks:
         raise RuntimeError(f"[sf_validate] No show_in_ui picks for {date_str} — analysis may have failed")
@@ -3,9 +3,16 @@ surebet_orchestrator.py
 ========================
 Master orchestration script.  Every daily pipeline phase is defined here with:
   • the script to run
+  • its dependencies within the phase (steps with none pending run in parallel)
   • a success verifier (checks exit-code AND output patterns AND DynamoDB state)
-  • an abort flag (True = stop the phase on failure)
-  • a notification flag (True = email/log prominently on failure)
+  • an abort flag (True = skip everything downstream of the step on failure)
+  • timeout / retries
+
+A phase runs as a DAG through pipeline_scheduler: in this process, with
+shared modules and boto3 clients warmed once, so a phase takes the time of
+its critical path rather than the sum of its steps.  The scheduler's run
+manifest (per-step status, runtime, attempts, critical path) is written to
+DynamoDB under ORCH_MANIFEST.
 
 Usage
 -----
@@ -16,6 +23,7 @@ Usage
   python surebet_orchestrator.py --phase learning    # Phase 6:   learning cycle
   python surebet_orchestrator.py --status            # Print current pipeline state only
   python surebet_orchestrator.py --dry-run           # List all steps, do not execute
+  python surebet_orchestrator.py --isolate           # One subprocess per step (old behaviour)
 
 Designed to be called by Windows Task Scheduler:
   08:30 → --phase morning
@@ -27,17 +35,15 @@ Designed to be called by Windows Task Scheduler:
 import argparse
 import json
 import os
-import re
-import subprocess
 import sys
-import traceback
 from datetime import datetime, timezone
-from decimal import Decimal
 from pathlib import Path
 
 import boto3
 from boto3.dynamodb.conditions import Key
 
+import pipeline_scheduler
+
 # ── Config ─────────────────────────────────────────────────────────────────────
 BASE_DIR     = Path(__file__).parent
 PYTHON       = str(BASE_DIR / ".venv" / "Scripts" / "python.exe")
@@ -45,6 +51,9 @@ LOG_FILE     = BASE_DIR / "orchestrator.log"
 REGION       = "eu-west-1"
 TABLE_NAME   = "SureBetBets"
 MANIFEST_KEY = "ORCH_MANIFEST"   # bet_date for orchestrator status records
+MAX_WORKERS  = 4
+# Imported once before a phase so every in-process step finds them warm
+WARM_MODULES = ("boto3", "config_snapshot", "pick_record", "market_model", "score_calibration")
 
 # ── DynamoDB ───────────────────────────────────────────────────────────────────
 try:
@@ -70,18 +79,27 @@ def log(msg: str, level: str = "INFO"):
 # ── Pipeline phase definitions ─────────────────────────────────────────────────
 #
 # Each step dict:
+#   id              str    – unique within the phase; referenced by `after`
+#   after           list   – ids this step needs (same phase); [] = starts immediately
 #   script          str    – filename relative to BASE_DIR (or None for built-in checks)
 #   label           str    – human-readable description
-#   abort_on_fail   bool   – stop the current phase if this step fails
+#   abort_on_fail   bool   – skip every step downstream of this one if it fails
 #   output_checks   list   – strings that must appear in stdout for pass; empty = not checked
 #   min_runtime_s   float  – fail if script finishes faster than this (catches silent crashes)
 #   phase           str    – which --phase this step belongs to
+#   est_s           float  – typical runtime; orders ready steps by critical-path length
+#   timeout_s       float  – per attempt (default 600)
+#   retries         int    – extra attempts after a failure (default 0); give such
+#                            steps isolate — an in-process timeout is not retried
+#   isolate         bool   – run in a subprocess instead of in-process
 #   builtin         str    – name of built-in verifier function (if no script)
 
 STEPS = [
     # ── MORNING PHASE ──────────────────────────────────────────────────────────
     {
         "phase": "morning",
+        "id": "health",
+        "after": [],
         "script": "daily_health_check.py",
         "label": "Pre-flight health check",
         "abort_on_fail": True,
@@ -90,32 +108,47 @@ STEPS = [
     },
     {
         "phase": "morning",
+        "id": "betfair",
+        "after": ["health"],
         "script": "betfair_odds_fetcher.py",
         "label": "Fetch Betfair odds",
         "abort_on_fail": True,
         "output_checks": ["response_horses", "races", "runners"],
         "min_runtime_s": 5,
+        "est_s": 30,
+        "retries": 1,
+        "isolate": True,               # retried — a subprocess can be killed on timeout
     },
 
     # ── REFRESH PHASE (runs every 2 hours 12-18) ───────────────────────────────
     {
         "phase": "refresh",
+        "id": "betfair",
+        "after": [],
         "script": "betfair_odds_fetcher.py",
         "label": "Refresh Betfair odds",
         "abort_on_fail": True,
         "output_checks": ["response_horses", "races", "runners"],
         "min_runtime_s": 5,
+        "est_s": 30,
+        "retries": 1,
+        "isolate": True,               # retried — a subprocess can be killed on timeout
     },
     {
         "phase": "refresh",
+        "id": "analysis",
+        "after": ["betfair"],
         "script": "complete_daily_analysis.py",
         "label": "Score all horses + build top-5 UI picks",
         "abort_on_fail": True,
         "output_checks": ["Saved", "horses", "UI picks"],
         "min_runtime_s": 10,
+        "est_s": 120,
     },
     {
         "phase": "refresh",
+        "id": "validate",
+        "after": ["analysis"],
         "script": "validate_picks.py",
         "label": "Validate pick data completeness",
         "abort_on_fail": False,         # warn but don't abort — picks gate is in Lambda
@@ -124,6 +157,8 @@ STEPS = [
     },
     {
         "phase": "refresh",
+        "id": "notify",
+        "after": ["analysis"],
         "script": "notify_picks.py",
         "label": "Send pick notifications",
         "abort_on_fail": False,
@@ -134,6 +169,8 @@ STEPS = [
     # ── EVENING PHASE (20:00) ──────────────────────────────────────────────────
     {
         "phase": "evening",
+        "id": "settled",
+        "after": [],
         "script": "fetch_settled_today.py",
         "label": "Fetch settled results for today",
         "abort_on_fail": True,
@@ -142,6 +179,8 @@ STEPS = [
     },
     {
         "phase": "evening",
+        "id": "evaluate",
+        "after": ["settled"],
         "script": "evaluate_performance.py",
         "label": "Evaluate performance + update P&L",
         "abort_on_fail": False,
@@ -150,6 +189,8 @@ STEPS = [
     },
     {
         "phase": "evening",
+        "id": "loss_report",
+        "after": ["settled"],
         "script": "evening_loss_report.py",
         "label": "Generate evening loss report",
         "abort_on_fail": False,
@@ -160,6 +201,8 @@ STEPS = [
     # ── LEARNING PHASE (21:00) ─────────────────────────────────────────────────
     {
         "phase": "learning",
+        "id": "learning",
+        "after": [],
         "script": "daily_learning_cycle.py",
         "label": "Run learning cycle + update weights",
         "abort_on_fail": False,
@@ -169,9 +212,9 @@ STEPS = [
 ]
 
 # ── Script runner ───────────────────────────────────────────────────────────────
-def run_step(step: dict, dry_run: bool = False) -> dict:
+def run_step(step: dict, dry_run: bool = False, isolate: bool = False) -> dict:
     """
-    Run a single pipeline step.
+    Run a single pipeline step (pipeline_scheduler executes it) and verify it.
     Returns {ok, exit_code, stdout, stderr, runtime_s, reason}.
     """
     script = step["script"]
@@ -188,48 +231,50 @@ def run_step(step: dict, dry_run: bool = False) -> dict:
         return result
 
     if dry_run:
-        log(f"DRY-RUN  {label} ({script})", "INFO")
+        deps = ", ".join(step.get("after", [])) or "-"
+        log(f"DRY-RUN  {label} ({script})  after: {deps}", "INFO")
         result["ok"] = True
         return result
 
     log(f"Running  {label} …", "INFO")
-    start = datetime.now(timezone.utc)
+    timeout = step.get("timeout_s", pipeline_scheduler.DEFAULT_TIMEOUT)
     try:
-        proc = subprocess.run(
-            [PYTHON, "-X", "utf8", str(path)],
-            capture_output=True, text=True, encoding="utf-8",
-            cwd=str(BASE_DIR), timeout=600
-        )
-    except subprocess.TimeoutExpired:
-        result["reason"] = "Timed out after 600s"
-        log(f"TIMEOUT  {label}", "ERROR")
-        return result
+        run = pipeline_scheduler.execute_script(
+            path, timeout_s=timeout, isolate=isolate or step.get("isolate", False),
+            python=PYTHON, cwd=str(BASE_DIR))
     except Exception as exc:
         result["reason"] = str(exc)
         log(f"EXEC-ERR {label}: {exc}", "ERROR")
         return result
+    if run["timed_out"]:
+        result["reason"] = f"Timed out after {timeout}s"
+        # An in-process step's thread is still running — a retry would run it twice
+        result["retryable"] = bool(isolate or step.get("isolate", False))
+        log(f"TIMEOUT  {label}", "ERROR")
+        return result
 
-    elapsed = (datetime.now(timezone.utc) - start).total_seconds()
-    result["exit_code"]  = proc.returncode
-    result["stdout"]     = proc.stdout
-    result["stderr"]     = proc.stderr
-    result["runtime_s"]  = round(elapsed, 1)
+    elapsed = run["runtime_s"]
+    stdout  = run["stdout"]
+    result["exit_code"]  = run["exit_code"]
+    result["stdout"]     = stdout
+    result["stderr"]     = run["stderr"]
+    result["runtime_s"]  = elapsed
 
     # Surface key output lines
-    for line in proc.stdout.splitlines():
+    for line in stdout.splitlines():
         kw = ("ERROR", "WARNING", "WARN", "PICK", "✅", "❌", "✓", "✗",
               "saved", "Saved", "HEALTH", "VALIDATE", "total", "Total",
               "UI pick", "learning", "weight", "complete", "PASS", "FAIL")
         if any(k in line for k in kw):
-            log(f"  >> {line.strip()}", "INFO")
+            log(f"  >> [{step['id']}] {line.strip()}", "INFO")
 
     # Check exit code
-    if proc.returncode != 0:
-        result["reason"] = f"Exit code {proc.returncode}"
-        if proc.stderr:
-            tail = proc.stderr.strip()[-500:]
+    if run["exit_code"] != 0:
+        result["reason"] = f"Exit code {run['exit_code']}"
+        if run["stderr"]:
+            tail = run["stderr"].strip()[-500:]
             log(f"  STDERR: {tail}", "ERROR")
-        log(f"FAIL  {label} (exit {proc.returncode})", "ERROR")
+        log(f"FAIL  {label} (exit {run['exit_code']})", "ERROR")
         return result
 
     # Check minimum runtime (catches silent no-op)
@@ -240,7 +285,7 @@ def run_step(step: dict, dry_run: bool = False) -> dict:
 
     # Check expected output substrings
     for check in step.get("output_checks", []):
-        if check.lower() not in proc.stdout.lower():
+        if check.lower() not in stdout.lower():
             result["reason"] = f"Expected output not found: '{check}'"
             log(f"WARN  {label} — {result['reason']}", "WARN")
             # Output check failure is a warning, not a hard fail (scripts vary)
@@ -251,8 +296,9 @@ def run_step(step: dict, dry_run: bool = False) -> dict:
 
 
 # ── Phase runner ────────────────────────────────────────────────────────────────
-def run_phase(phase: str, dry_run: bool = False) -> dict:
-    """Run all steps for a given phase. Returns summary dict."""
+def run_phase(phase: str, dry_run: bool = False, isolate: bool = False,
+              max_workers: int = MAX_WORKERS) -> dict:
+    """Run a phase's steps as a dependency graph. Returns summary dict."""
     today  = datetime.now(timezone.utc).strftime("%Y-%m-%d")
     now_ts = datetime.now(timezone.utc).isoformat()
 
@@ -260,28 +306,28 @@ def run_phase(phase: str, dry_run: bool = False) -> dict:
     log(f"SureBet Orchestrator  phase={phase.upper()}  date={today}  {'(DRY-RUN) ' if dry_run else ''}", "INFO")
     log("=" * 70, "HEADER")
 
-    phase_steps   = [s for s in STEPS if s["phase"] == phase]
-    passed        = []
-    failed        = []
-    skipped       = []
-    aborted_after = None
-
-    for i, step in enumerate(phase_steps, 1):
-        log(f"[{i}/{len(phase_steps)}] {step['label']}", "INFO")
-        res = run_step(step, dry_run=dry_run)
-
-        if res["ok"]:
-            passed.append(step["label"])
-        else:
-            failed.append({"step": step["label"], "reason": res["reason"]})
-            if step["abort_on_fail"]:
-                aborted_after = step["label"]
-                remaining     = [s["label"] for s in phase_steps[i:]]
-                skipped.extend(remaining)
-                log(f"Aborting {phase} phase after: {aborted_after}", "ERROR")
-                break
-
-    status = "ok" if not failed else ("partial" if passed else "failed")
+    phase_steps = [s for s in STEPS if s["phase"] == phase]
+    # In-process steps share this process's cwd, and several of them open
+    # response_horses.json etc. by relative path — run from BASE_DIR, as the
+    # isolated steps always have (Task Scheduler may start us elsewhere)
+    os.chdir(BASE_DIR)
+    if not dry_run and not isolate:
+        pipeline_scheduler.warm(WARM_MODULES)
+
+    sink = (pipeline_scheduler.dynamodb_sink(_table, MANIFEST_KEY, phase, today)
+            if _table is not None and not dry_run else None)
+    manifest = pipeline_scheduler.run_dag(
+        phase_steps, lambda step: run_step(step, dry_run=dry_run, isolate=isolate),
+        max_workers=1 if dry_run else max_workers, sink=sink, name=phase)
+
+    labels  = {s["id"]: s["label"] for s in phase_steps}
+    records = manifest["steps"]
+    passed  = [labels[i] for i, r in records.items() if r["status"] == "ok"]
+    failed  = [{"step": labels[i], "reason": r["reason"]} for i, r in records.items() if r["status"] == "failed"]
+    skipped = [labels[i] for i, r in records.items() if r["status"] == "skipped"]
+    aborted = [labels[i] for i, r in records.items()
+               if r["status"] == "failed" and next(s for s in phase_steps if s["id"] == i)["abort_on_fail"]]
+    status  = manifest["status"] if phase_steps else "ok"
 
     summary = {
         "phase":         phase,
@@ -294,58 +340,18 @@ def run_phase(phase: str, dry_run: bool = False) -> dict:
         "passed":        passed,
         "failed":        failed,
         "skipped":       skipped,
-        "aborted_after": aborted_after,
+        "aborted_after": aborted[0] if aborted else None,
+        "wall_s":        manifest["wall_s"],
+        "serial_s":      manifest["serial_s"],
+        "critical_path": manifest["critical_path"],
     }
 
     icon = "✅" if status == "ok" else ("⚠️" if status == "partial" else "❌")
-    log(f"{icon} Phase {phase.upper()} {status.upper()} — {len(passed)}/{len(phase_steps)} steps passed", "INFO")
-
-    _write_manifest(phase, summary)
+    log(f"{icon} Phase {phase.upper()} {status.upper()} — {len(passed)}/{len(phase_steps)} steps passed "
+        f"in {manifest['wall_s']}s (serial {manifest['serial_s']}s)", "INFO")
     return summary
 
 
-# ── DynamoDB manifest ───────────────────────────────────────────────────────────
-def _dec(v):
-    """Convert numeric values to Decimal for DynamoDB."""
-    if isinstance(v, float):
-        return Decimal(str(round(v, 4)))
-    if isinstance(v, int):
-        return Decimal(v)
-    return v
-
-def _sanitize(obj):
-    """Recursively convert floats to Decimal for DynamoDB storage."""
-    if isinstance(obj, dict):
-        return {k: _sanitize(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_sanitize(i) for i in obj]
-    if isinstance(obj, float):
-        return Decimal(str(round(obj, 4)))
-    return obj
-
-def _write_manifest(phase: str, summary: dict):
-    """Persist orchestration status to DynamoDB."""
-    if _table is None:
-        return
-    try:
-        item = {
-            "bet_date":   MANIFEST_KEY,
-            "bet_id":     f"PHASE_{phase.upper()}_{summary['date']}",
-            "phase":      phase,
-            "date":       summary["date"],
-            "status":     summary["status"],
-            "timestamp":  summary["timestamp"],
-            "steps_passed":  _dec(summary["steps_passed"]),
-            "steps_failed":  _dec(summary["steps_failed"]),
-            "steps_skipped": _dec(summary["steps_skipped"]),
-            "failed_steps":  json.dumps(summary["failed"]),
-            "skipped_steps": json.dumps(summary["skipped"]),
-        }
-        _table.put_item(Item=item)
-    except Exception as exc:
-        log(f"DynamoDB manifest write failed: {exc}", "WARN")
-
-
 # ── Status query ────────────────────────────────────────────────────────────────
 def print_status():
     """Print today's orchestration state from DynamoDB."""
@@ -376,7 +382,10 @@ def print_status():
         failed    = item.get("steps_failed", 0)
         skipped   = item.get("steps_skipped", 0)
         icon      = "✅" if status == "ok" else ("⚠️" if status == "partial" else "❌")
-        log(f"  {icon} {phase:10} {status:8}  {passed}✓ {failed}✗ {skipped}⏭  @ {ts}", "INFO")
+        timing    = f"  {item['wall_s']}s (serial {item.get('serial_s')}s)" if item.get("wall_s") is not None else ""
+        log(f"  {icon} {phase:10} {status:8}  {passed}✓ {failed}✗ {skipped}⏭  @ {ts}{timing}", "INFO")
+        if item.get("critical_path"):
+            log(f"       critical path: {' → '.join(item['critical_path'])}", "INFO")
 
         fails = json.loads(item.get("failed_steps", "[]"))
         for f in fails:
@@ -390,6 +399,8 @@ def main():
                         default="all", help="Which phase to run")
     parser.add_argument("--dry-run", action="store_true", help="Print steps only, do not execute")
     parser.add_argument("--status",  action="store_true", help="Print today's pipeline state and exit")
+    parser.add_argument("--isolate", action="store_true", help="Run every step in its own subprocess")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Steps run concurrently per phase")
     args = parser.parse_args()
 
     if args.status:
@@ -402,7 +413,7 @@ def main():
 
     overall_ok = True
     for phase in phases:
-        summary = run_phase(phase, dry_run=args.dry_run)
+        summary = run_phase(phase, dry_run=args.dry_run, isolate=args.isolate, max_workers=args.workers)
         if summary["status"] == "failed":
             overall_ok = False
 
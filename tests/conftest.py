@@ -0,0 +1,6 @@
+"""The pipeline modules are flat files at the repo root — make them importable."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
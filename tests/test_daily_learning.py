@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+import daily_learning as dl
+import pick_record
+
+
+WEIGHTS = {'form': 10.0, 'going': 5.0, 'bounce_back_bonus': 4.0, 'unused': 8.0}
+
+
+def _pick(sel, bd):
+    return {'selection_id': sel, 'score_breakdown': bd}
+
+
+def test_build_matrix_activations_and_aliases():
+    by_market = {'1.1': [_pick('11', {'form': 20, 'bounce_back': 8}),
+                         _pick('12', {'going': 5})]}
+    X, race_idx, won, factors = dl.build_matrix(by_market, {'1.1': ('12', 'B')}, WEIGHTS)
+    assert factors == sorted(WEIGHTS)
+    col = {f: j for j, f in enumerate(factors)}
+    assert X.shape == (2, len(factors))
+    assert X[0, col['form']] == pytest.approx(2.0)
+    assert X[0, col['bounce_back_bonus']] == pytest.approx(2.0)     # alias → stored weight name
+    assert X[1, col['going']] == pytest.approx(1.0)
+    assert list(race_idx) == [0, 0]
+    assert list(won) == [0.0, 1.0]
+
+
+def test_build_matrix_reads_compressed_breakdowns():
+    picks = [{'selection_id': '11', 'score_breakdown_z': pick_record.pack_blob({'form': 10})},
+             _pick('12', {'going': 10})]
+    X, _, won, factors = dl.build_matrix({'1.1': picks}, {'1.1': ('11', 'A')}, WEIGHTS)
+    assert X[0, factors.index('form')] == pytest.approx(1.0)
+    assert list(won) == [1.0, 0.0]
+
+
+def test_build_matrix_skips_races_without_signal():
+    by_market = {
+        'no_winner':   [_pick('1', {'form': 5}), _pick('2', {'form': 5})],
+        'winner_away': [_pick('3', {'form': 5}), _pick('4', {'form': 5})],
+        'single':      [_pick('5', {'form': 5})],
+        'no_bd':       [_pick('6', {}), _pick('7', {})],
+        'ok':          [_pick('8', {'form': 5}), _pick('9', {'going': 5})],
+    }
+    winners = {'winner_away': ('99', 'X'), 'single': ('5', 'E'),
+               'no_bd': ('6', 'F'), 'ok': ('9', 'I')}
+    X, race_idx, won, _ = dl.build_matrix(by_market, winners, WEIGHTS)
+    assert X.shape[0] == 2 and list(race_idx) == [0, 0] and list(won) == [0.0, 1.0]
+
+
+def test_build_matrix_empty():
+    X, race_idx, won, factors = dl.build_matrix({}, {}, WEIGHTS)
+    assert X.shape == (0, len(factors)) and len(race_idx) == 0 and len(won) == 0
+
+
+def test_race_softmax_normalises_per_race():
+    z = np.array([1.0, 2.0, 3.0, 0.0, 0.0])
+    p = dl._race_softmax(z, np.array([0, 0, 0, 1, 1]))
+    assert p[:3].sum() == pytest.approx(1.0)
+    assert p[3:] == pytest.approx([0.5, 0.5])
+
+
+def _races(n, winner_factor='form', loser_factor='going'):
+    by_market, winners = {}, {}
+    for r in range(n):
+        mid = f'1.{r}'
+        by_market[mid] = [_pick('w', {winner_factor: 10}), _pick('l', {loser_factor: 10})]
+        winners[mid] = ('w', 'W')
+    return dl.build_matrix(by_market, winners, WEIGHTS)
+
+
+def test_gradient_step_moves_towards_winning_factors():
+    X, race_idx, won, factors = _races(dl.MIN_RACES + 5)
+    new, stats = dl.gradient_step(WEIGHTS, X, race_idx, won, factors)
+    assert new['form'] > WEIGHTS['form']
+    assert new['going'] < WEIGHTS['going']
+    assert new['unused'] == WEIGHTS['unused']              # never fired → untouched
+    assert new['bounce_back_bonus'] == WEIGHTS['bounce_back_bonus']
+    for f in factors:
+        assert abs(new[f] - WEIGHTS[f]) <= dl.MAX_NUDGE + 1e-9
+        assert dl.WEIGHT_MIN <= new[f] <= dl.WEIGHT_MAX
+    assert stats['races'] == dl.MIN_RACES + 5
+    assert stats['runners'] == 2 * (dl.MIN_RACES + 5)
+    assert set(stats['steps']) == {'form', 'going'}
+
+
+def test_gradient_step_needs_min_races():
+    X, race_idx, won, factors = _races(dl.MIN_RACES - 1)
+    new, stats = dl.gradient_step(WEIGHTS, X, race_idx, won, factors)
+    assert new == WEIGHTS and stats == {'races': dl.MIN_RACES - 1}
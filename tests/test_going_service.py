@@ -0,0 +1,75 @@
+import io
+import json
+import os
+
+import boto3
+import pytest
+
+import going_service as gs
+
+DATE = '2026-10-19'
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **kw):
+        self.objects[Key] = Body
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise KeyError(Key)
+        return {'Body': io.BytesIO(self.objects[Key])}
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    s3, fetched = FakeS3(), []
+
+    def fetch(courses):
+        fetched.append(list(courses))
+        return {c: {'going': 'Good', 'source': 'weather'} for c in courses}
+
+    monkeypatch.setattr(gs, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(gs, 'USE_S3', True)
+    monkeypatch.setattr(gs, '_fetch', fetch)
+    monkeypatch.setattr(boto3, 'client', lambda *a, **kw: s3)
+    monkeypatch.setattr(gs, '_mem', {})
+    monkeypatch.setattr(gs, '_seeded', set())
+    return s3, fetched
+
+
+def test_prewarm_writes_the_whole_day_once(env):
+    s3, fetched = env
+    gs.prewarm_going(['Ascot', 'Kempton', 'Nowhere Park'], DATE)
+    assert fetched == [['Ascot', 'Kempton']]
+    assert list(s3.objects) == [gs._s3_key(DATE)]
+    assert set(json.loads(s3.objects[gs._s3_key(DATE)])['tracks']) == {'Ascot', 'Kempton'}
+
+
+def test_scoring_miss_writes_only_its_course_key(env):
+    s3, fetched = env
+    gs.prewarm_going(['Ascot'], DATE)
+    day = s3.objects[gs._s3_key(DATE)]
+    assert 'Kempton' in gs.get_going_conditions('Kempton', DATE)
+    assert fetched[-1] == ['Kempton']
+    assert s3.objects[gs._s3_key(DATE)] is day                       # whole-day object untouched
+    assert json.loads(s3.objects[gs._course_key(DATE, 'Kempton')])['going']['going'] == 'Good'
+
+
+def test_scoring_miss_reuses_another_shards_course_key(env):
+    s3, fetched = env
+    s3.objects[gs._course_key(DATE, 'Kempton')] = json.dumps(
+        {'going': {'going': 'Soft', 'source': 'weather'}}).encode('utf-8')
+    assert gs.get_going_conditions('Kempton', DATE)['Kempton']['going'] == 'Soft'
+    assert fetched == []
+
+
+def test_seeded_dates_are_never_persisted(env):
+    s3, fetched = env
+    gs.seed_going({'Ascot': {'going': 'Heavy'}}, DATE)
+    assert gs.get_going_conditions('Ascot', DATE)['Ascot']['going'] == 'Heavy'
+    assert gs.get_going_conditions('Kempton', DATE)['Kempton']['going'] == 'Good'   # fetched, memory only
+    assert s3.objects == {}
+    assert not os.path.exists(gs._cache_path(DATE))
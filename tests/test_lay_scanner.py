@@ -0,0 +1,71 @@
+import lay_scanner as ls
+
+
+def _row(hhmm, course, score, outcome=None, odds=1.8):
+    return {'date': '2026-10-19', 'race_time': f'2026-10-19T{hhmm}:00Z', 'course': course,
+            'favourite': 'Alpha', 'odds': odds, 'lay_score': score, 'outcome': outcome}
+
+
+def test_merge_keeps_finished_races_and_settled_outcomes():
+    stored = [_row('13:00', 'Ascot', 5, outcome='loss'),
+              _row('14:00', 'Ascot', 9, outcome='win'),
+              _row('15:00', 'Ascot', 3)]
+    fresh = [_row('14:00', 'Ascot', 11, odds=2.1), _row('15:00', 'Ascot', 4), _row('16:00', 'Kempton', 7)]
+    merged = ls.merge_rows(stored, fresh)
+    by_time = {r['race_time'][11:16]: r for r in merged}
+    assert set(by_time) == {'13:00', '14:00', '15:00', '16:00'}
+    assert by_time['13:00']['outcome'] == 'loss'                        # no longer on the card
+    assert by_time['14:00']['odds'] == 2.1 and by_time['14:00']['outcome'] == 'win'
+    assert [r['lay_score'] for r in merged] == [11, 7, 5, 4]
+    assert fresh[0]['outcome'] is None                                   # inputs untouched
+
+
+def test_merge_into_nothing_stored():
+    assert ls.merge_rows(None, [_row('14:00', 'Ascot', 2)]) == [_row('14:00', 'Ascot', 2)]
+
+
+def test_match_winner_converts_to_uk_local_and_fuzzy_course():
+    winner_map = {('kempton', '14:35'): 'Bravo', ('ascot', '14:35'): 'Charlie'}
+    # BST in October: 13:32 UTC is a 14:32 local off, within the window of 14:35
+    assert ls.match_winner(winner_map, 'Kempton Park', '2026-10-19T13:32:00Z', '2026-10-19') == 'Bravo'
+    assert ls.match_winner(winner_map, 'Kempton', '2026-10-19T12:00:00Z', '2026-10-19') is None
+    assert ls.match_winner({}, 'Kempton', '2026-10-19T13:35:00Z', '2026-10-19') is None
+
+
+def test_apply_outcomes_from_winner_map_then_items():
+    rows = [_row('13:35', 'Ascot', 5), _row('15:00', 'Ascot', 4), _row('16:00', 'Ascot', 3, outcome='win')]
+    items = [{'race_time': '2026-10-19T15:00:00Z', 'course': 'Ascot', 'horse': 'Alpha', 'outcome': 'won'}]
+    n = ls.apply_outcomes(rows, {('ascot', '14:35'): "Alpha (IRE)"}, items)
+    assert n == 2
+    assert [r['outcome'] for r in rows] == ['win', 'win', 'win']
+
+
+def test_odds_and_names():
+    assert ls.odds_to_decimal('5/4') == 2.25
+    assert ls.odds_to_decimal('3.5') == 3.5
+    assert ls.odds_to_decimal('evs') is None and ls.odds_to_decimal(None) is None
+    assert ls.norm_name("O'Neill-Star (IRE)") == ls.norm_name('o neill star')
+
+
+def test_fetch_winner_map_goes_through_http_client(monkeypatch):
+    import json
+    import http_client
+
+    fast = [{'courseName': 'Kempton Park', 'time': '14:35',
+             'top_horses': [{'horse_name': 'Bravo (IRE)', 'position': 1},
+                            {'horse_name': 'Alpha', 'position': 2}]},
+            {'courseName': 'Ascot', 'time': '15:10', 'top_horses': []}]
+    page = ('<html><script id="__NEXT_DATA__" type="application/json">'
+            + json.dumps({'props': {'pageProps': {'fastResults': fast}}}) + '</script></html>')
+    seen = []
+
+    def get(url, **kw):
+        seen.append(url)
+        return http_client.Response(200, page.encode('utf-8'), url=url)
+
+    monkeypatch.setattr(http_client, 'get', get)
+    assert ls.fetch_winner_map() == {('kempton park', '14:35'): 'Bravo'}
+    assert seen == [ls.SL_FAST_RESULTS]
+
+    monkeypatch.setattr(http_client, 'get', lambda url, **kw: http_client.Response(503, b'', url=url))
+    assert ls.fetch_winner_map() == {}
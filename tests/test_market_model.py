@@ -0,0 +1,71 @@
+import pytest
+
+import market_model
+
+
+def test_overround_removed_probs_sum_to_one():
+    odds = [2.0, 3.5, 5.0, 9.0, 17.0]
+    probs, overround, k = market_model.implied_probabilities(odds)
+    assert overround == pytest.approx(sum(1 / o for o in odds))
+    assert overround > 1.0 and k > 1.0
+    assert sum(probs) == pytest.approx(1.0, abs=1e-9)
+
+
+def test_power_method_solves_exponent():
+    odds = [1.8, 4.0, 6.0, 11.0]
+    _, _, k = market_model.implied_probabilities(odds)
+    assert sum((1 / o) ** k for o in odds) == pytest.approx(1.0, abs=1e-6)
+
+
+def test_power_method_shades_longshots_more():
+    # Favourite-longshot bias: the longshot loses a larger share of its raw price
+    odds = [1.5, 3.5, 11.0]
+    probs, _, _ = market_model.implied_probabilities(odds)
+    ratios = [p / (1 / o) for p, o in zip(probs, odds)]
+    assert ratios[0] > ratios[1] > ratios[2]
+
+
+def test_unpriced_runners_stay_none():
+    probs, _, _ = market_model.implied_probabilities([2.5, 0, None, 3.0, 1.0])
+    assert probs[1] is None and probs[2] is None and probs[4] is None
+    assert probs[0] + probs[3] == pytest.approx(1.0)
+
+
+def test_too_few_prices():
+    assert market_model.implied_probabilities([3.0, 0]) == ([None, None], None, None)
+
+
+def test_book_under_100_percent_is_renormalised_not_powered():
+    probs, overround, k = market_model.implied_probabilities([3.0, 3.0, 4.0])
+    assert overround < 1.0 and k == 1.0
+    assert sum(probs) == pytest.approx(1.0)
+
+
+def test_annotate_race_ranks_and_fair_odds():
+    race = {'runners': [{'odds': 6.0}, {'odds': '2.2'}, {'odds': 'n/a'}, {'odds': 4.5}]}
+    market_model.annotate_race(race)
+    r = race['runners']
+    assert [x['market_rank'] for x in r] == [3, 1, None, 2]
+    assert r[2]['market_prob'] is None and r[2]['market_fair_odds'] is None
+    assert r[1]['market_fair_odds'] == pytest.approx(1 / r[1]['market_prob'], rel=1e-2)
+
+
+def test_baseline_anchored_on_a_typical_field():
+    # Equal-priced field of n runners: 1 / Σp² == n, so n == TYPICAL_FIELD_ODDS → 3.80
+    n = 6
+    race = {'runners': [{'odds': n * 1.1} for _ in range(n)]}
+    market_model.annotate_race(race)
+    expected = market_model.DEFAULT_BASELINE * n / market_model.TYPICAL_FIELD_ODDS
+    assert race['winner_odds_baseline'] == pytest.approx(expected, abs=0.01)
+
+
+def test_baseline_clipped_and_default():
+    big = {'runners': [{'odds': 30.0} for _ in range(20)]}
+    match = {'runners': [{'odds': 1.1}, {'odds': 9.0}]}
+    unpriced = {'runners': [{'odds': 0}]}
+    for race in (big, match, unpriced):
+        market_model.annotate_race(race)
+    assert big['winner_odds_baseline'] == market_model.BASELINE_MAX
+    assert match['winner_odds_baseline'] == market_model.BASELINE_MIN
+    assert unpriced['winner_odds_baseline'] == market_model.DEFAULT_BASELINE
+    assert unpriced['overround'] is None
@@ -0,0 +1,99 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+import pick_record
+
+
+class Binary:
+    """Stand-in for boto3's Binary wrapper (bytes under .value)."""
+
+    def __init__(self, value):
+        self.value = value
+
+
+ALL_HORSES = [{'horse': 'Alpha', 'score': Decimal('91'), 'odds': Decimal('3.5')},
+              {'horse': 'Bravo', 'score': Decimal('74'), 'odds': Decimal('6.25')}]
+
+
+def test_pack_unpack_round_trip():
+    blob = pick_record.pack_blob(ALL_HORSES)
+    assert isinstance(blob, bytes)
+    back = pick_record.unpack_blob(blob)
+    assert back == [{'horse': 'Alpha', 'score': 91, 'odds': 3.5},
+                    {'horse': 'Bravo', 'score': 74, 'odds': 6.25}]
+    assert type(back[0]['score']) is int            # integral Decimals stay integers
+
+
+def test_unpack_decimals_ready_for_dynamodb():
+    back = pick_record.unpack_blob(Binary(pick_record.pack_blob(ALL_HORSES)), decimals=True)
+    assert back[1]['odds'] == Decimal('6.25') and type(back[1]['odds']) is Decimal
+    assert back[0]['score'] == 91
+    assert pick_record.unpack_blob(None) is None
+
+
+def test_pack_rejects_unserialisable():
+    with pytest.raises(TypeError):
+        pick_record.pack_blob({'when': object()})
+
+
+def test_expand_heavy_restores_and_prefers_plain():
+    item = {'bet_id': 'x',
+            'all_horses_z': Binary(pick_record.pack_blob(ALL_HORSES)),
+            'score_breakdown': {'form': 10},
+            'score_breakdown_z': pick_record.pack_blob({'form': 99})}
+    out = pick_record.expand_heavy(item)
+    assert out is item
+    assert [h['horse'] for h in item['all_horses']] == ['Alpha', 'Bravo']
+    assert item['score_breakdown'] == {'form': 10}
+    assert not any(k.endswith(pick_record.BLOB_SUFFIX) for k in item)
+
+
+def test_expand_heavy_survives_a_corrupt_blob():
+    item = pick_record.expand_heavy({'bet_id': 'x', 'all_horses_z': b'not zlib'})
+    assert item == {'bet_id': 'x'}
+
+
+def test_plain_item_and_projection():
+    low = {'odds': {'N': '3.5'}, 'horse': {'S': 'Alpha'}, 'show_in_ui': {'BOOL': True},
+           'tags': {'L': [{'S': 'a'}, {'NULL': True}]}, 'all_horses_z': {'B': b'\x00'}}
+    assert pick_record.plain_item(low) == {'odds': 3.5, 'horse': 'Alpha', 'show_in_ui': True,
+                                           'tags': ['a', None], 'all_horses_z': b'\x00'}
+    expr, names = pick_record.projection(('name', 'odds'))
+    assert expr == '#p0, #p1' and names == {'#p0': 'name', '#p1': 'odds'}
+
+
+def test_pick_record_from_item():
+    rec = pick_record.PickRecord.from_item({'bet_id': 'b1', 'bet_date': '2026-10-19',
+                                            'odds': Decimal('4.5'), 'horse': 'Alpha', 'extra': 1})
+    assert rec.odds == 4.5 and rec.get('stake', 0) == 0
+    assert rec.key == {'bet_id': 'b1', 'bet_date': '2026-10-19'}
+    assert rec.to_dict() == {'bet_id': 'b1', 'bet_date': '2026-10-19', 'odds': 4.5, 'horse': 'Alpha'}
+
+
+def test_to_plain_expands_binary_blobs_so_items_serialise():
+    from boto3.dynamodb.types import Binary as BotoBinary
+
+    items = [{'bet_id': 'learn', 'odds': Decimal('4.5'),
+              'all_horses_z': BotoBinary(pick_record.pack_blob(ALL_HORSES))},
+             {'bet_id': 'ui', 'all_horses': [{'horse': 'Alpha', 'score': Decimal('91')}]}]
+    out = pick_record.to_plain(items)
+    assert json.loads(json.dumps(out))[0]['all_horses'][1] == {'horse': 'Bravo', 'score': 74, 'odds': 6.25}
+    assert out[0]['odds'] == 4.5 and 'all_horses_z' not in out[0]
+    assert out[1]['all_horses'] == [{'horse': 'Alpha', 'score': 91.0}]
+
+
+def test_get_all_picks_with_a_learning_row(monkeypatch):
+    from boto3.dynamodb.types import Binary as BotoBinary
+    import api_picks
+
+    class Table:
+        def scan(self):
+            return {'Items': [{'bet_id': 'learn', 'timestamp': '1',
+                               'all_horses_z': BotoBinary(pick_record.pack_blob(ALL_HORSES))}]}
+
+    monkeypatch.setattr(api_picks, 'table', Table())
+    resp = api_picks.get_all_picks({})
+    assert resp['statusCode'] == 200
+    assert json.loads(resp['body'])['picks'][0]['all_horses'][0]['horse'] == 'Alpha'
@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+
+import pytest
+
+import pipeline_scheduler as ps
+
+
+def _steps():
+    #   a ──▶ b ──▶ d
+    #   └───▶ c ──┘
+    return [
+        {'id': 'a', 'est_s': 1},
+        {'id': 'b', 'after': ['a'], 'est_s': 5},
+        {'id': 'c', 'after': ['a'], 'est_s': 1},
+        {'id': 'd', 'after': ['b', 'c'], 'est_s': 1},
+    ]
+
+
+def test_validate_rejects_bad_graphs():
+    with pytest.raises(ValueError, match='duplicate'):
+        ps._validate([{'id': 'a'}, {'id': 'a'}])
+    with pytest.raises(ValueError, match='unknown'):
+        ps._validate([{'id': 'a', 'after': ['x']}])
+    with pytest.raises(ValueError, match='cycle'):
+        ps._validate([{'id': 'a', 'after': ['b']}, {'id': 'b', 'after': ['a']}])
+
+
+def test_rank_is_longest_path_to_the_end():
+    steps = _steps()
+    rank = ps._rank(steps, ps._validate(steps))
+    assert rank == {'a': 7.0, 'b': 6.0, 'c': 2.0, 'd': 1.0}
+
+
+def test_run_dag_respects_dependencies_and_critical_path_first():
+    order, lock = [], threading.Lock()
+
+    def runner(step):
+        with lock:
+            order.append(step['id'])
+        time.sleep(0.01)
+        return {'ok': True}
+
+    manifest = ps.run_dag(_steps(), runner, max_workers=1)
+    assert order == ['a', 'b', 'c', 'd']        # b (longer tail) before c
+    assert manifest['status'] == 'ok'
+    assert manifest['counts'] == {'ok': 4, 'failed': 0, 'skipped': 0}
+    assert manifest['critical_path'][0] == 'a' and manifest['critical_path'][-1] == 'd'
+
+
+def test_explicit_priority_wins_over_rank():
+    steps = _steps()
+    steps[2]['priority'] = 1
+    order = []
+    ps.run_dag(steps, lambda s: order.append(s['id']) or {'ok': True}, max_workers=1)
+    assert order == ['a', 'c', 'b', 'd']
+
+
+def test_abort_on_fail_skips_descendants_only():
+    steps = _steps() + [{'id': 'e'}]
+    steps[1]['abort_on_fail'] = True
+    ran = []
+
+    def runner(step):
+        ran.append(step['id'])
+        return {'ok': step['id'] != 'b', 'reason': 'boom' if step['id'] == 'b' else ''}
+
+    manifest = ps.run_dag(steps, runner)
+    recs = manifest['steps']
+    assert recs['b']['status'] == 'failed' and recs['b']['reason'] == 'boom'
+    assert recs['d']['status'] == 'skipped' and 'upstream b' in recs['d']['reason']
+    assert recs['c']['status'] == 'ok' and recs['e']['status'] == 'ok'
+    assert 'd' not in ran
+    assert manifest['status'] == 'partial'
+
+
+def test_soft_failure_lets_dependents_run():
+    manifest = ps.run_dag(_steps(), lambda s: {'ok': s['id'] != 'b'})
+    assert manifest['steps']['d']['status'] == 'ok'
+
+
+def test_retries_and_non_retryable_results():
+    calls = {'flaky': 0, 'stuck': 0, 'boom': 0}
+
+    def runner(step):
+        calls[step['id']] += 1
+        if step['id'] == 'flaky':
+            return {'ok': calls['flaky'] == 3}
+        if step['id'] == 'stuck':
+            return {'ok': False, 'reason': 'timeout', 'retryable': False}
+        raise RuntimeError('nope')
+
+    steps = [{'id': i, 'retries': 3, 'retry_delay_s': 0} for i in calls]
+    manifest = ps.run_dag(steps, runner)
+    assert calls == {'flaky': 3, 'stuck': 1, 'boom': 4}
+    assert manifest['steps']['flaky']['status'] == 'ok'
+    assert manifest['steps']['stuck']['attempts'] == 1
+    assert manifest['steps']['boom']['reason'] == 'RuntimeError: nope'
+
+
+def test_critical_path_follows_latest_finishing_dependency():
+    records = {'a': {'end_s': 1.0}, 'b': {'end_s': 6.0}, 'c': {'end_s': 2.0}, 'd': {'end_s': 7.0}}
+    assert ps.critical_path(_steps(), records) == ['a', 'b', 'd']
+    records['c']['end_s'] = 6.5
+    assert ps.critical_path(_steps(), records) == ['a', 'c', 'd']
+    assert ps.critical_path(_steps(), {'a': {'end_s': None}}) == []
+
+
+def test_sink_failure_is_not_fatal():
+    def sink(manifest):
+        raise IOError('down')
+    assert ps.run_dag([{'id': 'a'}], lambda s: {'ok': True}, sink=sink)['status'] == 'ok'
+
+
+def test_execute_script_runs_in_process_cwd(tmp_path, monkeypatch):
+    script = tmp_path / 'step.py'
+    script.write_text("import os, sys\nprint(os.getcwd())\nprint(sys.argv)\n", encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+    res = ps.execute_script(script, cwd=str(tmp_path))
+    assert res['exit_code'] == 0 and not res['timed_out']
+    assert res['stdout'].splitlines()[0] == os.getcwd()
+    assert res['stdout'].splitlines()[1] == repr([str(script)])
+    with pytest.raises(ValueError, match='cannot run in'):
+        ps.execute_script(script, cwd=os.path.dirname(str(tmp_path)))
@@ -0,0 +1,101 @@
+import io
+from datetime import datetime
+
+import pytest
+
+import race_card
+
+
+class FakeS3:
+    """put_object / get_object (with Range) over a dict."""
+
+    def __init__(self):
+        self.objects, self.gets = {}, []
+
+    def put_object(self, Bucket, Key, Body, **kw):
+        self.objects[Key] = bytes(Body)
+
+    def get_object(self, Bucket, Key, Range=None):
+        self.gets.append((Key, Range))
+        body = self.objects[Key]
+        if Range:
+            start, end = map(int, Range.split('=')[1].split('-'))
+            body = body[start:end + 1]
+        return {'Body': io.BytesIO(body)}
+
+
+def _card():
+    races = []
+    for n, course in enumerate(['Ascot', 'Kempton', 'Ascot', 'Newbury', 'Kempton']):
+        races.append({'course': course, 'race_time': f'2026-10-19T1{n}:00:00Z', 'market_id': f'1.{n}',
+                      'runners': [{'name': f'H{n}{i}', 'odds': 2.0 + i} for i in range(3 + n)]})
+    return races
+
+
+@pytest.fixture(autouse=True)
+def _clear_blob_cache():
+    race_card._blobs.clear()
+    yield
+    race_card._blobs.clear()
+
+
+def test_encode_decode_round_trip():
+    races = [{'course': 'Ascot', 'off': datetime(2026, 10, 19, 14, 30)}]
+    pos, back = race_card.decode(race_card.encode(races, [4]))
+    assert pos == [4] and back == [{'course': 'Ascot', 'off': '2026-10-19T14:30:00'}]
+
+
+def test_decode_rejects_foreign_and_newer_payloads():
+    with pytest.raises(ValueError):
+        race_card.decode(b'nope')
+    blob = bytearray(race_card.encode([]))
+    blob[len(race_card.MAGIC)] = race_card.SCHEMA_VERSION + 1
+    with pytest.raises(ValueError, match='schema'):
+        race_card.decode(bytes(blob))
+
+
+def test_pack_inline_and_load_in_card_order():
+    races = _card()
+    ref = race_card.pack(races, '2026-10-19')
+    assert ref['s3_key'] is None
+    assert [s['course'] for s in ref['shards']] == ['Ascot', 'Kempton', 'Newbury']
+    assert ref['races'] == 5 and ref['runners'] == sum(len(r['runners']) for r in races)
+    assert race_card.load(ref) == races
+    assert race_card.load(ref, courses=['kempton']) == [races[1], races[4]]
+
+
+def test_split_one_ref_per_course():
+    races = _card()
+    refs = race_card.split(race_card.pack(races, '2026-10-19'))
+    assert [r['races'] for r in refs] == [2, 2, 1]
+    assert [race for ref in refs for race in race_card.load(ref)] == [
+        races[0], races[2], races[1], races[4], races[3]]
+
+
+def test_pack_single_shard():
+    ref = race_card.pack(_card(), '2026-10-19', by_course=False)
+    assert [s['course'] for s in ref['shards']] == [race_card.ALL_COURSES]
+
+
+def test_pack_to_s3_and_ranged_shard_reads():
+    races, s3 = _card(), FakeS3()
+    ref = race_card.pack(races, '2026-10-19', inline_limit=0, s3=s3)
+    assert ref['s3_key'] in s3.objects
+    assert all('data' not in s for s in ref['shards'])
+
+    race_card._blobs.clear()                      # a different Lambda: nothing cached
+    shard = race_card.split(ref)[1]
+    assert race_card.load(shard, s3=s3) == [races[1], races[4]]
+    assert s3.gets[-1][1] is not None             # one byte range, not the whole object
+
+    race_card._blobs.clear()
+    assert race_card.load(ref, s3=s3) == races
+    assert s3.gets[-1] == (ref['s3_key'], None)   # several shards → one full GET
+    n = len(s3.gets)
+    assert race_card.load(ref, s3=s3) == races
+    assert len(s3.gets) == n                      # served from the per-run cache
+
+
+def test_load_rejects_other_schema():
+    with pytest.raises(ValueError):
+        race_card.load({'schema': 99, 'shards': []})
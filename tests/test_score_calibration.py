@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+import score_calibration as sc
+
+
+def _non_decreasing(xs):
+    return all(a <= b + 1e-12 for a, b in zip(xs, xs[1:]))
+
+
+def test_pav_leaves_sorted_input_alone():
+    assert sc._pav([0.1, 0.2, 0.3], [1, 1, 1]) == [0.1, 0.2, 0.3]
+
+
+def test_pav_pools_a_violation_by_weight():
+    out = sc._pav([0.1, 0.5, 0.2, 0.6], [1, 1, 3, 1])
+    pooled = (0.5 * 1 + 0.2 * 3) / 4
+    assert out == pytest.approx([0.1, pooled, pooled, 0.6])
+
+
+def test_pav_pools_back_through_earlier_blocks():
+    out = sc._pav([0.4, 0.3, 0.2, 0.1], [1, 1, 1, 1])
+    assert out == pytest.approx([0.25] * 4)
+
+
+def test_pav_is_monotone_and_preserves_weighted_mean():
+    rng = random.Random(7)
+    values = [rng.random() for _ in range(50)]
+    weights = [rng.randint(1, 9) for _ in range(50)]
+    out = sc._pav(values, weights)
+    assert len(out) == len(values)
+    assert _non_decreasing(out)
+    assert sum(o * w for o, w in zip(out, weights)) == pytest.approx(
+        sum(v * w for v, w in zip(values, weights)))
+
+
+def test_fit_table_without_data_follows_the_static_prior():
+    table = sc._fit_table([], [])
+    assert len(table) == sc.SCORE_MAX + 1
+    assert _non_decreasing(table)
+    assert table[0] == pytest.approx(sc.static_pct(0), abs=0.1)
+    assert table[sc.SCORE_MAX] == pytest.approx(sc.static_pct(sc.SCORE_MAX), abs=0.1)
+
+
+def test_fit_table_is_monotone_on_noisy_data():
+    rng = random.Random(11)
+    scores = [rng.uniform(40, 140) for _ in range(3000)]
+    wins = [rng.random() < 0.05 + s / 400 for s in scores]
+    # A low-score bin that wins far too often must not break monotonicity
+    scores += [50.0] * 30
+    wins += [True] * 30
+    table = sc._fit_table(scores, wins)
+    assert _non_decreasing(table)
+    assert max(table) <= sc.MAX_PCT
+    assert table[130] > table[60]
+
+
+def test_win_prob_picks_race_type_table_and_clamps():
+    table = {'tables': {'all': [10.0] * (sc.SCORE_MAX + 1), 'chase': [20.0] * (sc.SCORE_MAX + 1)}}
+    assert sc.win_prob(90, '3m Hcap Chs', table=table) == 20.0
+    assert sc.win_prob(90, '7f Hcap', table=table) == 10.0
+    assert sc.win_prob(999, table=table) == 10.0
+    assert sc.win_prob(-5, table=table) == 10.0
@@ -0,0 +1,43 @@
+import boto3
+
+import intraday_learning_system as ils
+import settled_picks
+
+
+class FakeDynamo:
+    """Just enough of a low-level client for _query_settled_day's paginator."""
+
+    def __init__(self, items):
+        self.items, self.queries = items, []
+
+    def get_paginator(self, name):
+        return self
+
+    def paginate(self, **kw):
+        self.queries.append(kw['ExpressionAttributeValues'][':d']['S'])
+        return [{'Items': self.items}]
+
+
+def test_day_rows_queries_one_day_and_persists_nothing(monkeypatch):
+    client = FakeDynamo([
+        {'bet_id': {'S': 'b'}, 'race_time': {'S': '2026-10-19T15:00'}, 'horse': {'S': 'Bravo'},
+         'result_emoji': {'S': 'WIN'}},
+        {'bet_id': {'S': 'a'}, 'race_time': {'S': '2026-10-19T13:00'}, 'horse': {'S': 'Alpha'},
+         'outcome': {'S': 'lost'}, 'odds': {'N': '4.5'}},
+        {'bet_id': {'S': 'c'}, 'race_time': {'S': '2026-10-19T16:00'}, 'outcome': {'S': 'pending'}},
+    ])
+    monkeypatch.setattr(boto3, 'client', lambda *a, **kw: client)
+    monkeypatch.setattr(settled_picks, 'save', lambda *a, **kw: (_ for _ in ()).throw(AssertionError('saved')))
+
+    out = settled_picks.day_rows('2026-10-19')
+    assert client.queries == ['2026-10-19']
+    assert [(r['bet_id'], r['outcome'], r['odds']) for r in out] == [('a', 'loss', 4.5), ('b', 'win', None)]
+    assert set(out[0]) == set(settled_picks.COLUMNS)
+
+
+def test_track_patterns_tolerate_missing_odds_and_score():
+    results = [{'outcome': 'WON', 'course': 'Ascot', 'horse': 'Alpha', 'trainer': 'T',
+                'odds': None, 'comprehensive_score': None},
+               {'outcome': 'LOST', 'course': 'Ascot', 'horse': 'Bravo'}]
+    patterns = ils.get_track_patterns_today(results)
+    assert patterns['Ascot'] == [{'horse': 'Alpha', 'odds': 0.0, 'trainer': 'T', 'score': 0.0}]
@@ -0,0 +1,48 @@
+import os
+import sys
+import types
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'step_functions', 'lambdas'))
+
+import push_events  # noqa: E402
+import sf_sl_results  # noqa: E402
+
+
+class FakeTable:
+    def __init__(self, items):
+        self.items = items
+
+    def query(self, **kw):
+        return {'Items': self.items}
+
+
+class FakeResource:
+    def __init__(self, items):
+        self.table = FakeTable(items)
+
+    def Table(self, name):
+        return self.table
+
+
+def test_publishes_only_picks_settled_by_this_run(monkeypatch):
+    items = [{'bet_id': 'old', 'outcome': 'win', 'show_in_ui': True},
+             {'bet_id': 'new', 'outcome': 'loss', 'show_in_ui': True},
+             {'bet_id': 'open', 'outcome': 'pending', 'show_in_ui': True}]
+    fetcher = types.SimpleNamespace(update_results=lambda date_str: ['new'])
+    published = []
+    monkeypatch.setitem(sys.modules, 'sl_results_fetcher', fetcher)
+    monkeypatch.setattr(boto3, 'resource', lambda *a, **kw: FakeResource(items))
+    monkeypatch.setattr(push_events, 'publish_event',
+                        lambda kind, data, date_str=None: published.append((kind, data)))
+
+    out = sf_sl_results.lambda_handler({'date': '2026-10-19'}, None)
+    assert out['success'] and out['results_recorded'] == 2 and out['newly_settled'] == 1
+    assert [[r['bet_id'] for r in d['results']] for _, d in published] == [['new']]
+
+    fetcher.update_results = lambda date_str: []
+    published.clear()
+    assert sf_sl_results.lambda_handler({'date': '2026-10-19'}, None)['newly_settled'] == 0
+    assert published == []
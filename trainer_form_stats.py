@@ -19,13 +19,18 @@ Cache: in-memory dict (_stats_cache) populated once per process.
        Only refreshed if record count changes by >10% (rare intraday).
 """
 
-import boto3
-from boto3.dynamodb.conditions import Attr
 from datetime import datetime, timedelta
 from collections import defaultdict
 
-_db    = boto3.resource('dynamodb', region_name='eu-west-1')
-_table = _db.Table('SureBetBets')
+_table = None   # created on first _build_stats() — keeps import free of boto3
+
+
+def _get_table():
+    global _table
+    if _table is None:
+        import boto3
+        _table = boto3.resource('dynamodb', region_name='eu-west-1').Table('SureBetBets')
+    return _table
 
 _stats_cache: dict = {}   # 'trainer:Name' or 'jockey:Name' → {wins, runs, win_rate, hot}
 _cache_built: bool = False
@@ -43,9 +48,11 @@ def _build_stats(days: int = 30) -> dict:
     trainer_stats: dict = defaultdict(lambda: {'wins': 0, 'runs': 0})
     jockey_stats:  dict = defaultdict(lambda: {'wins': 0, 'runs': 0})
 
+    from boto3.dynamodb.conditions import Attr
+    table = _get_table()
     kwargs = {'FilterExpression': Attr('bet_date').gte(cutoff)}
     while True:
-        resp = _table.scan(**kwargs)
+        resp = table.scan(**kwargs)
         for item in resp.get('Items', []):
             if item.get('bet_id') == 'SYSTEM_ANALYSIS_MANIFEST':
                 continue
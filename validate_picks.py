@@ -19,6 +19,8 @@ from decimal import Decimal
 
 import boto3
 
+import pick_record
+
 TABLE_NAME = "SureBetBets"
 REGION     = "eu-west-1"
 MIN_RUNNERS = 2  # minimum all_horses entries before we flag a problem
@@ -49,7 +51,7 @@ def main():
         )
         items.extend(resp.get("Items", []))
 
-    ui_picks = [i for i in items if i.get("show_in_ui") is True]
+    ui_picks = [pick_record.expand_heavy(i) for i in items if i.get("show_in_ui") is True]
 
     if not ui_picks:
         print("[VALIDATE] ⚠  No UI picks found for today — analysis may not have run yet")
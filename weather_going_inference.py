@@ -135,6 +135,50 @@ def get_recent_rainfall(lat, lon, days=3):
     
     return None
 
+def get_recent_rainfall_batch(locations, days=3):
+    """
+    Get rainfall for many tracks in ONE Open-Meteo request.
+    Open-Meteo accepts comma-separated latitude/longitude lists and returns
+    one result object per location, in the order requested.
+
+    Args:
+        locations: dict track -> {'lat': .., 'lon': ..}
+    Returns dict track -> total rainfall mm (None where unavailable)
+    """
+    tracks = list(locations.keys())
+    if not tracks:
+        return {}
+
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+
+    url = "https://archive-api.open-meteo.com/v1/archive"
+    params = {
+        'latitude': ','.join(str(locations[t]['lat']) for t in tracks),
+        'longitude': ','.join(str(locations[t]['lon']) for t in tracks),
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'end_date': end_date.strftime('%Y-%m-%d'),
+        'daily': 'precipitation_sum',
+        'timezone': 'Europe/London'
+    }
+
+    results = {t: None for t in tracks}
+    try:
+        response = requests.get(url, params=params, timeout=15)
+        response.raise_for_status()
+        data = response.json()
+        # Single location → dict, multiple → list of dicts
+        if isinstance(data, dict):
+            data = [data]
+        for track, loc_data in zip(tracks, data):
+            rainfall = (loc_data.get('daily') or {}).get('precipitation_sum')
+            if rainfall is not None:
+                results[track] = sum([r for r in rainfall if r is not None])
+    except Exception as e:
+        print(f"  ⚠️ Weather API batch error ({len(tracks)} tracks): {e}")
+
+    return results
+
 def infer_going(rainfall_mm, surface_type='turf', month=None, force_heavy=True):
     """
     Infer going conditions from rainfall + seasonal factors
@@ -216,6 +260,10 @@ def infer_going(rainfall_mm, surface_type='turf', month=None, force_heavy=True):
     
     return final_going, final_adjustment, explanation
 
+def track_has_official(track, date_str):
+    """True if OFFICIAL_GOING has a declaration for this track on date_str"""
+    return track in OFFICIAL_GOING.get(date_str, {})
+
 def check_all_tracks_going(tracks=None, use_official=True):
     """
     Check going for all tracks or specified list with seasonal adjustments
@@ -245,6 +293,15 @@ def check_all_tracks_going(tracks=None, use_official=True):
     
     print(f"{'='*80}\n")
     
+    # Fetch rainfall for every track that needs the weather API in one request
+    # (previously one 10s-timeout request per track, serially)
+    weather_tracks = {
+        t: TRACK_LOCATIONS[t] for t in tracks
+        if t in TRACK_LOCATIONS
+        and not (use_official and track_has_official(t, current_date))
+    }
+    rainfall_by_track = get_recent_rainfall_batch(weather_tracks)
+    
     for track in tracks:
         if track not in TRACK_LOCATIONS:
             print(f"  [!] {track} - Location unknown, skipping")
@@ -276,7 +333,7 @@ def check_all_tracks_going(tracks=None, use_official=True):
         # Fall back to weather API inference
         print(f"Checking {track} ({surface}) - Weather API...")
         
-        rainfall = get_recent_rainfall(location['lat'], location['lon'])
+        rainfall = rainfall_by_track.get(track)
         
         if rainfall is not None:
             going, adjustment, explanation = infer_going(rainfall, surface, current_month, force_heavy=True)